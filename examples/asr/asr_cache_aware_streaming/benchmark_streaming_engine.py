@@ -0,0 +1,142 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Local load generator for the continuous batching streaming engine
+(nemo.collections.asr.parts.utils.streaming_session_utils).
+
+Sessions arrive as a Poisson process and push their audio in real time, in pieces of `--push_ms` milliseconds.
+Sessions that arrive when all slots are in use wait for a free slot. The script reports percentiles of
+the chunk latency (from pushing audio to the end of the step which processed it), of the finalization latency
+(from the end of the input to the final transcription) and of the admission wait, together with the mean batch
+occupancy of the engine.
+
+# Stream the audio files of a manifest (or synthetic audio when no manifest is given)
+python benchmark_streaming_engine.py \
+    --asr_model=asr_model.nemo \
+    --manifest_file=manifest_file.json \
+    --num_sessions=200 \
+    --arrival_rate=10 \
+    --max_sessions=64 \
+    --output_file=results.json
+"""
+
+import asyncio
+import json
+import time
+from argparse import ArgumentParser
+
+import numpy as np
+import torch
+
+import nemo.collections.asr as nemo_asr
+from nemo.collections.asr.parts.preprocessing.segment import get_samples
+from nemo.collections.asr.parts.utils.streaming_session_utils import AsyncStreamingEngine, CacheAwareStreamingEngine
+from nemo.utils import logging
+
+
+def percentiles(values, q=(50, 90, 99)):
+    if len(values) == 0:
+        return {}
+    return {f"p{p}": float(np.percentile(values, p)) for p in q}
+
+
+async def run_session(engine, audio, push_samples, push_interval, stats):
+    arrival = time.perf_counter()
+    session_id = await engine.open_session()
+    stats["admission_wait"].append(time.perf_counter() - arrival)
+    for start in range(0, len(audio), push_samples):
+        engine.push_audio(session_id, audio[start : start + push_samples])
+        await asyncio.sleep(push_interval)
+    input_end = time.perf_counter()
+    session = await engine.finish_session(session_id)
+    stats["finalization_latency"].append(time.perf_counter() - input_end)
+    stats["chunk_latency"].extend(session.latencies)
+
+
+async def run_load(engine, audios, arrival_rate, push_samples, push_interval, seed):
+    rng = np.random.default_rng(seed)
+    stats = {"admission_wait": [], "finalization_latency": [], "chunk_latency": []}
+    tasks = []
+    async with engine:
+        for audio in audios:
+            tasks.append(asyncio.create_task(run_session(engine, audio, push_samples, push_interval, stats)))
+            await asyncio.sleep(rng.exponential(1.0 / arrival_rate))
+        await asyncio.gather(*tasks)
+    return stats
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--asr_model", type=str, required=True, help="Path to a .nemo file or a pretrained model")
+    parser.add_argument("--manifest_file", type=str, default=None, help="Manifest of audio files to stream")
+    parser.add_argument("--num_sessions", type=int, default=100, help="Number of sessions to simulate")
+    parser.add_argument("--session_duration", type=float, default=10.0, help="Duration of synthetic sessions (s)")
+    parser.add_argument("--arrival_rate", type=float, default=5.0, help="Mean number of new sessions per second")
+    parser.add_argument("--push_ms", type=float, default=80.0, help="Duration of audio pushed at once (ms)")
+    parser.add_argument("--max_sessions", type=int, default=32, help="Number of slots of the engine")
+    parser.add_argument("--device", type=str, default="cuda" if torch.cuda.is_available() else "cpu")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output_file", type=str, default=None, help="Optional path of the JSON results")
+    args = parser.parse_args()
+
+    if args.asr_model.endswith('.nemo'):
+        asr_model = nemo_asr.models.ASRModel.restore_from(restore_path=args.asr_model, map_location=args.device)
+    else:
+        asr_model = nemo_asr.models.ASRModel.from_pretrained(model_name=args.asr_model, map_location=args.device)
+    asr_model.eval()
+    if hasattr(asr_model, "decoding") and hasattr(asr_model.cfg, "decoding"):
+        # streaming transducers need a decoding strategy with partial hypotheses
+        decoding_cfg = asr_model.cfg.decoding
+        if decoding_cfg.get("strategy") == "greedy_batch":
+            decoding_cfg.strategy = "greedy"
+            asr_model.change_decoding_strategy(decoding_cfg)
+    sample_rate = asr_model.cfg.preprocessor.get("sample_rate", 16000)
+
+    rng = np.random.default_rng(args.seed)
+    if args.manifest_file:
+        with open(args.manifest_file) as f:
+            audio_files = [json.loads(line)["audio_filepath"] for line in f if line.strip()]
+        audios = [get_samples(audio_files[idx % len(audio_files)], sample_rate) for idx in range(args.num_sessions)]
+    else:
+        num_samples = int(args.session_duration * sample_rate)
+        audios = [0.1 * rng.standard_normal(num_samples).astype(np.float32) for _ in range(args.num_sessions)]
+
+    engine = CacheAwareStreamingEngine(asr_model, max_sessions=args.max_sessions)
+    push_samples = int(args.push_ms * sample_rate / 1000)
+    start = time.perf_counter()
+    stats = asyncio.run(
+        run_load(AsyncStreamingEngine(engine), audios, args.arrival_rate, push_samples, args.push_ms / 1000, args.seed)
+    )
+    wall_time = time.perf_counter() - start
+
+    results = {
+        "num_sessions": args.num_sessions,
+        "max_sessions": args.max_sessions,
+        "arrival_rate": args.arrival_rate,
+        "audio_duration": sum(len(audio) for audio in audios) / sample_rate,
+        "wall_time": wall_time,
+        "mean_batch_size": engine.num_chunks / max(engine.num_batches, 1),
+        "batches_per_step": engine.num_batches / max(engine.num_steps, 1),
+    }
+    for name, values in stats.items():
+        results[name] = percentiles(values)
+    logging.info(json.dumps(results, indent=2))
+    if args.output_file:
+        with open(args.output_file, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -35,6 +35,7 @@ from nemo.collections.asr.parts.utils.transcribe_utils import (
     prepare_audio_data,
     restore_transcription_order,
     setup_model,
+    transcribe_manifest_resumable,
     write_transcription,
 )
 from nemo.core.config import hydra_runner
@@ -58,6 +59,9 @@ Transcribe audio file on a single CPU/GPU. Useful for transcription of moderate
   output_filename: Output filename where the transcriptions will be written
   batch_size: batch size during inference
   presort_manifest: sorts the provided manifest by audio length for faster inference (default: True)
+  resumable: Bool to stream dataset_manifest in windows of sort_window_size entries, which are sorted by audio length
+    if presort_manifest is set. Transcriptions are stored as each window completes, and a restarted run skips the
+    transcribed entries. Recommended for very large manifests.
 
   cuda: Optional int to enable or disable execution of model on certain CUDA device.
   allow_mps: Bool to allow using MPS (Apple Silicon M-series GPU) device if available
@@ -127,6 +131,9 @@ class TranscriptionConfig:
     audio_key: str = 'audio_filepath'  # Used to override the default audio key in dataset_manifest
     eval_config_yaml: Optional[str] = None  # Path to a yaml file of config of evaluation
     presort_manifest: bool = True  # Significant inference speedup on short-form data due to padding reduction
+    # Stream dataset_manifest in windows and keep transcribed windows if the run is interrupted
+    resumable: bool = False
+    sort_window_size: int = 10000  # number of manifest entries sorted and transcribed together if resumable
 
     # General configs
     output_filename: Optional[str] = None
@@ -225,6 +232,8 @@ def main(cfg: TranscriptionConfig) -> Union[TranscriptionConfig, List[Hypothesis
         raise ValueError("Both cfg.model_path and cfg.pretrained_name cannot be None!")
     if cfg.audio_dir is None and cfg.dataset_manifest is None:
         raise ValueError("Both cfg.audio_dir and cfg.dataset_manifest cannot be None!")
+    if cfg.resumable and (cfg.dataset_manifest is None or cfg.return_transcriptions):
+        raise ValueError("cfg.resumable requires cfg.dataset_manifest and cfg.return_transcriptions=False!")
 
     # Load augmentor from exteranl yaml file which contains eval info, could be extend to other feature such VAD, P&C
     augmentor = None
@@ -346,7 +355,11 @@ def main(cfg: TranscriptionConfig) -> Union[TranscriptionConfig, List[Hypothesis
         else:
             cfg.decoding = cfg.rnnt_decoding
 
-    filepaths, sorted_manifest_path = prepare_audio_data(cfg)
+    if cfg.resumable:
+        # the manifest is streamed by transcribe_manifest_resumable
+        filepaths, sorted_manifest_path = None, None
+    else:
+        filepaths, sorted_manifest_path = prepare_audio_data(cfg)
 
     remove_path_after_done = sorted_manifest_path if sorted_manifest_path is not None else None
 
@@ -395,42 +408,56 @@ def main(cfg: TranscriptionConfig) -> Union[TranscriptionConfig, List[Hypothesis
             if hasattr(override_cfg, "prompt"):
                 override_cfg.prompt = parse_multitask_prompt(OmegaConf.to_container(cfg.prompt))
 
-            transcriptions = asr_model.transcribe(
-                audio=filepaths,
-                override_config=override_cfg,
-            )
+            if cfg.resumable:
+                output_filename, pred_text_attr_name = transcribe_manifest_resumable(
+                    asr_model,
+                    cfg,
+                    model_name,
+                    override_cfg=override_cfg,
+                    window_size=cfg.sort_window_size,
+                    compute_langs=compute_langs,
+                    timestamps=cfg.timestamps,
+                )
+            else:
+                transcriptions = asr_model.transcribe(
+                    audio=filepaths,
+                    override_config=override_cfg,
+                )
             if cfg.calculate_rtfx:
                 transcribe_time = time.time() - start_time
 
-    if cfg.dataset_manifest is not None:
+    if cfg.resumable:
         logging.info(f"Finished transcribing from manifest file: {cfg.dataset_manifest}")
-        if cfg.presort_manifest:
-            transcriptions = restore_transcription_order(cfg.dataset_manifest, transcriptions)
     else:
-        logging.info(f"Finished transcribing {len(filepaths)} files !")
-    logging.info(f"Writing transcriptions into file: {cfg.output_filename}")
-
-    # if transcriptions form a tuple of (best_hypotheses, all_hypotheses)
-    if type(transcriptions) == tuple and len(transcriptions) == 2:
-        if cfg.extract_nbest:
-            # extract all hypotheses if exists
-            transcriptions = transcriptions[1]
+        if cfg.dataset_manifest is not None:
+            logging.info(f"Finished transcribing from manifest file: {cfg.dataset_manifest}")
+            if cfg.presort_manifest:
+                transcriptions = restore_transcription_order(cfg.dataset_manifest, transcriptions)
         else:
-            # extract just best hypothesis
-            transcriptions = transcriptions[0]
-
-    if cfg.return_transcriptions:
-        return transcriptions
-
-    # write audio transcriptions
-    output_filename, pred_text_attr_name = write_transcription(
-        transcriptions,
-        cfg,
-        model_name,
-        filepaths=filepaths,
-        compute_langs=compute_langs,
-        timestamps=cfg.timestamps,
-    )
+            logging.info(f"Finished transcribing {len(filepaths)} files !")
+        logging.info(f"Writing transcriptions into file: {cfg.output_filename}")
+
+        # if transcriptions form a tuple of (best_hypotheses, all_hypotheses)
+        if type(transcriptions) == tuple and len(transcriptions) == 2:
+            if cfg.extract_nbest:
+                # extract all hypotheses if exists
+                transcriptions = transcriptions[1]
+            else:
+                # extract just best hypothesis
+                transcriptions = transcriptions[0]
+
+        if cfg.return_transcriptions:
+            return transcriptions
+
+        # write audio transcriptions
+        output_filename, pred_text_attr_name = write_transcription(
+            transcriptions,
+            cfg,
+            model_name,
+            filepaths=filepaths,
+            compute_langs=compute_langs,
+            timestamps=cfg.timestamps,
+        )
     logging.info(f"Finished writing predictions to {output_filename}!")
 
     # clean-up
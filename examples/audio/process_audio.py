@@ -92,6 +92,11 @@ class ProcessConfig:
     output_filename: Optional[str] = None
     batch_size: int = 1
     num_workers: int = 0
+    num_writer_threads: int = 1  # number of background threads writing the processed files
+
+    # Chunked processing of long files with overlap-add, disabled if chunk_duration is None
+    chunk_duration: Optional[float] = None  # duration of a chunk in seconds
+    chunk_hop_duration: Optional[float] = None  # hop between chunks in seconds, defaults to chunk_duration / 2
 
     # Override model config
     override_config_path: Optional[str] = None  # path to a yaml config that will override the internal config file
@@ -249,6 +254,9 @@ def main(cfg: ProcessConfig) -> ProcessConfig:
                 num_workers=cfg.num_workers,
                 input_channel_selector=cfg.input_channel_selector,
                 input_dir=input_dir,
+                chunk_duration=cfg.chunk_duration,
+                chunk_hop_duration=cfg.chunk_hop_duration,
+                num_writer_threads=cfg.num_writer_threads,
             )
 
     logging.info(f"Finished processing {len(filepaths)} files!")
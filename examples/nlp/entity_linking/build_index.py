@@ -25,20 +25,16 @@ from sklearn.decomposition import PCA
 from tqdm import tqdm
 
 from nemo.collections.nlp.models import EntityLinkingModel
+from nemo.collections.nlp.parts.retrieval_index import build_index_from_embeddings
 from nemo.utils import logging
 
-try:
-    import faiss
-except ModuleNotFoundError:
-    logging.warning("Faiss is required for building the index. Please install faiss-gpu")
-
 device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
 
 
 def build_index(cfg: DictConfig, model: object):
     """
-    Builds faiss index from index dataset specified in the config.
-        
+    Builds a retrieval index from index dataset specified in the config.
+
     Args:
         cfg (DictConfig): Config file specifying index parameters
         model (object): Encoder model
@@ -78,22 +74,30 @@ def build_index(cfg: DictConfig, model: object):
             pca = pkl.load(open(cfg.pca.pca_save_name, "rb"))
             embeddings = reduce_embedding_dim(pca, embeddings, cfg)
 
-    # Build faiss index from embeddings
-    logging.info(f"Training index with embedding dim size {cfg.dims} using {faiss.get_num_gpus()} gpus")
-    quantizer = faiss.IndexFlatL2(cfg.dims)
-    index = faiss.IndexIVFFlat(quantizer, cfg.dims, cfg.nlist)
-    index = faiss.index_cpu_to_all_gpus(index)
-    index.train(embeddings)
-
-    logging.info("Adding dataset embeddings to index")
-    for i in tqdm(range(0, embeddings.shape[0], cfg.index_batch_size)):
-        index.add(embeddings[i : i + cfg.index_batch_size])
+    # Build retrieval index from embeddings
+    backend = cfg.get("backend", "faiss")
+    logging.info(f"Training {backend} index with embedding dim size {cfg.dims}")
+    index = build_index_from_embeddings(
+        np.asarray(embeddings, dtype=np.float32),
+        backend=backend,
+        metric="l2",
+        add_batch_size=cfg.index_batch_size,
+        nlist=cfg.nlist,
+        nprobe=cfg.get("nprobe", 1),
+    )
 
     logging.info("Saving index")
-    faiss.write_index(faiss.index_gpu_to_cpu(index), cfg.index_save_name)
+    index.save(cfg.index_save_name)
     logging.info("Index built and saved")
 
 
+def map_idx_to_ids(cfg: DictConfig):
+    """Map the positions of the index dataset embeddings in the index to their concept ids"""
+    concept_ids = pkl.load(open(cfg.concept_id_save_name, "rb"))
+    idx2id = {idx: concept_id for idx, concept_id in enumerate(concept_ids)}
+    pkl.dump(idx2id, open(cfg.idx_to_id, "wb"))
+
+
 def reduce_embedding_dim(pca, embeddings, cfg):
     """Apply PCA transformation to index dataset embeddings"""
 
@@ -171,7 +175,7 @@ def main(cfg: DictConfig, restore: bool):
     logging.info("Loading entity linking encoder model")
     model = load_model(cfg.model, restore)
 
-    if not os.path.isfile(cfg.index.index_save_name) or (
+    if not os.path.exists(cfg.index.index_save_name) or (
         cfg.apply_pca and not os.path.isfile(cfg.index.pca.pca_save_name)
     ):
         logging.info("Building index")
@@ -23,13 +23,9 @@ import torch
 from build_index import load_model
 from omegaconf import DictConfig, OmegaConf
 
+from nemo.collections.nlp.parts.retrieval_index import RetrievalIndex, load_retrieval_index
 from nemo.utils import logging
 
-try:
-    import faiss
-except ModuleNotFoundError:
-    logging.warning("Faiss is required for building the index. Please install faiss-gpu")
-
 device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
 
 
@@ -55,7 +51,7 @@ def get_query_embedding(query, model):
 
 
 def query_index(
-    query: str, cfg: DictConfig, model: object, index: object, pca: object, idx2id: dict, id2string: dict,
+    query: str, cfg: DictConfig, model: object, index: RetrievalIndex, pca: object, idx2id: dict, id2string: dict,
 ) -> Dict:
 
     """
@@ -67,7 +63,7 @@ def query_index(
         query (str): entity to look up in the index
         cfg (DictConfig): config object to specifiy query parameters
         model (EntityLinkingModel): entity linking encoder model
-        index (object): faiss index
+        index (RetrievalIndex): index of the concept embeddings
         pca (object): sklearn pca transformation to be applied to queries 
         idx2id (dict): dictionary mapping unique concept dataset index to 
                        its CUI
@@ -91,7 +87,7 @@ def query_index(
     neighbor_idx = 0
 
     # Many of nearest neighbors could map to the same concept id, their idx is their unique identifier
-    while len(unique_ids) < cfg.top_n and neighbor_idx < len(neighbors):
+    while len(unique_ids) < cfg.top_n and neighbor_idx < len(neighbors) and neighbors[neighbor_idx] >= 0:
         concept_id_idx = neighbors[neighbor_idx]
         concept_id = idx2id[concept_id_idx]
 
@@ -109,7 +105,7 @@ def query_index(
 
 def main(cfg: DictConfig, restore: bool):
     """
-    Loads faiss index and allows commandline queries 
+    Loads the retrieval index and allows commandline queries 
     to the index. Builds new index if one hasn't been built yet.
 
     Args:
@@ -119,7 +115,7 @@ def main(cfg: DictConfig, restore: bool):
                  used before self alignment pretraining.
     """
 
-    if not os.path.isfile(cfg.index.index_save_name) or (
+    if not os.path.exists(cfg.index.index_save_name) or (
         cfg.apply_pca and not os.path.isfile(cfg.index.pca.pca_save_name) or not os.path.isfile(cfg.index.idx_to_id)
     ):
         logging.warning("Either no index and/or no mapping from entity idx to ids exists. Please run `build_index.py`")
@@ -129,20 +125,21 @@ def main(cfg: DictConfig, restore: bool):
     model = load_model(cfg.model, restore)
 
     logging.info("Loading index and associated files")
-    index = faiss.read_index(cfg.index.index_save_name)
+    index = load_retrieval_index(cfg.index.index_save_name)
     idx2id = pkl.load(open(cfg.index.idx_to_id, "rb"))
     id2string = pkl.load(open(cfg.index.id_to_string, "rb"))  # Should be created during dataset prep
 
+    pca = None
     if cfg.index.apply_pca:
         pca = pkl.load(open(cfg.index.pca.pca_save_name, "rb"))
 
     while True:
         query = input("enter index query: ")
-        output = query_index(query, cfg.top_n, cfg.index, model, index, pca, idx2id, id2string)
-
         if query == "exit":
             break
 
+        output = query_index(query, cfg.index, model, index, pca, idx2id, id2string)
+
         for concept_id in output:
             concept_details = output[concept_id]
             concept_id = "C" + str(concept_id).zfill(7)
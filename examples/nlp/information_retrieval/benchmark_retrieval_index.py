@@ -0,0 +1,104 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark of the retrieval index backends (nemo.collections.nlp.parts.retrieval_index): recall@k against an exact
+search and queries per second.
+
+Embeddings can be the `doc.npy` and `query.npy` files written by megatron_gpt_embedding_generate.py. Random clustered
+embeddings are used when they are not given.
+
+python benchmark_retrieval_index.py \
+    --doc_embeddings=test_embeddings/.../doc.npy \
+    --query_embeddings=test_embeddings/.../query.npy \
+    --k=10 \
+    --configs='[{"backend": "numpy", "nlist": 1024, "nprobe": 16}, {"backend": "faiss", "factory_string": "IVF1024,PQ32"}]' \
+    --output_file=results.json
+"""
+
+import json
+import time
+from argparse import ArgumentParser
+
+import numpy as np
+
+from nemo.collections.nlp.parts.retrieval_index import HAVE_FAISS, build_index_from_embeddings
+from nemo.utils import logging
+
+
+def default_configs(num_docs):
+    nlist = int(max(1, min(4 * np.sqrt(num_docs), num_docs // 39)))
+    configs = [{"backend": "numpy", "nlist": nlist, "nprobe": nprobe} for nprobe in (1, 8, 32)]
+    if HAVE_FAISS:
+        configs += [{"backend": "faiss", "nlist": nlist, "nprobe": nprobe} for nprobe in (1, 8, 32)]
+        configs.append({"backend": "faiss", "factory_string": f"IVF{nlist},PQ16", "nprobe": 32})
+    return configs
+
+
+def synthetic_embeddings(num_docs, num_queries, dim, seed):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(num_docs // 100, 1), dim)).astype(np.float32)
+    docs = centers[rng.integers(0, len(centers), num_docs)] + 0.5 * rng.standard_normal((num_docs, dim))
+    queries = centers[rng.integers(0, len(centers), num_queries)] + 0.5 * rng.standard_normal((num_queries, dim))
+    return docs.astype(np.float32), queries.astype(np.float32)
+
+
+def run(config, docs, queries, k, metric, batch_size):
+    start = time.perf_counter()
+    index = build_index_from_embeddings(docs, metric=metric, **config)
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    scores, ids = index.search(queries, k, batch_size=batch_size)
+    search_time = time.perf_counter() - start
+    return ids, {"build_time": build_time, "search_time": search_time, "qps": len(queries) / search_time}
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--doc_embeddings", type=str, default=None, help="Path to a .npy file of doc embeddings")
+    parser.add_argument("--query_embeddings", type=str, default=None, help="Path to a .npy file of query embeddings")
+    parser.add_argument("--num_docs", type=int, default=100000, help="Number of synthetic docs")
+    parser.add_argument("--num_queries", type=int, default=1000, help="Number of synthetic queries")
+    parser.add_argument("--dim", type=int, default=256, help="Dimension of synthetic embeddings")
+    parser.add_argument("--metric", type=str, default="ip", choices=["ip", "l2"])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch_size", type=int, default=1024, help="Number of queries searched at once")
+    parser.add_argument("--configs", type=str, default=None, help="JSON list of index configurations")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output_file", type=str, default=None, help="Optional path of the JSON results")
+    args = parser.parse_args()
+
+    if args.doc_embeddings is not None:
+        docs = np.load(args.doc_embeddings).astype(np.float32)
+        queries = np.load(args.query_embeddings).astype(np.float32)
+    else:
+        docs, queries = synthetic_embeddings(args.num_docs, args.num_queries, args.dim, args.seed)
+    configs = json.loads(args.configs) if args.configs else default_configs(len(docs))
+
+    expected, exact_results = run({"backend": "exact"}, docs, queries, args.k, args.metric, args.batch_size)
+    results = [{"config": {"backend": "exact"}, f"recall@{args.k}": 1.0, **exact_results}]
+    for config in configs:
+        ids, config_results = run(config, docs, queries, args.k, args.metric, args.batch_size)
+        recall = np.mean([len(np.intersect1d(a, b)) / args.k for a, b in zip(ids, expected)])
+        results.append({"config": config, f"recall@{args.k}": float(recall), **config_results})
+        logging.info(json.dumps(results[-1]))
+
+    logging.info(json.dumps(results, indent=2))
+    if args.output_file:
+        with open(args.output_file, "w") as f:
+            json.dump({"num_docs": len(docs), "num_queries": len(queries), "results": results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
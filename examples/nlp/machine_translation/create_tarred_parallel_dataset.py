@@ -105,6 +105,11 @@ if __name__ == '__main__':
         action="store_true",
         help='If True, this will not respect whitepsaces while learning BPE merges.',
     )
+    parser.add_argument(
+        '--use_token_store',
+        action="store_true",
+        help='Write a memory-mappable token store instead of tar files, interrupted runs resume when run again.',
+    )
     args = parser.parse_args()
     if not os.path.exists(args.out_dir):
         os.mkdir(args.out_dir)
@@ -184,4 +189,5 @@ if __name__ == '__main__':
         n_jobs=args.n_preproc_jobs,
         encoder_tokenizer_legacy=args.encoder_tokenizer_legacy,
         decoder_tokenizer_legacy=args.decoder_tokenizer_legacy,
+        use_token_store=args.use_token_store,
     )
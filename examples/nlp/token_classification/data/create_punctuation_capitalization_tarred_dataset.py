@@ -16,6 +16,9 @@ import argparse
 import multiprocessing as mp
 from pathlib import Path
 
+from nemo.collections.nlp.data.token_classification.punctuation_capitalization_indexed_dataset import (
+    create_indexed_dataset,
+)
 from nemo.collections.nlp.data.token_classification.punctuation_capitalization_tarred_dataset import (
     DEFAULT_CAPIT_LABEL_VOCAB_FILE_NAME,
     DEFAULT_PUNCT_LABEL_VOCAB_FILE_NAME,
@@ -59,6 +62,13 @@ python create_punctuation_capitalization_tarred_dataset.py \
   --num_batches_per_tarfile 5 \
   --tokenizer_name char \
   --vocab_file <PATH_TO_CHAR_TOKENIZER_VOCABULARY>
+
+With `--indexed` flag the script creates an indexed dataset instead of tar files. Each worker writes batches of its
+dataset fragment into a binary file with token and label ids and an index file with batch offsets, so no batches are
+discarded and `--num_batches_per_tarfile` is ignored. An indexed dataset supports random access to batches, global
+shuffling and resuming from any batch. Audio is not supported in indexed datasets. Metadata file of an indexed dataset
+should be passed to constructor of
+`nemo.collections.nlp.data.token_classification.punctuation_capitalization_indexed_dataset.BertPunctuationCapitalizationIndexedDataset`.
 """
 
 
@@ -253,6 +263,12 @@ def get_args() -> argparse.Namespace:
         help="A string from which tar file names start. It can contain only characters 'A-Z', 'a-z', '0-9', '_', '-', "
         "'.'.",
     )
+    parser.add_argument(
+        "--indexed",
+        action="store_true",
+        help="Create an indexed dataset with random access to batches instead of tar files. Parameter "
+        "`--num_batches_per_tarfile` is ignored.",
+    )
     parser.add_argument(
         "--n_jobs",
         "-j",
@@ -305,6 +321,8 @@ def get_args() -> argparse.Namespace:
             args.pad_label, args.capit_labels, '--pad_label', '--capit_labels', parser.error
         )
     check_tar_file_prefix(args.tar_file_prefix, parser.error, '--tar_file_prefix')
+    if args.indexed and args.use_audio:
+        parser.error("Parameter `--use_audio` is not supported for indexed datasets.")
     return args
 
 
@@ -325,6 +343,30 @@ def main() -> None:
     else:
         capit_label_ids = None
 
+    if args.indexed:
+        create_indexed_dataset(
+            args.text,
+            args.labels,
+            args.output_dir,
+            args.max_seq_length,
+            args.tokens_in_batch,
+            args.lines_per_dataset_fragment,
+            args.tokenizer_name,
+            tokenizer_model=args.tokenizer_model,
+            vocab_file=args.vocab_file,
+            merges_file=args.merges_file,
+            special_tokens=special_tokens,
+            use_fast_tokenizer=args.use_fast_tokenizer,
+            pad_label=args.pad_label,
+            punct_label_ids=punct_label_ids,
+            capit_label_ids=capit_label_ids,
+            punct_label_vocab_file=args.punct_label_vocab_file,
+            capit_label_vocab_file=args.capit_label_vocab_file,
+            file_prefix=args.tar_file_prefix,
+            n_jobs=args.n_jobs,
+        )
+        return
+
     create_tarred_dataset(
         args.text,
         args.labels,
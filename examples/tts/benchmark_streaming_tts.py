@@ -0,0 +1,143 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+CPU latency benchmark of streaming synthesis with a spectrogram generator and a vocoder
+(nemo.collections.tts.parts.utils.streaming.StreamingSynthesizer).
+
+For every text, the script compares the synthesis of the whole utterance with chunked vocoding of the spectrogram
+of the whole sentence and of its phrases. It reports the time to the first chunk of audio, the total synthesis time
+and the real-time factor (synthesis time / audio duration), averaged over `--repeats` runs.
+
+The models are names of pretrained models or paths to .nemo files:
+
+python benchmark_streaming_tts.py \
+    --spec_model tts_en_fastpitch \
+    --vocoder_model tts_en_hifigan \
+    --chunk_frames 16 32 64 \
+    --output_file=results.json
+"""
+
+import argparse
+import json
+import time
+
+import torch
+
+from nemo.collections.tts.models.base import SpectrogramGenerator, Vocoder
+from nemo.collections.tts.parts.utils.streaming import StreamingSynthesizer
+from nemo.utils import logging
+
+TEXTS = [
+    "Hello, this is a short test.",
+    "The discussion above has already set forth examples of his expression of hatred for the United States, "
+    "and of the way he tried to leave the country.",
+    "At two thirty-eight p.m., Eastern Standard Time, Lyndon Baines Johnson took the oath of office as the "
+    "thirty-sixth President of the United States. Mrs. Kennedy stood at his side, and the plane departed for "
+    "Washington shortly afterwards, with the body of the late President on board.",
+]
+
+
+def restore(model_class, name: str):
+    if name.endswith('.nemo'):
+        return model_class.restore_from(name, map_location='cpu')
+    return model_class.from_pretrained(model_name=name, map_location='cpu')
+
+
+def time_stream(chunks) -> dict:
+    start = time.perf_counter()
+    first_chunk, num_samples = None, 0
+    for chunk in chunks:
+        if first_chunk is None:
+            first_chunk = time.perf_counter() - start
+        num_samples += chunk.shape[-1]
+    return {"first_chunk_sec": first_chunk, "total_sec": time.perf_counter() - start, "num_samples": num_samples}
+
+
+def run(synthesizer: StreamingSynthesizer, text: str, mode: str, repeats: int) -> dict:
+    spec_generator, vocoder = synthesizer.spec_generator, synthesizer.vocoder
+
+    def whole_utterance():
+        spec = spec_generator.generate_spectrogram(tokens=spec_generator.parse(text))
+        yield vocoder.convert_spectrogram_to_audio(spec=spec)
+
+    streams = {
+        "whole_utterance": whole_utterance,
+        "chunked_sentence": lambda: synthesizer.stream(text),
+        "chunked_phrases": lambda: synthesizer.stream(text, split_phrases=True),
+    }
+    # warmup
+    time_stream(streams[mode]())
+    runs = [time_stream(streams[mode]()) for _ in range(repeats)]
+
+    audio_sec = runs[0]["num_samples"] / vocoder.sample_rate
+    total_sec = sum(r["total_sec"] for r in runs) / repeats
+    return {
+        "mode": mode,
+        "num_chars": len(text),
+        "audio_sec": audio_sec,
+        "time_to_first_chunk_sec": sum(r["first_chunk_sec"] for r in runs) / repeats,
+        "total_sec": total_sec,
+        "rtf": total_sec / audio_sec,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--spec_model", type=str, default="tts_en_fastpitch", help="spectrogram generator")
+    parser.add_argument("--vocoder_model", type=str, default="tts_en_hifigan", help="vocoder")
+    parser.add_argument("--chunk_frames", type=int, nargs="+", default=[32], help="mel frames per vocoded chunk")
+    parser.add_argument("--overlap_frames", type=int, default=2, help="cross-faded frames between chunks")
+    parser.add_argument(
+        "--context_frames", type=int, default=None, help="context of a chunk, defaults to the receptive field"
+    )
+    parser.add_argument("--text", type=str, nargs="+", default=TEXTS, help="texts to synthesize")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--num_threads", type=int, default=None, help="number of CPU threads of torch")
+    parser.add_argument("--output_file", type=str, default=None, help="optional path of the JSON results")
+    args = parser.parse_args()
+
+    if args.num_threads is not None:
+        torch.set_num_threads(args.num_threads)
+    torch.set_grad_enabled(False)
+    spec_generator = restore(SpectrogramGenerator, args.spec_model).eval()
+    vocoder = restore(Vocoder, args.vocoder_model).eval()
+
+    results = []
+    for chunk_frames in args.chunk_frames:
+        synthesizer = StreamingSynthesizer(
+            spec_generator,
+            vocoder,
+            chunk_frames=chunk_frames,
+            context_frames=args.context_frames,
+            overlap_frames=args.overlap_frames,
+            num_mel_channels=spec_generator.cfg.n_mel_channels,
+        )
+        modes = ["chunked_sentence", "chunked_phrases"]
+        if chunk_frames == args.chunk_frames[0]:
+            modes.insert(0, "whole_utterance")
+        for text in args.text:
+            for mode in modes:
+                result = run(synthesizer, text, mode, args.repeats)
+                result.update(chunk_frames=chunk_frames, context_frames=synthesizer.context_frames)
+                results.append(result)
+                logging.info(json.dumps(results[-1]))
+
+    if args.output_file:
+        with open(args.output_file, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
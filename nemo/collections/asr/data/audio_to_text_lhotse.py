@@ -18,6 +18,7 @@ import torch.utils.data
 from lhotse.dataset import AudioSamples
 from lhotse.dataset.collation import collate_vectors
 
+from nemo.collections.common.data.pipeline_metrics import data_pipeline_stage
 from nemo.collections.common.tokenizers.aggregate_tokenizer import TokenizerWrapper
 from nemo.collections.common.tokenizers.tokenizer_spec import TokenizerSpec
 from nemo.core.neural_types import AudioSignal, LabelsType, LengthsType, NeuralType
@@ -50,19 +51,24 @@ class LhotseSpeechToTextBpeDataset(torch.utils.data.Dataset):
         self.return_cuts = return_cuts
 
     def __getitem__(self, cuts) -> Tuple[torch.Tensor, ...]:
-        audio, audio_lens, cuts = self.load_audio(cuts)
-        tokens = [
-            torch.cat(
-                [
-                    torch.as_tensor(s.tokens if hasattr(s, "tokens") else self.tokenizer(s.text or "", s.language))
-                    for s in c.supervisions
-                ],
-                dim=0,
-            )
-            for c in cuts
-        ]
-        token_lens = torch.tensor([t.size(0) for t in tokens], dtype=torch.long)
-        tokens = collate_vectors(tokens, padding_value=0)
+        with data_pipeline_stage("audio_decode"):
+            audio, audio_lens, cuts = self.load_audio(cuts)
+        with data_pipeline_stage("tokenize"):
+            tokens = [
+                torch.cat(
+                    [
+                        torch.as_tensor(
+                            s.tokens if hasattr(s, "tokens") else self.tokenizer(s.text or "", s.language)
+                        )
+                        for s in c.supervisions
+                    ],
+                    dim=0,
+                )
+                for c in cuts
+            ]
+        with data_pipeline_stage("collate"):
+            token_lens = torch.tensor([t.size(0) for t in tokens], dtype=torch.long)
+            tokens = collate_vectors(tokens, padding_value=0)
         if self.return_cuts:
             return audio, audio_lens, tokens, token_lens, cuts.drop_in_memory_data()
         return audio, audio_lens, tokens, token_lens
@@ -14,6 +14,7 @@
 
 import concurrent
 import os
+import random
 import warnings
 from typing import Dict, List, Tuple
 
@@ -27,6 +28,7 @@ from tqdm import tqdm
 
 from nemo.collections.asr.parts.preprocessing.perturb import process_augmentations
 from nemo.collections.asr.parts.utils.data_simulation_utils import (
+    AudioReadBuffer,
     DataAnnotator,
     SpeechSampler,
     build_speaker_samples_map,
@@ -85,6 +87,11 @@ class MultiSpeakerSimulator(object):
         - Re-organized MultiSpeakerSimulator class and moved util functions to util files.
         v1.1.1 March 2023
             - Changed `silence_mean` to use exactly the same sampling equation as `overlap_mean`.
+        v1.1.2
+            - Each worker process keeps a single copy of the simulator, sessions are sent to workers in chunks
+            - Optional LRU buffer of decoded utterances that is kept across sessions in each worker
+            - All random number generators are seeded per session and output file lists are in session order,
+              so the outputs do not depend on the number of workers
 
 
     Args:
@@ -94,6 +101,8 @@ class MultiSpeakerSimulator(object):
       manifest_filepath (str): Manifest file with paths to single speaker audio files
       sr (int): Sampling rate of the input audio files from the manifest
       random_seed (int): Seed to random number generator
+      audio_read_buffer_size_MB (float): Size of the buffer of decoded utterances kept across sessions in each worker,
+                                         set 0 to clear the buffer after each session
 
     session_config:
       num_speakers (int): Number of unique speakers per multispeaker audio session
@@ -213,7 +222,8 @@ class MultiSpeakerSimulator(object):
         self._volume = None
         self._speaker_ids = None
         self._device = torch.device("cuda") if torch.cuda.is_available() else torch.device("cpu")
-        self._audio_read_buffer_dict = {}
+        self._audio_read_buffer_size_MB = self._params.data_simulator.get("audio_read_buffer_size_MB", 0)
+        self._audio_read_buffer_dict = self._init_audio_read_buffer()
         self.add_missing_overlap = self._params.data_simulator.session_params.get("add_missing_overlap", False)
 
         if (
@@ -295,6 +305,34 @@ class MultiSpeakerSimulator(object):
         logging.info(f"Initialized speaker permutations for {num_sess} sessions with {num_speakers} speakers each.")
         return permuted_inds.reshape(num_sess, num_speakers)
 
+    def _init_audio_read_buffer(self):
+        """
+        Initialize the hash-table for loaded audio files. If `audio_read_buffer_size_MB` is set,
+        the buffer is kept across sessions and the least recently used audio files are evicted.
+        """
+        if self._audio_read_buffer_size_MB > 0:
+            return AudioReadBuffer(max_size_MB=self._audio_read_buffer_size_MB)
+        return {}
+
+    def _set_session_random_seed(self, idx: int):
+        """
+        Seed all random number generators for the session `idx`. The generated session depends only on
+        `random_seed` and `idx`, and not on the process or the order in which the sessions are generated.
+
+        Args:
+            idx (int): Index for current session (out of total number of sessions).
+
+        Returns:
+            session_seed (int): Seed of the session.
+        """
+        session_seed = self._params.data_simulator.random_seed + idx
+        np.random.seed(session_seed)
+        random.seed(session_seed)
+        torch.manual_seed(session_seed)
+        # reset the state carried over from the previous session generated by this process
+        self._missing_overlap = 0
+        return session_seed
+
     def _init_chunk_count(self):
         """
         Initialize the chunk count for multi-processing to prevent over-flow of job counts.
@@ -406,12 +444,14 @@ class MultiSpeakerSimulator(object):
 
     def clean_up(self):
         """
-        Clear the system memory. Cache data for audio files and alignments are removed.
+        Clear the system memory. Cache data for audio files and alignments are removed,
+        unless the buffer of loaded audio files is kept across sessions.
         """
         self._sentence = None
         self._words = []
         self._alignments = []
-        self._audio_read_buffer_dict = {}
+        if not isinstance(self._audio_read_buffer_dict, AudioReadBuffer):
+            self._audio_read_buffer_dict = {}
         torch.cuda.empty_cache()
 
     def _get_speaker_dominance(self) -> List[float]:
@@ -1021,8 +1061,7 @@ class MultiSpeakerSimulator(object):
             device (torch.device): Device to use for generating this session.
             enforce_counter (int): In enforcement mode, dominance is increased by a factor of enforce_counter for unrepresented speakers
         """
-        random_seed = self._params.data_simulator.random_seed
-        np.random.seed(random_seed + idx)
+        session_seed = self._set_session_random_seed(idx)
 
         self._device = device
         speaker_dominance = self._get_speaker_dominance()  # randomly determine speaker dominance
@@ -1156,7 +1195,7 @@ class MultiSpeakerSimulator(object):
                     snr_min=self._params.data_simulator.background_noise.snr_min,
                     snr_max=self._params.data_simulator.background_noise.snr_max,
                     background_noise_snr=self._params.data_simulator.background_noise.snr,
-                    seed=(random_seed + idx),
+                    seed=session_seed,
                     device=self._device,
                 )
                 array += bg
@@ -1202,9 +1241,6 @@ class MultiSpeakerSimulator(object):
         )
         OmegaConf.save(self._params, os.path.join(output_dir, "params.yaml"))
 
-        tp = concurrent.futures.ProcessPoolExecutor(max_workers=self.num_workers)
-        futures = []
-
         num_sessions = self._params.data_simulator.session_config.num_sessions
         source_noise_manifest = read_noise_manifest(
             add_bg=self._params.data_simulator.background_noise.add_bg,
@@ -1233,51 +1269,59 @@ class MultiSpeakerSimulator(object):
         if self.num_workers > 1:
             self._manifest = None
             self._speaker_samples = None
+            # the simulator is sent once to each worker process instead of once for every session
+            tp = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.num_workers, initializer=_init_session_worker, initargs=(self,)
+            )
 
         # Chunk the sessions into smaller chunks for very large number of sessions (10K+ sessions)
         for chunk_idx in range(self.chunk_count):
-            futures = []
             stt_idx, end_idx = (
                 chunk_idx * self.multiprocessing_chunksize,
                 min((chunk_idx + 1) * self.multiprocessing_chunksize, num_sessions),
             )
-            for sess_idx in range(stt_idx, end_idx):
-                self._furthest_sample = [0 for n in range(self._params.data_simulator.session_config.num_speakers)]
-                self._audio_read_buffer_dict = {}
-                if self.num_workers > 1:
-                    futures.append(tp.submit(self._generate_session, *queue[sess_idx]))
-                else:
-                    futures.append(queue[sess_idx])
-
             if self.num_workers > 1:
-                generator = concurrent.futures.as_completed(futures)
+                # sessions are sent to the workers in chunks, and the results are returned in the session order
+                chunksize = max(1, (end_idx - stt_idx) // (4 * self.num_workers))
+                generator = tp.map(_generate_session_in_worker, queue[stt_idx:end_idx], chunksize=chunksize)
             else:
-                generator = futures
+                generator = (self._generate_session(*args) for args in queue[stt_idx:end_idx])
 
-            for future in tqdm(
+            for basepath, filename in tqdm(
                 generator,
                 desc=f"[{chunk_idx+1}/{self.chunk_count}] Waiting jobs from {stt_idx+1: 2} to {end_idx: 2}",
                 unit="jobs",
-                total=len(futures),
+                total=end_idx - stt_idx,
             ):
-                if self.num_workers > 1:
-                    basepath, filename = future.result()
-                else:
-                    self._noise_samples = self.sampler.sample_noise_manifest(
-                        noise_manifest=source_noise_manifest,
-                    )
-                    basepath, filename = self._generate_session(*future)
-
                 self.annotator.add_to_filename_lists(basepath=basepath, filename=filename)
 
                 # throw warning if number of speakers is less than requested
                 self._check_missing_speakers()
 
-        tp.shutdown()
+        if self.num_workers > 1:
+            tp.shutdown()
         self.annotator.write_filelist_files(basepath=basepath)
         logging.info(f"Data simulation has been completed, results saved at: {basepath}")
 
 
+_SESSION_SIMULATOR = None
+
+
+def _init_session_worker(simulator: MultiSpeakerSimulator):
+    """
+    Initializer of the worker processes, keeps a single copy of the simulator in each worker.
+    """
+    global _SESSION_SIMULATOR
+    _SESSION_SIMULATOR = simulator
+
+
+def _generate_session_in_worker(args: tuple) -> Tuple[str, str]:
+    """
+    Generate a session with the simulator of the current worker process, see `MultiSpeakerSimulator._generate_session`.
+    """
+    return _SESSION_SIMULATOR._generate_session(*args)
+
+
 class RIRMultiSpeakerSimulator(MultiSpeakerSimulator):
     """
     RIR Augmented Multispeaker Audio Session Simulator - simulates multispeaker audio sessions using single-speaker
@@ -1538,8 +1582,7 @@ class RIRMultiSpeakerSimulator(MultiSpeakerSimulator):
             device (torch.device): Device to use for generating this session.
             enforce_counter (int): In enforcement mode, dominance is increased by a factor of enforce_counter for unrepresented speakers
         """
-        random_seed = self._params.data_simulator.random_seed
-        np.random.seed(random_seed + idx)
+        session_seed = self._set_session_random_seed(idx)
 
         self._device = device
         speaker_dominance = self._get_speaker_dominance()  # randomly determine speaker dominance
@@ -1670,7 +1713,7 @@ class RIRMultiSpeakerSimulator(MultiSpeakerSimulator):
                     snr_min=self._params.data_simulator.background_noise.snr_min,
                     snr_max=self._params.data_simulator.background_noise.snr_max,
                     background_noise_snr=self._params.data_simulator.background_noise.snr,
-                    seed=(random_seed + idx),
+                    seed=session_seed,
                     device=self._device,
                 )
                 array += bg
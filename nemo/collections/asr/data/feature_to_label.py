@@ -16,6 +16,7 @@ from typing import Dict, List, Optional
 import torch
 
 from nemo.collections.asr.parts.preprocessing.feature_loader import ExternalFeatureLoader
+from nemo.collections.asr.parts.preprocessing.feature_store import FeatureStoreShardSampler
 from nemo.collections.common.parts.preprocessing import collections
 from nemo.core.classes import Dataset
 from nemo.core.neural_types import AcousticEncodedRepresentation, LabelsType, LengthsType, NeuralType
@@ -276,6 +277,7 @@ class FeatureToLabelDataset(Dataset):
         zero_spec_db_val (float): Value to replace non-speech signals in log-melspectrogram.
         min_duration (float): Minimum duration of the audio file in seconds.
         max_duration (float): Maximum duration of the audio file in seconds.
+        feature_store_dir (str): Optional directory of a feature store, features found in the store are read from it.
     """
 
     ZERO_LEVEL_SPEC_DB_VAL = -16.635  # Log-Melspectrogram value for zero signal
@@ -307,6 +309,7 @@ class FeatureToLabelDataset(Dataset):
         zero_spec_db_val: float = -16.635,
         min_duration: Optional[float] = None,
         max_duration: Optional[float] = None,
+        feature_store_dir: Optional[str] = None,
     ):
         super().__init__()
         self.window_length_in_sec = window_length_in_sec
@@ -324,7 +327,7 @@ class FeatureToLabelDataset(Dataset):
             max_duration=max_duration,
         )
 
-        self.feature_loader = ExternalFeatureLoader(augmentor=augmentor)
+        self.feature_loader = ExternalFeatureLoader(augmentor=augmentor, feature_store_dir=feature_store_dir)
         self.labels = labels if labels else self.collection.uniq_labels
 
         self.is_regression_task = is_regression_task
@@ -350,6 +353,21 @@ class FeatureToLabelDataset(Dataset):
             self.labels = []
             self.num_classes = 1
 
+    def get_sampler(
+        self, shuffle: bool = True, seed: int = 0, rank: int = 0, world_size: int = 1
+    ) -> Optional[FeatureStoreShardSampler]:
+        """
+        Sampler reading the feature store shard by shard, see `FeatureStoreShardSampler`.
+        None if the dataset does not use a feature store.
+        """
+        return self.feature_loader.get_shard_sampler(
+            [sample.feature_file for sample in self.collection],
+            shuffle=shuffle,
+            seed=seed,
+            rank=rank,
+            world_size=world_size,
+        )
+
     def __len__(self):
         return len(self.collection)
 
@@ -391,6 +409,7 @@ class FeatureToMultiLabelDataset(Dataset):
         zero_spec_db_val (float): Value to replace non-speech signals in log-melspectrogram.
         min_duration (float): Minimum duration of the audio file in seconds.
         max_duration (float): Maximum duration of the audio file in seconds.
+        feature_store_dir (str): Optional directory of a feature store, features found in the store are read from it.
     """
 
     ZERO_LEVEL_SPEC_DB_VAL = -16.635  # Log-Melspectrogram value for zero signal
@@ -420,6 +439,7 @@ class FeatureToMultiLabelDataset(Dataset):
         zero_spec_db_val: float = -16.635,
         min_duration: Optional[float] = None,
         max_duration: Optional[float] = None,
+        feature_store_dir: Optional[str] = None,
     ):
         super().__init__()
         self.delimiter = delimiter
@@ -438,7 +458,7 @@ class FeatureToMultiLabelDataset(Dataset):
         )
 
         self.is_regression_task = is_regression_task
-        self.feature_loader = ExternalFeatureLoader(augmentor=augmentor)
+        self.feature_loader = ExternalFeatureLoader(augmentor=augmentor, feature_store_dir=feature_store_dir)
         self.labels = labels if labels else self.collection.uniq_labels
 
         self.label2id, self.id2label = {}, {}
@@ -479,6 +499,21 @@ class FeatureToMultiLabelDataset(Dataset):
             labels = torch.tensor(labels).long()
         return labels
 
+    def get_sampler(
+        self, shuffle: bool = True, seed: int = 0, rank: int = 0, world_size: int = 1
+    ) -> Optional[FeatureStoreShardSampler]:
+        """
+        Sampler reading the feature store shard by shard, see `FeatureStoreShardSampler`.
+        None if the dataset does not use a feature store.
+        """
+        return self.feature_loader.get_shard_sampler(
+            [sample.feature_file for sample in self.collection],
+            shuffle=shuffle,
+            seed=seed,
+            rank=rank,
+            world_size=world_size,
+        )
+
     def __len__(self):
         return len(self.collection)
 
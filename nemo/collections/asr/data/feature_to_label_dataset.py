@@ -47,6 +47,7 @@ def get_feature_label_dataset(
         zero_spec_db_val=config.get("zero_spec_db_val", -16.635),
         max_duration=config.get('max_duration', None),
         min_duration=config.get('min_duration', None),
+        feature_store_dir=config.get('feature_store_dir', None),
     )
     return dataset
 
@@ -64,5 +65,6 @@ def get_feature_multi_label_dataset(
         zero_spec_db_val=config.get("zero_spec_db_val", -16.635),
         max_duration=config.get('max_duration', None),
         min_duration=config.get('min_duration', None),
+        feature_store_dir=config.get('feature_store_dir', None),
     )
     return dataset
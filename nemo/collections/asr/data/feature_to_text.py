@@ -18,6 +18,7 @@ import torch
 
 from nemo.collections.asr.data.feature_to_label import _audio_feature_collate_fn
 from nemo.collections.asr.parts.preprocessing.feature_loader import ExternalFeatureLoader
+from nemo.collections.asr.parts.preprocessing.feature_store import FeatureStoreShardSampler
 from nemo.collections.asr.parts.preprocessing.features import normalize_batch
 from nemo.collections.asr.parts.preprocessing.segment import ChannelSelectorType
 from nemo.collections.asr.parts.utils.vad_utils import load_speech_segments_from_rttm
@@ -107,6 +108,7 @@ class _FeatureTextDataset(Dataset):
         pad_id (int): Id of pad symbol. Defaults to 0
         return_sample_id (bool): whether to return the sample_id as a part of each sample
         channel_selector (int | Iterable[int] | str): select a single channel or a subset of channels from multi-channel audio. If set to `'average'`, it performs averaging across channels. Disabled if set to `None`. Defaults to `None`. Uses zero-based indexing.
+        feature_store_dir (str): optional directory of a feature store, features found in the store are read from it instead of the feature files
     """
 
     ZERO_LEVEL_SPEC_DB_VAL = -16.635  # Log-Melspectrogram value for zero signal
@@ -146,6 +148,7 @@ class _FeatureTextDataset(Dataset):
         pad_id: int = 0,
         return_sample_id: bool = False,
         channel_selector: Optional[ChannelSelectorType] = None,
+        feature_store_dir: Optional[str] = None,
     ):
         if type(manifest_filepath) == str:
             manifest_filepath = manifest_filepath.split(",")
@@ -181,7 +184,7 @@ class _FeatureTextDataset(Dataset):
             eos_id=eos_id,
             pad_id=pad_id,
         )
-        self.featurizer = ExternalFeatureLoader(augmentor=augmentor)
+        self.featurizer = ExternalFeatureLoader(augmentor=augmentor, feature_store_dir=feature_store_dir)
         self.trim = trim
         self.return_sample_id = return_sample_id
         self.channel_selector = channel_selector
@@ -252,6 +255,21 @@ class _FeatureTextDataset(Dataset):
             return new_features[:, : self.feat_min_len]
         return new_features[:, :fid]
 
+    def get_sampler(
+        self, shuffle: bool = True, seed: int = 0, rank: int = 0, world_size: int = 1
+    ) -> Optional[FeatureStoreShardSampler]:
+        """
+        Sampler reading the feature store shard by shard, see `FeatureStoreShardSampler`.
+        None if the dataset does not use a feature store.
+        """
+        return self.featurizer.get_shard_sampler(
+            [sample.feature_file for sample in self.manifest_processor.collection],
+            shuffle=shuffle,
+            seed=seed,
+            rank=rank,
+            world_size=world_size,
+        )
+
     def __len__(self):
         return len(self.manifest_processor.collection)
 
@@ -307,6 +325,7 @@ class FeatureToCharDataset(_FeatureTextDataset):
         eos_id: Id of end of sequence symbol to append if not None
         return_sample_id (bool): whether to return the sample_id as a part of each sample
         channel_selector (int | Iterable[int] | str): select a single channel or a subset of channels from multi-channel audio. If set to `'average'`, it performs averaging across channels. Disabled if set to `None`. Defaults to `None`. Uses zero-based indexing.
+        feature_store_dir (str): optional directory of a feature store, features found in the store are read from it instead of the feature files
     """
 
     def __init__(
@@ -334,6 +353,7 @@ class FeatureToCharDataset(_FeatureTextDataset):
         parser: Union[str, Callable] = 'en',
         return_sample_id: bool = False,
         channel_selector: Optional[ChannelSelectorType] = None,
+        feature_store_dir: Optional[str] = None,
     ):
         self.labels = labels
 
@@ -362,6 +382,7 @@ class FeatureToCharDataset(_FeatureTextDataset):
             pad_id=pad_id,
             return_sample_id=return_sample_id,
             channel_selector=channel_selector,
+            feature_store_dir=feature_store_dir,
         )
 
 
@@ -407,6 +428,7 @@ class FeatureToBPEDataset(_FeatureTextDataset):
             tokens to beginning and ending of speech respectively.
         return_sample_id (bool): whether to return the sample_id as a part of each sample
         channel_selector (int | Iterable[int] | str): select a single channel or a subset of channels from multi-channel audio. If set to `'average'`, it performs averaging across channels. Disabled if set to `None`. Defaults to `None`. Uses zero-based indexing.
+        feature_store_dir (str): optional directory of a feature store, features found in the store are read from it instead of the feature files
     """
 
     def __init__(
@@ -429,6 +451,7 @@ class FeatureToBPEDataset(_FeatureTextDataset):
         trim: bool = False,
         return_sample_id: bool = False,
         channel_selector: Optional[ChannelSelectorType] = None,
+        feature_store_dir: Optional[str] = None,
     ):
         if use_start_end_token and hasattr(tokenizer, "bos_id") and tokenizer.bos_id > 0:
             bos_id = tokenizer.bos_id
@@ -484,4 +507,5 @@ class FeatureToBPEDataset(_FeatureTextDataset):
             pad_id=pad_id,
             return_sample_id=return_sample_id,
             channel_selector=channel_selector,
+            feature_store_dir=feature_store_dir,
         )
@@ -53,6 +53,7 @@ def get_char_dataset(config: dict, augmentor: Optional['FeatureAugmentor'] = Non
         parser=config.get('parser', 'en'),
         return_sample_id=config.get('return_sample_id', False),
         channel_selector=config.get('channel_selector', None),
+        feature_store_dir=config.get('feature_store_dir', None),
     )
     return dataset
 
@@ -90,5 +91,6 @@ def get_bpe_dataset(
         use_start_end_token=config.get('use_start_end_token', True),
         return_sample_id=config.get('return_sample_id', False),
         channel_selector=config.get('channel_selector', None),
+        feature_store_dir=config.get('feature_store_dir', None),
     )
     return dataset
@@ -344,12 +344,17 @@ class _EncDecBaseModel(ASRModel, ExportableEncDecModel, TranscriptionMixin):
             batch_size = config['batch_size']
             shuffle = config['shuffle']
 
+        # shuffled features of a feature store are read shard by shard
+        sampler = None
+        if shuffle:
+            sampler = dataset.get_sampler(rank=self.global_rank, world_size=self.world_size)
         return torch.utils.data.DataLoader(
             dataset=dataset,
             batch_size=batch_size,
             collate_fn=collate_func,
             drop_last=config.get('drop_last', False),
-            shuffle=shuffle,
+            shuffle=shuffle and sampler is None,
+            sampler=sampler,
             num_workers=config.get('num_workers', 0),
             pin_memory=config.get('pin_memory', False),
         )
@@ -1001,12 +1006,18 @@ class EncDecFrameClassificationModel(EncDecClassificationModel):
 
         dataset = feature_to_label_dataset.get_feature_multi_label_dataset(config=config, augmentor=augmentor)
 
+        # shuffled features of a feature store are read shard by shard
+        shuffle = config.get('shuffle', False)
+        sampler = None
+        if shuffle:
+            sampler = dataset.get_sampler(rank=self.global_rank, world_size=self.world_size)
         return torch.utils.data.DataLoader(
             dataset=dataset,
             batch_size=config.get("batch_size", 1),
             collate_fn=dataset.collate_fn,
             drop_last=config.get('drop_last', False),
-            shuffle=config.get('shuffle', False),
+            shuffle=shuffle and sampler is None,
+            sampler=sampler,
             num_workers=config.get('num_workers', 0),
             pin_memory=config.get('pin_memory', False),
         )
@@ -30,6 +30,7 @@ from nemo.collections.asr.metrics.der import score_labels
 from nemo.collections.asr.models.classification_models import EncDecClassificationModel
 from nemo.collections.asr.models.label_models import EncDecSpeakerLabelModel
 from nemo.collections.asr.parts.mixins.mixins import DiarizationMixin
+from nemo.collections.asr.parts.utils.multiscale_embedding_extractor import MultiscaleEmbeddingExtractor
 from nemo.collections.asr.parts.utils.speaker_utils import (
     audio_rttm_map,
     get_embs_and_timestamps,
@@ -90,6 +91,7 @@ class ClusteringDiarizer(torch.nn.Module, Model, DiarizationMixin):
 
         # init speaker model
         self.multiscale_embeddings_and_timestamps = {}
+        self._multiscale_embedding_extractor = None
         self._init_speaker_model(speaker_model)
         self._speaker_params = self._cfg.diarizer.speaker_embeddings.parameters
 
@@ -372,15 +374,47 @@ class ClusteringDiarizer(torch.nn.Module, Model, DiarizationMixin):
                 self.time_stamps[uniq_name].append([start, end])
 
         if self._speaker_params.save_embeddings:
-            embedding_dir = os.path.join(self._speaker_dir, 'embeddings')
-            if not os.path.exists(embedding_dir):
-                os.makedirs(embedding_dir, exist_ok=True)
+            self._save_embeddings(manifest_file)
 
-            prefix = get_uniqname_from_filepath(manifest_file)
-            name = os.path.join(embedding_dir, prefix)
-            self._embeddings_file = name + f'_embeddings.pkl'
-            pkl.dump(self.embeddings, open(self._embeddings_file, 'wb'))
-            logging.info("Saved embedding files to {}".format(embedding_dir))
+    def _save_embeddings(self, manifest_file: str):
+        embedding_dir = os.path.join(self._speaker_dir, 'embeddings')
+        if not os.path.exists(embedding_dir):
+            os.makedirs(embedding_dir, exist_ok=True)
+
+        prefix = get_uniqname_from_filepath(manifest_file)
+        name = os.path.join(embedding_dir, prefix)
+        self._embeddings_file = name + f'_embeddings.pkl'
+        pkl.dump(self.embeddings, open(self._embeddings_file, 'wb'))
+        logging.info("Saved embedding files to {}".format(embedding_dir))
+
+    def _extract_multiscale_embeddings(self):
+        """
+        This method extracts speaker embeddings of all scales in one pass over the audio, decoding every
+        recording once and batching the windows of a scale across recordings.
+        Embeddings are cached by the extractor, so diarizing the same recordings again reuses them.
+        """
+        subsegments_manifests, window_lengths = {}, {}
+        for scale_idx, (window, shift) in self.multiscale_args_dict['scale_dict'].items():
+            self._run_segmentation(window, shift, scale_tag=f'_scale{scale_idx}')
+            subsegments_manifests[scale_idx] = self.subsegments_manifest_path
+            window_lengths[scale_idx] = window
+
+        if self._multiscale_embedding_extractor is None:
+            self._multiscale_embedding_extractor = MultiscaleEmbeddingExtractor(
+                self._speaker_model,
+                sample_rate=self._cfg.sample_rate,
+                num_workers=self._cfg.num_workers,
+                verbose=self.verbose,
+            )
+        if self._cfg.get('batch_size'):
+            self._multiscale_embedding_extractor.batch_size = self._cfg.batch_size
+        outputs = self._multiscale_embedding_extractor.extract(subsegments_manifests, window_lengths)
+
+        for scale_idx, (embeddings, time_stamps) in outputs.items():
+            self.embeddings, self.time_stamps = embeddings, time_stamps
+            self.multiscale_embeddings_and_timestamps[scale_idx] = [embeddings, time_stamps]
+            if self._speaker_params.save_embeddings:
+                self._save_embeddings(subsegments_manifests[scale_idx])
 
     def diarize(self, paths2audio_files: List[str] = None, batch_size: int = 0):
         """
@@ -425,15 +459,19 @@ class ClusteringDiarizer(torch.nn.Module, Model, DiarizationMixin):
 
         # Segmentation
         scales = self.multiscale_args_dict['scale_dict'].items()
-        for scale_idx, (window, shift) in scales:
+        if self._speaker_params.get('batched_multiscale_extraction', False):
+            # Segmentation and embedding extraction for all scales at once
+            self._extract_multiscale_embeddings()
+        else:
+            for scale_idx, (window, shift) in scales:
 
-            # Segmentation for the current scale (scale_idx)
-            self._run_segmentation(window, shift, scale_tag=f'_scale{scale_idx}')
+                # Segmentation for the current scale (scale_idx)
+                self._run_segmentation(window, shift, scale_tag=f'_scale{scale_idx}')
 
-            # Embedding Extraction for the current scale (scale_idx)
-            self._extract_embeddings(self.subsegments_manifest_path, scale_idx, len(scales))
+                # Embedding Extraction for the current scale (scale_idx)
+                self._extract_embeddings(self.subsegments_manifest_path, scale_idx, len(scales))
 
-            self.multiscale_embeddings_and_timestamps[scale_idx] = [self.embeddings, self.time_stamps]
+                self.multiscale_embeddings_and_timestamps[scale_idx] = [self.embeddings, self.time_stamps]
 
         embs_and_timestamps = get_embs_and_timestamps(
             self.multiscale_embeddings_and_timestamps, self.multiscale_args_dict
@@ -22,7 +22,10 @@ from omegaconf import DictConfig
 
 from nemo.collections.asr.models import ClusteringDiarizer
 from nemo.collections.asr.parts.utils.offline_clustering import get_scale_interpolated_embs, split_input_data
-from nemo.collections.asr.parts.utils.online_clustering import OnlineSpeakerClustering
+from nemo.collections.asr.parts.utils.online_clustering import (
+    IncrementalSpeakerClustering,
+    OnlineSpeakerClustering,
+)
 from nemo.collections.asr.parts.utils.speaker_utils import (
     OnlineSegmentor,
     audio_rttm_map,
@@ -113,7 +116,8 @@ class OnlineClusteringDiarizer(ClusteringDiarizer):
 
         Attributes:
             online_clus (OnlineSpeakerClustering):
-                Online clustering diarizer class instance
+                Online clustering diarizer class instance. `IncrementalSpeakerClustering` is used
+                if `incremental_clustering` is True in the clustering parameters.
             history_n (int):
                 History buffer size for saving history of speaker label inference
                 Total number of embedding vectors saved in the buffer that is kept till the end of the session
@@ -121,14 +125,28 @@ class OnlineClusteringDiarizer(ClusteringDiarizer):
                 Current buffer (FIFO queue) size for calculating the speaker label inference
                 Total number of embedding vectors saved in the FIFO queue for clustering inference
         """
-        self.online_clus = OnlineSpeakerClustering(
-            max_num_speakers=clustering_params.max_num_speakers,
-            max_rp_threshold=clustering_params.max_rp_threshold,
-            sparse_search_volume=clustering_params.sparse_search_volume,
-            history_buffer_size=clustering_params.history_buffer_size,
-            current_buffer_size=clustering_params.current_buffer_size,
-            cuda=self.cuda,
-        )
+        if clustering_params.get('incremental_clustering', False):
+            # Constant per-step latency for long sessions, see `IncrementalSpeakerClustering`
+            self.online_clus = IncrementalSpeakerClustering(
+                max_num_speakers=clustering_params.max_num_speakers,
+                max_rp_threshold=clustering_params.max_rp_threshold,
+                sparse_search_volume=clustering_params.sparse_search_volume,
+                history_buffer_size=clustering_params.history_buffer_size,
+                current_buffer_size=clustering_params.current_buffer_size,
+                knn_neighbors=clustering_params.get('knn_neighbors', 10),
+                recluster_interval=clustering_params.get('recluster_interval', 10),
+                novelty_sigma=clustering_params.get('novelty_sigma', 3.0),
+                cuda=self.cuda,
+            )
+        else:
+            self.online_clus = OnlineSpeakerClustering(
+                max_num_speakers=clustering_params.max_num_speakers,
+                max_rp_threshold=clustering_params.max_rp_threshold,
+                sparse_search_volume=clustering_params.sparse_search_volume,
+                history_buffer_size=clustering_params.history_buffer_size,
+                current_buffer_size=clustering_params.current_buffer_size,
+                cuda=self.cuda,
+            )
         self.history_n = clustering_params.history_buffer_size
         self.current_n = clustering_params.current_buffer_size
 
@@ -16,5 +16,5 @@ from nemo.collections.asr.parts.context_biasing.context_biasing_utils import (
     compute_fscore,
     merge_alignment_with_ws_hyps,
 )
-from nemo.collections.asr.parts.context_biasing.context_graph_ctc import ContextGraphCTC
+from nemo.collections.asr.parts.context_biasing.context_graph_ctc import CompiledContextGraphCTC, ContextGraphCTC
 from nemo.collections.asr.parts.context_biasing.ctc_based_word_spotter import run_word_spotter
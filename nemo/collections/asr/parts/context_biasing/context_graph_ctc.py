@@ -32,8 +32,11 @@
 # https://github.com/k2-fsa/icefall/blob/11d816d174076ec9485ab8b1d36af2592514e348/icefall/context_graph.py
 
 from collections import deque
+from dataclasses import dataclass
 from typing import Dict, List, Optional
 
+import numpy as np
+
 
 try:
     import graphviz
@@ -68,6 +71,47 @@ class ContextState:
         self.best_token = None
 
 
+@dataclass
+class CompiledContextGraphCTC:
+    """
+    Flat (CSR) representation of ContextGraphCTC used by the vectorized CTC-based Word Spotter.
+    Outgoing transitions of the state `s` are stored in the range [arc_offsets[s], arc_offsets[s + 1])
+    of `arc_tokens` and `arc_targets` in the same order as in `ContextState.next`.
+
+    Args:
+        arc_offsets: start index of the outgoing transitions for each state [num_states + 1]
+        arc_tokens: token ids of the transitions [num_arcs]
+        arc_targets: indices of the target states of the transitions [num_arcs]
+        is_end: True for the states which finish a context biasing word [num_states]
+        word_ids: index of the word in `words` for end states and -1 otherwise [num_states]
+        words: list of context biasing words
+        blank_token: the id of blank token in ASR model
+        root: index of the root state
+    """
+
+    arc_offsets: np.ndarray
+    arc_tokens: np.ndarray
+    arc_targets: np.ndarray
+    is_end: np.ndarray
+    word_ids: np.ndarray
+    words: List[str]
+    blank_token: int
+    root: int = 0
+
+    @property
+    def num_states(self) -> int:
+        return self.is_end.shape[0]
+
+    @property
+    def num_arcs(self) -> int:
+        return self.arc_tokens.shape[0]
+
+    @property
+    def num_out_arcs(self) -> np.ndarray:
+        """Number of outgoing transitions (including self-loops) for each state"""
+        return np.diff(self.arc_offsets)
+
+
 class ContextGraphCTC:
     """
     Context-biasing graph (based on prefix tree) according to the CTC transition topology (with blank nodes).
@@ -154,6 +198,58 @@ class ContextGraphCTC:
                         prev_node = prev_node.next[self.blank_token].next[token]
                     prev_token = token
 
+    def compile(self) -> CompiledContextGraphCTC:
+        """
+        Compile the pointer-based prefix tree into flat CSR transition arrays.
+        The state index in the compiled graph is equal to `ContextState.index`.
+        Transition tokens must be integer token ids.
+
+        Returns:
+            CompiledContextGraphCTC with the same topology as the current graph
+        """
+        num_states = self.num_nodes + 1
+        num_out_arcs = np.zeros(num_states, dtype=np.int64)
+        arc_tokens = [[] for _ in range(num_states)]
+        arc_targets = [[] for _ in range(num_states)]
+        is_end = np.zeros(num_states, dtype=bool)
+        word_ids = np.full(num_states, -1, dtype=np.int64)
+        words, word_to_id = [], {}
+
+        seen = {self.root.index}
+        queue = deque([self.root])
+        while queue:
+            state = queue.popleft()
+            for token, next_state in state.next.items():
+                if not isinstance(token, (int, np.integer)):
+                    raise ValueError(
+                        f"Only integer token ids are supported in compiled context graph, got `{token}` of type {type(token)}"
+                    )
+                arc_tokens[state.index].append(int(token))
+                arc_targets[state.index].append(next_state.index)
+                if next_state.index not in seen:
+                    seen.add(next_state.index)
+                    queue.append(next_state)
+            num_out_arcs[state.index] = len(state.next)
+            if state.is_end:
+                is_end[state.index] = True
+                if state.word not in word_to_id:
+                    word_to_id[state.word] = len(words)
+                    words.append(state.word)
+                word_ids[state.index] = word_to_id[state.word]
+
+        arc_offsets = np.zeros(num_states + 1, dtype=np.int64)
+        np.cumsum(num_out_arcs, out=arc_offsets[1:])
+        return CompiledContextGraphCTC(
+            arc_offsets=arc_offsets,
+            arc_tokens=np.array([t for tokens in arc_tokens for t in tokens], dtype=np.int64),
+            arc_targets=np.array([t for targets in arc_targets for t in targets], dtype=np.int64),
+            is_end=is_end,
+            word_ids=word_ids,
+            words=words,
+            blank_token=self.blank_token,
+            root=self.root.index,
+        )
+
     def draw(self, title: Optional[str] = None, symbol_table: Optional[Dict[int, str]] = None,) -> "graphviz.Digraph":
         """Visualize a ContextGraph via graphviz.
 
@@ -13,11 +13,15 @@
 # limitations under the License.
 
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import List, Optional, Union
 
 import numpy as np
 
-from nemo.collections.asr.parts.context_biasing.context_graph_ctc import ContextGraphCTC, ContextState
+from nemo.collections.asr.parts.context_biasing.context_graph_ctc import (
+    CompiledContextGraphCTC,
+    ContextGraphCTC,
+    ContextState,
+)
 
 
 @dataclass
@@ -104,6 +108,148 @@ def state_pruning(next_tokens: List[Token]) -> List[Token]:
     return next_tokens_pruned
 
 
+def _running_best_scores(scores: np.ndarray, resets_best: np.ndarray) -> np.ndarray:
+    """
+    Compute the running best score seen before each candidate (the score of the candidate itself for the first one
+    and after a reset) in the same way as the running beam pruning of the Token Passing Algorithm.
+
+    Args:
+        scores: candidate scores in the order of token expansion
+        resets_best: True for candidates which reset the running best score if they set it
+
+    Returns:
+        running best scores for each candidate
+    """
+    running_best = np.empty_like(scores)
+    start = 0
+    while start < scores.shape[0]:
+        segment = scores[start:]
+        segment_max = np.maximum.accumulate(segment)
+        segment_best = np.concatenate([segment[:1], segment_max[:-1]])
+        sets_best = np.concatenate([[True], segment[1:] > segment_max[:-1]])
+        resets = np.flatnonzero(sets_best & resets_best[start:])
+        if resets.shape[0] == 0:
+            running_best[start:] = segment_best
+            break
+        end = resets[0] + 1
+        running_best[start : start + end] = segment_best[:end]
+        start += end
+    return running_best
+
+
+def run_vectorized_token_passing(
+    logprobs: np.ndarray,
+    context_graph: CompiledContextGraphCTC,
+    blank_idx: int = 0,
+    beam_threshold: float = 5.0,
+    cb_weight: float = 3.0,
+    keyword_threshold: float = -5.0,
+    blank_threshold: float = 0.8,
+    non_blank_threshold: float = 0.001,
+) -> List[WSHyp]:
+    """
+    Vectorized version of the Token Passing Algorithm over the compiled (CSR) context graph.
+    All active tokens are stored in flat arrays (state, score, start frame) and are expanded at each frame
+    with gather operations over the graph transitions, so the cost of a frame does not depend on Python-level
+    loops over tokens. Beam and state prunings follow the token order of the pointer-based implementation.
+
+    Args:
+        logprobs: CTC logprobs for one file [Time, Vocab+blank]
+        context_graph: compiled Context-Biasing graph
+        blank_idx: blank index in ASR model
+        beam_threshold: threshold for beam pruning
+        cb_weight: context biasing weight
+        keyword_threshold: auxiliary weight for pruning final hypotheses
+        blank_threshold: blank threshold (probability) for preliminary hypotheses pruning
+        non_blank_threshold: non-blank threshold (probability) for preliminary hypotheses pruning
+
+    Returns:
+        list of spotted hypotheses WSHyp (before overlap and ctc alignment filtering)
+    """
+    arc_offsets = context_graph.arc_offsets
+    arc_tokens = context_graph.arc_tokens
+    arc_targets = context_graph.arc_targets
+    num_out_arcs = context_graph.num_out_arcs
+    is_end = context_graph.is_end
+    # cb_weight is added only for non-blank tokens
+    arc_weights = np.where(arc_tokens != blank_idx, cb_weight, 0.0)
+    # end states which are the last in the branch (only one self-loop transition)
+    is_last = is_end & (num_out_arcs == 1)
+    root_arcs = np.arange(arc_offsets[context_graph.root], arc_offsets[context_graph.root + 1])
+
+    # move threshold probabilities to log space
+    blank_threshold = np.log(blank_threshold)
+    non_blank_threshold = np.log(non_blank_threshold)
+
+    states = np.zeros(0, dtype=np.int64)
+    scores = np.zeros(0, dtype=np.float64)
+    start_frames = np.zeros(0, dtype=np.int64)
+    spotted_words = []
+
+    for frame in range(logprobs.shape[0]):
+        frame_logprobs = logprobs[frame]
+
+        # expand all active tokens by all outgoing transitions of their states
+        counts = num_out_arcs[states]
+        src = np.repeat(np.arange(states.shape[0]), counts)
+        arc_shift = np.arange(src.shape[0]) - np.repeat(np.cumsum(counts) - counts, counts)
+        arcs = arc_offsets[states][src] + arc_shift
+        src_scores = scores[src]
+        src_start_frames = start_frames[src]
+
+        # an empty token (located in the graph root) is added at each new frame to start new word spotting
+        if frame_logprobs[blank_idx] <= blank_threshold:
+            new_root_arcs = root_arcs[frame_logprobs[arc_tokens[root_arcs]] >= non_blank_threshold]
+            arcs = np.concatenate([arcs, new_root_arcs])
+            src_scores = np.concatenate([src_scores, np.zeros(new_root_arcs.shape[0])])
+            src_start_frames = np.concatenate(
+                [src_start_frames, np.full(new_root_arcs.shape[0], frame, dtype=np.int64)]
+            )
+
+        if arcs.shape[0] == 0:
+            states, scores, start_frames = arcs, src_scores, src_start_frames
+            continue
+
+        next_states = arc_targets[arcs]
+        next_scores = src_scores + frame_logprobs[arc_tokens[arcs]] + arc_weights[arcs]
+
+        # running beam pruning - compare each candidate with the running best score of the previous candidates
+        # (the running best is reset when it was set by the spotted word in the last state of the branch)
+        resets_best = is_last[next_states] & (next_scores > keyword_threshold)
+        alive = next_scores >= _running_best_scores(next_scores, resets_best) - beam_threshold
+
+        # add a word as spotted if token reached the end of word state in context graph
+        spotted = alive & is_end[next_states] & (next_scores > keyword_threshold)
+        for idx in np.flatnonzero(spotted):
+            spotted_words.append(
+                WSHyp(
+                    word=context_graph.words[context_graph.word_ids[next_states[idx]]],
+                    score=next_scores[idx].item(),
+                    start_frame=int(src_start_frames[idx]),
+                    end_frame=frame,
+                )
+            )
+        alive &= ~(spotted & is_last[next_states])
+
+        # beam pruning
+        if alive.any():
+            alive &= next_scores > next_scores[alive].max() - beam_threshold
+        alive_idx = np.flatnonzero(alive)
+
+        # state pruning - leave only the best (the first one in case of equal scores) token for each state
+        order = np.lexsort((-next_scores[alive_idx], next_states[alive_idx]))
+        sorted_states = next_states[alive_idx][order]
+        is_first = np.ones(order.shape[0], dtype=bool)
+        is_first[1:] = sorted_states[1:] != sorted_states[:-1]
+        alive_idx = np.sort(alive_idx[order[is_first]])
+
+        states = next_states[alive_idx]
+        scores = next_scores[alive_idx]
+        start_frames = src_start_frames[alive_idx]
+
+    return spotted_words
+
+
 def find_best_hyps(spotted_words: List[WSHyp], intersection_threshold: int = 10) -> List[WSHyp]:
     """
     Some spotted hypotheses may have overlap.
@@ -265,7 +411,7 @@ def filter_wb_hyps(best_hyp_list: List[WSHyp], word_alignment: List[tuple]) -> L
 
 def run_word_spotter(
     logprobs: np.ndarray,
-    context_graph: ContextGraphCTC,
+    context_graph: Union[ContextGraphCTC, CompiledContextGraphCTC],
     asr_model,
     blank_idx: int = 0,
     beam_threshold: float = 5.0,
@@ -280,10 +426,12 @@ def run_word_spotter(
     The algorithm is based on the Token Passing Algorithm (TPA) and uses run, beam and state prunings.
     Blank and non-blank thresholds are used for preliminary hypotheses pruning.
     The algorithm is implemented in log semiring. 
+    In case of compiled context graph (ContextGraphCTC.compile()) the vectorized search is used,
+    which is much faster for large context biasing lists.
     
     Args:
         logprobs: CTC logprobs for one file [Time, Vocab+blank]
-        context_graph: Context-Biasing graph
+        context_graph: Context-Biasing graph (pointer-based or compiled)
         blank_idx: blank index in ASR model
         asr_model: ASR model (ctc or hybrid-transducer-ctc)
         beam_threshold: threshold for beam pruning
@@ -297,6 +445,58 @@ def run_word_spotter(
         final list of spotted hypotheses WSHyp
     """
 
+    if isinstance(context_graph, CompiledContextGraphCTC):
+        spotted_words = run_vectorized_token_passing(
+            logprobs,
+            context_graph,
+            blank_idx=blank_idx,
+            beam_threshold=beam_threshold,
+            cb_weight=cb_weight,
+            keyword_threshold=keyword_threshold,
+            blank_threshold=blank_threshold,
+            non_blank_threshold=non_blank_threshold,
+        )
+    else:
+        spotted_words = run_token_passing(
+            logprobs,
+            context_graph,
+            blank_idx=blank_idx,
+            beam_threshold=beam_threshold,
+            cb_weight=cb_weight,
+            keyword_threshold=keyword_threshold,
+            blank_threshold=blank_threshold,
+            non_blank_threshold=non_blank_threshold,
+        )
+
+    # find best hyps for spotted keywords (in case of hyps overlapping):
+    best_hyp_list = find_best_hyps(spotted_words)
+
+    # filter hyps according to word-level ctc alignment to avoid a high false accept rate
+    ctc_word_alignment = get_ctc_word_alignment(
+        logprobs, asr_model, token_weight=ctc_ali_token_weight, blank_idx=blank_idx
+    )
+    best_hyp_list = filter_wb_hyps(best_hyp_list, ctc_word_alignment)
+
+    return best_hyp_list
+
+
+def run_token_passing(
+    logprobs: np.ndarray,
+    context_graph: ContextGraphCTC,
+    blank_idx: int = 0,
+    beam_threshold: float = 5.0,
+    cb_weight: float = 3.0,
+    keyword_threshold: float = -5.0,
+    blank_threshold: float = 0.8,
+    non_blank_threshold: float = 0.001,
+) -> List[WSHyp]:
+    """
+    Token Passing Algorithm over the pointer-based context graph.
+    See run_word_spotter for the description of arguments.
+
+    Returns:
+        list of spotted hypotheses WSHyp (before overlap and ctc alignment filtering)
+    """
     start_state = context_graph.root
     active_tokens = []
     next_tokens = []
@@ -353,13 +553,4 @@ def run_word_spotter(
         active_tokens = next_tokens
         next_tokens = []
 
-    # find best hyps for spotted keywords (in case of hyps overlapping):
-    best_hyp_list = find_best_hyps(spotted_words)
-
-    # filter hyps according to word-level ctc alignment to avoid a high false accept rate
-    ctc_word_alignment = get_ctc_word_alignment(
-        logprobs, asr_model, token_weight=ctc_ali_token_weight, blank_idx=blank_idx
-    )
-    best_hyp_list = filter_wb_hyps(best_hyp_list, ctc_word_alignment)
-
-    return best_hyp_list
+    return spotted_words
@@ -26,18 +26,109 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Optional, Tuple
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 
 import torch
 
 from nemo.collections.asr.parts.k2.utils import add_self_loops, compose_with_self_loops, intersect_with_self_loops
 
 from nemo.core.utils.k2_guard import k2  # import k2 from guard module
+from nemo.utils import logging
+
+
+def _fsa_tensors(fsa: 'k2.Fsa') -> Dict[str, torch.Tensor]:
+    return {name: value for name, value in fsa.as_dict().items() if isinstance(value, torch.Tensor)}
+
+
+def _has_ragged_attributes(fsa: 'k2.Fsa') -> bool:
+    # ragged attributes (e.g. ragged aux_labels) are not plain tensors and are not saved by SupervisionGraphCache
+    return any(not isinstance(value, torch.Tensor) for value in fsa.as_dict().values())
+
+
+class SupervisionGraphCache(object):
+    """LRU cache of compiled per-utterance supervision graphs.
+    Graphs are keyed by (topology key, token sequence). The total size of the cached graphs
+    is bounded by max_size_MB; the least recently used graphs are evicted first.
+
+    If cache_dir is provided, every compiled graph is also saved there
+    and graphs missing from memory are looked up on disk before being compiled.
+    Graphs with ragged attributes are only cached in memory.
+
+    Args:
+      max_size_MB: memory budget of the in-memory cache.
+      cache_dir: optional directory for on-disk persistence of the compiled graphs.
+    """
+
+    def __init__(self, max_size_MB: float = 256.0, cache_dir: Optional[str] = None):
+        self.max_size = int(max_size_MB * 1024 * 1024)
+        self.cache_dir = cache_dir
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._graphs = OrderedDict()
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._graphs)
+
+    def _path(self, topology_key: str, token_ids: Tuple[int, ...]) -> str:
+        name = hashlib.sha1(repr(token_ids).encode()).hexdigest()
+        return os.path.join(self.cache_dir, topology_key, name + ".pt")
+
+    def get(self, topology_key: str, token_ids: Tuple[int, ...], device: torch.device) -> Optional['k2.Fsa']:
+        key = (topology_key, token_ids)
+        entry = self._graphs.get(key)
+        if entry is not None:
+            self._graphs.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        if self.cache_dir is not None and os.path.exists(self._path(topology_key, token_ids)):
+            graph = k2.Fsa.from_dict(torch.load(self._path(topology_key, token_ids), map_location="cpu")).to(device)
+            self._insert(key, graph)
+            self.hits += 1
+            return graph
+        self.misses += 1
+        return None
+
+    def put(self, topology_key: str, token_ids: Tuple[int, ...], graph: 'k2.Fsa'):
+        if self.cache_dir is not None and not _has_ragged_attributes(graph):
+            path = self._path(topology_key, token_ids)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tensors = {name: value.cpu() for name, value in _fsa_tensors(graph).items()}
+                # write to a temporary file first so that concurrent readers never see a partial graph
+                torch.save(tensors, path + f".{os.getpid()}.tmp")
+                os.replace(path + f".{os.getpid()}.tmp", path)
+        self._insert((topology_key, token_ids), graph)
+
+    def _insert(self, key: Tuple[str, Tuple[int, ...]], graph: 'k2.Fsa'):
+        graph_size = sum(value.numel() * value.element_size() for value in _fsa_tensors(graph).values())
+        if graph_size > self.max_size:
+            return
+        if key in self._graphs:
+            self.size -= self._graphs.pop(key)[1]
+        self._graphs[key] = (graph, graph_size)
+        self.size += graph_size
+        while self.size > self.max_size:
+            _, (_, evicted_size) = self._graphs.popitem(last=False)
+            self.size -= evicted_size
+
+    def clear(self):
+        """Drops the in-memory graphs. Graphs saved to cache_dir are kept."""
+        self._graphs.clear()
+        self.size = 0
 
 
 class CtcTopologyCompiler(object):
     """Default graph compiler.
     It applies its topology to the input token sequence to compile the supervision graph.
+
+    If graph_cache_size_MB or graph_cache_dir is provided, compiled per-utterance graphs are cached
+    with SupervisionGraphCache and only the unseen token sequences of a batch are compiled.
     
     Based on https://github.com/k2-fsa/snowfall/blob/master/snowfall/training/ctc_graph.py
     """
@@ -49,6 +140,8 @@ class CtcTopologyCompiler(object):
         topo_type: str = "default",
         topo_with_self_loops: bool = True,
         device: torch.device = torch.device("cpu"),
+        graph_cache_size_MB: float = 0.0,
+        graph_cache_dir: Optional[str] = None,
     ):
         self.topo_type = topo_type
         self.device = device
@@ -58,14 +151,54 @@ class CtcTopologyCompiler(object):
             self.device
         )
         self.ctc_topo_inv = k2.arc_sort(self.base_graph.invert())
+        self.graph_cache = (
+            SupervisionGraphCache(graph_cache_size_MB, graph_cache_dir)
+            if graph_cache_size_MB > 0 or graph_cache_dir is not None
+            else None
+        )
+        self._topology_key = None  # computed on the first cached compile() call
 
     def to(self, device: torch.device):
         self.ctc_topo_inv = self.ctc_topo_inv.to(device)
         if self.base_graph is not None:
             self.base_graph = self.base_graph.to(device)
         self.device = device
+        if self.graph_cache is not None:
+            self.graph_cache.clear()
+
+    def _get_topology_key(self) -> str:
+        """Fingerprint of everything but the token sequence the compiled graphs depend on."""
+        hasher = hashlib.sha1(type(self).__name__.encode())
+        for name, value in sorted(_fsa_tensors(self.base_graph).items()):
+            hasher.update(name.encode())
+            hasher.update(value.cpu().numpy().tobytes())
+        return hasher.hexdigest()
 
     def compile(self, targets: torch.Tensor, target_lengths: torch.Tensor) -> 'k2.Fsa':
+        if self.graph_cache is None:
+            return self._compile(targets, target_lengths)
+        if self._topology_key is None:
+            self._topology_key = self._get_topology_key()
+
+        token_ids_list = [tuple(t[:l].tolist()) for t, l in zip(targets, target_lengths)]
+        graphs = [self.graph_cache.get(self._topology_key, token_ids, self.device) for token_ids in token_ids_list]
+        missing = [i for i, graph in enumerate(graphs) if graph is None]
+        if len(missing) > 0:
+            # compile all the unseen sequences of the batch at once
+            compiled = self._compile(targets[missing], target_lengths[missing])
+            for j, i in enumerate(missing):
+                graphs[i] = compiled[j]
+                self.graph_cache.put(self._topology_key, token_ids_list[i], graphs[i])
+        if len(missing) < len(graphs):
+            logging.debug(
+                f"Supervision graph cache: {len(graphs) - len(missing)} hits, {len(missing)} misses, "
+                f"{len(self.graph_cache)} graphs of {self.graph_cache.size} bytes cached"
+            )
+        supervision_graphs = k2.create_fsa_vec(graphs)
+        supervision_graphs.requires_grad_(False)
+        return supervision_graphs
+
+    def _compile(self, targets: torch.Tensor, target_lengths: torch.Tensor) -> 'k2.Fsa':
         token_ids_list = [t[:l].tolist() for t, l in zip(targets, target_lengths)]
         label_graph = k2.linear_fsa(token_ids_list).to(self.device)
         label_graph.aux_labels = label_graph.labels.clone()
@@ -80,6 +213,11 @@ class CtcTopologyCompiler(object):
 class CtcNumGraphCompiler(CtcTopologyCompiler):
     """Graph compiler with auxiliary graph to compose with the topology.
     The supervision graph contains the auxiliary graph information.
+
+    An auxiliary graph passed to compile() is identified by the object: the topology is rebuilt and the
+    cache key is computed only when a different object is passed, so a modified graph must be passed
+    as a new object. Graphs are compiled without the cache on the call which changes the auxiliary graph,
+    so auxiliary graphs changing on every call are neither hashed nor cached.
     """
 
     def __init__(
@@ -90,14 +228,22 @@ class CtcNumGraphCompiler(CtcTopologyCompiler):
         topo_with_self_loops: bool = True,
         device: torch.device = torch.device("cpu"),
         aux_graph: Optional['k2.Fsa'] = None,
+        graph_cache_size_MB: float = 0.0,
+        graph_cache_dir: Optional[str] = None,
     ):
-        super().__init__(num_classes, blank, topo_type, topo_with_self_loops, device)
+        super().__init__(
+            num_classes, blank, topo_type, topo_with_self_loops, device, graph_cache_size_MB, graph_cache_dir
+        )
+        self._aux_graph = aux_graph
         if aux_graph is None:
             self.decoding_graph = k2.create_fsa_vec([self.ctc_topo_inv.invert()]).to(self.device)
         else:
             self.base_graph = intersect_with_self_loops(self.ctc_topo_inv, aux_graph).invert_()
             self.base_graph = k2.arc_sort(self.base_graph).to(self.device)
 
+    def _is_new_aux_graph(self, aux_graph: Optional['k2.Fsa']) -> bool:
+        return aux_graph is not None and aux_graph is not self._aux_graph
+
     def compile(
         self, targets: torch.Tensor, target_lengths: torch.Tensor, aux_graph: Optional['k2.Fsa'] = None,
     ) -> 'k2.Fsa':
@@ -105,9 +251,14 @@ class CtcNumGraphCompiler(CtcTopologyCompiler):
             raise ValueError(
                 f"At least one of aux_graph and self.base_graph must be set: {aux_graph}, {self.base_graph}"
             )
-        elif aux_graph is not None:
+        elif self._is_new_aux_graph(aux_graph):
             self.base_graph = intersect_with_self_loops(self.ctc_topo_inv, aux_graph).invert()
             self.base_graph = k2.arc_sort(self.base_graph).to(self.device)
+            self._aux_graph = aux_graph
+            # cached graphs of the previous auxiliary graph are not reused, the key of the new one is computed
+            # when it is passed again
+            self._topology_key = None
+            return self._compile(targets, target_lengths)
         return super().compile(targets, target_lengths)
 
 
@@ -125,8 +276,19 @@ class MmiGraphCompiler(CtcNumGraphCompiler):
         topo_with_self_loops: bool = True,
         device: torch.device = torch.device("cpu"),
         aux_graph: Optional['k2.Fsa'] = None,
+        graph_cache_size_MB: float = 0.0,
+        graph_cache_dir: Optional[str] = None,
     ):
-        super().__init__(num_classes, blank, topo_type, topo_with_self_loops, device, aux_graph)
+        super().__init__(
+            num_classes,
+            blank,
+            topo_type,
+            topo_with_self_loops,
+            device,
+            aux_graph,
+            graph_cache_size_MB,
+            graph_cache_dir,
+        )
         if aux_graph is None:
             self.decoding_graph = k2.create_fsa_vec([self.ctc_topo_inv.invert()]).to(self.device)
         else:
@@ -140,12 +302,13 @@ class MmiGraphCompiler(CtcNumGraphCompiler):
     def compile(
         self, targets: torch.Tensor, target_lengths: torch.Tensor, aux_graph: Optional['k2.Fsa'] = None,
     ) -> Tuple['k2.Fsa', 'k2.Fsa']:
+        is_new_aux_graph = self._is_new_aux_graph(aux_graph)
         supervision_graphs = super().compile(targets, target_lengths, aux_graph)
         if aux_graph is None and self.decoding_graph is None:
             raise ValueError(
                 f"At least one of aux_graph and self.decoding_graph must be set: {aux_graph}, {self.decoding_graph}"
             )
-        elif aux_graph is not None:
+        elif is_new_aux_graph:
             self.decoding_graph = k2.create_fsa_vec([self.base_graph.detach()]).to(self.device)
         return supervision_graphs, self.decoding_graph
 
@@ -156,6 +319,8 @@ class RnntTopologyCompiler(CtcTopologyCompiler):
 
     If max_adapter_length is provided, the maximum adapter length is limited.
 
+    The cached per-utterance graphs are the final ones, already intersected with their adapters.
+
     Note:
       The actual number of classes is `num_classes` + 1 with <eps> as the class 0.
 
@@ -171,17 +336,24 @@ class RnntTopologyCompiler(CtcTopologyCompiler):
         topo_with_self_loops: bool = True,
         device: torch.device = torch.device("cpu"),
         max_adapter_length: int = 0,
+        graph_cache_size_MB: float = 0.0,
+        graph_cache_dir: Optional[str] = None,
     ):
         if topo_type == "compact":
             raise NotImplementedError(f"This compiler does not support topo_type==`compact`.")
-        super().__init__(num_classes, blank, topo_type, topo_with_self_loops, device)
+        super().__init__(
+            num_classes, blank, topo_type, topo_with_self_loops, device, graph_cache_size_MB, graph_cache_dir
+        )
         from nemo.collections.asr.parts.k2.topologies import RnntEmissionAdapterBuilder
 
         self.max_adapter_length = max_adapter_length
         self._builder = RnntEmissionAdapterBuilder(list(range(num_classes)), blank, num_classes)
 
-    def compile(self, targets: torch.Tensor, target_lengths: torch.Tensor) -> 'k2.Fsa':
-        supervision_graphs = add_self_loops(super().compile(targets, target_lengths), self._builder.eps_num, "input")
+    def _get_topology_key(self) -> str:
+        return f"{super()._get_topology_key()}_{self.max_adapter_length}"
+
+    def _compile(self, targets: torch.Tensor, target_lengths: torch.Tensor) -> 'k2.Fsa':
+        supervision_graphs = add_self_loops(super()._compile(targets, target_lengths), self._builder.eps_num, "input")
 
         adapters = self._builder(
             torch.where(target_lengths > self.max_adapter_length, self.max_adapter_length, target_lengths)
@@ -316,5 +316,11 @@ class CtcMmiLoss(MAPLoss, CtcK2Mixin):
         from nemo.collections.asr.parts.k2.graph_compilers import MmiGraphCompiler as compiler
 
         self.graph_compiler = compiler(
-            self.num_classes, self.blank, self.topo_type, self.topo_with_self_loops, aux_graph=lm_graph
+            self.num_classes,
+            self.blank,
+            self.topo_type,
+            self.topo_with_self_loops,
+            aux_graph=lm_graph,
+            graph_cache_size_MB=self.graph_cache_size_MB,
+            graph_cache_dir=self.graph_cache_dir,
         )
@@ -59,17 +59,23 @@ class MLLoss(torch.nn.Module):
         cfg: Optional[DictConfig] = None,
         topo_type: str = "default",
         topo_with_self_loops: bool = True,
+        graph_cache_size_MB: float = 0.0,
+        graph_cache_dir: Optional[str] = None,
     ):
         super().__init__()
         if cfg is not None:
             topo_type = cfg.get("topo_type", topo_type)
             topo_with_self_loops = cfg.get("topo_with_self_loops", topo_with_self_loops)
+            graph_cache_size_MB = cfg.get("graph_cache_size_MB", graph_cache_size_MB)
+            graph_cache_dir = cfg.get("graph_cache_dir", graph_cache_dir)
         self.blank = blank
         self.num_classes = num_classes
         self.reduction = reduction
         self.topo_type = topo_type
         self.topo_with_self_loops = topo_with_self_loops
         self.pad_fsavec = topo_type == "compact"
+        self.graph_cache_size_MB = graph_cache_size_MB
+        self.graph_cache_dir = graph_cache_dir
         self.graph_compiler = None  # expected to be initialized in child classes
 
     def _prepare_graphs_for_intersection(
@@ -148,6 +154,8 @@ class CtcLoss(MLLoss, CtcK2Mixin):
         cfg: Optional[DictConfig] = None,
         topo_type: str = "default",
         topo_with_self_loops: bool = True,
+        graph_cache_size_MB: float = 0.0,
+        graph_cache_dir: Optional[str] = None,
     ):
         super().__init__(
             num_classes=num_classes,
@@ -156,9 +164,16 @@ class CtcLoss(MLLoss, CtcK2Mixin):
             cfg=cfg,
             topo_type=topo_type,
             topo_with_self_loops=topo_with_self_loops,
+            graph_cache_size_MB=graph_cache_size_MB,
+            graph_cache_dir=graph_cache_dir,
         )
         self.graph_compiler = CtcTopologyCompiler(
-            self.num_classes, self.blank, self.topo_type, self.topo_with_self_loops
+            self.num_classes,
+            self.blank,
+            self.topo_type,
+            self.topo_with_self_loops,
+            graph_cache_size_MB=self.graph_cache_size_MB,
+            graph_cache_dir=self.graph_cache_dir,
         )
 
 
@@ -181,6 +196,8 @@ class RnntLoss(MLLoss, RnntK2Mixin):
         topo_with_self_loops: bool = True,
         predictor_window_size: int = 0,
         predictor_step_size: int = 1,
+        graph_cache_size_MB: float = 0.0,
+        graph_cache_dir: Optional[str] = None,
     ):
         super().__init__(
             num_classes=num_classes,
@@ -189,6 +206,8 @@ class RnntLoss(MLLoss, RnntK2Mixin):
             cfg=cfg,
             topo_type=topo_type,
             topo_with_self_loops=topo_with_self_loops,
+            graph_cache_size_MB=graph_cache_size_MB,
+            graph_cache_dir=graph_cache_dir,
         )
         if cfg is not None:
             topo_type = cfg.get("topo_type", topo_type)
@@ -204,6 +223,8 @@ class RnntLoss(MLLoss, RnntK2Mixin):
             self.topo_type,
             self.topo_with_self_loops,
             max_adapter_length=self.predictor_window_size,
+            graph_cache_size_MB=self.graph_cache_size_MB,
+            graph_cache_dir=self.graph_cache_dir,
         )
 
     def forward(
@@ -0,0 +1,185 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Audio banks: noise or RIR corpora decoded once, resampled to a fixed sample rate and packed into a single
+memory-mapped float16 array with an offset index.
+
+A bank is a directory with two files:
+
+* ``samples.bin`` - float16 samples of all manifest entries, concatenated;
+* ``index.json`` - sample rate, offsets of the entries in ``samples.bin`` and their source audio files.
+
+A bank is built once in the main process (e.g. when a perturbation is constructed). It is pickled without the
+array, which is opened read-only with ``np.memmap`` lazily in every process, so dataloader workers share the pages
+of the bank through the page cache and drawing a noise or RIR sample is a slice of the array without decoding
+or opening audio files.
+"""
+
+import hashlib
+import json
+import os
+import random
+import shutil
+import tempfile
+from typing import Optional
+
+import numpy as np
+
+from nemo.collections.asr.parts.preprocessing.segment import AudioSegment
+from nemo.utils import logging
+
+__all__ = ["AudioBank", "get_audio_bank"]
+
+_SAMPLES_FILENAME = "samples.bin"
+_INDEX_FILENAME = "index.json"
+
+
+class AudioBank:
+    """
+    Read-only memory-mapped bank of single-channel audio entries at a fixed sample rate.
+
+    Args:
+        bank_dir: directory of the bank (see `AudioBank.build`)
+    """
+
+    def __init__(self, bank_dir: str):
+        self.bank_dir = bank_dir
+        with open(os.path.join(bank_dir, _INDEX_FILENAME)) as f:
+            index = json.load(f)
+        self.sample_rate = index["sample_rate"]
+        self.offsets = np.asarray(index["offsets"], dtype=np.int64)
+        self.audio_files = index["audio_files"]
+        self._samples = None
+
+    def __getstate__(self):
+        # the memory map is reopened in each process (e.g. dataloader workers) instead of being pickled
+        state = self.__dict__.copy()
+        state["_samples"] = None
+        return state
+
+    @property
+    def samples(self) -> np.ndarray:
+        """Float16 samples of all entries (memory-mapped)"""
+        if self._samples is None:
+            path = os.path.join(self.bank_dir, _SAMPLES_FILENAME)
+            if self.offsets[-1] > 0:
+                self._samples = np.memmap(path, dtype=np.float16, mode="r", shape=(int(self.offsets[-1]),))
+            else:
+                # np.memmap cannot map empty files
+                self._samples = np.zeros(0, dtype=np.float16)
+        return self._samples
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def get(self, idx: int, start: int = 0, num_samples: Optional[int] = None) -> AudioSegment:
+        """
+        Returns samples [start, start + num_samples) of the entry `idx` (the whole entry if num_samples is None).
+        """
+        begin, end = int(self.offsets[idx]), int(self.offsets[idx + 1])
+        begin = min(begin + start, end)
+        if num_samples is not None:
+            end = min(begin + num_samples, end)
+        samples = self.samples[begin:end].astype(np.float32)
+        return AudioSegment(samples, self.sample_rate, audio_file=self.audio_files[idx])
+
+    def sample(self, duration: Optional[float] = None, rng: Optional[random.Random] = None) -> AudioSegment:
+        """
+        Returns a uniformly sampled entry, or a random segment of `duration` seconds of it if the entry is longer.
+
+        Args:
+            duration: duration of the segment in seconds (the whole entry if None)
+            rng: random generator (the global `random` module if None)
+        """
+        rng = rng or random
+        idx = rng.randrange(len(self))
+        if duration is None:
+            return self.get(idx)
+        num_samples = int(round(duration * self.sample_rate))
+        length = int(self.offsets[idx + 1] - self.offsets[idx])
+        start = rng.randint(0, length - num_samples) if length > num_samples else 0
+        return self.get(idx, start=start, num_samples=num_samples)
+
+    @staticmethod
+    def build(manifest, bank_dir: str, sample_rate: int) -> "AudioBank":
+        """
+        Decodes all entries of a manifest, resamples them to `sample_rate` and writes them into a bank.
+        The bank is written to a temporary directory and moved to `bank_dir` when complete,
+        so concurrent builders (e.g. several ranks) never observe a partial bank.
+
+        Args:
+            manifest: audio collection (e.g. `collections.ASRAudioText`) with audio_file, offset and duration
+            bank_dir: output directory
+            sample_rate: sample rate of the bank
+
+        Returns:
+            the built bank
+        """
+        parent_dir = os.path.dirname(os.path.abspath(bank_dir))
+        os.makedirs(parent_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=parent_dir, prefix=".tmp_audio_bank_")
+        try:
+            offsets, audio_files = [0], []
+            with open(os.path.join(tmp_dir, _SAMPLES_FILENAME), "wb") as f:
+                for entry in manifest.data:
+                    segment = AudioSegment.from_file(
+                        entry.audio_file,
+                        target_sr=sample_rate,
+                        offset=0 if entry.offset is None else entry.offset,
+                        duration=0 if entry.duration is None else entry.duration,
+                    )
+                    if segment.num_channels != 1:
+                        raise ValueError(
+                            f"Audio banks support only single-channel audio, "
+                            f"got {segment.num_channels} channels in {entry.audio_file}."
+                        )
+                    f.write(segment.samples.astype(np.float16).tobytes())
+                    offsets.append(offsets[-1] + len(segment.samples))
+                    audio_files.append(entry.audio_file)
+            with open(os.path.join(tmp_dir, _INDEX_FILENAME), "w") as f:
+                json.dump({"sample_rate": sample_rate, "offsets": offsets, "audio_files": audio_files}, f)
+            try:
+                os.rename(tmp_dir, bank_dir)
+            except OSError:
+                # another process has built the same bank in the meantime
+                if not os.path.exists(os.path.join(bank_dir, _INDEX_FILENAME)):
+                    raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return AudioBank(bank_dir)
+
+
+def _manifest_hash(manifest) -> str:
+    hash_obj = hashlib.sha1()
+    for entry in manifest.data:
+        hash_obj.update(json.dumps([entry.audio_file, entry.offset, entry.duration]).encode())
+    return hash_obj.hexdigest()[:16]
+
+
+def get_audio_bank(manifest, cache_dir: str, sample_rate: int) -> AudioBank:
+    """
+    Returns the bank of a manifest at a sample rate from `cache_dir`, building it on first use.
+    Banks are keyed by the manifest entries and the sample rate, so changing either builds a new bank.
+
+    Args:
+        manifest: audio collection (e.g. `collections.ASRAudioText`)
+        cache_dir: directory of cached banks
+        sample_rate: sample rate of the bank
+    """
+    bank_dir = os.path.join(cache_dir, f"{_manifest_hash(manifest)}_{sample_rate}")
+    if os.path.exists(os.path.join(bank_dir, _INDEX_FILENAME)):
+        return AudioBank(bank_dir)
+    logging.info(f"Building audio bank of {len(manifest.data)} files at {sample_rate} Hz in {bank_dir}")
+    return AudioBank.build(manifest, bank_dir, sample_rate)
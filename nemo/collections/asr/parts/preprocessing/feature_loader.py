@@ -11,29 +11,62 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-from typing import Optional
+from typing import List, Optional
 
 import numpy as np
 import torch
 
+from nemo.collections.asr.parts.preprocessing.feature_store import (
+    FeatureStore,
+    FeatureStoreShardSampler,
+    get_feature_store_key,
+)
+
 
 class ExternalFeatureLoader(object):
     """Feature loader that load external features store in certain format. 
-    Currently support pickle, npy and npz format.
+    Currently support pickle, npy and npz format, and a sharded feature store
+    (see `nemo.collections.asr.parts.preprocessing.feature_store`).
     """
 
     def __init__(
-        self, augmentor: Optional["nemo.collections.asr.parts.perturb.FeatureAugmentor"] = None,
+        self,
+        augmentor: Optional["nemo.collections.asr.parts.perturb.FeatureAugmentor"] = None,
+        feature_store_dir: Optional[str] = None,
     ):
         """
         Feature loader
+
+        Args:
+            augmentor: optional feature augmentor.
+            feature_store_dir: optional directory of a feature store. Features of the files whose file id is
+                in the store are read from the store instead of the file.
         """
         self.augmentor = augmentor
+        self.feature_store = FeatureStore(feature_store_dir) if feature_store_dir else None
+
+    def get_shard_sampler(
+        self, feature_files: List[str], shuffle: bool = True, seed: int = 0, rank: int = 0, world_size: int = 1
+    ) -> Optional[FeatureStoreShardSampler]:
+        """
+        Sampler of the items with the given feature files which reads the feature store shard by shard,
+        see `FeatureStoreShardSampler`. None if the loader does not use a feature store.
+        """
+        if self.feature_store is None:
+            return None
+        return FeatureStoreShardSampler(
+            feature_files, self.feature_store, shuffle=shuffle, seed=seed, rank=rank, world_size=world_size
+        )
 
     def load_feature_from_file(self, file_path: str):
         """Load samples from file_path and convert it to be of type float32
         file_path (str) is the path of the file that stores feature/sample.
         """
+        if self.feature_store is not None:
+            key = get_feature_store_key(file_path)
+            if key in self.feature_store:
+                # the conversion from the memory mapped store is the only copy of the features
+                return self.feature_store[key].astype(np.float32)
 
         if file_path.endswith(".pt") or file_path.endswith(".pth"):
             samples = torch.load(file_path, map_location="cpu").float().numpy()
@@ -68,6 +101,6 @@ class ExternalFeatureLoader(object):
         if self.augmentor:
             # augmentor for external features. Here possible augmentor for external embedding feature is Diaconis Augmentation and might be implemented later
             self.augmentor.perturb(feature_segment)
-            return torch.tensor(feature_segment, dtype=torch.float)
+            return torch.as_tensor(feature_segment, dtype=torch.float)
 
-        return torch.tensor(feature_segment, dtype=torch.float)
+        return torch.as_tensor(feature_segment, dtype=torch.float)
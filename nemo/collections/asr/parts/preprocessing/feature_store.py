@@ -0,0 +1,335 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Sharded store of precomputed features.
+
+A feature store is a directory with one or more parts. Each part is written by a single `FeatureStoreWriter`
+and consists of the shard files `<part>_shard_<index>.bin`, which contain the features of many utterances as
+contiguous arrays, and the index `<part>_index.npz`, which contains the key, shard, offset and shape of every
+utterance. Parts can be written in parallel by several processes and are merged when the store is opened.
+
+Features are read through memory maps, so loading an utterance is a view into the page cache instead of
+opening a file per utterance.
+"""
+import glob
+import os
+from typing import Iterator, List, Sequence, Tuple
+
+import numpy as np
+import torch
+from torch.utils.data.distributed import DistributedSampler
+
+__all__ = [
+    'FeatureStore',
+    'FeatureStoreWriter',
+    'FeatureStoreShardSampler',
+    'get_feature_store_key',
+    'shard_shuffled_order',
+]
+
+INDEX_SUFFIX = '_index.npz'
+
+
+def get_feature_store_key(feature_file: str) -> str:
+    """
+    Key of the features in a feature store, the file id of the feature (or audio) file.
+    This is the same file id that is used by the manifest collections when indexing by file id.
+    """
+    return os.path.splitext(os.path.basename(feature_file))[0]
+
+
+class FeatureStoreWriter:
+    """
+    Writes one part of a feature store.
+
+    Args:
+        store_dir: directory of the feature store.
+        part_name: name of the part, must be unique for every writer of the same store.
+        max_shard_size_MB: a new shard file is started when the current one exceeds this size.
+        dtype: data type of the stored features, float16 halves the size of float32 features.
+    """
+
+    def __init__(
+        self, store_dir: str, part_name: str = 'part_0', max_shard_size_MB: float = 1024.0, dtype=np.float16,
+    ):
+        os.makedirs(store_dir, exist_ok=True)
+        self.store_dir = store_dir
+        self.part_name = part_name
+        self.max_shard_size = int(max_shard_size_MB * 1024 * 1024)
+        self.dtype = np.dtype(dtype)
+
+        self._keys = []
+        self._shards = []
+        self._offsets = []
+        self._shapes = []
+        self._shard_names = []
+        self._file = None
+        self._shard_size = 0
+
+    def _open_shard(self):
+        if self._file is not None:
+            self._file.close()
+        shard_name = f'{self.part_name}_shard_{len(self._shard_names):05d}.bin'
+        self._file = open(os.path.join(self.store_dir, shard_name), 'wb')
+        self._shard_names.append(shard_name)
+        self._shard_size = 0
+
+    def add(self, key: str, features: np.ndarray):
+        """
+        Append the features of an utterance.
+
+        Args:
+            key: key of the utterance, see `get_feature_store_key`.
+            features: features of the utterance, usually of shape [D, T].
+        """
+        if torch.is_tensor(features):
+            features = features.detach().cpu().numpy()
+        features = np.ascontiguousarray(features, dtype=self.dtype)
+        if features.ndim != 2:
+            raise ValueError(f"Expected features of shape [D, T], got shape {features.shape} for {key}")
+        if self._file is None or (self._shard_size > 0 and self._shard_size + features.nbytes > self.max_shard_size):
+            self._open_shard()
+
+        self._keys.append(key)
+        self._shards.append(len(self._shard_names) - 1)
+        self._offsets.append(self._shard_size // self.dtype.itemsize)
+        self._shapes.append(features.shape)
+        self._file.write(features.tobytes())
+        self._shard_size += features.nbytes
+
+    def close(self) -> str:
+        """
+        Close the current shard and write the index of the part.
+
+        Returns:
+            Path of the index file.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        index_filepath = os.path.join(self.store_dir, self.part_name + INDEX_SUFFIX)
+        np.savez(
+            index_filepath,
+            keys=np.array(self._keys, dtype=str),
+            shards=np.array(self._shards, dtype=np.int32),
+            offsets=np.array(self._offsets, dtype=np.int64),
+            shapes=np.array(self._shapes, dtype=np.int32).reshape(-1, 2),
+            shard_names=np.array(self._shard_names, dtype=str),
+            dtype=np.array(self.dtype.str),
+        )
+        return index_filepath
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        elif self._file is not None:
+            # the index of an incomplete part is not written
+            self._file.close()
+
+
+class FeatureStore:
+    """
+    Random access to the features in a feature store written by `FeatureStoreWriter`.
+
+    The shard files are memory mapped lazily in every process, so the store can be passed to data loader
+    workers. Indexing the store returns a copy-on-write view of the stored features without copying them.
+
+    Args:
+        store_dir: directory of the feature store.
+    """
+
+    def __init__(self, store_dir: str):
+        index_files = sorted(glob.glob(os.path.join(store_dir, '*' + INDEX_SUFFIX)))
+        if not index_files:
+            raise FileNotFoundError(f"No feature store index found in {store_dir}")
+        self.store_dir = store_dir
+
+        keys, shards, offsets, shapes = [], [], [], []
+        self._shard_paths = []
+        dtype = None
+        for index_file in index_files:
+            with np.load(index_file) as index:
+                if dtype is not None and index['dtype'].item() != dtype:
+                    raise ValueError(f"All parts of the feature store must have the same dtype, got {index_file}")
+                dtype = index['dtype'].item()
+                keys.append(index['keys'])
+                shards.append(index['shards'] + len(self._shard_paths))
+                offsets.append(index['offsets'])
+                shapes.append(index['shapes'])
+                self._shard_paths.extend(os.path.join(store_dir, name) for name in index['shard_names'])
+
+        self.dtype = np.dtype(dtype)
+        self.keys = np.concatenate(keys)
+        self.shards = np.concatenate(shards)
+        self.offsets = np.concatenate(offsets)
+        self.shapes = np.concatenate(shapes)
+        self._key_to_index = {key: idx for idx, key in enumerate(self.keys.tolist())}
+        if len(self._key_to_index) != len(self.keys):
+            raise ValueError(f"Feature store {store_dir} contains duplicate keys")
+        self._memmaps = {}
+
+    @property
+    def num_shards(self) -> int:
+        return len(self._shard_paths)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._key_to_index
+
+    def _get_memmap(self, shard: int) -> np.memmap:
+        if shard not in self._memmaps:
+            self._memmaps[shard] = np.memmap(self._shard_paths[shard], dtype=self.dtype, mode='c')
+        return self._memmaps[shard]
+
+    def get_by_index(self, index: int) -> np.ndarray:
+        """Features of the `index`-th utterance of the store."""
+        shape = self.shapes[index]
+        offset = self.offsets[index]
+        data = self._get_memmap(self.shards[index])
+        return data[offset : offset + shape[0] * shape[1]].reshape(shape)
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        return self.get_by_index(self._key_to_index[key])
+
+    def get_shard_of_key(self, key: str) -> int:
+        return int(self.shards[self._key_to_index[key]])
+
+    def iter_shards(
+        self, shuffle: bool = True, seed: int = 0, rank: int = 0, world_size: int = 1
+    ) -> Iterator[Tuple[str, np.ndarray]]:
+        """
+        Iterate over the utterances shard by shard, so every shard is read sequentially.
+        Shards are split between the ranks, and the order of the shards and of the utterances
+        within each shard are shuffled.
+
+        Yields:
+            Tuples of key and features.
+        """
+        for index in shard_shuffled_order(self.shards, shuffle=shuffle, seed=seed, rank=rank, world_size=world_size):
+            yield self.keys[index], self.get_by_index(index)
+
+    def __getstate__(self):
+        # memory maps are opened again in every process
+        state = self.__dict__.copy()
+        state['_memmaps'] = {}
+        return state
+
+
+def shard_shuffled_order(
+    shards: Sequence[int], shuffle: bool = True, seed: int = 0, rank: int = 0, world_size: int = 1
+) -> List[int]:
+    """
+    Order of the items grouped by shard. The order of the shards and the items of every shard are shuffled,
+    and the order is split into equal contiguous parts of the ranks. The order is padded by repeating its
+    beginning, so every rank gets the same number of items, `ceil(len(shards) / world_size)`, and reads
+    a few consecutive shards sequentially.
+
+    Args:
+        shards: shard of every item.
+        shuffle: whether to shuffle the shards and the items within each shard.
+        seed: seed of the shuffling, e.g. the epoch.
+        rank: rank of the current process.
+        world_size: number of processes.
+
+    Returns:
+        List of item indices of the given rank.
+    """
+    shards = np.asarray(shards)
+    rng = np.random.default_rng(seed)
+    # group the items by shard with a single sort
+    sorted_indices = np.argsort(shards, kind='stable')
+    _, shard_starts = np.unique(shards[sorted_indices], return_index=True)
+    groups = np.split(sorted_indices, shard_starts[1:])
+    if shuffle:
+        groups = [rng.permutation(groups[group_idx]) for group_idx in rng.permutation(len(groups))]
+    order = np.concatenate(groups)
+
+    num_samples = _num_samples_per_rank(len(order), world_size)
+    order = np.resize(order, num_samples * world_size)
+    return order[rank * num_samples : (rank + 1) * num_samples].tolist()
+
+
+def _num_samples_per_rank(num_items: int, world_size: int) -> int:
+    return -(-num_items // world_size)
+
+
+class FeatureStoreShardSampler(DistributedSampler):
+    """
+    Sampler of a feature dataset that reads a feature store shard by shard.
+    Each epoch visits the shards in a new random order, see `shard_shuffled_order`.
+    Items whose features are not in the store are grouped as a separate shard.
+
+    The sampler splits the items between the ranks itself. It is a `DistributedSampler`, so that Lightning
+    does not wrap it into another distributed sampler.
+
+    Args:
+        feature_files: feature file of every item of the dataset.
+        feature_store: feature store with the features of the dataset.
+        shuffle: whether to shuffle the shards and the items within each shard.
+        seed: base seed of the shuffling.
+        rank: rank of the current process.
+        world_size: number of processes.
+    """
+
+    def __init__(
+        self,
+        feature_files: Sequence[str],
+        feature_store: FeatureStore,
+        shuffle: bool = True,
+        seed: int = 0,
+        rank: int = 0,
+        world_size: int = 1,
+    ):
+        keys = [get_feature_store_key(f) for f in feature_files]
+        shards = [feature_store.get_shard_of_key(key) if key in feature_store else -1 for key in keys]
+        self._setup(shards, shuffle, seed, rank, world_size)
+
+    @classmethod
+    def from_shards(
+        cls, shards: Sequence[int], shuffle: bool = True, seed: int = 0, rank: int = 0, world_size: int = 1
+    ) -> 'FeatureStoreShardSampler':
+        """Creates a sampler from the shard id of every item of the dataset, -1 for items outside the store."""
+        sampler = cls.__new__(cls)
+        sampler._setup(shards, shuffle, seed, rank, world_size)
+        return sampler
+
+    def _setup(self, shards: Sequence[int], shuffle: bool, seed: int, rank: int, world_size: int):
+        self.shards = list(shards)
+        self.shuffle = shuffle
+        self.seed = seed
+        self.rank = rank
+        self.world_size = world_size
+        self.epoch = 0
+
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(
+            shard_shuffled_order(
+                self.shards,
+                shuffle=self.shuffle,
+                seed=self.seed + self.epoch,
+                rank=self.rank,
+                world_size=self.world_size,
+            )
+        )
+
+    def __len__(self) -> int:
+        return _num_samples_per_rank(len(self.shards), self.world_size)
@@ -43,6 +43,7 @@ import torch.nn as nn
 
 from nemo.collections.asr.parts.preprocessing.perturb import AudioAugmentor
 from nemo.collections.asr.parts.preprocessing.segment import AudioSegment
+from nemo.collections.common.data.pipeline_metrics import data_pipeline_stage
 from nemo.utils import logging
 
 try:
@@ -199,21 +200,22 @@ class WaveformFeaturizer(object):
         channel_selector=None,
         normalize_db=None,
     ):
-        audio = AudioSegment.from_file(
-            file_path,
-            target_sr=self.sample_rate,
-            int_values=self.int_values,
-            offset=offset,
-            duration=duration,
-            trim=trim,
-            trim_ref=trim_ref,
-            trim_top_db=trim_top_db,
-            trim_frame_length=trim_frame_length,
-            trim_hop_length=trim_hop_length,
-            orig_sr=orig_sr,
-            channel_selector=channel_selector,
-            normalize_db=normalize_db,
-        )
+        with data_pipeline_stage("audio_decode"):
+            audio = AudioSegment.from_file(
+                file_path,
+                target_sr=self.sample_rate,
+                int_values=self.int_values,
+                offset=offset,
+                duration=duration,
+                trim=trim,
+                trim_ref=trim_ref,
+                trim_top_db=trim_top_db,
+                trim_frame_length=trim_frame_length,
+                trim_hop_length=trim_hop_length,
+                orig_sr=orig_sr,
+                channel_selector=channel_selector,
+                normalize_db=normalize_db,
+            )
         return self.process_segment(audio)
 
     def process_segment(self, audio_segment):
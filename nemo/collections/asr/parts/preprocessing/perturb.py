@@ -46,7 +46,9 @@ import numpy as np
 import soundfile as sf
 from scipy import signal
 
+from nemo.collections.asr.parts.preprocessing.audio_bank import get_audio_bank
 from nemo.collections.asr.parts.preprocessing.segment import AudioSegment
+from nemo.collections.common.data.pipeline_metrics import data_pipeline_stage
 from nemo.collections.common.parts.preprocessing import collections, parsers
 from nemo.core.classes import IterableDataset
 from nemo.utils import logging
@@ -88,6 +90,37 @@ def read_one_audiosegment(manifest, target_sr, tarred_audio=False, audio_dataset
     return AudioSegment.from_file(audio_file, target_sr=target_sr, offset=offset, duration=duration)
 
 
+class _AudioBankMixin:
+    """
+    Draws noise or RIR samples from a memory-mapped audio bank (see `audio_bank.AudioBank`) instead of decoding
+    manifest entries. The bank is built (or opened from the cache in `bank_dir`) once at the target sample rate
+    when the perturbation is constructed, i.e. in the main process; dataloader workers receive it without the
+    memory map and only reopen the map.
+    """
+
+    def _init_audio_bank(self, bank_dir: Optional[str], bank_sample_rate: int):
+        self._bank = None
+        if bank_dir:
+            if self._tarred_audio:
+                raise ValueError("Audio banks are built from manifest audio files and do not support tarred audio.")
+            self._bank = get_audio_bank(self._manifest, bank_dir, bank_sample_rate)
+
+    def sample_audio_segment(self, target_sr: int, duration: Optional[float] = None) -> AudioSegment:
+        """
+        Returns a random audio sample, or a random segment of `duration` seconds of it when an audio bank is used.
+        """
+        if self._bank is not None:
+            if target_sr != self._bank.sample_rate:
+                raise ValueError(
+                    f"Audio bank in {self._bank.bank_dir} has sample rate {self._bank.sample_rate}, "
+                    f"but audio at {target_sr} Hz is perturbed. Set `bank_sample_rate` to the data sample rate."
+                )
+            return self._bank.sample(duration=duration)
+        return read_one_audiosegment(
+            self._manifest, target_sr, tarred_audio=self._tarred_audio, audio_dataset=self._data_iterator
+        )
+
+
 class Perturbation(object):
     def max_augmentation_length(self, length):
         return length
@@ -336,7 +369,7 @@ class GainPerturbation(Perturbation):
         data._samples = data._samples * (10.0 ** (gain / 20.0))
 
 
-class ImpulsePerturbation(Perturbation):
+class ImpulsePerturbation(_AudioBankMixin, Perturbation):
     """
     Convolves audio with a Room Impulse Response.
 
@@ -347,6 +380,10 @@ class ImpulsePerturbation(Perturbation):
         normalize_impulse (bool): Normalize impulse response to zero mean and amplitude 1
         shift_impulse (bool): Shift impulse response to adjust for delay at the beginning
         rng (int): Random seed. Default is None
+        bank_dir (str): Directory of cached audio banks. If set, RIRs are decoded once into a memory-mapped bank
+            and sampled from it instead of being read from disk on every application. Default is None
+        bank_sample_rate (int): Sample rate of the audio bank, which must match the sample rate of the perturbed
+            audio. The bank is built when the perturbation is constructed. Default is 16000
     """
 
     def __init__(
@@ -357,6 +394,8 @@ class ImpulsePerturbation(Perturbation):
         normalize_impulse=False,
         shift_impulse=False,
         rng=None,
+        bank_dir=None,
+        bank_sample_rate=16000,
     ):
         self._manifest = collections.ASRAudioText(manifest_path, parser=parsers.make_parser([]), index_by_file_id=True)
         self._audiodataset = None
@@ -370,16 +409,12 @@ class ImpulsePerturbation(Perturbation):
             self._audiodataset = AugmentationDataset(manifest_path, audio_tar_filepaths, shuffle_n)
             self._data_iterator = iter(self._audiodataset)
 
+        self._init_audio_bank(bank_dir, bank_sample_rate)
         self._rng = rng
         random.seed(self._rng) if rng else None
 
     def perturb(self, data):
-        impulse = read_one_audiosegment(
-            self._manifest,
-            data.sample_rate,
-            tarred_audio=self._tarred_audio,
-            audio_dataset=self._data_iterator,
-        )
+        impulse = self.sample_audio_segment(data.sample_rate)
 
         # normalize if necessary
         if self._normalize_impulse:
@@ -448,7 +483,7 @@ class ShiftPerturbation(Perturbation):
             data._samples[-shift_samples:] = 0
 
 
-class NoisePerturbation(Perturbation):
+class NoisePerturbation(_AudioBankMixin, Perturbation):
     """
     Perturbation that adds noise to input audio.
 
@@ -461,6 +496,10 @@ class NoisePerturbation(Perturbation):
         shuffle_n (int): Shuffle parameter for shuffling buffered files from the tar files
         orig_sr (int): Original sampling rate of the noise files
         rng (int): Random seed. Default is None
+        bank_dir (str): Directory of cached audio banks. If set, noise files are decoded once into a memory-mapped
+            bank and random noise segments are sliced from it instead of being read from disk. Default is None
+        bank_sample_rate (int): Sample rate of the audio bank, which must match the sample rate of the perturbed
+            audio. The bank is built when the perturbation is constructed. Default is 16000
     """
 
     def __init__(
@@ -473,6 +512,8 @@ class NoisePerturbation(Perturbation):
         audio_tar_filepaths=None,
         shuffle_n=100,
         orig_sr=16000,
+        bank_dir=None,
+        bank_sample_rate=16000,
     ):
         self._manifest = collections.ASRAudioText(manifest_path, parser=parsers.make_parser([]), index_by_file_id=True)
         self._audiodataset = None
@@ -485,6 +526,7 @@ class NoisePerturbation(Perturbation):
             self._audiodataset = AugmentationDataset(manifest_path, audio_tar_filepaths, shuffle_n)
             self._data_iterator = iter(self._audiodataset)
 
+        self._init_audio_bank(bank_dir, bank_sample_rate)
         random.seed(rng) if rng else None
         self._rng = rng
 
@@ -497,9 +539,7 @@ class NoisePerturbation(Perturbation):
         return self._orig_sr
 
     def get_one_noise_sample(self, target_sr):
-        return read_one_audiosegment(
-            self._manifest, target_sr, tarred_audio=self._tarred_audio, audio_dataset=self._data_iterator
-        )
+        return self.sample_audio_segment(target_sr)
 
     def perturb(self, data, ref_mic=0):
         """
@@ -507,12 +547,8 @@ class NoisePerturbation(Perturbation):
             data (AudioSegment): audio data
             ref_mic (int): reference mic index for scaling multi-channel audios
         """
-        noise = read_one_audiosegment(
-            self._manifest,
-            data.sample_rate,
-            tarred_audio=self._tarred_audio,
-            audio_dataset=self._data_iterator,
-        )
+        # with a bank, only a random segment of the length of the data is read
+        noise = self.sample_audio_segment(data.sample_rate, duration=data.duration)
         self.perturb_with_input_noise(data, noise, ref_mic=ref_mic)
 
     def perturb_with_input_noise(self, data, noise, data_rms=None, ref_mic=0):
@@ -891,6 +927,8 @@ class RirAndNoisePerturbation(Perturbation):
         bg_noise_tar_filepaths: Tar files, if noise files are tarred
         bg_orig_sample_rate: Original sampling rate of background noise audio
         rng: Random seed. Default is None
+        bank_dir: Directory of cached audio banks for RIRs and noises (see `NoisePerturbation`). Default is None
+        bank_sample_rate: Sample rate of the audio banks. Default is 16000
 
     """
 
@@ -916,6 +954,8 @@ class RirAndNoisePerturbation(Perturbation):
         bg_noise_tar_filepaths=None,
         bg_orig_sample_rate=None,
         rng=None,
+        bank_dir=None,
+        bank_sample_rate=16000,
     ):
 
         self._rir_prob = rir_prob
@@ -927,6 +967,8 @@ class RirAndNoisePerturbation(Perturbation):
             audio_tar_filepaths=rir_tar_filepaths,
             shuffle_n=rir_shuffle_n,
             shift_impulse=True,
+            bank_dir=bank_dir,
+            bank_sample_rate=bank_sample_rate,
         )
         self._fg_noise_perturbers = None
         self._bg_noise_perturbers = None
@@ -943,6 +985,8 @@ class RirAndNoisePerturbation(Perturbation):
                     max_snr_db=max_snr_db[i],
                     audio_tar_filepaths=noise_tar_filepaths[i],
                     orig_sr=orig_sr,
+                    bank_dir=bank_dir,
+                    bank_sample_rate=bank_sample_rate,
                 )
         self._max_additions = max_additions
         self._max_duration = max_duration
@@ -959,6 +1003,8 @@ class RirAndNoisePerturbation(Perturbation):
                     max_snr_db=bg_max_snr_db[i],
                     audio_tar_filepaths=bg_noise_tar_filepaths[i],
                     orig_sr=orig_sr,
+                    bank_dir=bank_dir,
+                    bank_sample_rate=bank_sample_rate,
                 )
 
         self._apply_noise_rir = apply_noise_rir
@@ -989,7 +1035,7 @@ class RirAndNoisePerturbation(Perturbation):
                 orig_sr = max(self._bg_noise_perturbers.keys())
             bg_perturber = self._bg_noise_perturbers[orig_sr]
 
-            noise = bg_perturber.get_one_noise_sample(data.sample_rate)
+            noise = bg_perturber.sample_audio_segment(data.sample_rate, duration=data.duration)
             bg_perturber.perturb_with_input_noise(data, noise, data_rms=data_rms)
 
 
@@ -1146,9 +1192,10 @@ class AudioAugmentor(object):
         self._pipeline = perturbations if perturbations is not None else []
 
     def perturb(self, segment):
-        for prob, p in self._pipeline:
-            if random.random() < prob:
-                p.perturb(segment)
+        with data_pipeline_stage("perturb"):
+            for prob, p in self._pipeline:
+                if random.random() < prob:
+                    p.perturb(segment)
         return
 
     def max_augmentation_length(self, length):
@@ -15,7 +15,7 @@
 import copy
 import os
 import shutil
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from typing import IO, Dict, List, Optional, Tuple
 
 import numpy as np
@@ -141,6 +141,49 @@ def get_subset_of_audio_manifest(
     return audio_manifest
 
 
+class AudioReadBuffer(OrderedDict):
+    """
+    Hash-table for `read_audio_from_buffer` and `get_random_offset_index` with least-recently-used eviction.
+    Unlike a plain dictionary that is cleared after every session, this buffer can be kept across sessions,
+    so the same utterances are not decoded again by the same worker. Entries are evicted when the total size
+    of the buffered audio exceeds `max_size_MB`.
+
+    Args:
+        max_size_MB (float): Maximum total size of the buffered audio in megabytes.
+    """
+
+    def __init__(self, max_size_MB: float):
+        super().__init__()
+        self.max_size = int(max_size_MB * 1024 * 1024)
+        self.size = 0
+
+    @staticmethod
+    def _get_item_size(value) -> int:
+        return sum(
+            item.numel() * item.element_size() if torch.is_tensor(item) else item.nbytes
+            for item in value
+            if torch.is_tensor(item) or isinstance(item, np.ndarray)
+        )
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key in self:
+            self.size -= self._get_item_size(super().__getitem__(key))
+        super().__setitem__(key, value)
+        self.size += self._get_item_size(value)
+        while self.size > self.max_size and len(self) > 1:
+            _, evicted = self.popitem(last=False)
+            self.size -= self._get_item_size(evicted)
+
+    def __reduce__(self):
+        # buffered audio is not sent to other processes
+        return self.__class__, (self.max_size / (1024 * 1024),)
+
+
 def read_audio_from_buffer(
     audio_manifest: dict,
     buffer_dict: dict,
@@ -175,6 +218,8 @@ def read_audio_from_buffer(
     audio_file_id = f"{audio_manifest['audio_filepath']}#{offset_index}"
     if audio_file_id in buffer_dict:
         audio_file, sr, audio_manifest = buffer_dict[audio_file_id]
+        # the buffer may be kept across sessions generated on different devices
+        audio_file = audio_file.to(device)
     else:
         if read_subset:
             audio_manifest = get_subset_of_audio_manifest(
@@ -820,6 +865,9 @@ class DataAnnotator(object):
     def write_annotation_files(self, basepath: str, filename: str, meta_data: dict):
         """
         Write all annotation files: RTTM, JSON, CTM, TXT, and META.
+        The files are written by the process that generates the session, so with several workers the annotation
+        files of different sessions are written in parallel. Only the filelists are collected in the main process
+        and written once by `write_filelist_files`.
 
         Args:
             basepath (str): Basepath for output files.
@@ -0,0 +1,222 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Speaker embedding extraction for all scales of multiscale diarization in one pass over the audio.
+
+The per-scale extraction of `ClusteringDiarizer` runs the test dataloader of the speaker model over the subsegments
+manifest of every scale, so every recording is decoded once per subsegment and scale. `MultiscaleEmbeddingExtractor`
+decodes every recording once, slices the subsegments of all scales from the waveform, and batches the windows of a
+scale across recordings. Windows shorter than the window length of their scale are repeated up to the window length,
+as the fixed-length collate function of the speaker label dataset does with the longest window of a batch.
+"""
+
+import json
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+import torch
+from tqdm import tqdm
+
+from nemo.collections.asr.data.audio_to_label import repeat_signal
+from nemo.collections.asr.parts.preprocessing.segment import AudioSegment
+from nemo.collections.asr.parts.utils.speaker_utils import get_uniqname_from_filepath
+from nemo.utils import logging
+
+__all__ = ['MultiscaleEmbeddingExtractor']
+
+
+class _RecordingDataset(torch.utils.data.Dataset):
+    """Decodes recordings at the sample rate of the speaker model, one recording per item."""
+
+    def __init__(self, audio_filepaths: List[str], sample_rate: int):
+        self.audio_filepaths = audio_filepaths
+        self.sample_rate = sample_rate
+
+    def __len__(self):
+        return len(self.audio_filepaths)
+
+    def __getitem__(self, index):
+        audio_filepath = self.audio_filepaths[index]
+        audio = AudioSegment.from_file(audio_filepath, target_sr=self.sample_rate)
+        return audio_filepath, torch.tensor(audio.samples, dtype=torch.float32)
+
+
+class MultiscaleEmbeddingExtractor:
+    """
+    Extracts speaker embeddings of the subsegments of all scales, decoding every recording only once.
+
+    Embeddings are cached by recording, window length and subsegment, so repeated extractions with the same
+    extractor, e.g. when diarizing a set of recordings again with other clustering parameters, only run the speaker
+    model on new subsegments. The least recently used embeddings are removed when the cache holds more than
+    `max_cache_size` embeddings. The cache assumes that the audio files do not change, see `clear_cache`.
+
+    Args:
+        speaker_model: speaker embedding model, e.g. EncDecSpeakerLabelModel.
+        sample_rate: sample rate of the speaker model.
+        batch_size: number of windows in a batch.
+        num_workers: number of data loader workers decoding recordings.
+        verbose: whether to show a progress bar.
+        max_cache_size: maximum number of cached embeddings, 0 disables caching between extractions.
+    """
+
+    def __init__(
+        self,
+        speaker_model,
+        sample_rate: int,
+        batch_size: int = 64,
+        num_workers: int = 0,
+        verbose: bool = True,
+        max_cache_size: int = 100000,
+    ):
+        self.speaker_model = speaker_model
+        self.sample_rate = sample_rate
+        self.batch_size = batch_size
+        self.num_workers = num_workers
+        self.verbose = verbose
+        self.max_cache_size = max_cache_size
+        # ordered from the least to the most recently used embedding
+        self._cache: Dict[Tuple[str, float, float, float], torch.Tensor] = OrderedDict()
+
+    def clear_cache(self):
+        """Removes all cached embeddings."""
+        self._cache.clear()
+
+    def _get_cached(self, key: Tuple[str, float, float, float]) -> torch.Tensor:
+        self._cache.move_to_end(key)
+        return self._cache[key]
+
+    def _evict(self):
+        while len(self._cache) > self.max_cache_size:
+            self._cache.popitem(last=False)
+
+    def _embed(self, signals: List[torch.Tensor]) -> torch.Tensor:
+        device = self.speaker_model.device
+        audio_signal = torch.stack(signals).to(device)
+        audio_signal_len = torch.full((len(signals),), audio_signal.shape[1], dtype=torch.long, device=device)
+        with torch.no_grad(), torch.amp.autocast(device.type):
+            _, embs = self.speaker_model.forward(input_signal=audio_signal, input_signal_length=audio_signal_len)
+        return embs.view(len(signals), -1).float().cpu()
+
+    def extract(
+        self, subsegments_manifests: Dict[int, str], window_lengths: Dict[int, float]
+    ) -> Dict[int, List[Dict[str, object]]]:
+        """
+        Extracts the embeddings of the subsegments manifests of all scales.
+
+        Args:
+            subsegments_manifests: subsegments manifest of every scale index, as written by
+                `segments_manifest_to_subsegments_manifest`.
+            window_lengths: window length in seconds of every scale index.
+
+        Returns:
+            For every scale index, a list of the embeddings and the time stamps of the scale: a dictionary from the
+            unique name of a recording to a tensor with the embeddings of its subsegments in manifest order, and a
+            dictionary from the unique name to a list of the [start, end] times of the subsegments.
+        """
+        # subsegments of every scale, grouped by recording in the order of first occurrence
+        recordings: Dict[str, Dict[int, List[Tuple[float, float]]]] = OrderedDict()
+        num_subsegments = {}
+        for scale_idx, manifest_file in subsegments_manifests.items():
+            num_subsegments[scale_idx] = 0
+            with open(manifest_file, 'r', encoding='utf-8') as manifest:
+                for line in manifest:
+                    if not line.strip():
+                        continue
+                    dic = json.loads(line)
+                    scales = recordings.setdefault(dic['audio_filepath'], {})
+                    scales.setdefault(scale_idx, []).append((dic['offset'], dic['duration']))
+                    num_subsegments[scale_idx] += 1
+
+        pending = [
+            key
+            for audio_filepath, scales in recordings.items()
+            for scale_idx, subsegments in scales.items()
+            for key in self._keys(audio_filepath, window_lengths[scale_idx], subsegments)
+        ]
+        to_compute = set(key for key in pending if key not in self._cache)
+        logging.info(
+            f'Extracting embeddings of {sum(num_subsegments.values())} subsegments of {len(subsegments_manifests)} '
+            f'scales, {len(pending) - len(to_compute)} embeddings are cached.'
+        )
+
+        uncached_filepaths = set(key[0] for key in to_compute)
+        audio_filepaths = [audio_filepath for audio_filepath in recordings if audio_filepath in uncached_filepaths]
+        if audio_filepaths:
+            self._extract_uncached(recordings, window_lengths, audio_filepaths, to_compute)
+
+        output = {}
+        for scale_idx in subsegments_manifests:
+            embeddings, time_stamps = {}, {}
+            for audio_filepath, scales in recordings.items():
+                if scale_idx not in scales:
+                    continue
+                uniq_name = get_uniqname_from_filepath(audio_filepath)
+                keys = self._keys(audio_filepath, window_lengths[scale_idx], scales[scale_idx])
+                embs = torch.stack([self._get_cached(key) for key in keys])
+                if uniq_name in embeddings:
+                    embeddings[uniq_name] = torch.cat((embeddings[uniq_name], embs))
+                else:
+                    embeddings[uniq_name] = embs
+                time_stamps.setdefault(uniq_name, []).extend(
+                    [start, start + duration] for start, duration in scales[scale_idx]
+                )
+            output[scale_idx] = [embeddings, time_stamps]
+        # the embeddings of this extraction are all needed above, the cache is bounded afterwards
+        self._evict()
+        return output
+
+    @staticmethod
+    def _keys(audio_filepath: str, window_length: float, subsegments: List[Tuple[float, float]]):
+        return [(audio_filepath, window_length, start, duration) for start, duration in subsegments]
+
+    def _extract_uncached(self, recordings, window_lengths, audio_filepaths: List[str], to_compute: set):
+        dataloader = torch.utils.data.DataLoader(
+            _RecordingDataset(audio_filepaths, self.sample_rate),
+            batch_size=None,
+            num_workers=self.num_workers,
+        )
+        self.speaker_model.eval()
+        # windows of a scale have the same length, batches of every scale are filled across recordings
+        batches: Dict[float, Tuple[List[tuple], List[torch.Tensor]]] = {}
+        for audio_filepath, samples in tqdm(
+            dataloader, desc='extract multiscale embeddings', leave=True, disable=not self.verbose
+        ):
+            for scale_idx, subsegments in recordings[audio_filepath].items():
+                window_length = window_lengths[scale_idx]
+                window_samples = int(window_length * self.sample_rate)
+                keys, signals = batches.setdefault(window_length, ([], []))
+                for key in self._keys(audio_filepath, window_length, subsegments):
+                    if key not in to_compute:
+                        continue
+                    to_compute.discard(key)
+                    signals.append(self._slice(samples, key[2], key[3], window_samples))
+                    keys.append(key)
+                    if len(keys) == self.batch_size:
+                        self._cache.update(zip(keys, self._embed(signals)))
+                        keys.clear()
+                        signals.clear()
+        for keys, signals in batches.values():
+            if keys:
+                self._cache.update(zip(keys, self._embed(signals)))
+
+    def _slice(self, samples: torch.Tensor, start: float, duration: float, window_samples: int) -> torch.Tensor:
+        # same samples as loading the subsegment with offset and duration
+        start_sample = int(start * self.sample_rate)
+        signal = samples[start_sample : start_sample + int(duration * self.sample_rate)]
+        if len(signal) == 0:
+            raise ValueError(f'Subsegment at {start} s of {duration} s is outside of the recording.')
+        if len(signal) < window_samples:
+            signal = repeat_signal(signal, len(signal), window_samples)
+        return signal[:window_samples]
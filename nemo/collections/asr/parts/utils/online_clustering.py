@@ -1183,6 +1183,27 @@ class OnlineSpeakerClustering(torch.nn.Module):
 
         merged_embs, add_new = self.get_reduced_mat(emb_in=curr_emb, base_segment_indexes=base_segment_indexes,)
         # Perform clustering on the embedding matrix containing history and current FIFO buffer merged_embeddings
+        Y = self.cluster_embeddings(merged_embs, frame_index=frame_index, cuda=cuda)
+        # Match the permutation of the newly obtained speaker labels and the previous labels
+        merged_clus_labels = self.match_labels(Y_merged=Y, add_new=add_new)
+        return merged_clus_labels
+
+    def cluster_embeddings(self, merged_embs: torch.Tensor, frame_index: int, cuda: bool = False) -> torch.Tensor:
+        """
+        Estimate the number of speakers and run spectral clustering on the given embedding vectors.
+
+        Args:
+            merged_embs (Tensor):
+                Embedding vectors of the history buffer and the current buffer
+            frame_index (int):
+                Unique index for each segment (also each embedding vector)
+            cuda (bool):
+                Boolean that determines whether cuda is used or not
+
+        Returns:
+            Y (Tensor):
+                Speaker labels of `merged_embs` whose permutation is not matched yet
+        """
         if merged_embs.shape[0] == 1:
             Y = torch.zeros((1,), dtype=torch.int32)
         else:
@@ -1190,6 +1211,415 @@ class OnlineSpeakerClustering(torch.nn.Module):
             est_num_of_spk, affinity_mat = self.online_spk_num_estimation(mat, frame_index)
             spectral_model = SpectralClustering(n_clusters=est_num_of_spk, cuda=cuda, device=merged_embs.device)
             Y = spectral_model.forward(affinity_mat).to(merged_embs.device)
-        # Match the permutation of the newly obtained speaker labels and the previous labels
-        merged_clus_labels = self.match_labels(Y_merged=Y, add_new=add_new)
-        return merged_clus_labels
+        return Y
+
+
+class IncrementalSpeakerClustering(OnlineSpeakerClustering):
+    """
+    Online speaker clustering with an incremental clustering state for long sessions.
+
+    `OnlineSpeakerClustering` runs speaker counting and spectral clustering on the history buffer and the current
+    buffer at every step, and reduces the history buffer by merging the closest embedding vectors, which requires
+    affinity matrices of the whole history buffer. This class keeps the same buffers, but updates the clustering
+    state incrementally:
+
+        - Embedding vectors leaving the current buffer are added to the history buffer of their speaker. Each speaker
+          keeps at most `minimum_segments_per_buffer` exemplars. If a speaker has this many exemplars, the embedding
+          vector is merged into the closest exemplar of the speaker, so a new embedding vector costs O(m * d) for
+          m exemplars per speaker and embedding dimension d.
+        - Speaker centroids are updated with every embedding vector added to the history buffer in O(d).
+        - Embedding vectors in the current buffer are labeled by the vote of their `knn_neighbors` nearest exemplars
+          in the history buffer and by the similarity to the speaker centroids in O(n * (h + k) * d), for n current,
+          h history embedding vectors and k speakers.
+        - Every `recluster_interval` steps, speakers are counted and clustered with spectral clustering on the
+          history buffer and the current buffer as in `OnlineSpeakerClustering`, and the labels of the history
+          exemplars and the centroids are re-derived from the result. New speakers are found at these steps.
+
+    The computation per step does not depend on the length of the session. Before the buffers are filled, the
+    embedding vectors are clustered at every step as in `OnlineSpeakerClustering`.
+
+    Additional Attributes:
+
+        knn_neighbors (int):
+            Number of nearest exemplars in the history buffer voting for the speaker label of an embedding vector.
+        recluster_interval (int):
+            Number of online steps between runs of speaker counting and spectral clustering.
+        novelty_sigma (float):
+            Number of standard deviations below the mean similarity to a speaker centroid at which an embedding
+            vector is considered as a new speaker, which triggers spectral clustering before `recluster_interval`.
+        steps_since_recluster (int):
+            Number of online steps since the last spectral clustering.
+        history_embedding_buffer_count (Tensor):
+            Number of embedding vectors merged into each exemplar of the history buffer
+        centroid_sum (Tensor):
+            Sum of the embedding vectors added to the history buffer for each speaker
+        centroid_count (Tensor):
+            Number of the embedding vectors added to the history buffer for each speaker
+        centroid_sim_sum, centroid_sim_sq_sum (Tensor):
+            Sum and squared sum of the cosine similarities between the embedding vectors added to the history buffer
+            and the centroids of their speakers. An embedding vector in the current buffer whose similarity to the
+            centroid of its speaker is `novelty_sigma` standard deviations below the mean is considered as
+            a new speaker, and triggers spectral clustering.
+    """
+
+    def __init__(
+        self,
+        max_num_speakers: int = 8,
+        max_rp_threshold: float = 0.15,
+        enhanced_count_thres: float = 40,
+        fixed_thres: float = -1.0,
+        sparse_search_volume: int = 10,
+        history_buffer_size: int = 150,
+        current_buffer_size: int = 150,
+        min_spk_counting_buffer_size: int = 3,
+        min_frame_per_spk: int = 15,
+        p_update_freq: int = 5,
+        p_value_skip_frame_thres: int = 50,
+        p_value_queue_size: int = 3,
+        use_temporal_label_major_vote: bool = False,
+        temporal_label_major_vote_buffer_size: int = 11,
+        knn_neighbors: int = 10,
+        recluster_interval: int = 10,
+        novelty_sigma: float = 3.0,
+        cuda: bool = False,
+    ):
+        super().__init__(
+            max_num_speakers=max_num_speakers,
+            max_rp_threshold=max_rp_threshold,
+            enhanced_count_thres=enhanced_count_thres,
+            fixed_thres=fixed_thres,
+            sparse_search_volume=sparse_search_volume,
+            history_buffer_size=history_buffer_size,
+            current_buffer_size=current_buffer_size,
+            min_spk_counting_buffer_size=min_spk_counting_buffer_size,
+            min_frame_per_spk=min_frame_per_spk,
+            p_update_freq=p_update_freq,
+            p_value_skip_frame_thres=p_value_skip_frame_thres,
+            p_value_queue_size=p_value_queue_size,
+            use_temporal_label_major_vote=use_temporal_label_major_vote,
+            temporal_label_major_vote_buffer_size=temporal_label_major_vote_buffer_size,
+            cuda=cuda,
+        )
+        self.knn_neighbors = knn_neighbors
+        self.recluster_interval = recluster_interval
+        self.novelty_sigma = novelty_sigma
+        self.minimum_segments_per_buffer = max(1, self.minimum_segments_per_buffer)
+        self.steps_since_recluster = 0
+
+        # Initialize the incremental clustering state
+        self.history_embedding_buffer_count = torch.tensor([])
+        self.centroid_sum = torch.tensor([])
+        self.centroid_count = torch.tensor([])
+        self.centroid_sim_sum = torch.tensor([])
+        self.centroid_sim_sq_sum = torch.tensor([])
+
+    def compress_history_buffer(self):
+        """
+        Make room in the history buffer by merging two exemplars of the speaker with the most exemplars.
+        As in `get_closest_embeddings`, the exemplar with the highest affinity sum to the exemplars of the speaker
+        is the most redundant one, and it is merged into its closest exemplar. This costs O(m * d) for m exemplars
+        of the speaker instead of computing the affinity matrix of the exemplars.
+        """
+        labels = self.history_embedding_buffer_label.long()
+        spk_inds = torch.where(labels == torch.argmax(torch.bincount(labels)))[0]
+        spk_embs = torch.nn.functional.normalize(self.history_embedding_buffer_emb[spk_inds], dim=1)
+        redundant_idx = int(torch.argmax(torch.matmul(spk_embs, spk_embs.sum(0))))
+        sims = torch.matmul(spk_embs, spk_embs[redundant_idx])
+        sims[redundant_idx] = -2.0
+        drop, keep = spk_inds[redundant_idx], spk_inds[torch.argmax(sims)]
+
+        counts = self.history_embedding_buffer_count
+        total = counts[keep] + counts[drop]
+        self.history_embedding_buffer_emb[keep] = (
+            counts[keep] * self.history_embedding_buffer_emb[keep]
+            + counts[drop] * self.history_embedding_buffer_emb[drop]
+        ) / total
+        counts[keep] = total
+        remain = torch.arange(labels.shape[0], device=labels.device) != drop
+        self.history_embedding_buffer_emb = self.history_embedding_buffer_emb[remain]
+        self.history_embedding_buffer_label = self.history_embedding_buffer_label[remain]
+        self.history_embedding_buffer_count = counts[remain]
+
+    def expand_centroids(self, num_spks: int, emb: torch.Tensor):
+        """
+        Add empty speaker centroids until there are `num_spks` centroids.
+
+        Args:
+            num_spks (int):
+                Number of speaker centroids
+            emb (Tensor):
+                Embedding vector defining the dimension, type and device of the centroids
+        """
+        num_prev_spks = 0
+        if self.centroid_sum.dim() > 1:
+            num_prev_spks = self.centroid_sum.shape[0]
+        pad_n = num_spks - num_prev_spks
+        self.centroid_sum = torch.vstack(
+            (
+                self.centroid_sum.view(num_prev_spks, emb.shape[0]).to(emb.device),
+                torch.zeros((pad_n, emb.shape[0]), dtype=emb.dtype, device=emb.device),
+            )
+        )
+        pad_stats = torch.zeros((pad_n,), dtype=emb.dtype, device=emb.device)
+        self.centroid_count = torch.hstack((self.centroid_count.to(emb.device), pad_stats))
+        self.centroid_sim_sum = torch.hstack((self.centroid_sim_sum.to(emb.device), pad_stats))
+        self.centroid_sim_sq_sum = torch.hstack((self.centroid_sim_sq_sum.to(emb.device), pad_stats))
+
+    def add_embedding_to_history(self, emb: torch.Tensor, label: int):
+        """
+        Add an embedding vector leaving the current buffer to the history buffer and to the centroid of its speaker.
+
+        Args:
+            emb (Tensor):
+                Embedding vector to be added
+                Dimension: (embedding dimension)
+            label (int):
+                Speaker label of the embedding vector
+        """
+        # Update the speaker centroid and the statistics of the similarity to the centroid
+        if self.centroid_sum.dim() == 1 or self.centroid_sum.shape[0] <= label:
+            self.expand_centroids(label + 1, emb)
+        if self.centroid_count[label] > 0:
+            sim = torch.nn.functional.cosine_similarity(self.centroid_sum[label], emb, dim=0)
+            self.centroid_sim_sum[label] += sim
+            self.centroid_sim_sq_sum[label] += sim * sim
+        self.centroid_sum[label] += emb
+        self.centroid_count[label] += 1
+
+        # Add a new exemplar or merge the embedding vector into the closest exemplar of the speaker
+        if self.history_embedding_buffer_emb.dim() == 1:
+            self.history_embedding_buffer_emb = emb.unsqueeze(0)
+            self.history_embedding_buffer_label = torch.tensor([label], dtype=torch.long, device=emb.device)
+            self.history_embedding_buffer_count = torch.ones((1,), dtype=emb.dtype, device=emb.device)
+            return
+        spk_inds = torch.where(self.history_embedding_buffer_label == label)[0]
+        is_full = self.history_embedding_buffer_emb.shape[0] >= self.history_n
+        max_spk_count = int(torch.bincount(self.history_embedding_buffer_label.long()).max())
+        if is_full and spk_inds.shape[0] >= max(self.minimum_segments_per_buffer, max_spk_count - 1):
+            sims = torch.nn.functional.cosine_similarity(self.history_embedding_buffer_emb[spk_inds], emb.unsqueeze(0))
+            closest = spk_inds[torch.argmax(sims)]
+            count = self.history_embedding_buffer_count[closest]
+            self.history_embedding_buffer_emb[closest] = (count * self.history_embedding_buffer_emb[closest] + emb) / (
+                count + 1
+            )
+            self.history_embedding_buffer_count[closest] = count + 1
+        else:
+            if is_full:
+                self.compress_history_buffer()
+            self.history_embedding_buffer_emb = torch.vstack((self.history_embedding_buffer_emb, emb.unsqueeze(0)))
+            self.history_embedding_buffer_label = torch.hstack(
+                (
+                    self.history_embedding_buffer_label.long(),
+                    torch.tensor([label], dtype=torch.long, device=emb.device),
+                )
+            )
+            self.history_embedding_buffer_count = torch.hstack(
+                (self.history_embedding_buffer_count, torch.ones((1,), dtype=emb.dtype, device=emb.device))
+            )
+
+    def assign_labels(self, emb: torch.Tensor) -> Tuple[torch.Tensor, bool]:
+        """
+        Label embedding vectors by the vote of their nearest exemplars in the history buffer
+        and by the similarity to the speaker centroids.
+
+        Args:
+            emb (Tensor):
+                Embedding vectors to be labeled
+                Dimension: (number of embedding vectors) x (embedding dimension)
+
+        Returns:
+            Y (Tensor):
+                Speaker labels of the embedding vectors
+            has_novel_emb (bool):
+                Whether an embedding vector is too far from the centroid of its speaker, and is likely
+                to be of a new speaker.
+        """
+        emb_norm = torch.nn.functional.normalize(emb, dim=1)
+        hist_norm = torch.nn.functional.normalize(self.history_embedding_buffer_emb, dim=1)
+        knn_sims, knn_inds = torch.topk(
+            torch.matmul(emb_norm, hist_norm.T), k=min(self.knn_neighbors, hist_norm.shape[0]), dim=1
+        )
+        num_spks = self.centroid_sum.shape[0]
+        knn_labels = self.history_embedding_buffer_label.long()[knn_inds]
+        votes = torch.zeros((emb.shape[0], num_spks), dtype=emb.dtype, device=emb.device)
+        votes = votes.scatter_add_(1, knn_labels, knn_sims) / knn_sims.shape[1]
+
+        centroid_sims = torch.matmul(emb_norm, torch.nn.functional.normalize(self.centroid_sum, dim=1).T)
+        centroid_sims[:, self.centroid_count == 0] = -2.0
+        Y = torch.argmax(votes + centroid_sims, dim=1)
+
+        # Similarity statistics of the speakers, speakers with less than two samples are never novel
+        sim_count = (self.centroid_count - 1).clamp(min=1)
+        sim_mean = self.centroid_sim_sum / sim_count
+        sim_std = (self.centroid_sim_sq_sum / sim_count - sim_mean * sim_mean).clamp(min=0).sqrt()
+        sim_thres = sim_mean - self.novelty_sigma * sim_std
+        sim_thres[self.centroid_count < 3] = -2.0
+        assigned_sims = centroid_sims.gather(1, Y.unsqueeze(1)).squeeze(1)
+        has_novel_emb = bool((assigned_sims < sim_thres[Y]).any())
+        return Y, has_novel_emb
+
+    def update_speaker_history_buffer(
+        self, emb_in: torch.Tensor, base_segment_indexes: torch.Tensor
+    ) -> Tuple[torch.Tensor, bool]:
+        """
+        Add the embedding vectors leaving the current buffer to the history buffer and to the speaker centroids.
+        Unlike `OnlineSpeakerClustering`, the history buffer is not reduced with affinity matrices of the whole
+        history buffer.
+
+        Args:
+            emb_in (Tensor):
+                `emb` contains history buffer and FIFO queue
+            base_segment_indexes (Tensor):
+                Tensor containing unique segment (embedding vector) index
+
+        Returns:
+            history_and_current_emb (Tensor):
+                Matrix containing the history buffer and the current buffer.
+            is_update (bool):
+                Boolean indicates whether to update speaker
+        """
+        is_update, _, pre_embs, pre_clus_labels = self.prepare_embedding_update(emb_in, base_segment_indexes)
+        if is_update:
+            hist_n = 0
+            if self.history_embedding_buffer_emb.dim() > 1:
+                hist_n = self.history_embedding_buffer_emb.shape[0]
+            for k in range(hist_n, pre_embs.shape[0]):
+                self.add_embedding_to_history(pre_embs[k], int(pre_clus_labels[k].item()))
+
+        emb_curr = self.make_constant_length_emb(emb_in, base_segment_indexes)
+        return torch.vstack((self.history_embedding_buffer_emb, emb_curr)), is_update
+
+    def relabel_history_buffer(self, hist_labels: torch.Tensor):
+        """
+        Update the labels of the history exemplars with the spectral clustering result and re-derive the centroids
+        of the speakers whose exemplars changed. Each exemplar is the mean of the embedding vectors merged into it,
+        so the count-weighted sum of the exemplars of a speaker is the sum of its embedding vectors. The similarity
+        statistics of these speakers are estimated from the similarities of their exemplars to the new centroids.
+
+        Args:
+            hist_labels (Tensor):
+                Matched speaker labels of the history exemplars
+        """
+        hist_labels = hist_labels.long()
+        changed = hist_labels != self.history_embedding_buffer_label.long()
+        if not bool(changed.any()):
+            return
+        embs, counts = self.history_embedding_buffer_emb, self.history_embedding_buffer_count
+        num_spks = int(hist_labels.max()) + 1
+        if self.centroid_sum.shape[0] < num_spks:
+            self.expand_centroids(num_spks, embs[0])
+        affected = torch.zeros(self.centroid_sum.shape[0], dtype=torch.bool, device=embs.device)
+        affected[hist_labels[changed]] = True
+        affected[self.history_embedding_buffer_label.long()[changed]] = True
+        self.history_embedding_buffer_label = hist_labels
+
+        centroid_sum = torch.zeros_like(self.centroid_sum).index_add_(0, hist_labels, embs * counts.unsqueeze(1))
+        centroid_count = torch.zeros_like(self.centroid_count).index_add_(0, hist_labels, counts)
+        sims = torch.nn.functional.cosine_similarity(embs, centroid_sum[hist_labels], dim=1)
+        # the statistics are accumulated over all but the first embedding vector of a speaker
+        scale = (centroid_count - 1).clamp(min=0) / centroid_count.clamp(min=1)
+        sim_sum = torch.zeros_like(self.centroid_sim_sum).index_add_(0, hist_labels, counts * sims) * scale
+        sim_sq_sum = torch.zeros_like(self.centroid_sim_sq_sum).index_add_(0, hist_labels, counts * sims * sims)
+        self.centroid_sum = torch.where(affected.unsqueeze(1), centroid_sum, self.centroid_sum)
+        self.centroid_count = torch.where(affected, centroid_count, self.centroid_count)
+        self.centroid_sim_sum = torch.where(affected, sim_sum, self.centroid_sim_sum)
+        self.centroid_sim_sq_sum = torch.where(affected, sim_sq_sum * scale, self.centroid_sim_sq_sum)
+
+    def match_labels(self, Y_merged: torch.Tensor, add_new: bool) -> torch.Tensor:
+        """
+        Match the speaker labels of spectral clustering with the speaker labels of the history buffer and of the
+        current buffer. The speaker labels are matched with the Hungarian algorithm on the label co-occurrence
+        counts, and clusters without a match get new labels. The labels of the history exemplars and the speaker
+        centroids are then updated from the matched labels (see `relabel_history_buffer`).
+
+        Args:
+            Y_merged (Tensor):
+                The newly generated clustering label sequence of the history buffer and the current buffer.
+            add_new (bool):
+                This variable indicates whether there is a new set of segments.
+
+        Returns:
+            Y_out (Tensor):
+                Permutation-matched speaker labels based on history buffer
+        """
+        if not self.is_online:
+            Y_out = stitch_cluster_labels(Y_old=self.Y_fullhist, Y_new=Y_merged).to(Y_merged.device)
+            self.Y_fullhist = Y_out
+            return Y_out
+
+        hist_n = self.history_embedding_buffer_emb.shape[0]
+        Y_old = torch.hstack((self.history_embedding_buffer_label, self.Y_fullhist[self.history_buffer_seg_end :]))
+        Y_old = Y_old.long().to(Y_merged.device)
+        Y_new = get_minimal_indices(Y_merged).long()
+        min_len = min(Y_old.shape[0], Y_new.shape[0])
+        num_old_spks, num_new_spks = int(Y_old.max()) + 1, int(Y_new.max()) + 1
+        num_spks = max(num_old_spks, num_new_spks)
+        co_counts = torch.zeros((num_spks, num_spks), device=Y_merged.device)
+        co_counts = co_counts.index_put_(
+            (Y_new[:min_len], Y_old[:min_len]), torch.ones(min_len, device=Y_merged.device), accumulate=True
+        )
+        row_ind, col_ind = linear_sum_assignment(-co_counts)
+        mapping_array = torch.full((num_new_spks,), -1, dtype=torch.long, device=Y_merged.device)
+        for k in range(row_ind.shape[0]):
+            if row_ind[k] < num_new_spks and co_counts[row_ind[k], col_ind[k]] > 0:
+                mapping_array[row_ind[k]] = col_ind[k]
+        # Clusters without a match get the lowest labels which are not used in the history and current buffers
+        unmatched = torch.where(mapping_array < 0)[0]
+        is_used = torch.zeros((num_old_spks + num_new_spks,), dtype=torch.bool, device=Y_merged.device)
+        is_used[Y_old] = True
+        mapping_array[unmatched] = torch.where(~is_used)[0][: unmatched.shape[0]]
+        Y_matched = mapping_array[Y_new]
+        self.relabel_history_buffer(Y_matched[:hist_n])
+
+        if add_new:
+            Y_out = torch.hstack((self.Y_fullhist[: self.history_buffer_seg_end].long(), Y_matched[hist_n:]))
+            self.Y_fullhist = Y_out
+        else:
+            Y_out = self.Y_fullhist
+        return Y_out
+
+    def forward_infer(
+        self,
+        curr_emb: torch.Tensor,
+        base_segment_indexes: torch.Tensor,
+        max_num_speakers: int = 4,
+        max_rp_threshold: float = 0.15,
+        enhanced_count_thres: int = 40,
+        sparse_search_volume: int = 10,
+        fixed_thres: float = -1.0,
+        frame_index: int = 0,
+        cuda: bool = False,
+    ) -> torch.Tensor:
+        """
+        Perform speaker clustering in online mode. Spectral clustering is performed every `recluster_interval`
+        steps, and the embedding vectors in the current buffer are labeled with the history buffer in between.
+        See `OnlineSpeakerClustering.forward_infer` for the arguments.
+
+        Returns:
+            Y (Tensor):
+                Speaker labels for history embeddings and current embedding inputs
+        """
+        self.max_num_speakers = max_num_speakers
+        self.max_rp_threshold = max_rp_threshold
+        self.enhanced_count_thres = enhanced_count_thres
+        self.sparse_search_volume = sparse_search_volume
+        self.fixed_thres = fixed_thres
+
+        if cuda and (curr_emb.device == torch.device("cpu") or base_segment_indexes.device == torch.device("cpu")):
+            raise ValueError(f"CUDA is enabled but the input {curr_emb} or {base_segment_indexes} is not on the GPU.")
+
+        merged_embs, add_new = self.get_reduced_mat(emb_in=curr_emb, base_segment_indexes=base_segment_indexes,)
+        if self.is_online and self.steps_since_recluster < self.recluster_interval:
+            # Label the current buffer with the incremental clustering state
+            hist_n = self.history_embedding_buffer_emb.shape[0]
+            Y_curr, has_novel_emb = self.assign_labels(merged_embs[hist_n:])
+            if not has_novel_emb:
+                self.steps_since_recluster += 1
+                if add_new:
+                    Y_curr = Y_curr.to(self.Y_fullhist.dtype)
+                    self.Y_fullhist = torch.hstack((self.Y_fullhist[: self.history_buffer_seg_end], Y_curr))
+                return self.Y_fullhist
+
+        self.steps_since_recluster = 0
+        Y = self.cluster_embeddings(merged_embs, frame_index=frame_index, cuda=cuda)
+        return self.match_labels(Y_merged=Y, add_new=add_new)
@@ -0,0 +1,447 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Session-based (continuous batching) cache-aware streaming inference.
+
+`CacheAwareStreamingAudioBuffer` advances a fixed set of streams which start together. `CacheAwareStreamingEngine`
+instead keeps the encoder caches of up to `max_sessions` sessions in a pool of slots: sessions are admitted and
+evicted between steps, every step gathers the caches of the sessions which have a full chunk of features into one
+batch, runs `conformer_stream_step` and scatters the updated caches and decoder states back to the sessions.
+`AsyncStreamingEngine` exposes the engine to asyncio applications.
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+
+from nemo.collections.asr.parts.utils.rnnt_utils import Hypothesis
+from nemo.collections.asr.parts.utils.streaming_utils import CacheAwareStreamingAudioBuffer
+
+__all__ = ["StreamingSession", "CacheAwareStreamingEngine", "AsyncStreamingEngine"]
+
+
+@dataclass
+class StreamingSession:
+    """State of a streaming session in `CacheAwareStreamingEngine`"""
+
+    session_id: str
+    slot: int
+    # features which are not consumed yet, including the pre-encode cache of the next chunk [feat_in, T]
+    features: Optional[torch.Tensor] = None
+    # index of the first frame of `features` in the whole stream
+    features_offset: int = 0
+    # total number of frames pushed to the session
+    num_frames: int = 0
+    buffer_idx: int = 0
+    step: int = 0
+    input_finished: bool = False
+    previous_hypothesis: Optional[Hypothesis] = None
+    previous_pred_out: Optional[torch.Tensor] = None
+    transcription: Any = ""
+    # (number of frames pushed, push time) not processed yet, used to measure latencies
+    push_marks: Deque[Tuple[int, float]] = field(default_factory=deque)
+    # seconds from pushing features to the end of the step which processed them
+    latencies: List[float] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        """Current transcription of the session"""
+        if isinstance(self.transcription, Hypothesis):
+            return self.transcription.text
+        return self.transcription
+
+
+class CacheAwareStreamingEngine:
+    """
+    Continuous batching engine for cache-aware streaming ASR models (CTC, RNNT and hybrid models with a
+    streaming encoder like Conformer).
+
+    Each session owns a slot of the cache pool. Features of pushed audio are computed independently for every
+    pushed piece, as in `CacheAwareStreamingAudioBuffer.append_audio`. Chunks are formed exactly as in
+    `CacheAwareStreamingAudioBuffer`, so a session produces the same outputs as the same stream processed alone.
+    Sessions at their first or last chunk use different chunk sizes and flags, so one step runs one batch per such
+    group of sessions.
+
+    RNNT models need a decoding strategy which supports partial hypotheses (e.g. "greedy").
+
+    Args:
+        model: ASR model with a streaming encoder
+        max_sessions: number of slots, i.e. the maximum number of concurrent sessions and batch size
+        pad_and_drop_preencoded: pad the first chunk and always drop pre-encoded outputs
+            (see `CacheAwareStreamingAudioBuffer`)
+    """
+
+    def __init__(self, model, max_sessions: int = 32, pad_and_drop_preencoded: bool = False):
+        self.model = model
+        self.max_sessions = max_sessions
+        self.pad_and_drop_preencoded = pad_and_drop_preencoded
+        self._audio_buffer = CacheAwareStreamingAudioBuffer(
+            model, online_normalization=False, pad_and_drop_preencoded=pad_and_drop_preencoded
+        )
+        self.streaming_cfg = self._audio_buffer.streaming_cfg
+        self.sampling_frames = self._audio_buffer.sampling_frames
+        self.input_features = self._audio_buffer.input_features
+
+        pre_encode_cache_size = self.streaming_cfg.pre_encode_cache_size
+        self._max_pre_encode_cache_size = (
+            max(pre_encode_cache_size) if isinstance(pre_encode_cache_size, list) else pre_encode_cache_size
+        )
+
+        (
+            self.cache_last_channel,
+            self.cache_last_time,
+            self.cache_last_channel_len,
+        ) = model.encoder.get_initial_cache_state(batch_size=max_sessions)
+        self._free_slots = list(range(max_sessions - 1, -1, -1))
+        self.sessions: Dict[str, StreamingSession] = {}
+        self._lock = threading.Lock()
+
+        # statistics of the batch occupancy
+        self.num_steps = 0
+        self.num_batches = 0
+        self.num_chunks = 0
+
+    @property
+    def num_free_slots(self) -> int:
+        return len(self._free_slots)
+
+    def open_session(self, session_id: Optional[str] = None) -> str:
+        """
+        Admits a new session and resets the caches of its slot.
+
+        Returns:
+            id of the session
+        """
+        with self._lock:
+            if session_id is None:
+                session_id = uuid.uuid4().hex
+            if session_id in self.sessions:
+                raise ValueError(f"Session {session_id} already exists.")
+            if not self._free_slots:
+                raise RuntimeError(f"All {self.max_sessions} slots are in use.")
+            slot = self._free_slots.pop()
+            self.cache_last_channel[:, slot] = 0
+            self.cache_last_time[:, slot] = 0
+            self.cache_last_channel_len[slot] = 0
+            self.sessions[session_id] = StreamingSession(session_id=session_id, slot=slot)
+        return session_id
+
+    @torch.no_grad()
+    def push_audio(self, session_id: str, audio: np.ndarray):
+        """Computes features of a piece of audio (float32 samples at the model sample rate) and appends them"""
+        processed_signal, _ = self._audio_buffer.preprocess_audio(audio)
+        self.push_features(session_id, processed_signal[0])
+
+    def push_features(self, session_id: str, features: torch.Tensor):
+        """Appends features [feat_in, T] to a session"""
+        if features.size(0) != self.input_features:
+            raise ValueError(f"Expected {self.input_features} features, got {features.size(0)}.")
+        with self._lock:
+            session = self.sessions[session_id]
+            if session.input_finished:
+                raise ValueError(f"Input of session {session_id} is finished.")
+            if session.features is None:
+                session.features = features
+            else:
+                session.features = torch.cat((session.features, features), dim=-1)
+            session.num_frames += features.size(-1)
+            session.push_marks.append((session.num_frames, time.perf_counter()))
+
+    def finish_session(self, session_id: str):
+        """Marks the end of the input of a session, the session is evicted once all its features are processed"""
+        with self._lock:
+            self.sessions[session_id].input_finished = True
+
+    def close_session(self, session_id: str) -> StreamingSession:
+        """Evicts a session immediately, e.g. when a call is dropped"""
+        with self._lock:
+            return self._evict(session_id)
+
+    def get_transcription(self, session_id: str) -> str:
+        return self.sessions[session_id].text
+
+    def _evict(self, session_id: str) -> StreamingSession:
+        session = self.sessions.pop(session_id)
+        self._free_slots.append(session.slot)
+        session.features = None
+        return session
+
+    def _select(self, value, first: bool):
+        # selects the value of a streaming parameter for the first or the following chunks
+        if not isinstance(value, list):
+            return value
+        return value[0] if first and not self.pad_and_drop_preencoded else value[1]
+
+    def _chunk_status(self, session: StreamingSession) -> Optional[bool]:
+        """Returns True if the next chunk can be processed, False if more input is needed, None if the session is done"""
+        first = session.buffer_idx == 0
+        chunk_size = self._select(self.streaming_cfg.chunk_size, first)
+        available = session.num_frames - session.buffer_idx
+        if available <= 0:
+            return None if session.input_finished else False
+        if available < chunk_size and not session.input_finished:
+            return False
+        if self.sampling_frames is not None:
+            if first and isinstance(self.sampling_frames, list):
+                sampling_frames = self.sampling_frames[0]
+            else:
+                sampling_frames = (
+                    self.sampling_frames[1] if isinstance(self.sampling_frames, list) else self.sampling_frames
+                )
+            if min(available, chunk_size) < sampling_frames:
+                # not enough frames for a single output after downsampling
+                return None if session.input_finished else False
+        return True
+
+    def _make_chunk(self, session: StreamingSession) -> Tuple[torch.Tensor, int, int]:
+        """Returns the next chunk of a session with its pre-encode cache, the number of valid frames and shift"""
+        first = session.buffer_idx == 0
+        chunk_size = self._select(self.streaming_cfg.chunk_size, first)
+        shift_size = self._select(self.streaming_cfg.shift_size, first)
+        pre_encode_cache_size = self._select(self.streaming_cfg.pre_encode_cache_size, first)
+
+        start = session.buffer_idx - session.features_offset
+        audio_chunk = session.features[:, start : start + chunk_size]
+        if first and isinstance(self.streaming_cfg.pre_encode_cache_size, list):
+            cache_pre_encode = audio_chunk.new_zeros(audio_chunk.size(0), pre_encode_cache_size)
+        else:
+            cache_start = max(session.buffer_idx - pre_encode_cache_size, 0) - session.features_offset
+            cache_pre_encode = session.features[:, cache_start:start]
+            if cache_pre_encode.size(-1) < pre_encode_cache_size:
+                zeros_pads = audio_chunk.new_zeros(audio_chunk.size(0), pre_encode_cache_size - cache_pre_encode.size(-1))
+                cache_pre_encode = torch.cat((zeros_pads, cache_pre_encode), dim=-1)
+        chunk = torch.cat((cache_pre_encode, audio_chunk), dim=-1)
+        return chunk, chunk.size(-1), shift_size
+
+    def has_work(self) -> bool:
+        """Returns True if a call of `step` would process a chunk or evict a session"""
+        with self._lock:
+            return any(self._chunk_status(session) is not False for session in self.sessions.values())
+
+    @torch.no_grad()
+    def step(self) -> List[StreamingSession]:
+        """
+        Processes the next chunk of every session which has one, in as few batches as possible.
+
+        Returns:
+            sessions which are completed and evicted after this step
+        """
+        groups = {}
+        with self._lock:
+            for session in list(self.sessions.values()):
+                status = self._chunk_status(session)
+                if status:
+                    chunk, length, shift_size = self._make_chunk(session)
+                    first = session.buffer_idx == 0
+                    last = session.input_finished and session.buffer_idx + shift_size >= session.num_frames
+                    groups.setdefault((first, last), []).append((session, chunk, length, shift_size))
+
+        for (first, last), items in groups.items():
+            self._step_batch(items, first=first, last=last)
+        self.num_steps += int(len(groups) > 0)
+
+        completed = []
+        with self._lock:
+            for session in list(self.sessions.values()):
+                if self._chunk_status(session) is None:
+                    completed.append(self._evict(session.session_id))
+        return completed
+
+    def _step_batch(self, items, first: bool, last: bool):
+        sessions = [item[0] for item in items]
+        device = self.cache_last_channel.device
+        width = max(item[2] for item in items)
+        chunks = torch.zeros(len(items), self.input_features, width, device=device, dtype=items[0][1].dtype)
+        for idx, (_, chunk, length, _) in enumerate(items):
+            chunks[idx, :, :length] = chunk
+        chunk_lengths = torch.tensor([item[2] for item in items], device=device, dtype=torch.int64)
+        slots = torch.tensor([session.slot for session in sessions], device=device, dtype=torch.int64)
+
+        previous_hypotheses = [session.previous_hypothesis for session in sessions]
+        if all(hyp is None for hyp in previous_hypotheses):
+            previous_hypotheses = None
+        previous_pred_out = [
+            (
+                session.previous_pred_out
+                if session.previous_pred_out is not None
+                else torch.zeros(0, dtype=torch.int64, device=device)
+            )
+            for session in sessions
+        ]
+        drop_extra_pre_encoded = (
+            0 if first and not self.pad_and_drop_preencoded else self.streaming_cfg.drop_extra_pre_encoded
+        )
+
+        (
+            pred_out,
+            transcribed_texts,
+            cache_last_channel,
+            cache_last_time,
+            cache_last_channel_len,
+            best_hyp,
+        ) = self.model.conformer_stream_step(
+            processed_signal=chunks,
+            processed_signal_length=chunk_lengths,
+            cache_last_channel=self.cache_last_channel.index_select(1, slots),
+            cache_last_time=self.cache_last_time.index_select(1, slots),
+            cache_last_channel_len=self.cache_last_channel_len.index_select(0, slots),
+            keep_all_outputs=last,
+            previous_hypotheses=previous_hypotheses,
+            previous_pred_out=previous_pred_out,
+            drop_extra_pre_encoded=drop_extra_pre_encoded,
+            return_transcription=True,
+        )
+
+        now = time.perf_counter()
+        with self._lock:
+            # sessions closed during the step may have their slots reused already
+            active = [idx for idx, session in enumerate(sessions) if self.sessions.get(session.session_id) is session]
+            if len(active) < len(sessions):
+                active = torch.tensor(active, device=device, dtype=torch.int64)
+                slots = slots[active]
+                cache_last_channel = cache_last_channel[:, active]
+                cache_last_time = cache_last_time[:, active]
+                cache_last_channel_len = cache_last_channel_len[active]
+            self.cache_last_channel.index_copy_(1, slots, cache_last_channel)
+            self.cache_last_time.index_copy_(1, slots, cache_last_time)
+            self.cache_last_channel_len.index_copy_(0, slots, cache_last_channel_len)
+
+            for idx, (session, _, _, shift_size) in enumerate(items):
+                session.previous_pred_out = pred_out[idx]
+                session.transcription = transcribed_texts[idx]
+                if best_hyp is not None:
+                    session.previous_hypothesis = best_hyp[idx]
+                session.buffer_idx += shift_size
+                session.step += 1
+                while session.push_marks and session.push_marks[0][0] <= session.buffer_idx:
+                    session.latencies.append(now - session.push_marks.popleft()[1])
+                if session.input_finished and session.buffer_idx >= session.num_frames:
+                    session.latencies.extend(now - mark[1] for mark in session.push_marks)
+                    session.push_marks.clear()
+                # drop features which are not needed as the pre-encode cache anymore
+                keep_from = max(session.buffer_idx - self._max_pre_encode_cache_size, session.features_offset)
+                if keep_from > session.features_offset:
+                    session.features = session.features[:, keep_from - session.features_offset :]
+                    session.features_offset = keep_from
+        self.num_batches += 1
+        self.num_chunks += len(items)
+
+
+class AsyncStreamingEngine:
+    """
+    asyncio interface of `CacheAwareStreamingEngine`. Steps of the engine run in a background thread whenever
+    a session has a chunk to process; sessions wait for a free slot when all slots are in use.
+
+    Example:
+        async with AsyncStreamingEngine(CacheAwareStreamingEngine(asr_model, max_sessions=64)) as engine:
+            session_id = await engine.open_session()
+            for audio_chunk in audio_chunks:
+                engine.push_audio(session_id, audio_chunk)
+            text = await engine.finish_session(session_id)
+
+    Args:
+        engine: streaming engine
+        poll_interval: seconds to wait for new input when no session has a chunk to process
+    """
+
+    def __init__(self, engine: CacheAwareStreamingEngine, poll_interval: float = 0.002):
+        self.engine = engine
+        self.poll_interval = poll_interval
+        self._executor = None
+        self._task = None
+        self._slots = None
+        self._results: Dict[str, asyncio.Future] = {}
+
+    async def start(self):
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._slots = asyncio.Semaphore(self.engine.num_free_slots)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.stop()
+
+    async def open_session(self, session_id: Optional[str] = None) -> str:
+        """Waits for a free slot and admits a new session"""
+        await self._slots.acquire()
+        try:
+            session_id = self.engine.open_session(session_id)
+        except Exception:
+            self._slots.release()
+            raise
+        self._results[session_id] = asyncio.get_running_loop().create_future()
+        return session_id
+
+    def push_audio(self, session_id: str, audio: np.ndarray):
+        """Appends audio to a session (features are computed in the calling thread)"""
+        self.engine.push_audio(session_id, audio)
+
+    def push_features(self, session_id: str, features: torch.Tensor):
+        self.engine.push_features(session_id, features)
+
+    def get_transcription(self, session_id: str) -> str:
+        """Returns the current (partial) transcription of a session"""
+        return self.engine.get_transcription(session_id)
+
+    async def finish_session(self, session_id: str) -> StreamingSession:
+        """Marks the end of the input of a session and waits until it is completed"""
+        self.engine.finish_session(session_id)
+        return await self._results[session_id]
+
+    def close_session(self, session_id: str):
+        """Evicts a session without waiting for the rest of its input to be processed"""
+        session = self.engine.close_session(session_id)
+        self._complete([session])
+
+    def _complete(self, sessions: List[StreamingSession]):
+        for session in sessions:
+            result = self._results.pop(session.session_id)
+            if not result.done():
+                result.set_result(session)
+            self._slots.release()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self.engine.has_work():
+                await asyncio.sleep(self.poll_interval)
+                continue
+            try:
+                completed = await loop.run_in_executor(self._executor, self.engine.step)
+            except Exception as e:
+                for result in self._results.values():
+                    if not result.done():
+                        result.set_exception(e)
+                raise
+            self._complete(completed)
@@ -18,8 +18,9 @@ import re
 from dataclasses import dataclass
 from pathlib import Path
 from tempfile import NamedTemporaryFile
-from typing import List, Optional, Tuple, Union
+from typing import Iterator, List, Optional, Tuple, Union
 
+import numpy as np
 import torch
 from omegaconf import DictConfig
 from tqdm.auto import tqdm
@@ -400,6 +401,58 @@ def normalize_timestamp_output(timestamps: dict):
     return timestamps
 
 
+def get_pred_text_attr_name(cfg: DictConfig, model_name: str) -> str:
+    """Returns the manifest field of the transcriptions."""
+    if cfg.append_pred:
+        logging.info(f'Transcripts will be written in "{cfg.output_filename}" file')
+        if cfg.pred_name_postfix is not None:
+            pred_by_model_name = cfg.pred_name_postfix
+        else:
+            pred_by_model_name = model_name
+        return 'pred_text_' + pred_by_model_name
+    return 'pred_text'
+
+
+def add_transcription_to_item(
+    item: dict,
+    transcription: Union[rnnt_utils.Hypothesis, List[rnnt_utils.Hypothesis], str],
+    cfg: DictConfig,
+    pred_text_attr_name: str,
+    compute_langs: bool = False,
+    timestamps: bool = False,
+) -> dict:
+    """Adds the transcription of a string, a hypothesis or a list of n-best hypotheses to a manifest item."""
+    if isinstance(transcription, str):
+        item[pred_text_attr_name] = transcription
+        return item
+
+    beam = None
+    if isinstance(transcription, list):  # NBestHypothesis
+        if not cfg.decoding.beam.return_best_hypothesis:
+            beam = []
+            for hyp in transcription:
+                score = hyp.score.numpy().item() if isinstance(hyp.score, torch.Tensor) else hyp.score
+                beam.append((hyp.text, score))
+        transcription = transcription[0]
+
+    item[pred_text_attr_name] = transcription.text
+
+    if timestamps:
+        timestep = transcription.timestep
+        if timestep is not None and isinstance(timestep, dict):
+            timestep.pop('timestep', None)  # Pytorch tensor calculating index of each token, not needed.
+            for key in timestep.keys():
+                values = normalize_timestamp_output(timestep[key])
+                item[f'{key}'] = values
+
+    if compute_langs:
+        item['pred_lang'] = transcription.langs
+        item['pred_lang_chars'] = transcription.langs_chars
+    if beam is not None:
+        item['beams'] = beam
+    return item
+
+
 def write_transcription(
     transcriptions: Union[List[rnnt_utils.Hypothesis], List[List[rnnt_utils.Hypothesis]], List[str]],
     cfg: DictConfig,
@@ -409,63 +462,24 @@ def write_transcription(
     timestamps: bool = False,
 ) -> Tuple[str, str]:
     """Write generated transcription to output file."""
-    if cfg.append_pred:
-        logging.info(f'Transcripts will be written in "{cfg.output_filename}" file')
-        if cfg.pred_name_postfix is not None:
-            pred_by_model_name = cfg.pred_name_postfix
-        else:
-            pred_by_model_name = model_name
-        pred_text_attr_name = 'pred_text_' + pred_by_model_name
-    else:
-        pred_text_attr_name = 'pred_text'
-
-    return_hypotheses = True
-    if isinstance(transcriptions[0], str):  # List[str]:
-        best_hyps = transcriptions
-        return_hypotheses = False
-    elif isinstance(transcriptions[0], rnnt_utils.Hypothesis):  # List[rnnt_utils.Hypothesis]
-        best_hyps = transcriptions
+    pred_text_attr_name = get_pred_text_attr_name(cfg, model_name)
+
+    if isinstance(transcriptions[0], rnnt_utils.Hypothesis):  # List[rnnt_utils.Hypothesis]
         assert cfg.decoding.beam.return_best_hypothesis, "Works only with return_best_hypothesis=true"
-    elif isinstance(transcriptions[0], list) and isinstance(
-        transcriptions[0][0], rnnt_utils.Hypothesis
-    ):  # List[List[rnnt_utils.Hypothesis]] NBestHypothesis
-        best_hyps, beams = [], []
-        for hyps in transcriptions:
-            best_hyps.append(hyps[0])
-            if not cfg.decoding.beam.return_best_hypothesis:
-                beam = []
-                for hyp in hyps:
-                    score = hyp.score.numpy().item() if isinstance(hyp.score, torch.Tensor) else hyp.score
-                    beam.append((hyp.text, score))
-                beams.append(beam)
-    else:
+    elif not isinstance(transcriptions[0], str) and not (
+        isinstance(transcriptions[0], list) and isinstance(transcriptions[0][0], rnnt_utils.Hypothesis)
+    ):  # neither List[str] nor List[List[rnnt_utils.Hypothesis]] NBestHypothesis
         raise TypeError
 
     # create output dir if not exists
     Path(cfg.output_filename).parent.mkdir(parents=True, exist_ok=True)
     with open(cfg.output_filename, 'w', encoding='utf-8', newline='\n') as f:
         if cfg.audio_dir is not None:
-            for idx, transcription in enumerate(best_hyps):  # type: rnnt_utils.Hypothesis or str
-                if not return_hypotheses:  # transcription is str
-                    item = {'audio_filepath': filepaths[idx], pred_text_attr_name: transcription}
-                else:  # transcription is Hypothesis
-                    item = {'audio_filepath': filepaths[idx], pred_text_attr_name: transcription.text}
-
-                    if timestamps:
-                        timestamps = transcription.timestep
-                        if timestamps is not None and isinstance(timestamps, dict):
-                            timestamps.pop(
-                                'timestep', None
-                            )  # Pytorch tensor calculating index of each token, not needed.
-                            for key in timestamps.keys():
-                                values = normalize_timestamp_output(timestamps[key])
-                                item[f'{key}'] = values
-
-                    if compute_langs:
-                        item['pred_lang'] = transcription.langs
-                        item['pred_lang_chars'] = transcription.langs_chars
-                    if not cfg.decoding.beam.return_best_hypothesis:
-                        item['beams'] = beams[idx]
+            for idx, transcription in enumerate(transcriptions):
+                item = {'audio_filepath': filepaths[idx]}
+                item = add_transcription_to_item(
+                    item, transcription, cfg, pred_text_attr_name, compute_langs=compute_langs, timestamps=timestamps
+                )
                 f.write(json.dumps(item) + "\n")
         else:
             with open(cfg.dataset_manifest, 'r', encoding='utf-8') as fr:
@@ -473,29 +487,184 @@ def write_transcription(
                     line = line.strip()
                     if not line:
                         continue
-                    item = json.loads(line)
-                    if not return_hypotheses:  # transcription is str
-                        item[pred_text_attr_name] = best_hyps[idx]
-                    else:  # transcription is Hypothesis
-                        item[pred_text_attr_name] = best_hyps[idx].text
-
-                        if timestamps:
-                            timestamps = best_hyps[idx].timestep
-                            if timestamps is not None and isinstance(timestamps, dict):
-                                timestamps.pop(
-                                    'timestep', None
-                                )  # Pytorch tensor calculating index of each token, not needed.
-                                for key in timestamps.keys():
-                                    values = normalize_timestamp_output(timestamps[key])
-                                    item[f'{key}'] = values
-
-                        if compute_langs:
-                            item['pred_lang'] = best_hyps[idx].langs
-                            item['pred_lang_chars'] = best_hyps[idx].langs_chars
-
-                        if not cfg.decoding.beam.return_best_hypothesis:
-                            item['beams'] = beams[idx]
+                    item = add_transcription_to_item(
+                        json.loads(line),
+                        transcriptions[idx],
+                        cfg,
+                        pred_text_attr_name,
+                        compute_langs=compute_langs,
+                        timestamps=timestamps,
+                    )
+                    f.write(json.dumps(item) + "\n")
+
+    return cfg.output_filename, pred_text_attr_name
+
+
+def iter_manifest_windows(
+    manifest_path: str, window_size: int, sort_by_duration: bool = True, skip: Optional[np.ndarray] = None
+) -> Iterator[List[Tuple[int, dict]]]:
+    """
+    Streams the entries of a manifest in windows, without loading the whole manifest.
+
+    Args:
+        manifest_path: path to the manifest.
+        window_size: maximum number of entries in a window.
+        sort_by_duration: whether to sort a window by decreasing duration, if every entry of the window has one.
+        skip: optional boolean mask of the entries to skip, by entry index.
+
+    Returns:
+        Iterator over windows, lists of the index of an entry among the non-empty lines of the manifest and the entry.
+    """
+
+    def _maybe_sort(window):
+        if sort_by_duration and all(item.get("duration") is not None for _, item in window):
+            window.sort(reverse=True, key=lambda entry: entry[1]["duration"])
+        return window
+
+    window = []
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        entry_idx = 0
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if skip is None or not skip[entry_idx]:
+                window.append((entry_idx, json.loads(line)))
+                if len(window) == window_size:
+                    yield _maybe_sort(window)
+                    window = []
+            entry_idx += 1
+    if window:
+        yield _maybe_sort(window)
+
+
+def _get_transcription_store_header(manifest_path: str, model_name: str) -> dict:
+    """Identifies the manifest and the model whose transcriptions are stored in a transcription store."""
+    stat = os.stat(manifest_path)
+    return {
+        'manifest': os.path.abspath(manifest_path),
+        'manifest_size': stat.st_size,
+        'manifest_mtime_ns': stat.st_mtime_ns,
+        'model_name': model_name,
+    }
+
+
+def _read_transcription_store(store_path: str, num_entries: int, header: dict) -> np.ndarray:
+    """
+    Returns the byte offsets of the records of manifest entries in a transcription store, -1 for entries without a
+    record. A record truncated by an interrupted run, and the records after it, are removed from the store.
+    A store whose header does not match `header` (written for another manifest, a modified manifest or another
+    model) is discarded, and a new store starting with `header` is created.
+    """
+    offsets = np.full(num_entries, -1, dtype=np.int64)
+    if os.path.exists(store_path):
+        with open(store_path, 'rb+') as f:
+            try:
+                store_header = json.loads(f.readline())['header']
+            except (ValueError, KeyError, TypeError):
+                store_header = None
+            if store_header == header:
+                offset = f.tell()
+                for line in f:
+                    try:
+                        entry_idx = json.loads(line)['entry_idx'] if line.endswith(b'\n') else None
+                        if not isinstance(entry_idx, int) or not 0 <= entry_idx < num_entries:
+                            raise ValueError
+                        offsets[entry_idx] = offset
+                    except (ValueError, KeyError, TypeError):
+                        logging.warning(f"Removing truncated or invalid record at byte {offset} of {store_path}")
+                        break
+                    offset += len(line)
+                f.truncate(offset)
+                return offsets
+        logging.warning(f"Discarding {store_path}, which was written for another manifest or model")
+
+    with open(store_path, 'wb') as f:
+        f.write((json.dumps({'header': header}) + "\n").encode('utf-8'))
+    return offsets
+
+
+def transcribe_manifest_resumable(
+    asr_model: ASRModel,
+    cfg: DictConfig,
+    model_name: str,
+    override_cfg=None,
+    window_size: int = 10000,
+    compute_langs: bool = False,
+    timestamps: bool = False,
+) -> Tuple[str, str]:
+    """
+    Transcribes the entries of `cfg.dataset_manifest` and writes them with their transcriptions to
+    `cfg.output_filename`, without holding the manifest or the transcriptions in memory.
+
+    The manifest is streamed in windows of `window_size` entries, which are sorted by duration when
+    `cfg.presort_manifest` is set. The transcriptions of a window are appended to a store next to the output file,
+    `<output_filename>.partial`, as soon as the window is transcribed. A restarted run skips the entries in the store,
+    so an interrupted job only loses the window in progress. The store starts with a header identifying the manifest
+    (path, size and modification time) and the model, and a store written for another manifest or model is discarded.
+    When every entry is transcribed, the output manifest is written in the order of the input manifest from an index
+    of the records in the store, and the store is removed.
+
+    Args:
+        asr_model: ASR model.
+        cfg: transcription config, see `TranscriptionConfig` of `examples/asr/transcribe_speech.py`.
+        model_name: name of the model, used for the transcription field if `cfg.append_pred` is set.
+        override_cfg: optional transcribe config of the model.
+        window_size: number of manifest entries transcribed, sorted and stored together.
+        compute_langs: whether to write the language predictions.
+        timestamps: whether to write the timestamps.
+
+    Returns:
+        Path to the output manifest and the field of the transcriptions.
+    """
+    pred_text_attr_name = get_pred_text_attr_name(cfg, model_name)
+    audio_key = cfg.get('audio_key', 'audio_filepath')
+    store_path = cfg.output_filename + '.partial'
+    Path(cfg.output_filename).parent.mkdir(parents=True, exist_ok=True)
+
+    with open(cfg.dataset_manifest, 'r', encoding='utf-8') as f:
+        num_entries = sum(1 for line in f if line.strip())
+    header = _get_transcription_store_header(cfg.dataset_manifest, model_name)
+    offsets = _read_transcription_store(store_path, num_entries, header)
+    num_done = int((offsets >= 0).sum())
+    if num_done > 0:
+        logging.info(f"Resuming transcription, {num_done} of {num_entries} entries are found in {store_path}")
+
+    windows = iter_manifest_windows(
+        cfg.dataset_manifest, window_size, sort_by_duration=cfg.presort_manifest, skip=offsets >= 0
+    )
+    with open(store_path, 'ab') as store:
+        for window in tqdm(windows, total=-(-(num_entries - num_done) // window_size), desc="Transcribing windows"):
+            with NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
+                for _, item in window:
+                    audio_file = get_full_path(audio_file=item[audio_key], manifest_file=cfg.dataset_manifest)
+                    item = dict(item, audio_filepath=audio_file)
                     f.write(json.dumps(item) + "\n")
+            try:
+                transcriptions = asr_model.transcribe(audio=f.name, override_config=override_cfg)
+            finally:
+                os.unlink(f.name)
+
+            # if transcriptions form a tuple of (best_hypotheses, all_hypotheses)
+            if type(transcriptions) == tuple and len(transcriptions) == 2:
+                transcriptions = transcriptions[1] if cfg.extract_nbest else transcriptions[0]
+            if len(transcriptions) != len(window):
+                raise RuntimeError(f"Expected {len(window)} transcriptions, got {len(transcriptions)}")
+
+            for (entry_idx, item), transcription in zip(window, transcriptions):
+                item = add_transcription_to_item(
+                    item, transcription, cfg, pred_text_attr_name, compute_langs=compute_langs, timestamps=timestamps
+                )
+                offsets[entry_idx] = store.tell()
+                store.write((json.dumps({'entry_idx': entry_idx, 'item': item}) + "\n").encode('utf-8'))
+            store.flush()
+            os.fsync(store.fileno())
+
+    with open(store_path, 'rb') as store, open(cfg.output_filename, 'w', encoding='utf-8', newline='\n') as f:
+        for offset in offsets:
+            store.seek(offset)
+            f.write(json.dumps(json.loads(store.readline())['item']) + "\n")
+    os.unlink(store_path)
 
     return cfg.output_filename, pred_text_attr_name
 
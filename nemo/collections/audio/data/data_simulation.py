@@ -16,6 +16,7 @@ import itertools
 import multiprocessing
 import os
 import random
+from functools import lru_cache
 from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 import h5py
@@ -25,7 +26,8 @@ import numpy as np
 import soundfile as sf
 from numpy.random import default_rng
 from omegaconf import DictConfig, OmegaConf
-from scipy.signal import convolve
+from scipy.fft import irfft, next_fast_len, rfft
+from scipy.signal import fftconvolve
 from scipy.spatial.transform import Rotation
 from tqdm import tqdm
 
@@ -495,12 +497,20 @@ class RIRCorpusGenerator(object):
         if self.cfg.get('anechoic') is None:
             raise ValueError('Anechoic configuratio not provided.')
 
+        # simulation and output format
+        if (simulator := self.cfg.get('simulator', 'pyroomacoustics')) not in ['pyroomacoustics', 'numpy']:
+            raise ValueError(f'Unexpected simulator: {simulator}')
+
+        if (rooms_per_shard := self.cfg.get('rooms_per_shard')) is not None and rooms_per_shard <= 0:
+            raise ValueError(f'Number of rooms per shard must be positive: {rooms_per_shard}')
+
     def generate_room_params(self) -> dict:
         """Generate randomized room parameters based on the provided
         configuration.
         """
         # Prepare room sim parameters
-        if not PRA:
+        simulator = self.cfg.get('simulator', 'pyroomacoustics')
+        if simulator == 'pyroomacoustics' and not PRA:
             raise ImportError('pyroomacoustics is required for room simulation')
 
         room_cfg = self.cfg.room
@@ -548,7 +558,10 @@ class RIRCorpusGenerator(object):
 
             try:
                 # Get parameters from size and RT60
-                room_absorption, room_max_order = pra.inverse_sabine(rt60, room_dim)
+                if simulator == 'pyroomacoustics':
+                    room_absorption, room_max_order = pra.inverse_sabine(rt60, room_dim)
+                else:
+                    room_absorption, room_max_order = inverse_sabine(rt60, room_dim)
                 break
             except Exception as e:
                 logging.debug('Inverse sabine failed: %s', str(e))
@@ -696,6 +709,9 @@ class RIRCorpusGenerator(object):
             elif os.path.isdir(output_dir_subset) and len(os.listdir(output_dir_subset)) > 0:
                 raise RuntimeError(f'Output directory {output_dir_subset} is not empty.')
 
+            simulator = self.cfg.get('simulator', 'pyroomacoustics')
+            rooms_per_shard = self.cfg.get('rooms_per_shard')
+
             # Generate examples
             for n_room in range(num_rooms):
 
@@ -709,7 +725,11 @@ class RIRCorpusGenerator(object):
                 source_position = self.generate_source_position(room_params['dim'])
 
                 # file name for the file
-                room_filepath = os.path.join(output_dir_subset, f'{subset}_room_{n_room:06d}.h5')
+                if rooms_per_shard is None:
+                    room_filepath = os.path.join(output_dir_subset, f'{subset}_room_{n_room:06d}.h5')
+                else:
+                    shard = n_room // rooms_per_shard
+                    room_filepath = os.path.join(output_dir_subset, f'{subset}_shard_{shard:06d}.npy')
 
                 # prepare example
                 example = {
@@ -717,9 +737,20 @@ class RIRCorpusGenerator(object):
                     'mic_array': mic_array,
                     'source_position': source_position,
                     'room_filepath': room_filepath,
+                    'simulator': simulator,
                 }
                 examples.append(example)
 
+            if rooms_per_shard is not None:
+                # Each worker simulates all rooms in a shard and saves them in a single file
+                examples = [
+                    {'examples': examples[n : n + rooms_per_shard], 'shard_filepath': examples[n]['room_filepath']}
+                    for n in range(0, len(examples), rooms_per_shard)
+                ]
+                simulate_fn = simulate_room_shard_kwargs
+            else:
+                simulate_fn = simulate_room_kwargs
+
             # Simulation
             if (num_workers := self.cfg.get('num_workers')) is None:
                 num_workers = os.cpu_count() - 1
@@ -727,13 +758,17 @@ class RIRCorpusGenerator(object):
             if num_workers > 1:
                 logging.info(f'Simulate using {num_workers} workers')
                 with multiprocessing.Pool(processes=num_workers) as pool:
-                    metadata = list(tqdm(pool.imap(simulate_room_kwargs, examples), total=len(examples)))
+                    metadata = list(tqdm(pool.imap(simulate_fn, examples), total=len(examples)))
 
             else:
                 logging.info('Simulate using a single worker')
                 metadata = []
                 for example in tqdm(examples, total=len(examples)):
-                    metadata.append(simulate_room(**example))
+                    metadata.append(simulate_fn(example))
+
+            if rooms_per_shard is not None:
+                # Flatten the per-shard metadata
+                metadata = [room_metadata for shard_metadata in metadata for room_metadata in shard_metadata]
 
             # Save manifest
             manifest_filepath = os.path.join(output_dir, f'{subset}_manifest.json')
@@ -784,6 +819,7 @@ def simulate_room(
     mic_array: ArrayGeometry,
     source_position: Iterable[Iterable[float]],
     room_filepath: str,
+    simulator: str = 'pyroomacoustics',
 ) -> dict:
     """Simulate room
 
@@ -792,39 +828,103 @@ def simulate_room(
         mic_array: defines positions of the microphones
         source_positions: positions for all sources to be simulated
         room_filepath: results are saved to this path
+        simulator: `pyroomacoustics` or `numpy` (see `simulate_shoebox_rir`)
 
     Returns:
         Dictionary with metadata based on simulation setup
         and simulation results. Used to create the corresponding
         manifest file.
     """
-    # room with the selected parameters
-    room_sim = pra.ShoeBox(
-        room_params['dim'],
-        fs=room_params['sample_rate'],
-        materials=pra.Material(room_params['absorption']),
-        max_order=room_params['max_order'],
+    rir_dataset, metadata = simulate_room_rir(
+        room_params=room_params, mic_array=mic_array, source_position=source_position, simulator=simulator
     )
+    metadata = {'room_filepath': room_filepath, **metadata}
 
-    # same geometry for generating anechoic responses
-    room_anechoic = pra.ShoeBox(
-        room_params['dim'],
-        fs=room_params['sample_rate'],
-        materials=pra.Material(room_params['anechoic_absorption']),
-        max_order=room_params['anechoic_max_order'],
-    )
+    # Save simulated RIR
+    save_rir_simulation(room_filepath, rir_dataset, metadata)
+
+    return convert_numpy_to_serializable(metadata)
 
-    # Compute RIRs
-    for room in [room_sim, room_anechoic]:
-        # place the array
-        room.add_microphone_array(mic_array.positions.T)
 
-        # place the sources
-        for s_pos in source_position:
-            room.add_source(s_pos)
+def simulate_room_rir(
+    room_params: dict,
+    mic_array: ArrayGeometry,
+    source_position: Iterable[Iterable[float]],
+    simulator: str = 'pyroomacoustics',
+) -> Tuple[Dict[str, List[np.ndarray]], dict]:
+    """Simulate RIRs for a room, without saving them.
 
-        # generate RIRs
-        room.compute_rir()
+    Args:
+        room_params: parameters of the room to be simulated
+        mic_array: defines positions of the microphones
+        source_positions: positions for all sources to be simulated
+        simulator: `pyroomacoustics` or `numpy` (see `simulate_shoebox_rir`)
+
+    Returns:
+        Tuple (rir_dataset, metadata), where rir_dataset contains `rir` and `anechoic`
+        multichannel RIRs for each source and metadata describes the simulation.
+    """
+    if simulator == 'pyroomacoustics':
+        # room with the selected parameters
+        room_sim = pra.ShoeBox(
+            room_params['dim'],
+            fs=room_params['sample_rate'],
+            materials=pra.Material(room_params['absorption']),
+            max_order=room_params['max_order'],
+        )
+
+        # same geometry for generating anechoic responses
+        room_anechoic = pra.ShoeBox(
+            room_params['dim'],
+            fs=room_params['sample_rate'],
+            materials=pra.Material(room_params['anechoic_absorption']),
+            max_order=room_params['anechoic_max_order'],
+        )
+
+        # Compute RIRs
+        for room in [room_sim, room_anechoic]:
+            # place the array
+            room.add_microphone_array(mic_array.positions.T)
+
+            # place the sources
+            for s_pos in source_position:
+                room.add_source(s_pos)
+
+            # generate RIRs
+            room.compute_rir()
+
+        # RIRs
+        rir_dataset = {
+            'rir': convert_rir_to_multichannel(room_sim.rir),
+            'anechoic': convert_rir_to_multichannel(room_anechoic.rir),
+        }
+        rt60 = {
+            'rir_rt60_theory': room_sim.rt60_theory(),
+            'rir_rt60_measured': room_sim.measure_rt60().mean(axis=0),  # average across mics for each source
+            'anechoic_rt60_theory': room_anechoic.rt60_theory(),
+            'anechoic_rt60_measured': room_anechoic.measure_rt60().mean(axis=0),
+        }
+    elif simulator == 'numpy':
+        rir_dataset, rt60 = {}, {}
+        for rir_key, absorption, max_order in [
+            ('rir', room_params['absorption'], room_params['max_order']),
+            ('anechoic', room_params['anechoic_absorption'], room_params['anechoic_max_order']),
+        ]:
+            rir_dataset[rir_key] = simulate_shoebox_rir(
+                room_dim=room_params['dim'],
+                absorption=absorption,
+                max_order=max_order,
+                mic_positions=mic_array.positions,
+                source_positions=source_position,
+                sample_rate=room_params['sample_rate'],
+            )
+            rt60[f'{rir_key}_rt60_theory'] = sabine_rt60(room_params['dim'], absorption)
+            # average across mics for each source
+            rt60[f'{rir_key}_rt60_measured'] = np.array(
+                [measure_rt60(rir, room_params['sample_rate']).mean() for rir in rir_dataset[rir_key]]
+            )
+    else:
+        raise ValueError(f'Unexpected simulator: {simulator}')
 
     # Get metadata for sources
     source_distance = []
@@ -836,23 +936,16 @@ def simulate_room(
         source_azimuth.append(azimuth)
         source_elevation.append(elevation)
 
-    # RIRs
-    rir_dataset = {
-        'rir': convert_rir_to_multichannel(room_sim.rir),
-        'anechoic': convert_rir_to_multichannel(room_anechoic.rir),
-    }
-
     # Prepare metadata dict and return
     metadata = {
-        'room_filepath': room_filepath,
         'sample_rate': room_params['sample_rate'],
         'dim': room_params['dim'],
         'rir_absorption': room_params['absorption'],
         'rir_max_order': room_params['max_order'],
-        'rir_rt60_theory': room_sim.rt60_theory(),
-        'rir_rt60_measured': room_sim.measure_rt60().mean(axis=0),  # average across mics for each source
-        'anechoic_rt60_theory': room_anechoic.rt60_theory(),
-        'anechoic_rt60_measured': room_anechoic.measure_rt60().mean(axis=0),  # average across mics for each source
+        'rir_rt60_theory': rt60['rir_rt60_theory'],
+        'rir_rt60_measured': rt60['rir_rt60_measured'],
+        'anechoic_rt60_theory': rt60['anechoic_rt60_theory'],
+        'anechoic_rt60_measured': rt60['anechoic_rt60_measured'],
         'anechoic_absorption': room_params['anechoic_absorption'],
         'anechoic_max_order': room_params['anechoic_max_order'],
         'mic_positions': mic_array.positions,
@@ -864,10 +957,239 @@ def simulate_room(
         'num_sources': len(source_position),
     }
 
-    # Save simulated RIR
-    save_rir_simulation(room_filepath, rir_dataset, metadata)
+    return rir_dataset, metadata
 
-    return convert_numpy_to_serializable(metadata)
+
+def simulate_room_shard_kwargs(kwargs: dict) -> List[dict]:
+    """Wrapper around `simulate_room_shard` to handle kwargs.
+
+    Args:
+        kwargs: kwargs that are forwarded to `simulate_room_shard`
+
+    Returns:
+        List of dictionaries with metadata, see `simulate_room_shard`
+    """
+    return simulate_room_shard(**kwargs)
+
+
+def simulate_room_shard(examples: List[dict], shard_filepath: str) -> List[dict]:
+    """Simulate multiple rooms and save all their RIRs in a single shard.
+
+    RIRs of all rooms are concatenated along the time axis and saved as a single
+    float32 array of shape (num_samples, num_mics), which can be memory-mapped when loading.
+    Position of each RIR in the shard is saved in `rir_index` of the room metadata.
+
+    Args:
+        examples: list of kwargs for `simulate_room_rir`
+        shard_filepath: RIRs of all rooms are saved to this path
+
+    Returns:
+        List of dictionaries with metadata for each room, see `simulate_room`.
+    """
+    rirs, metadata = [], []
+    offset = 0
+
+    for example in examples:
+        rir_dataset, room_metadata = simulate_room_rir(
+            room_params=example['room_params'],
+            mic_array=example['mic_array'],
+            source_position=example['source_position'],
+            simulator=example.get('simulator', 'pyroomacoustics'),
+        )
+
+        # (offset, length) of each RIR in the shard
+        rir_index = {'sample_rate': room_metadata['sample_rate']}
+        for rir_key, rir_value in rir_dataset.items():
+            rir_index[rir_key] = []
+            for rir in rir_value:
+                rir_index[rir_key].append([offset, len(rir)])
+                rirs.append(rir)
+                offset += len(rir)
+
+        metadata.append({'room_filepath': shard_filepath, **room_metadata, 'rir_index': rir_index})
+
+    save_rir_shard(shard_filepath, rirs)
+
+    return [convert_numpy_to_serializable(room_metadata) for room_metadata in metadata]
+
+
+@lru_cache(maxsize=32)
+def _image_source_lattice(max_order: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Indices of all image sources with at most max_order reflections.
+
+    Returns:
+        Tuple (indices, order), where indices is an array with shape (num_images, 3)
+        and order is the number of reflections for each image.
+    """
+    r = np.arange(-max_order, max_order + 1)
+    n_y, n_z = np.meshgrid(r, r, indexing='ij')
+    n_y, n_z = n_y.ravel(), n_z.ravel()
+    order_yz = np.abs(n_y) + np.abs(n_z)
+
+    indices = []
+    for n_x in r:
+        mask = order_yz <= max_order - abs(n_x)
+        indices.append(np.stack([np.full(np.count_nonzero(mask), n_x), n_y[mask], n_z[mask]], axis=1))
+    indices = np.concatenate(indices)
+
+    return indices, np.abs(indices).sum(axis=1)
+
+
+def inverse_sabine(rt60: float, room_dim: Iterable[float], sound_speed: float = 343.0) -> Tuple[float, int]:
+    """Energy absorption of the walls and the image source order required for the given RT60,
+    using Sabine's formula. Matches `pyroomacoustics.inverse_sabine`.
+
+    Args:
+        rt60: desired reverberation time in seconds
+        room_dim: dimensions of a shoebox room
+        sound_speed: speed of sound in m/s
+
+    Returns:
+        Tuple (absorption, max_order)
+    """
+    room_dim = np.asarray(room_dim, dtype=float)
+    volume = np.prod(room_dim)
+    surface = 2 * (room_dim[0] * room_dim[1] + room_dim[0] * room_dim[2] + room_dim[1] * room_dim[2])
+    absorption = 24 * np.log(10) / sound_speed * volume / (surface * rt60)
+
+    if absorption > 1:
+        raise ValueError(f'Evaluation of parameters failed. Room may be too large for the required RT60 {rt60}s.')
+
+    # images up to max_order form a diamond-shaped pile of rooms, the order is chosen so that the largest
+    # sphere inside the diamond includes all reflections within a distance of sound_speed * rt60
+    radius = min(l1 * l2 / np.sqrt(l1**2 + l2**2) for l1, l2 in itertools.combinations(room_dim, 2))
+    max_order = int(np.ceil(sound_speed * rt60 / radius - 1))
+    return absorption, max_order
+
+
+def sabine_rt60(room_dim: Iterable[float], absorption: float, sound_speed: float = 343.0) -> float:
+    """Theoretical RT60 of a shoebox room using Sabine's formula.
+
+    Args:
+        room_dim: dimensions of a shoebox room
+        absorption: energy absorption of the walls
+        sound_speed: speed of sound in m/s
+
+    Returns:
+        RT60 in seconds
+    """
+    room_dim = np.asarray(room_dim, dtype=float)
+    volume = np.prod(room_dim)
+    surface = 2 * (room_dim[0] * room_dim[1] + room_dim[0] * room_dim[2] + room_dim[1] * room_dim[2])
+    return float(24 * np.log(10) / sound_speed * volume / (surface * absorption))
+
+
+def measure_rt60(rir: np.ndarray, sample_rate: float, decay_db: float = 60) -> np.ndarray:
+    """Measure RT60 using Schroeder's backward integration.
+    Time is measured from the -5 dB point of the energy decay curve, as in `pyroomacoustics.experimental.measure_rt60`.
+
+    Args:
+        rir: single- or multi-channel RIR, (samples,) or (samples, channels)
+        sample_rate: sample rate of the RIR
+        decay_db: decay used for measurement, result is extrapolated to 60 dB
+
+    Returns:
+        RT60 in seconds for each channel
+    """
+    rir = rir[:, None] if rir.ndim == 1 else rir
+    energy = np.cumsum(rir[::-1] ** 2, axis=0)[::-1]
+    energy_db = pow2db(energy / np.maximum(energy[0], 1e-16) + 1e-16)
+
+    # first sample below each of the levels, last sample if the level is not reached
+    n_5db = np.argmax(energy_db < -5, axis=0)
+    below_decay = energy_db < -5 - decay_db
+    n_decay = np.where(below_decay.any(axis=0), np.argmax(below_decay, axis=0), len(rir) - 1)
+
+    return (60 / decay_db) * (n_decay - n_5db) / sample_rate
+
+
+def simulate_shoebox_rir(
+    room_dim: Iterable[float],
+    absorption: float,
+    max_order: int,
+    mic_positions: np.ndarray,
+    source_positions: Iterable[Iterable[float]],
+    sample_rate: float,
+    sound_speed: float = 343.0,
+    fractional_delay_length: int = 81,
+    fractional_delay_resolution: int = 32,
+) -> List[np.ndarray]:
+    """Simulate RIRs of a shoebox room using the image source method, vectorized with numpy.
+
+    All image sources up to max_order are processed at once for each source. Instead of adding a windowed-sinc
+    fractional delay filter for each image, the attenuation of each image is split between the two closest of
+    `fractional_delay_resolution + 1` fractional delays. The resulting impulse trains are filtered with the
+    corresponding fractional delay filters in the frequency domain. The RIR structure follows pyroomacoustics,
+    with walls of equal absorption and the global delay of `fractional_delay_length // 2` samples.
+
+    Args:
+        room_dim: dimensions of the room, [width, length, height]
+        absorption: energy absorption of the walls
+        max_order: maximum number of reflections for an image source
+        mic_positions: positions of the microphones, shape (num_mics, 3)
+        source_positions: positions of the sources, list with num_sources elements
+        sample_rate: sample rate of the RIR
+        sound_speed: speed of sound in m/s
+        fractional_delay_length: length of the windowed-sinc fractional delay filter
+        fractional_delay_resolution: number of fractional delay filters per sample
+
+    Returns:
+        List of multichannel RIRs, each with shape (num_samples, num_mics)
+    """
+    room_dim = np.asarray(room_dim, dtype=float)
+    mic_positions = np.asarray(mic_positions, dtype=float)
+    num_mics = len(mic_positions)
+    num_phases = fractional_delay_resolution + 1
+
+    # images of a source are the same for all sources, only the position changes
+    indices, order = _image_source_lattice(max_order)
+    # pressure reflection coefficient of the walls
+    attenuation = np.sqrt(1 - absorption) ** order / (4 * np.pi)
+    is_odd = indices % 2 == 1
+
+    # fractional delay filters for all phases, (num_phases, fractional_delay_length)
+    taps = np.arange(fractional_delay_length) - fractional_delay_length // 2
+    phases = np.arange(num_phases) / fractional_delay_resolution
+    filters = np.hanning(fractional_delay_length) * np.sinc(taps[None, :] - phases[:, None])
+
+    mc_rir = []
+    for source_position in source_positions:
+        source_position = np.asarray(source_position, dtype=float)
+        # position of each image, odd indices are reflected
+        images = indices * room_dim + np.where(is_odd, room_dim - source_position, source_position)
+        # squared distances computed with a matrix product, (num_images, num_mics)
+        distance = (images**2).sum(axis=1)[:, None] - 2 * images @ mic_positions.T + (mic_positions**2).sum(axis=1)
+        distance = np.sqrt(np.maximum(distance, 1e-12))
+        amplitude = attenuation[:, None] / distance
+
+        delay = distance * (sample_rate / sound_speed)
+        delay_int = delay.astype(np.int64)
+        phase = (delay - delay_int) * fractional_delay_resolution
+        phase_int = phase.astype(np.int64)
+        phase_weight = phase - phase_int
+
+        # impulse trains for each phase and mic, (num_phases, num_mics, num_delays)
+        num_delays = int(delay_int.max()) + 1
+        mic_index = np.arange(num_mics)[None, :]
+        index = (phase_int * num_mics + mic_index) * num_delays + delay_int
+        weights = amplitude * (1 - phase_weight)
+        trains = np.bincount(index.ravel(), weights=weights.ravel(), minlength=num_phases * num_mics * num_delays)
+        trains += np.bincount(
+            (index + num_mics * num_delays).ravel(),
+            weights=(amplitude - weights).ravel(),
+            minlength=num_phases * num_mics * num_delays,
+        )
+        trains = trains.reshape(num_phases, num_mics, num_delays)
+
+        # filter each train with its fractional delay and sum
+        num_samples = num_delays + fractional_delay_length - 1
+        fft_length = next_fast_len(num_samples, real=True)
+        spectrum = np.einsum(
+            'pmf,pf->mf', rfft(trains, n=fft_length, axis=-1), rfft(filters, n=fft_length, axis=-1), optimize=True
+        )
+        mc_rir.append(irfft(spectrum, n=fft_length, axis=-1)[:, :num_samples].T)
+
+    return mc_rir
 
 
 def save_rir_simulation(filepath: str, rir_dataset: Dict[str, List[np.array]], metadata: dict):
@@ -903,17 +1225,55 @@ def save_rir_simulation(filepath: str, rir_dataset: Dict[str, List[np.array]], m
             metadata_group.create_dataset(key, data=value)
 
 
-def load_rir_simulation(filepath: str, source: int = 0, rir_key: str = 'rir') -> Tuple[np.ndarray, float]:
+def save_rir_shard(filepath: str, rirs: List[np.ndarray]):
+    """Save multiple multichannel RIRs in a single shard.
+
+    Args:
+        filepath: Path to a `.npy` file where the RIRs will be saved.
+        rirs: List of RIRs, each with shape (num_samples, num_mics).
+    """
+    if os.path.exists(filepath):
+        raise RuntimeError(f'Output file exists: {filepath}')
+
+    if len(num_mics := set(rir.shape[1] for rir in rirs)) > 1:
+        raise ValueError(f'All RIRs in a shard should have the same number of mics, found {num_mics}')
+
+    with open(filepath, 'wb') as f:
+        np.save(f, np.concatenate(rirs, axis=0).astype(np.float32))
+
+
+@lru_cache(maxsize=64)
+def load_rir_shard(filepath: str) -> np.ndarray:
+    """Memory-map a shard of RIRs. Shards are cached, so repeated loads from the same shard do not reopen the file.
+
+    Args:
+        filepath: Path to a shard saved with `save_rir_shard`
+
+    Returns:
+        Read-only memory-mapped array with shape (num_samples, num_mics)
+    """
+    return np.load(filepath, mmap_mode='r')
+
+
+def load_rir_simulation(
+    filepath: str, source: int = 0, rir_key: str = 'rir', rir_index: Optional[dict] = None
+) -> Tuple[np.ndarray, float]:
     """Load simulated RIRs and metadata.
 
     Args:
         filepath: Path to simulated RIR data
         source: Index of a source.
         rir_key: String to denote which RIR to load, if there are multiple available.
+        rir_index: Position of the RIRs in a shard, required if `filepath` is a shard saved with `save_rir_shard`.
 
     Returns:
         Multichannel RIR as ndarray with shape (num_samples, num_channels) and scalar sample rate.
     """
+    if rir_index is not None:
+        offset, length = rir_index[rir_key][source]
+        rir = np.array(load_rir_shard(filepath)[offset : offset + length], dtype=float)
+        return rir, rir_index['sample_rate']
+
     with h5py.File(filepath, 'r') as h5f:
         # Load RIR
         rir = h5f[rir_key][f'{source}'][:]
@@ -1363,6 +1723,10 @@ class RIRMixGenerator(object):
             'distance_source_to_mic': distance_source_to_mic,
         }
 
+        if 'rir_index' in room_data:
+            # RIRs are saved in a shard
+            target_cfg['rir_index'] = room_data['rir_index']
+
         return target_cfg
 
     def generate_interference(self, subset: str, target_cfg: dict) -> List[dict]:
@@ -1639,12 +2003,10 @@ def convolve_rir(signal: np.ndarray, rir: np.ndarray) -> np.ndarray:
     num_samples = len(signal)
     if rir.ndim == 1:
         # convolve and trim to length
-        out = convolve(signal, rir)[:num_samples]
+        out = fftconvolve(signal, rir)[:num_samples]
     elif rir.ndim == 2:
-        num_channels = rir.shape[1]
-        out = np.zeros((num_samples, num_channels))
-        for m in range(num_channels):
-            out[:, m] = convolve(signal, rir[:, m])[:num_samples]
+        # all channels are convolved at once, using a single FFT of the signal
+        out = fftconvolve(signal[:, None], rir, axes=0)[:num_samples]
 
     else:
         raise RuntimeError(f'RIR with {rir.ndim} not supported')
@@ -2050,7 +2412,7 @@ def simulate_room_mix(
         """Load a RIR and check that the sample rate is matching the desired sample rate
 
         Args:
-            room_filepath: Path to a room simulation in an h5 file
+            room_filepath: Path to a room simulation in an h5 file or a shard of RIRs
             source: Index of the desired source
             sample_rate: Sample rate of the simulation
             rir_key: Key of the RIR to load from the simulation.
@@ -2058,7 +2420,9 @@ def simulate_room_mix(
         Returns:
             Numpy array with shape (num_samples, num_channels)
         """
-        rir, rir_sample_rate = load_rir_simulation(room_filepath, source=source, rir_key=rir_key)
+        rir, rir_sample_rate = load_rir_simulation(
+            room_filepath, source=source, rir_key=rir_key, rir_index=target_cfg.get('rir_index')
+        )
         if rir_sample_rate != sample_rate:
             raise RuntimeError(
                 f'RIR sample rate ({sample_rate}) is not matching the expected sample rate ({sample_rate}). File: {room_filepath}'
@@ -2124,10 +2488,11 @@ def simulate_room_mix(
     )
     source_signals_metadata = {'target': target_metadata['source_signals']}
 
-    # Convolve target
-    target_reverberant = convolve_rir(target_signal, target_rir)
-    target_anechoic = convolve_rir(target_signal, target_rir_anechoic)
-    target_early = convolve_rir(target_signal, target_rir_early)
+    # Convolve target with all RIRs at once
+    target_rirs = [target_rir, target_rir_anechoic, target_rir_early]
+    rir_len = max(len(rir) for rir in target_rirs)
+    target_rirs = np.concatenate([np.pad(rir, ((0, rir_len - len(rir)), (0, 0))) for rir in target_rirs], axis=1)
+    target_reverberant, target_anechoic, target_early = np.split(convolve_rir(target_signal, target_rirs), 3, axis=1)
 
     # Prepare noise signal
     noise, noise_metadata = prepare_source_signal(
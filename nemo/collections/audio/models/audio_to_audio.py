@@ -20,7 +20,6 @@ from typing import Dict, List, Optional, Union
 
 import hydra
 import librosa
-import soundfile as sf
 import torch
 from lightning.pytorch import Trainer
 from omegaconf import DictConfig, OmegaConf
@@ -31,6 +30,7 @@ from nemo.collections.asr.parts.preprocessing.segment import ChannelSelectorType
 from nemo.collections.audio.data import audio_to_audio_dataset
 from nemo.collections.audio.data.audio_to_audio_lhotse import LhotseAudioToTargetDataset
 from nemo.collections.audio.metrics.audio import AudioMetricWrapper
+from nemo.collections.audio.parts.utils.chunked_processing import AudioWriterPool, process_files_in_chunks
 from nemo.collections.common.data.lhotse import get_lhotse_dataloader_from_config
 from nemo.core.classes import ModelPT
 from nemo.utils import logging, model_utils
@@ -340,6 +340,9 @@ class AudioToAudioModel(ModelPT, ABC):
         num_workers: Optional[int] = None,
         input_channel_selector: Optional[ChannelSelectorType] = None,
         input_dir: Optional[str] = None,
+        chunk_duration: Optional[float] = None,
+        chunk_hop_duration: Optional[float] = None,
+        num_writer_threads: int = 1,
     ) -> List[str]:
         """
         Takes paths to audio files and returns a list of paths to processed
@@ -353,6 +356,11 @@ class AudioToAudioModel(ModelPT, ABC):
             input_channel_selector (int | Iterable[int] | str): select a single channel or a subset of channels from multi-channel audio.
                             If set to `'average'`, it performs averaging across channels. Disabled if set to `None`. Defaults to `None`.
             input_dir: Optional, directory that contains the input files. If provided, the output directory will mirror the input directory structure.
+            chunk_duration: Optional, duration of chunks in seconds. If provided, files are processed in chunks,
+                            which are windowed and overlap-added, and chunks of several files are batched together.
+                            Memory does not depend on the length of the files.
+            chunk_hop_duration: Optional, hop between chunks in seconds. Defaults to half of `chunk_duration`.
+            num_writer_threads: number of background threads writing the processed files.
 
         Returns:
             Paths to processed audio signals.
@@ -360,6 +368,18 @@ class AudioToAudioModel(ModelPT, ABC):
         if paths2audio_files is None or len(paths2audio_files) == 0:
             return {}
 
+        if chunk_duration is not None:
+            return self._process_in_chunks(
+                paths2audio_files=paths2audio_files,
+                output_dir=output_dir,
+                batch_size=batch_size,
+                input_channel_selector=input_channel_selector,
+                input_dir=input_dir,
+                chunk_duration=chunk_duration,
+                chunk_hop_duration=chunk_hop_duration,
+                num_writer_threads=num_writer_threads,
+            )
+
         if num_workers is None:
             num_workers = min(batch_size, os.cpu_count() - 1)
 
@@ -406,44 +426,39 @@ class AudioToAudioModel(ModelPT, ABC):
                 # Indexing of the original files, used to form the output file name
                 file_idx = 0
 
-                # Process batches
-                for test_batch in tqdm(temporary_dataloader, desc="Processing"):
-                    input_signal = test_batch[0]
-                    input_length = test_batch[1]
-
-                    # Expand channel dimension, if necessary
-                    # For consistency, the model uses multi-channel format, even if the channel dimension is 1
-                    if input_signal.ndim == 2:
-                        input_signal = input_signal.unsqueeze(1)
-
-                    processed_batch, _ = self.forward(
-                        input_signal=input_signal.to(device), input_length=input_length.to(device)
-                    )
-
-                    for example_idx in range(processed_batch.size(0)):
-                        # This assumes the data loader is not shuffling files
-                        if input_dir is not None:
-                            # Make sure the output has the same directory structure as the input
-                            filepath_relative = os.path.relpath(paths2audio_files[file_idx], start=input_dir)
-                        else:
-                            # Input dir is not provided, save files in the output directory
-                            filepath_relative = os.path.basename(paths2audio_files[file_idx])
-                        # Prepare output file
-                        output_file = os.path.join(output_dir, filepath_relative)
-                        # Create output dir if necessary
-                        if not os.path.isdir(os.path.dirname(output_file)):
-                            os.makedirs(os.path.dirname(output_file))
-                        # Crop the output signal to the actual length
-                        output_signal = processed_batch[example_idx, :, : input_length[example_idx]].cpu().numpy()
-                        # Write audio
-                        sf.write(output_file, output_signal.T, self.sample_rate, 'float')
-                        # Update the file counter
-                        file_idx += 1
-                        # Save processed file
-                        paths2processed_files.append(output_file)
-
-                    del test_batch
-                    del processed_batch
+                # Process batches, the processed files are written in background threads
+                with AudioWriterPool(num_threads=num_writer_threads) as writer:
+                    for test_batch in tqdm(temporary_dataloader, desc="Processing"):
+                        input_signal = test_batch[0]
+                        input_length = test_batch[1]
+
+                        # Expand channel dimension, if necessary
+                        # For consistency, the model uses multi-channel format, even if the channel dimension is 1
+                        if input_signal.ndim == 2:
+                            input_signal = input_signal.unsqueeze(1)
+
+                        processed_batch, _ = self.forward(
+                            input_signal=input_signal.to(device), input_length=input_length.to(device)
+                        )
+
+                        for example_idx in range(processed_batch.size(0)):
+                            # This assumes the data loader is not shuffling files
+                            output_file = self._get_process_output_file(
+                                paths2audio_files[file_idx], output_dir=output_dir, input_dir=input_dir
+                            )
+                            # Crop the output signal to the actual length
+                            output_signal = processed_batch[example_idx, :, : input_length[example_idx]].cpu().numpy()
+                            # Write audio
+                            writer.open(file_idx, output_file, self.sample_rate, output_signal.shape[0])
+                            writer.write(file_idx, output_signal)
+                            writer.close(file_idx)
+                            # Update the file counter
+                            file_idx += 1
+                            # Save processed file
+                            paths2processed_files.append(output_file)
+
+                        del test_batch
+                        del processed_batch
 
         finally:
             # set mode back to its original value
@@ -454,6 +469,75 @@ class AudioToAudioModel(ModelPT, ABC):
 
         return paths2processed_files
 
+    @staticmethod
+    def _get_process_output_file(input_file: str, output_dir: str, input_dir: Optional[str] = None) -> str:
+        """Returns the path of the processed file and creates its directory if necessary."""
+        if input_dir is not None:
+            # Make sure the output has the same directory structure as the input
+            filepath_relative = os.path.relpath(input_file, start=input_dir)
+        else:
+            # Input dir is not provided, save files in the output directory
+            filepath_relative = os.path.basename(input_file)
+        # Prepare output file
+        output_file = os.path.join(output_dir, filepath_relative)
+        # Create output dir if necessary
+        if not os.path.isdir(os.path.dirname(output_file)):
+            os.makedirs(os.path.dirname(output_file))
+        return output_file
+
+    def _process_in_chunks(
+        self,
+        paths2audio_files: List[str],
+        output_dir: str,
+        batch_size: int,
+        input_channel_selector: Optional[ChannelSelectorType],
+        input_dir: Optional[str],
+        chunk_duration: float,
+        chunk_hop_duration: Optional[float],
+        num_writer_threads: int,
+    ) -> List[str]:
+        """Chunked overlap-add mode of `process`, see `process_files_in_chunks`."""
+        chunk_length = int(chunk_duration * self.sample_rate)
+        hop_length = int((chunk_hop_duration or chunk_duration / 2) * self.sample_rate)
+        output_files = [
+            self._get_process_output_file(audio_file, output_dir=output_dir, input_dir=input_dir)
+            for audio_file in paths2audio_files
+        ]
+
+        mode = self.training
+        device = next(self.parameters()).device
+
+        def process_batch(input_signal: torch.Tensor, input_length: torch.Tensor) -> torch.Tensor:
+            processed_signal, _ = self.forward(
+                input_signal=input_signal.to(device), input_length=input_length.to(device)
+            )
+            return processed_signal
+
+        try:
+            self.eval()
+            self.freeze()
+            logging.info(
+                f'Processing {len(paths2audio_files)} files in chunks of {chunk_length} samples with hop {hop_length}'
+            )
+            with torch.no_grad():
+                process_files_in_chunks(
+                    process_batch,
+                    input_files=paths2audio_files,
+                    output_files=output_files,
+                    sample_rate=self.sample_rate,
+                    chunk_length=chunk_length,
+                    hop_length=hop_length,
+                    batch_size=batch_size,
+                    channel_selector=input_channel_selector,
+                    num_writer_threads=num_writer_threads,
+                )
+        finally:
+            self.train(mode=mode)
+            if mode is True:
+                self.unfreeze()
+
+        return output_files
+
     @classmethod
     def list_available_models(cls) -> 'List[PretrainedModelInfo]':
         """
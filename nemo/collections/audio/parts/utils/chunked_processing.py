@@ -0,0 +1,279 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Chunked processing of long audio files with windowed overlap-add.
+
+Files are read in chunks of `chunk_length` samples with a hop of `hop_length` samples, chunks of several files are
+processed together in batches, and the processed chunks are windowed and overlap-added. The samples which are not
+overlapped by later chunks are written to the output files by background writer threads while the following chunks
+are processed, so the memory does not depend on the length of the files.
+"""
+
+import collections
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Iterator, List, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+import torch
+from scipy.signal import get_window
+
+from nemo.collections.asr.parts.preprocessing.segment import ChannelSelectorType, select_channels
+
+__all__ = ['AudioWriterPool', 'OverlapAddBuffer', 'iter_audio_chunks', 'process_files_in_chunks']
+
+
+def iter_audio_chunks(
+    path: str,
+    chunk_length: int,
+    hop_length: int,
+    sample_rate: int,
+    channel_selector: Optional[ChannelSelectorType] = None,
+) -> Iterator[np.ndarray]:
+    """
+    Reads an audio file in overlapping chunks, without loading the whole file.
+
+    Args:
+        path: path to the audio file
+        chunk_length: number of samples of a chunk
+        hop_length: number of samples between the starts of consecutive chunks
+        sample_rate: expected sample rate of the file
+        channel_selector: select a single channel or a subset of channels, or average the channels
+
+    Returns:
+        iterator of (num_channels, chunk_length) arrays, the last chunk is zero-padded
+    """
+    with sf.SoundFile(path, 'r') as f:
+        if f.samplerate != sample_rate:
+            raise ValueError(
+                f'Sample rate of {path} ({f.samplerate}) does not match the sample rate of the model ({sample_rate}). '
+                'Chunked processing does not resample, please resample the file first.'
+            )
+        num_samples = f.frames
+        chunk = None
+        for start in range(0, max(num_samples - chunk_length + hop_length, 1), hop_length):
+            new_samples = f.read(chunk_length if chunk is None else hop_length, dtype='float32')
+            new_samples = np.atleast_2d(select_channels(new_samples, channel_selector).T)
+            if chunk is None:
+                chunk = new_samples
+            else:
+                chunk = np.concatenate([chunk[:, hop_length:], new_samples], axis=1)
+            if chunk.shape[1] < chunk_length:
+                yield np.pad(chunk, ((0, 0), (0, chunk_length - chunk.shape[1])))
+            else:
+                yield chunk
+
+
+def num_audio_chunks(num_samples: int, chunk_length: int, hop_length: int) -> int:
+    """Number of chunks yielded by `iter_audio_chunks` for a file of `num_samples` samples."""
+    return len(range(0, max(num_samples - chunk_length + hop_length, 1), hop_length))
+
+
+class OverlapAddBuffer:
+    """
+    Windowed overlap-add of consecutive chunks with a hop of `hop_length` samples.
+    The output is normalized by the sum of the overlapping windows, so any hop up to the chunk length is supported.
+
+    Args:
+        chunk_length: number of samples of a chunk
+        hop_length: number of samples between the starts of consecutive chunks
+        window: name of the synthesis window, see scipy.signal.get_window
+    """
+
+    def __init__(self, chunk_length: int, hop_length: int, window: str = 'hann', eps: float = 1e-8):
+        if not 0 < hop_length <= chunk_length:
+            raise ValueError(f'hop_length ({hop_length}) must be in (0, chunk_length ({chunk_length})]')
+        self.chunk_length = chunk_length
+        self.hop_length = hop_length
+        self.eps = eps
+        # the window is offset by half a sample, so that its first and last samples are not zero
+        self.window = get_window(window, 2 * chunk_length + 1, fftbins=False)[1::2].astype(np.float32)
+        self.output = None
+        self.weight = np.zeros(chunk_length, dtype=np.float32)
+
+    def add(self, chunk: np.ndarray) -> np.ndarray:
+        """
+        Adds the next (num_channels, chunk_length) chunk.
+
+        Returns:
+            (num_channels, hop_length) array of the samples which are not overlapped by the following chunks
+        """
+        if self.output is None:
+            self.output = np.zeros((chunk.shape[0], self.chunk_length), dtype=np.float32)
+        self.output += chunk * self.window
+        self.weight += self.window
+
+        done = self.output[:, : self.hop_length] / np.maximum(self.weight[: self.hop_length], self.eps)
+        self.output = np.roll(self.output, -self.hop_length, axis=1)
+        self.output[:, -self.hop_length :] = 0.0
+        self.weight = np.roll(self.weight, -self.hop_length)
+        self.weight[-self.hop_length :] = 0.0
+        return done
+
+    def flush(self) -> np.ndarray:
+        """
+        Returns:
+            (num_channels, chunk_length - hop_length) array of the remaining samples of the last chunk
+        """
+        remaining = self.chunk_length - self.hop_length
+        return self.output[:, :remaining] / np.maximum(self.weight[:remaining], self.eps)
+
+
+class AudioWriterPool:
+    """
+    Writes audio files incrementally with background threads. All writes to a file are done in order by the same
+    thread, and at most `max_pending` writes per thread are queued, which bounds the memory of the queued audio.
+
+    Args:
+        num_threads: number of writer threads
+        max_pending: maximum number of queued writes per thread
+    """
+
+    def __init__(self, num_threads: int = 1, max_pending: int = 16):
+        self.lanes = [ThreadPoolExecutor(max_workers=1) for _ in range(max(num_threads, 1))]
+        self.pending: List[Deque[Future]] = [collections.deque() for _ in self.lanes]
+        self.max_pending = max_pending
+        self.files = {}
+        self._next_lane = 0
+
+    def _submit(self, file_id, fn, *args):
+        lane = self.files[file_id][1]
+        pending = self.pending[lane]
+        while len(pending) >= self.max_pending or (pending and pending[0].done()):
+            # raises the exception of a failed write
+            pending.popleft().result()
+        pending.append(self.lanes[lane].submit(fn, *args))
+
+    def open(self, file_id, path: str, sample_rate: int, num_channels: int):
+        # files are assigned to the threads in turn
+        self.files[file_id] = [None, self._next_lane]
+        self._next_lane = (self._next_lane + 1) % len(self.lanes)
+
+        def _open():
+            self.files[file_id][0] = sf.SoundFile(
+                path, 'w', samplerate=sample_rate, channels=num_channels, subtype='FLOAT'
+            )
+
+        self._submit(file_id, _open)
+
+    def write(self, file_id, samples: np.ndarray):
+        """Writes a (num_channels, num_samples) array to a file."""
+        self._submit(file_id, lambda: self.files[file_id][0].write(samples.T))
+
+    def close(self, file_id):
+        def _close():
+            self.files.pop(file_id)[0].close()
+
+        self._submit(file_id, _close)
+
+    def join(self):
+        """Waits for all writes and raises the exception of a failed write."""
+        for pending in self.pending:
+            while pending:
+                pending.popleft().result()
+
+    def shutdown(self):
+        for lane in self.lanes:
+            lane.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_type is None:
+                self.join()
+        finally:
+            self.shutdown()
+
+
+class _ChunkedFile:
+    """Overlap-add state of a file processed in chunks."""
+
+    def __init__(self, file_id: int, path: str, chunk_length: int, hop_length: int):
+        self.file_id = file_id
+        self.num_samples = sf.info(path).frames
+        self.num_chunks = num_audio_chunks(self.num_samples, chunk_length, hop_length)
+        self.buffer = OverlapAddBuffer(chunk_length, hop_length)
+        self.num_processed = 0
+        self.num_written = 0
+
+    def crop(self, samples: np.ndarray) -> np.ndarray:
+        samples = samples[:, : self.num_samples - self.num_written]
+        self.num_written += samples.shape[1]
+        return samples
+
+
+def process_files_in_chunks(
+    process_batch: Callable[[torch.Tensor, torch.Tensor], torch.Tensor],
+    input_files: List[str],
+    output_files: List[str],
+    sample_rate: int,
+    chunk_length: int,
+    hop_length: int,
+    batch_size: int = 1,
+    channel_selector: Optional[ChannelSelectorType] = None,
+    num_writer_threads: int = 1,
+) -> List[str]:
+    """
+    Processes audio files in overlapping chunks and writes the overlap-added output.
+
+    Args:
+        process_batch: function mapping a (batch, num_channels, chunk_length) tensor and the lengths to the
+            (batch, num_output_channels, chunk_length) processed tensor
+        input_files: paths of the input audio files
+        output_files: paths of the output audio files
+        sample_rate: sample rate of the input and output files
+        chunk_length: number of samples of a chunk
+        hop_length: number of samples between the starts of consecutive chunks
+        batch_size: number of chunks processed together, chunks of different files are batched together
+        channel_selector: select a single channel or a subset of channels, or average the channels
+        num_writer_threads: number of background threads writing the output files
+
+    Returns:
+        paths of the output audio files
+    """
+
+    def iter_chunks() -> Iterator[Tuple[_ChunkedFile, np.ndarray]]:
+        for file_id, path in enumerate(input_files):
+            state = _ChunkedFile(file_id, path, chunk_length, hop_length)
+            for chunk in iter_audio_chunks(path, chunk_length, hop_length, sample_rate, channel_selector):
+                yield state, chunk
+
+    def process(batch: List[Tuple[_ChunkedFile, np.ndarray]]):
+        input_signal = torch.from_numpy(np.stack([chunk for _, chunk in batch]))
+        input_length = torch.full((len(batch),), chunk_length, dtype=torch.long)
+        output_signal = process_batch(input_signal, input_length).float().cpu().numpy()
+
+        for (state, _), output in zip(batch, output_signal):
+            if state.num_processed == 0:
+                writer.open(state.file_id, output_files[state.file_id], sample_rate, output.shape[0])
+            writer.write(state.file_id, state.crop(state.buffer.add(output[:, :chunk_length])))
+            state.num_processed += 1
+            if state.num_processed == state.num_chunks:
+                writer.write(state.file_id, state.crop(state.buffer.flush()))
+                writer.close(state.file_id)
+
+    with AudioWriterPool(num_threads=num_writer_threads) as writer:
+        batch = []
+        for item in iter_chunks():
+            batch.append(item)
+            if len(batch) == batch_size:
+                process(batch)
+                batch = []
+        if batch:
+            process(batch)
+
+    return output_files
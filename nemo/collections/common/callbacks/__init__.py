@@ -13,4 +13,5 @@
 # limitations under the License.
 
 from nemo.collections.common.callbacks.callbacks import LogEpochTimeCallback
+from nemo.collections.common.callbacks.data_pipeline_metrics import DataPipelineMetricsCallback
 from nemo.collections.common.callbacks.ema import EMA
@@ -0,0 +1,126 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import time
+
+import torch
+from lightning.pytorch.callbacks import Callback
+
+from nemo.collections.common.data.pipeline_metrics import (
+    DataPipelineMetrics,
+    disable_data_pipeline_metrics,
+    enable_data_pipeline_metrics,
+)
+from nemo.utils import logging
+
+
+class DataPipelineMetricsCallback(Callback):
+    """
+    Logs how long the training loop waits for data and how the time of dataloader workers splits between
+    the data pipeline stages (audio decoding, perturbation, tokenization, collation).
+
+    The stall fraction is the share of the wall time between consecutive train batches spent waiting for
+    the next batch (from the end of a batch to the start of the next one). Stage latencies (p50/p99) are
+    reduced across ranks. Stage timing is enabled when fitting is set up, before dataloader workers are started,
+    and disabled on teardown.
+
+    Args:
+        output_dir: directory for per-process stage reports of the current rank
+        log_every_n_steps: how often to log the stall fraction and stage latencies
+    """
+
+    def __init__(self, output_dir: str, log_every_n_steps: int = 100):
+        self.output_dir = output_dir
+        self.log_every_n_steps = log_every_n_steps
+        self.metrics = DataPipelineMetrics(output_dir)
+        self._reset_window()
+        self._batch_start = None
+        self._batch_end = None
+
+    def setup(self, trainer, pl_module, stage):
+        if stage == "fit":
+            enable_data_pipeline_metrics(self.output_dir)
+
+    def teardown(self, trainer, pl_module, stage):
+        if stage == "fit":
+            disable_data_pipeline_metrics()
+
+    def _reset_window(self):
+        self._wait_time = 0.0
+        self._compute_time = 0.0
+
+    @property
+    def stall_fraction(self) -> float:
+        total = self._wait_time + self._compute_time
+        return self._wait_time / total if total > 0 else 0.0
+
+    def on_train_epoch_start(self, trainer, pl_module):
+        self._batch_end = time.perf_counter()
+
+    def on_train_batch_start(self, trainer, pl_module, batch, batch_idx):
+        self._batch_start = time.perf_counter()
+        if self._batch_end is not None:
+            self._wait_time += self._batch_start - self._batch_end
+
+    def on_train_batch_end(self, trainer, pl_module, outputs, batch, batch_idx):
+        self._batch_end = time.perf_counter()
+        if self._batch_start is not None:
+            self._compute_time += self._batch_end - self._batch_start
+
+        if self.log_every_n_steps > 0 and (batch_idx + 1) % self.log_every_n_steps == 0:
+            self._log(pl_module)
+            self._reset_window()
+
+    def on_validation_start(self, trainer, pl_module):
+        # validation during the training epoch is not a data stall
+        self._batch_end = None
+
+    def on_validation_end(self, trainer, pl_module):
+        if trainer.training:
+            self._batch_end = time.perf_counter()
+
+    def _log(self, pl_module):
+        pl_module.log(
+            "data_stall_fraction",
+            torch.as_tensor(self.stall_fraction),
+            on_step=True,
+            on_epoch=False,
+            batch_size=1,
+            sync_dist=True,
+        )
+        for stage, values in self.metrics.summary(percentiles=(50, 99), reduce_ranks=True).items():
+            for q in ("p50", "p99"):
+                pl_module.log(
+                    f"data/{stage} {q} in s",
+                    torch.as_tensor(values[q]),
+                    on_step=True,
+                    on_epoch=False,
+                    batch_size=1,
+                )
+
+    def on_train_end(self, trainer, pl_module):
+        summary = self.metrics.summary(percentiles=(50, 99), reduce_ranks=True)
+        worker_time = self.metrics.worker_time()
+        if trainer.is_global_zero:
+            for stage, values in sorted(summary.items()):
+                logging.info(
+                    f"Data pipeline stage {stage}: "
+                    f"count={values['count']} p50={values['p50']:.6f}s p99={values['p99']:.6f}s"
+                )
+        with open(os.path.join(self.output_dir, "summary.json"), "w") as f:
+            json.dump(
+                {"stages": summary, "worker_time": {str(k): v for k, v in worker_time.items()}}, f, indent=2
+            )
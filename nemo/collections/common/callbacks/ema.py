@@ -11,11 +11,13 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import bisect
 import contextlib
 import copy
+import math
 import os
 import threading
-from typing import Any, Dict, Iterable
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 import lightning.pytorch as pl
 import torch
@@ -37,6 +39,9 @@ class EMA(Callback):
         validate_original_weights: Validate the original weights, as apposed to the EMA weights.
         every_n_steps: Apply EMA every N steps.
         cpu_offload: Offload weights to CPU.
+        sharded: Shard EMA weights across data-parallel ranks and keep the shards in (pinned) CPU memory.
+            EMA weights are gathered only to swap them into the model or to save them. Implies `cpu_offload`.
+        chunk_numel: Number of elements per chunk of the overlapped sharded EMA update and gather.
     """
 
     def __init__(
@@ -45,6 +50,8 @@ class EMA(Callback):
         validate_original_weights: bool = False,
         every_n_steps: int = 1,
         cpu_offload: bool = False,
+        sharded: bool = False,
+        chunk_numel: int = 2**22,
     ):
         if not (0 <= decay <= 1):
             raise MisconfigurationException("EMA decay value must be between 0 and 1")
@@ -52,9 +59,11 @@ class EMA(Callback):
         self.validate_original_weights = validate_original_weights
         self.every_n_steps = every_n_steps
         self.cpu_offload = cpu_offload
+        self.sharded = sharded
+        self.chunk_numel = chunk_numel
 
     def on_fit_start(self, trainer: "pl.Trainer", pl_module: "pl.LightningModule") -> None:
-        device = pl_module.device if not self.cpu_offload else torch.device('cpu')
+        device = pl_module.device if not (self.cpu_offload or self.sharded) else torch.device('cpu')
         trainer.optimizers = [
             EMAOptimizer(
                 optim,
@@ -62,6 +71,8 @@ class EMA(Callback):
                 decay=self.decay,
                 every_n_steps=self.every_n_steps,
                 current_step=trainer.global_step,
+                sharded=self.sharded,
+                chunk_numel=self.chunk_numel,
             )
             for optim in trainer.optimizers
             if not isinstance(optim, EMAOptimizer)
@@ -166,6 +177,171 @@ def run_ema_update_cpu(ema_model_tuple, current_model_tuple, decay, pre_sync_str
     ema_update(ema_model_tuple, current_model_tuple, decay)
 
 
+class ShardedEMAState:
+    """
+    EMA weights sharded across data-parallel ranks.
+
+    Parameters are viewed as one flat vector which is split into equal contiguous shards, one per rank.
+    Each rank keeps only its shard of EMA weights (in float32, pinned CPU memory if CUDA is available)
+    and a staging buffer of the same size. The update copies the local shard of the current weights into
+    the staging buffer chunk by chunk (asynchronously for CUDA parameters) while a background thread updates
+    the EMA shard chunk by chunk as soon as each copy is finished.
+    Full EMA weights are gathered chunk by chunk only when they are swapped into the model or saved.
+
+    Args:
+        params: model parameters (replicated on all ranks, as in data-parallel training)
+        chunk_numel: number of elements per chunk of the update and gather
+        process_group: data-parallel process group (default group if None)
+    """
+
+    def __init__(
+        self, params: Sequence[torch.Tensor], chunk_numel: int = 2**22, process_group=None,
+    ):
+        self.params = list(params)
+        self.chunk_numel = chunk_numel
+        self.process_group = process_group
+        if torch.distributed.is_available() and torch.distributed.is_initialized():
+            self.rank = torch.distributed.get_rank(process_group)
+            self.world_size = torch.distributed.get_world_size(process_group)
+        else:
+            self.rank, self.world_size = 0, 1
+
+        self.param_offsets = [0]
+        for param in self.params:
+            self.param_offsets.append(self.param_offsets[-1] + param.numel())
+        self.total_numel = self.param_offsets[-1]
+        self.shard_numel = max(math.ceil(self.total_numel / self.world_size), 1)
+        self.shard_offset = self.rank * self.shard_numel
+
+        pin_memory = torch.cuda.is_available()
+        self.ema_shard = torch.zeros(self.shard_numel, dtype=torch.float32, pin_memory=pin_memory)
+        self.staging = torch.zeros(self.shard_numel, dtype=torch.float32, pin_memory=pin_memory)
+        self.chunks = [
+            (start, min(start + self.chunk_numel, self.shard_numel))
+            for start in range(0, self.shard_numel, self.chunk_numel)
+        ]
+        self._read_params(self.ema_shard)
+        self._synchronize(self._record_read_event())
+
+    def _record_read_event(self) -> Optional[torch.cuda.Event]:
+        # event after the copies issued by `_read_params` on the current stream (None for CPU parameters)
+        if not any(param.is_cuda for param in self.params):
+            return None
+        event = torch.cuda.Event()
+        event.record()
+        return event
+
+    @staticmethod
+    def _synchronize(event: Optional[torch.cuda.Event]):
+        # the host must not read the pinned buffers before the non-blocking device to host copies complete
+        if event is not None:
+            event.synchronize()
+
+    def _param_slices(self, flat_start: int, flat_end: int) -> List[Tuple[int, int, int, int]]:
+        """
+        Returns slices of parameters overlapping with [flat_start, flat_end) of the flat parameter vector
+        as tuples (param index, start in param, end in param, start relative to flat_start).
+        """
+        slices = []
+        for idx in range(max(bisect.bisect_right(self.param_offsets, flat_start) - 1, 0), len(self.params)):
+            begin, end = self.param_offsets[idx], self.param_offsets[idx + 1]
+            if begin >= flat_end:
+                break
+            if end <= flat_start:
+                continue
+            p_start, p_end = max(flat_start, begin) - begin, min(flat_end, end) - begin
+            slices.append((idx, p_start, p_end, begin + p_start - flat_start))
+        return slices
+
+    def _read_params(self, out: torch.Tensor, chunk: Optional[Tuple[int, int]] = None):
+        # copy the local shard (or its chunk) of current parameters into `out`
+        start, end = chunk if chunk is not None else (0, self.shard_numel)
+        for idx, p_start, p_end, out_start in self._param_slices(self.shard_offset + start, self.shard_offset + end):
+            values = self.params[idx].detach().view(-1)[p_start:p_end]
+            out[start + out_start : start + out_start + p_end - p_start].copy_(values, non_blocking=True)
+
+    def _write_params(self, flat_start: int, values: torch.Tensor):
+        # copy `values` into parameters starting from the flat position `flat_start`
+        for idx, p_start, p_end, out_start in self._param_slices(flat_start, flat_start + values.numel()):
+            param = self.params[idx].data.view(-1)
+            param[p_start:p_end].copy_(values[out_start : out_start + p_end - p_start])
+
+    def _update_chunks(self, events, decay: float):
+        for (start, end), event in zip(self.chunks, events):
+            if event is not None:
+                event.synchronize()
+            ema_update((self.ema_shard[start:end],), (self.staging[start:end],), decay)
+
+    @torch.no_grad()
+    def update(self, decay: float, stream=None) -> threading.Thread:
+        """
+        Starts the update of the local EMA shard. Copies of chunks are issued on `stream` (for CUDA parameters)
+        and overlap with the update of previous chunks in the background thread.
+
+        Returns:
+            the started background thread (must be joined before parameters are modified)
+        """
+        events = []
+        if stream is not None:
+            stream.wait_stream(torch.cuda.current_stream())
+        with torch.cuda.stream(stream):
+            for chunk in self.chunks:
+                self._read_params(self.staging, chunk)
+                if stream is not None:
+                    event = torch.cuda.Event()
+                    event.record(stream)
+                    events.append(event)
+                else:
+                    events.append(self._record_read_event())
+        thread = threading.Thread(target=self._update_chunks, args=(events, decay))
+        thread.start()
+        return thread
+
+    def _gather_chunks(self):
+        # yields (flat start, values) of the gathered EMA weights chunk by chunk
+        device = torch.device('cpu')
+        if self.world_size > 1 and torch.distributed.get_backend(self.process_group) == 'nccl':
+            device = torch.device('cuda', torch.cuda.current_device())
+        for start, end in self.chunks:
+            local = self.ema_shard[start:end].to(device)
+            if self.world_size > 1:
+                gathered = torch.empty(self.world_size * (end - start), dtype=local.dtype, device=device)
+                torch.distributed.all_gather_into_tensor(gathered, local, group=self.process_group)
+                gathered = gathered.view(self.world_size, -1)
+            else:
+                gathered = local.view(1, -1)
+            for rank in range(self.world_size):
+                yield rank * self.shard_numel + start, gathered[rank]
+
+    @torch.no_grad()
+    def swap_with_params(self):
+        """Swaps parameters with EMA weights (collective operation)"""
+        self._read_params(self.staging)
+        read_event = self._record_read_event()
+        for flat_start, values in self._gather_chunks():
+            self._write_params(flat_start, values)
+        self._synchronize(read_event)
+        self.ema_shard.copy_(self.staging)
+
+    @torch.no_grad()
+    def full_state(self) -> Tuple[torch.Tensor, ...]:
+        """Returns full EMA weights on CPU with shapes and dtypes of parameters (collective operation)"""
+        state = tuple(torch.empty_like(param, device='cpu') for param in self.params)
+        for flat_start, values in self._gather_chunks():
+            for idx, p_start, p_end, out_start in self._param_slices(flat_start, flat_start + values.numel()):
+                state[idx].view(-1)[p_start:p_end].copy_(values[out_start : out_start + p_end - p_start])
+        return state
+
+    @torch.no_grad()
+    def load_full_state(self, ema_params: Sequence[torch.Tensor]):
+        """Loads the local shard from full EMA weights (e.g. from a checkpoint)"""
+        for idx, p_start, p_end, out_start in self._param_slices(
+            self.shard_offset, self.shard_offset + self.shard_numel
+        ):
+            values = ema_params[idx].detach().reshape(-1)[p_start:p_end]
+            self.ema_shard[out_start : out_start + p_end - p_start].copy_(values)
+
+
 class EMAOptimizer(torch.optim.Optimizer):
     r"""
     EMAOptimizer is a wrapper for torch.optim.Optimizer that computes
@@ -187,6 +363,9 @@ class EMAOptimizer(torch.optim.Optimizer):
         optimizer (torch.optim.Optimizer): optimizer to wrap
         device (torch.device): device for EMA parameters
         decay (float): decay factor
+        sharded (bool): shard EMA weights across data-parallel ranks in CPU memory (see ShardedEMAState),
+            `device` is ignored in this case
+        chunk_numel (int): number of elements per chunk of the sharded EMA update and gather
 
     Returns:
         returns an instance of torch.optim.Optimizer that computes EMA of
@@ -214,6 +393,8 @@ class EMAOptimizer(torch.optim.Optimizer):
         decay: float = 0.9999,
         every_n_steps: int = 1,
         current_step: int = 0,
+        sharded: bool = False,
+        chunk_numel: int = 2**22,
     ):
         self.optimizer = optimizer
         self.decay = decay
@@ -230,6 +411,10 @@ class EMAOptimizer(torch.optim.Optimizer):
         self.ema_params = ()
         self.in_saving_ema_model_context = False
 
+        self.sharded = sharded
+        self.chunk_numel = chunk_numel
+        self.sharded_ema = None
+
     def all_parameters(self) -> Iterable[torch.Tensor]:
         return (param for group in self.param_groups for param in group['params'])
 
@@ -245,9 +430,17 @@ class EMAOptimizer(torch.optim.Optimizer):
         if self.rebuild_ema_params:
             opt_params = list(self.all_parameters())
 
-            self.ema_params += tuple(
-                copy.deepcopy(param.data.detach()).to(self.device) for param in opt_params[len(self.ema_params) :]
-            )
+            if self.sharded:
+                # keep EMA weights of already registered parameters, new parameters start from their values
+                ema_params = self.sharded_ema.full_state() if self.sharded_ema is not None else ()
+                ema_params += tuple(param.data for param in opt_params[len(ema_params) :])
+                self.sharded_ema = ShardedEMAState(opt_params, chunk_numel=self.chunk_numel)
+                self.sharded_ema.load_full_state(ema_params)
+            else:
+                self.ema_params += tuple(
+                    copy.deepcopy(param.data.detach()).to(self.device)
+                    for param in opt_params[len(self.ema_params) :]
+                )
             self.rebuild_ema_params = False
 
         if getattr(self.optimizer, "_step_supports_amp_scaling", False) and grad_scaler is not None:
@@ -265,6 +458,10 @@ class EMAOptimizer(torch.optim.Optimizer):
 
     @torch.no_grad()
     def update(self):
+        if self.sharded:
+            self.thread = self.sharded_ema.update(self.decay, self.stream)
+            return
+
         if self.stream is not None:
             self.stream.wait_stream(torch.cuda.current_stream())
 
@@ -297,6 +494,10 @@ class EMAOptimizer(torch.optim.Optimizer):
     def switch_main_parameter_weights(self, saving_ema_model: bool = False):
         self.join()
         self.in_saving_ema_model_context = saving_ema_model
+        if self.sharded:
+            if self.sharded_ema is not None:
+                self.sharded_ema.swap_with_params()
+            return
         for param, ema_param in zip(self.all_parameters(), self.ema_params):
             self.swap_tensors(param.data, ema_param)
 
@@ -337,7 +538,13 @@ class EMAOptimizer(torch.optim.Optimizer):
             return self.optimizer.state_dict()
 
         # if we are in the context of saving an EMA model, the EMA weights are in the modules' actual weights
-        ema_params = self.ema_params if not self.in_saving_ema_model_context else list(self.all_parameters())
+        if self.in_saving_ema_model_context:
+            ema_params = list(self.all_parameters())
+        elif self.sharded:
+            # full EMA weights are gathered, so the checkpoint format does not depend on sharding
+            ema_params = self.sharded_ema.full_state() if self.sharded_ema is not None else ()
+        else:
+            ema_params = self.ema_params
         state_dict = {
             'opt': self.optimizer.state_dict(),
             'ema': ema_params,
@@ -351,7 +558,11 @@ class EMAOptimizer(torch.optim.Optimizer):
         self.join()
 
         self.optimizer.load_state_dict(state_dict['opt'])
-        self.ema_params = tuple(param.to(self.device) for param in copy.deepcopy(state_dict['ema']))
+        if self.sharded:
+            self.sharded_ema = ShardedEMAState(list(self.all_parameters()), chunk_numel=self.chunk_numel)
+            self.sharded_ema.load_full_state(state_dict['ema'])
+        else:
+            self.ema_params = tuple(param.to(self.device) for param in copy.deepcopy(state_dict['ema']))
         self.current_step = state_dict['current_step']
         self.decay = state_dict['decay']
         self.every_n_steps = state_dict['every_n_steps']
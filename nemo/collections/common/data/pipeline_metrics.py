@@ -0,0 +1,228 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Per-stage timing of the data pipeline (audio decoding, perturbation, tokenization, collation).
+
+Stages are timed with ``data_pipeline_stage`` context managers placed inside datasets, augmentors and
+collate functions. Timing is enabled by setting the ``NEMO_DATA_PIPELINE_METRICS_DIR`` environment variable
+(see ``enable_data_pipeline_metrics``), which is inherited by dataloader worker processes regardless of the
+multiprocessing start method. Every process (the main one and each worker) periodically writes cumulative
+histograms of its stage durations to ``<dir>/worker_<pid>.json``; ``DataPipelineMetrics`` merges these files
+and can reduce them across ranks.
+"""
+
+import contextlib
+import glob
+import json
+import multiprocessing.util
+import os
+import time
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import torch
+
+from nemo.utils.timers import HierarchicalTimer
+
+__all__ = [
+    "NEMO_ENV_VARNAME_DATA_PIPELINE_METRICS_DIR",
+    "DataPipelineMetrics",
+    "data_pipeline_stage",
+    "disable_data_pipeline_metrics",
+    "enable_data_pipeline_metrics",
+]
+
+NEMO_ENV_VARNAME_DATA_PIPELINE_METRICS_DIR = "NEMO_DATA_PIPELINE_METRICS_DIR"
+
+# histogram configuration shared by all processes so that histograms can be summed
+_NUM_BINS = 64
+_MIN_TIME = 1e-6
+_MAX_TIME = 1e3
+
+# separator between the names of nested stages in a path
+_SEPARATOR = "/"
+
+_NULL_STAGE = contextlib.nullcontext()
+_RECORDER: Optional["_StageRecorder"] = None
+
+
+def _make_timer() -> HierarchicalTimer:
+    # only histograms are needed, keep the memory of the timer constant
+    return HierarchicalTimer(
+        buffer_size=1,
+        num_bins=_NUM_BINS,
+        min_time=_MIN_TIME,
+        max_time=_MAX_TIME,
+        max_trace_events=0,
+        separator=_SEPARATOR,
+    )
+
+
+class _StageRecorder:
+    """Records stage durations of the current process and periodically writes them to the metrics directory"""
+
+    def __init__(self, output_dir: str, report_interval: float = 5.0):
+        self.pid = os.getpid()
+        self.output_dir = output_dir
+        self.report_interval = report_interval
+        worker_info = torch.utils.data.get_worker_info()
+        self.worker_id = worker_info.id if worker_info is not None else -1
+        self.timer = _make_timer()
+        self.total_time = {}
+        self._last_report = time.monotonic()
+        # dataloader workers exit through multiprocessing, which runs its finalizers but not atexit handlers
+        multiprocessing.util.Finalize(self, self.flush, exitpriority=10)
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        self.timer.start(name)
+        path = self.timer.active_timers()[-1]
+        try:
+            yield
+        finally:
+            self.timer.stop(name)
+            self.total_time[path] = self.total_time.get(path, 0.0) + self.timer.timers[path]["dt"][-1]
+            if time.monotonic() - self._last_report > self.report_interval:
+                self.flush()
+
+    def flush(self):
+        """Writes cumulative histograms of the process (atomically replacing the previous report)"""
+        self._last_report = time.monotonic()
+        if not self.timer.histograms:
+            return
+        report = {
+            "pid": self.pid,
+            "worker_id": self.worker_id,
+            "histograms": {path: hist.tolist() for path, hist in self.timer.histograms.items()},
+            "total_time": self.total_time,
+        }
+        path = os.path.join(self.output_dir, f"worker_{self.pid}.json")
+        try:
+            with open(path + ".tmp", "w") as f:
+                json.dump(report, f)
+            os.replace(path + ".tmp", path)
+        except OSError:
+            # metrics must never break data loading
+            pass
+
+
+def _get_recorder() -> Optional[_StageRecorder]:
+    global _RECORDER
+    output_dir = os.environ.get(NEMO_ENV_VARNAME_DATA_PIPELINE_METRICS_DIR)
+    if not output_dir:
+        return None
+    # forked dataloader workers inherit the recorder of the parent process
+    if _RECORDER is None or _RECORDER.pid != os.getpid() or _RECORDER.output_dir != output_dir:
+        _RECORDER = _StageRecorder(output_dir)
+    return _RECORDER
+
+
+def data_pipeline_stage(name: str):
+    """
+    Context manager timing a stage of the data pipeline.
+    When data pipeline metrics are disabled, a shared no-op context manager is returned.
+
+    Example:
+        with data_pipeline_stage("tokenize"):
+            tokens = self.tokenizer(text)
+
+    Args:
+        name: stage name (e.g. "audio_decode", "perturb", "tokenize", "collate")
+    """
+    recorder = _get_recorder()
+    if recorder is None:
+        return _NULL_STAGE
+    return recorder.stage(name)
+
+
+def enable_data_pipeline_metrics(output_dir: str):
+    """
+    Enables timing of data pipeline stages in the current process and in dataloader workers started afterwards.
+    Reports of previous runs in `output_dir` are removed.
+
+    Args:
+        output_dir: directory for per-process reports (should be unique per rank)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    for report in glob.glob(os.path.join(output_dir, "worker_*.json")):
+        os.remove(report)
+    os.environ[NEMO_ENV_VARNAME_DATA_PIPELINE_METRICS_DIR] = output_dir
+
+
+def disable_data_pipeline_metrics():
+    """Disables timing of data pipeline stages in the current process and in dataloader workers started afterwards"""
+    global _RECORDER
+    if _RECORDER is not None and _RECORDER.pid == os.getpid():
+        _RECORDER.flush()
+    _RECORDER = None
+    os.environ.pop(NEMO_ENV_VARNAME_DATA_PIPELINE_METRICS_DIR, None)
+
+
+class DataPipelineMetrics:
+    """
+    Merges per-process reports of data pipeline stage timings written to a metrics directory.
+
+    Args:
+        output_dir: metrics directory (see `enable_data_pipeline_metrics`)
+    """
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+
+    def read_reports(self) -> Sequence[Dict]:
+        """Returns the latest report of every process that wrote to the metrics directory"""
+        # make the reports of the current process up to date
+        if _RECORDER is not None and _RECORDER.pid == os.getpid() and _RECORDER.output_dir == self.output_dir:
+            _RECORDER.flush()
+
+        reports = []
+        for path in sorted(glob.glob(os.path.join(self.output_dir, "worker_*.json"))):
+            try:
+                with open(path) as f:
+                    reports.append(json.load(f))
+            except (OSError, ValueError):
+                # the report is being replaced or was removed
+                continue
+        return reports
+
+    def histograms(self) -> Dict[str, np.ndarray]:
+        """Returns histograms of stage durations summed over all processes"""
+        histograms = {}
+        for report in self.read_reports():
+            for path, hist in report["histograms"].items():
+                histograms[path] = histograms.get(path, 0) + np.asarray(hist, dtype=np.int64)
+        return histograms
+
+    def worker_time(self) -> Dict[int, float]:
+        """Returns total time spent in all stages per dataloader worker id (-1 is the main process)"""
+        worker_time = {}
+        for report in self.read_reports():
+            worker_id = report["worker_id"]
+            # the time of nested stages is already included in the time of the top-level stages
+            total_time = sum(t for path, t in report["total_time"].items() if _SEPARATOR not in path)
+            worker_time[worker_id] = worker_time.get(worker_id, 0.0) + total_time
+        return worker_time
+
+    def summary(self, percentiles: Sequence[float] = (50, 99), reduce_ranks: bool = False) -> Dict[str, Dict]:
+        """
+        Returns the number of measures and the estimated percentiles of duration per stage.
+
+        Args:
+            percentiles: percentiles to estimate from histograms
+            reduce_ranks: if True histograms are summed over all ranks (must be called on all ranks)
+        """
+        timer = _make_timer()
+        timer.histograms = self.histograms()
+        return timer.summary(percentiles=percentiles, reduce_ranks=reduce_ranks)
@@ -16,3 +16,4 @@ from nemo.collections.nlp.data.machine_translation.machine_translation_dataset i
     TarredTranslationDataset,
     TranslationDataset,
 )
+from nemo.collections.nlp.data.machine_translation.translation_token_store import TranslationTokenStoreDataset
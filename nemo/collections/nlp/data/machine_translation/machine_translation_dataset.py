@@ -17,7 +17,6 @@
 import io
 import json
 import pickle
-from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Any, List, Optional
 
@@ -31,7 +30,7 @@ from nemo.core import Dataset
 from nemo.utils import logging
 from nemo.utils.distributed import webdataset_split_by_workers
 
-__all__ = ['TranslationDataset', 'TarredTranslationDataset']
+__all__ = ['TranslationDataset', 'TarredTranslationDataset', 'pack_lengths_into_batches']
 
 
 @dataclass
@@ -62,11 +61,64 @@ class TranslationDataConfig:
     tar_shuffle_n: int = 100
     n_preproc_jobs: int = -2
     tar_file_prefix: str = 'parallel'
+    use_token_store: bool = False
     concat_sampling_technique: Optional[str] = 'temperature'
     concat_sampling_temperature: Optional[int] = 5
     concat_sampling_probabilities: Optional[List[float]] = None
 
 
+def pack_lengths_into_batches(
+    src_lengths: np.ndarray, tgt_lengths: np.ndarray, tokens_in_batch: int
+) -> List[List[int]]:
+    """
+    Packs sentence pairs into batches of at most `tokens_in_batch` tokens including padding.
+
+    The pairs are sorted once by source and then target length, and consecutive pairs are added to a batch
+    until the padded size of the batch, number of pairs times the sum of the longest source and target,
+    exceeds `tokens_in_batch`. The batch is then cut to a multiple of 8 pairs (unless it has at most 8 pairs)
+    and the remaining pairs start the next batch. The padded size of the candidate batches is computed with
+    cumulative maxima over a window that is guaranteed to exceed the budget, so packing takes linear time.
+
+    Args:
+        src_lengths: number of tokens of every source sentence.
+        tgt_lengths: number of tokens of every target sentence.
+        tokens_in_batch: maximum number of tokens in a batch.
+
+    Returns:
+        List of batches, every batch is a list of indices of the sentence pairs.
+    """
+    src_lengths = np.asarray(src_lengths, dtype=np.int64)
+    tgt_lengths = np.asarray(tgt_lengths, dtype=np.int64)
+    if src_lengths.shape != tgt_lengths.shape:
+        raise ValueError("Source and target corpora have different lengths!")
+
+    order = np.lexsort((tgt_lengths, src_lengths))
+    src_sorted = src_lengths[order]
+    tgt_sorted = tgt_lengths[order]
+    num_pairs = len(order)
+
+    batches = []
+    start = 0
+    while start < num_pairs:
+        # the budget is exceeded within this window, since every pair is padded at least to the first one
+        window = tokens_in_batch // max(int(src_sorted[start] + tgt_sorted[start]), 1) + 1
+        end = min(start + window, num_pairs)
+        # sources are sorted, so the longest source is the last one
+        padded_size = np.arange(1, end - start + 1) * (
+            src_sorted[start:end] + np.maximum.accumulate(tgt_sorted[start:end])
+        )
+        exceeded = np.flatnonzero(padded_size > tokens_in_batch)
+        if exceeded.size == 0:
+            batch_size = end - start
+        else:
+            num_examples_to_split = int(exceeded[0]) + 1
+            batch_size = 8 * ((num_examples_to_split - 1) // 8) or num_examples_to_split
+        batches.append(order[start : start + batch_size].tolist())
+        start += batch_size
+
+    return batches
+
+
 class TranslationDataset(Dataset):
     def __init__(
         self,
@@ -179,83 +231,9 @@ class TranslationDataset(Dataset):
         into batches to minimize the use of padding tokens. Returns a list of
         batches where each batch contains indices of sentences included into it
         """
-
-        # create buckets sorted by the number of src tokens
-        # each bucket is also sorted by the number of tgt tokens
-        buckets = {}
-        for i, src_id in enumerate(src_ids):
-            src_len, tgt_len = len(src_id), len(tgt_ids[i])
-            if src_len not in buckets:
-                buckets[src_len] = [(tgt_len, i)]
-            else:
-                buckets[src_len].append((tgt_len, i))
-
-        for b_idx in buckets:
-            buckets[b_idx] = sorted(buckets[b_idx])
-
-        buckets = OrderedDict(sorted(buckets.items()))
-        indices = list(buckets.keys())
-
-        batches = [[]]
-        num_batches = 0
-        batch_size = 0
-        i = 0
-        src_len = 0
-        tgt_len = 0
-
-        while i < len(buckets):
-            while buckets[indices[i]]:
-
-                i_src = max(src_len, indices[i])
-                i_tgt = max(tgt_len, buckets[indices[i]][0][0])
-
-                try:
-                    ip1_src = max(src_len, indices[i + 1])
-                    ip1_tgt = max(tgt_len, buckets[indices[i + 1]][0][0])
-                except IndexError:
-                    ip1_src = i_src + 1
-                    ip1_tgt = i_tgt + 1
-
-                if i_src + i_tgt <= ip1_src + ip1_tgt:
-                    src_len = i_src
-                    tgt_len = i_tgt
-                    _, idx = buckets[indices[i]].pop(0)
-                else:
-                    src_len = ip1_src
-                    tgt_len = ip1_tgt
-                    _, idx = buckets[indices[i + 1]].pop(0)
-
-                batches[num_batches].append(idx)
-                batch_size += 1
-
-                if batch_size * (src_len + tgt_len) > self.tokens_in_batch:
-
-                    num_examples_to_split = len(batches[num_batches])
-                    batches_to_evict = 8 * ((num_examples_to_split - 1) // 8)
-
-                    if batches_to_evict == 0:
-                        batches_to_evict = num_examples_to_split
-
-                    batches.append(batches[num_batches][batches_to_evict:])
-                    batches[num_batches] = batches[num_batches][:batches_to_evict]
-                    batch_size = num_examples_to_split - batches_to_evict
-
-                    num_batches += 1
-                    if batch_size > 0:
-                        src_len = max([len(src_ids[j]) for j in batches[num_batches]])
-                        tgt_len = max([len(tgt_ids[j]) for j in batches[num_batches]])
-                    else:
-                        src_len = 0
-                        tgt_len = 0
-                    break
-
-            if not buckets[indices[i]]:
-                i = i + 1
-
-        if not batches[-1]:
-            batches.pop(-1)
-
-        return batches
+        src_lengths = np.fromiter((len(ids) for ids in src_ids), dtype=np.int64, count=len(src_ids))
+        tgt_lengths = np.fromiter((len(ids) for ids in tgt_ids), dtype=np.int64, count=len(tgt_ids))
+        return pack_lengths_into_batches(src_lengths, tgt_lengths, self.tokens_in_batch)
 
     def clean_src_and_target(
         self,
@@ -27,6 +27,9 @@ from omegaconf import ListConfig, OmegaConf
 from nemo.collections.common.tokenizers.sentencepiece_tokenizer import SentencePieceTokenizer, create_spt_model
 from nemo.collections.nlp.data.language_modeling.sentence_dataset import SentenceDataset
 from nemo.collections.nlp.data.machine_translation.machine_translation_dataset import TranslationDataset
+from nemo.collections.nlp.data.machine_translation.translation_token_store import (
+    preprocess_parallel_dataset_to_token_store,
+)
 from nemo.collections.nlp.models.machine_translation.mt_enc_dec_config import MTEncDecModelConfig
 from nemo.collections.nlp.modules.common.tokenizer_utils import get_nmt_tokenizer, get_tokenizer
 from nemo.utils import logging
@@ -247,6 +250,7 @@ class MTDataPreproc:
                             world_size=self.world_size,
                             n_jobs=cfg.train_ds.get('n_preproc_jobs', -2),
                             tar_file_prefix=cfg.train_ds.get('tar_file_prefix', 'parallel'),
+                            use_token_store=cfg.train_ds.get('use_token_store', False),
                         )
                         metadata_file_list.append(self.train_metadata_file)
                     # update config
@@ -272,7 +276,9 @@ class MTDataPreproc:
                     for metadata_file in metadata_file_list:
                         with open(metadata_file) as metadata_reader:
                             metadata = json.load(metadata_reader)
-                        if metadata['tar_files']:
+                        if metadata.get('token_store_fragments'):
+                            logging.info(f"Using token store: {metadata_file}")
+                        elif metadata['tar_files']:
                             logging.info(f"Using tarred dataset: {metadata['tar_files']}")
                         else:
                             raise ValueError(f'tar_files not provided and metadata does not have tar files')
@@ -339,6 +345,83 @@ class MTDataPreproc:
 
         return encoder_tokenizer, decoder_tokenizer
 
+    @staticmethod
+    def get_preproc_enc_dec_tokenizers(
+        encoder_tokenizer_name=None,
+        encoder_tokenizer_model=None,
+        encoder_bpe_dropout=0.0,
+        encoder_model_name=None,
+        encoder_r2l=False,
+        decoder_tokenizer_name=None,
+        decoder_tokenizer_model=None,
+        decoder_bpe_dropout=0.0,
+        decoder_model_name=None,
+        decoder_r2l=False,
+        encoder_tokenizer_legacy=False,
+        decoder_tokenizer_legacy=False,
+    ):
+        """Builds the encoder and decoder tokenizers used to preprocess parallel data."""
+        encoder_tokenizer, decoder_tokenizer = MTDataPreproc.get_enc_dec_tokenizers(
+            encoder_tokenizer_name=encoder_tokenizer_name,
+            encoder_tokenizer_model=encoder_tokenizer_model,
+            encoder_bpe_dropout=encoder_bpe_dropout,
+            encoder_model_name=encoder_model_name,
+            encoder_r2l=encoder_r2l,
+            decoder_tokenizer_name=decoder_tokenizer_name,
+            decoder_tokenizer_model=decoder_tokenizer_model,
+            decoder_bpe_dropout=decoder_bpe_dropout,
+            decoder_model_name=decoder_model_name,
+            decoder_r2l=decoder_r2l,
+            encoder_tokenizer_legacy=encoder_tokenizer_legacy,
+            decoder_tokenizer_legacy=decoder_tokenizer_legacy,
+        )
+
+        # validate no token is negative for sentencepiece tokenizers and add missing special tokens.
+        for tok_name, tok_library, tok_model, legacy in [
+            ("encoder_tokenizer", encoder_tokenizer_name, encoder_tokenizer, encoder_tokenizer_legacy),
+            ("decoder_tokenizer", decoder_tokenizer_name, decoder_tokenizer, decoder_tokenizer_legacy),
+        ]:
+            if tok_library == 'sentencepiece':
+                negative_tokens = []
+                for n in ["eos_id", "bos_id", "unk_id", "pad_id"]:
+                    v = getattr(tok_model.tokenizer, n)()
+                    if v < 0:
+                        negative_tokens.append(f"{n}={v}")
+                if negative_tokens and not legacy:
+                    raise ValueError(
+                        f"{tok_name}=sentencepiece has invalid negative special tokens = {negative_tokens}"
+                    )
+                # If using the legacy sentencepiece tokenizer, we can add the missing tokens as "special" tokens.
+                else:
+                    # If using sentencepiece legacy, eos, bos and pad need to be set/added differently.
+                    if legacy:
+                        # bos, eos, pad and unk may be present in the provided spm .model file, if they are, use it.
+                        if not hasattr(tok_model, 'pad_token'):
+                            if hasattr(tok_model.tokenizer, 'pad_id') and tok_model.tokenizer.pad_id() > 0:
+                                tok_model.pad_token = tok_model.tokenizer.id_to_piece(tok_model.tokenizer.pad_id())
+                            else:
+                                tok_model.add_special_tokens({'pad_token': '<pad>'})
+                        else:
+                            tok_model.add_special_tokens({'pad_token': '<pad>'})
+
+                        if not hasattr(tok_model, 'bos_token'):
+                            if hasattr(tok_model.tokenizer, 'bos_id') and tok_model.tokenizer.bos_id() > 0:
+                                tok_model.bos_token = tok_model.tokenizer.id_to_piece(tok_model.tokenizer.bos_id())
+                            else:
+                                tok_model.add_special_tokens({'bos_token': '<bos>'})
+                        else:
+                            tok_model.add_special_tokens({'bos_token': '<s>'})
+
+                        if not hasattr(tok_model, 'eos_token'):
+                            if hasattr(tok_model.tokenizer, 'eos_id') and tok_model.tokenizer.eos_id() > 0:
+                                tok_model.eos_token = tok_model.tokenizer.id_to_piece(tok_model.tokenizer.eos_id())
+                            else:
+                                tok_model.add_special_tokens({'eos_token': '<eos>'})
+                        else:
+                            tok_model.add_special_tokens({'eos_token': '</s>'})
+
+        return encoder_tokenizer, decoder_tokenizer
+
     @staticmethod
     def get_monolingual_tokenizer(
         tokenizer_name=None,
@@ -383,6 +466,7 @@ class MTDataPreproc:
         tar_file_prefix='parallel',
         encoder_tokenizer_legacy=False,
         decoder_tokenizer_legacy=False,
+        use_token_store=False,
     ):
         """Create tarred dataset from large paired translation data.
 
@@ -400,12 +484,49 @@ class MTDataPreproc:
             num_batches_per_tarfile (int): number of batches (pickle files) within each tarfile
             tar_file_prefix (str) : add string prefix to tar files
             n_jobs (int): number of processes to use for data processing (-2 to use all but 2)
+            use_token_store (bool): write a memory-mappable token store instead of tar files of pickled batches,
+                see nemo/collections/nlp/data/machine_translation/translation_token_store.py
         """
 
         os.makedirs(out_dir, exist_ok=True)
 
         metadata_path = os.path.join(out_dir, f'metadata.tokens.{tokens_in_batch}.json')
 
+        if use_token_store:
+            if global_rank == 0:
+                if os.path.exists(metadata_path):
+                    logging.info(f'Token store detected: {metadata_path} and will be used. Remove if reprocessing.')
+                else:
+                    # tokenizers are built once per worker, fragments completed before an interruption are reused
+                    preprocess_parallel_dataset_to_token_store(
+                        src_fname=src_fname,
+                        tgt_fname=tgt_fname,
+                        out_dir=out_dir,
+                        build_tokenizers=MTDataPreproc.get_preproc_enc_dec_tokenizers,
+                        tokenizer_kwargs=dict(
+                            encoder_tokenizer_name=encoder_tokenizer_name,
+                            encoder_tokenizer_model=encoder_tokenizer_model,
+                            encoder_bpe_dropout=encoder_bpe_dropout,
+                            encoder_model_name=encoder_model_name,
+                            encoder_r2l=encoder_tokenizer_r2l,
+                            decoder_tokenizer_name=decoder_tokenizer_name,
+                            decoder_tokenizer_model=decoder_tokenizer_model,
+                            decoder_bpe_dropout=decoder_bpe_dropout,
+                            decoder_model_name=decoder_model_name,
+                            decoder_r2l=decoder_tokenizer_r2l,
+                            encoder_tokenizer_legacy=encoder_tokenizer_legacy,
+                            decoder_tokenizer_legacy=decoder_tokenizer_legacy,
+                        ),
+                        tokens_in_batch=tokens_in_batch,
+                        lines_per_dataset_fragment=lines_per_dataset_fragment,
+                        clean=clean,
+                        max_seq_length=max_seq_length,
+                        min_seq_length=min_seq_length,
+                        n_jobs=n_jobs,
+                        prefix=tar_file_prefix,
+                    )
+            return [], metadata_path
+
         if global_rank == 0:
             tar_files_in_out_dir = glob.glob(f'{out_dir}/*.tar')
             if tar_files_in_out_dir:
@@ -933,7 +1054,7 @@ class MTDataPreproc:
             cache_data_per_node=False,
             use_cache=False,
         )
-        encoder_tokenizer, decoder_tokenizer = MTDataPreproc.get_enc_dec_tokenizers(
+        encoder_tokenizer, decoder_tokenizer = MTDataPreproc.get_preproc_enc_dec_tokenizers(
             encoder_tokenizer_name=encoder_tokenizer_name,
             encoder_tokenizer_model=encoder_tokenizer_model,
             encoder_bpe_dropout=encoder_bpe_dropout,
@@ -948,50 +1069,6 @@ class MTDataPreproc:
             decoder_tokenizer_legacy=decoder_tokenizer_legacy,
         )
 
-        # validate no token is negative for sentencepiece tokenizers and add missing special tokens.
-        for tok_name, tok_library, tok_model, legacy in [
-            ("encoder_tokenizer", encoder_tokenizer_name, encoder_tokenizer, encoder_tokenizer_legacy),
-            ("decoder_tokenizer", decoder_tokenizer_name, decoder_tokenizer, decoder_tokenizer_legacy),
-        ]:
-            if tok_library == 'sentencepiece':
-                negative_tokens = []
-                for n in ["eos_id", "bos_id", "unk_id", "pad_id"]:
-                    v = getattr(tok_model.tokenizer, n)()
-                    if v < 0:
-                        negative_tokens.append(f"{n}={v}")
-                if negative_tokens and not legacy:
-                    raise ValueError(
-                        f"{tok_name}=sentencepiece has invalid negative special tokens = {negative_tokens}"
-                    )
-                # If using the legacy sentencepiece tokenizer, we can add the missing tokens as "special" tokens.
-                else:
-                    # If using sentencepiece legacy, eos, bos and pad need to be set/added differently.
-                    if legacy:
-                        # bos, eos, pad and unk may be present in the provided spm .model file, if they are, use it.
-                        if not hasattr(tok_model, 'pad_token'):
-                            if hasattr(tok_model.tokenizer, 'pad_id') and tok_model.tokenizer.pad_id() > 0:
-                                tok_model.pad_token = tok_model.tokenizer.id_to_piece(tok_model.tokenizer.pad_id())
-                            else:
-                                tok_model.add_special_tokens({'pad_token': '<pad>'})
-                        else:
-                            tok_model.add_special_tokens({'pad_token': '<pad>'})
-
-                        if not hasattr(tok_model, 'bos_token'):
-                            if hasattr(tok_model.tokenizer, 'bos_id') and tok_model.tokenizer.bos_id() > 0:
-                                tok_model.bos_token = tok_model.tokenizer.id_to_piece(tok_model.tokenizer.bos_id())
-                            else:
-                                tok_model.add_special_tokens({'bos_token': '<bos>'})
-                        else:
-                            tok_model.add_special_tokens({'bos_token': '<s>'})
-
-                        if not hasattr(tok_model, 'eos_token'):
-                            if hasattr(tok_model.tokenizer, 'eos_id') and tok_model.tokenizer.eos_id() > 0:
-                                tok_model.eos_token = tok_model.tokenizer.id_to_piece(tok_model.tokenizer.eos_id())
-                            else:
-                                tok_model.add_special_tokens({'eos_token': '<eos>'})
-                        else:
-                            tok_model.add_special_tokens({'eos_token': '</s>'})
-
         dataset.batchify(encoder_tokenizer, decoder_tokenizer)
 
         tar_file_ctr = 0
@@ -0,0 +1,465 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Memory-mappable token store of batched parallel corpora.
+
+A parallel corpus is cut into fragments of `lines_per_fragment` lines by a single streaming scan of the source and
+target files, which records the byte ranges of the fragments and a fingerprint of their content. The fragments are
+tokenized by a pool of workers that build the tokenizers once, each fragment is packed into batches and written to
+the store as four .npy files:
+
+    <prefix>.<fingerprint>.tokens.<tokens_in_batch>.src.npy      source tokens of all sentences, in batch order
+    <prefix>.<fingerprint>.tokens.<tokens_in_batch>.tgt.npy      target tokens of all sentences, in batch order
+    <prefix>.<fingerprint>.tokens.<tokens_in_batch>.offsets.npy  [num_sentences + 1, 2] source and target token offsets
+    <prefix>.<fingerprint>.tokens.<tokens_in_batch>.batches.npy  [num_batches + 1] sentence offsets of the batches
+
+Completed fragments are appended to a completion manifest, so that an interrupted preprocessing resumes with the
+remaining fragments. Fragments with identical content and preprocessing configuration are tokenized only once.
+"""
+
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from nemo.collections.nlp.data.machine_translation.machine_translation_dataset import (
+    TranslationDataset,
+    pack_lengths_into_batches,
+)
+from nemo.core import Dataset
+from nemo.utils import logging
+
+__all__ = [
+    'ParallelFragment',
+    'TranslationTokenStoreDataset',
+    'iter_parallel_fragments',
+    'preprocess_parallel_dataset_to_token_store',
+]
+
+TOKEN_STORE_ARRAYS = ('src', 'tgt', 'offsets', 'batches')
+
+# tokenizers of a preprocessing worker, built once by `_init_token_store_worker`
+_WORKER_TOKENIZERS = None
+
+
+@dataclass
+class ParallelFragment:
+    """Byte ranges of a fragment of a parallel corpus and the fingerprint of its content."""
+
+    index: int
+    src_start: int
+    src_end: int
+    tgt_start: int
+    tgt_end: int
+    num_lines: int
+    fingerprint: str
+
+
+def _iter_line_fragments(fname: str, lines_per_fragment: int, block_size: int) -> Iterator[Tuple[int, int, int, str]]:
+    """Yields (start, end, num_lines, digest) of consecutive fragments of `lines_per_fragment` lines of a file."""
+    start, pos, num_lines = 0, 0, 0
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(fname, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            view = memoryview(block)
+            newlines = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == ord('\n'))
+            # the newlines ending the fragments in this block
+            ends = newlines[lines_per_fragment - num_lines - 1 :: lines_per_fragment]
+            block_start = 0
+            for end in ends.tolist():
+                hasher.update(view[block_start : end + 1])
+                yield start, pos + end + 1, lines_per_fragment, hasher.hexdigest()
+                start, block_start = pos + end + 1, end + 1
+                hasher = hashlib.blake2b(digest_size=16)
+            hasher.update(view[block_start:])
+            if len(ends):
+                num_lines = len(newlines) - int(np.searchsorted(newlines, ends[-1])) - 1
+            else:
+                num_lines += len(newlines)
+            pos += len(block)
+            last_byte = block[-1]
+    if pos > start:
+        # the last line may not end with a newline
+        yield start, pos, num_lines + int(last_byte != ord('\n')), hasher.hexdigest()
+
+
+def iter_parallel_fragments(
+    src_fname: str, tgt_fname: str, lines_per_fragment: int, config_fingerprint: str = '', block_size: int = 1 << 24,
+) -> Iterator[ParallelFragment]:
+    """
+    Cuts a parallel corpus into fragments of `lines_per_fragment` lines with a single streaming pass over the source
+    and target files, without counting the lines first. Fragments are yielded as soon as they are found, so that they
+    can be processed while the rest of the corpus is scanned.
+
+    Args:
+        src_fname: path to the source text file
+        tgt_fname: path to the target text file
+        lines_per_fragment: number of lines of a fragment
+        config_fingerprint: string mixed into the fingerprints of the fragments, e.g. the preprocessing config
+        block_size: size of the blocks read from the files, in bytes
+
+    Returns:
+        iterator of `ParallelFragment` with the byte ranges of the fragments in both files
+    """
+    src_fragments = _iter_line_fragments(src_fname, lines_per_fragment, block_size)
+    tgt_fragments = _iter_line_fragments(tgt_fname, lines_per_fragment, block_size)
+    for index, (src, tgt) in enumerate(itertools.zip_longest(src_fragments, tgt_fragments)):
+        if src is None or tgt is None or src[2] != tgt[2]:
+            raise ValueError('Number of source lines should equal number of target lines.')
+        fingerprint = hashlib.blake2b(f'{src[3]}:{tgt[3]}:{config_fingerprint}'.encode(), digest_size=16)
+        yield ParallelFragment(
+            index=index,
+            src_start=src[0],
+            src_end=src[1],
+            tgt_start=tgt[0],
+            tgt_end=tgt[1],
+            num_lines=src[2],
+            fingerprint=fingerprint.hexdigest(),
+        )
+
+
+def _read_lines(fname: str, start: int, end: int) -> List[str]:
+    with open(fname, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    lines = data.split(b'\n')
+    if data.endswith(b'\n'):
+        lines.pop()
+    return [line.decode('utf-8') for line in lines]
+
+
+def _token_store_paths(store_prefix: str) -> Dict[str, str]:
+    return {name: f'{store_prefix}.{name}.npy' for name in TOKEN_STORE_ARRAYS}
+
+
+def write_token_store_fragment(
+    store_prefix: str, src_ids: List[List[int]], tgt_ids: List[List[int]], batch_indices: List[List[int]]
+) -> int:
+    """
+    Writes the tokenized sentences of a fragment to the token store, the sentences of every batch are consecutive.
+    The offsets are written last, so a fragment is only readable once all of its arrays are complete.
+
+    Returns:
+        number of sentences written
+    """
+    order = [i for batch in batch_indices for i in batch]
+    max_id = max((max(ids) for ids in itertools.chain(src_ids, tgt_ids) if ids), default=0)
+    dtype = np.uint16 if max_id < np.iinfo(np.uint16).max else np.int32
+
+    offsets = np.zeros((len(order) + 1, 2), dtype=np.int64)
+    offsets[1:, 0] = np.cumsum([len(src_ids[i]) for i in order])
+    offsets[1:, 1] = np.cumsum([len(tgt_ids[i]) for i in order])
+    batches = np.cumsum([0] + [len(batch) for batch in batch_indices], dtype=np.int64)
+
+    def concatenate(ids, count):
+        return np.fromiter(itertools.chain.from_iterable(ids[i] for i in order), dtype=dtype, count=count)
+
+    arrays = {
+        'src': concatenate(src_ids, offsets[-1, 0]),
+        'tgt': concatenate(tgt_ids, offsets[-1, 1]),
+        'batches': batches,
+        'offsets': offsets,
+    }
+    paths = _token_store_paths(store_prefix)
+    for name, array in arrays.items():
+        with open(paths[name] + '.tmp', 'wb') as f:
+            np.save(f, array)
+        os.replace(paths[name] + '.tmp', paths[name])
+    return len(order)
+
+
+def _init_token_store_worker(build_tokenizers: Callable, tokenizer_kwargs: dict):
+    global _WORKER_TOKENIZERS
+    _WORKER_TOKENIZERS = build_tokenizers(**tokenizer_kwargs)
+
+
+def _process_token_store_fragment(args) -> Tuple[ParallelFragment, str, int, int]:
+    fragment, src_fname, tgt_fname, store_prefix, clean, max_seq_length, min_seq_length, tokens_in_batch = args
+    encoder_tokenizer, decoder_tokenizer = _WORKER_TOKENIZERS
+
+    src_lines = _read_lines(src_fname, fragment.src_start, fragment.src_end)
+    tgt_lines = _read_lines(tgt_fname, fragment.tgt_start, fragment.tgt_end)
+    # same tokenization as TranslationDataset.batchify
+    src_ids = [
+        [encoder_tokenizer.bos_id] + encoder_tokenizer.text_to_ids(line) + [encoder_tokenizer.eos_id]
+        for line in src_lines
+    ]
+    tgt_ids = [
+        [decoder_tokenizer.bos_id] + decoder_tokenizer.text_to_ids(line) + [decoder_tokenizer.eos_id]
+        for line in tgt_lines
+    ]
+    if clean:
+        dataset = TranslationDataset(
+            dataset_src=src_fname,
+            dataset_tgt=tgt_fname,
+            tokens_in_batch=tokens_in_batch,
+            clean=clean,
+            max_seq_length=max_seq_length,
+            min_seq_length=min_seq_length,
+            max_seq_length_diff=max_seq_length,
+            max_seq_length_ratio=max_seq_length,
+        )
+        src_ids, tgt_ids = dataset.clean_src_and_target(
+            src_ids,
+            tgt_ids,
+            max_tokens=dataset.max_seq_length,
+            min_tokens=dataset.min_seq_length,
+            max_tokens_diff=dataset.max_seq_length_diff,
+            max_tokens_ratio=dataset.max_seq_length_ratio,
+        )
+    src_lengths = np.fromiter((len(ids) for ids in src_ids), dtype=np.int64, count=len(src_ids))
+    tgt_lengths = np.fromiter((len(ids) for ids in tgt_ids), dtype=np.int64, count=len(tgt_ids))
+    batch_indices = pack_lengths_into_batches(src_lengths, tgt_lengths, tokens_in_batch)
+    num_sentences = write_token_store_fragment(store_prefix, src_ids, tgt_ids, batch_indices)
+    return fragment, os.path.basename(store_prefix), len(batch_indices), num_sentences
+
+
+def _read_completion_manifest(manifest_path: str, out_dir: str) -> Dict[str, dict]:
+    completed = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as f:
+            lines = f.read().split('\n')
+        # the last line is empty unless the previous run was interrupted while writing it
+        if lines[-1]:
+            with open(manifest_path, 'a') as f:
+                f.write('\n')
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            paths = _token_store_paths(os.path.join(out_dir, entry['name']))
+            if all(os.path.exists(path) for path in paths.values()):
+                completed[entry['fingerprint']] = entry
+    return completed
+
+
+def preprocess_parallel_dataset_to_token_store(
+    src_fname: str,
+    tgt_fname: str,
+    out_dir: str,
+    build_tokenizers: Callable,
+    tokenizer_kwargs: dict,
+    tokens_in_batch: int,
+    lines_per_dataset_fragment: int,
+    clean: bool = False,
+    max_seq_length: int = 512,
+    min_seq_length: int = 1,
+    n_jobs: int = -2,
+    prefix: str = 'parallel',
+    block_size: int = 1 << 24,
+) -> str:
+    """
+    Tokenizes and batches a parallel corpus into a token store that can be read by TranslationTokenStoreDataset.
+
+    Fragments are dispatched to the workers while the corpus is scanned. Every worker builds the tokenizers once with
+    `build_tokenizers(**tokenizer_kwargs)`, which must be picklable and return the encoder and decoder tokenizers.
+    Completed fragments are recorded in `<prefix>.tokens.<tokens_in_batch>.manifest.jsonl`, so calling the function
+    again after an interruption only processes the remaining fragments.
+
+    Args:
+        src_fname: path to the source text file
+        tgt_fname: path to the target text file
+        out_dir: directory of the token store
+        build_tokenizers: function building the encoder and decoder tokenizers
+        tokenizer_kwargs: keyword arguments of `build_tokenizers`, also part of the fragment fingerprints
+        tokens_in_batch: tokens per batch per GPU, effectively batch size
+        lines_per_dataset_fragment: number of lines of a fragment, the unit of bucketing and padding
+        clean: whether to remove noisy sentence pairs, see TranslationDataset.clean_src_and_target
+        max_seq_length: maximum sequence length used for cleaning
+        min_seq_length: minimum sequence length used for cleaning
+        n_jobs: number of worker processes, negative values use all but `-n_jobs - 1` cores
+        prefix: prefix of the token store files
+        block_size: size of the blocks read when scanning the corpus, in bytes
+
+    Returns:
+        path to the metadata file of the token store
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    metadata_path = os.path.join(out_dir, f'metadata.tokens.{tokens_in_batch}.json')
+    manifest_path = os.path.join(out_dir, f'{prefix}.tokens.{tokens_in_batch}.manifest.jsonl')
+
+    config_fingerprint = json.dumps(
+        {
+            'tokenizers': f'{build_tokenizers.__module__}.{build_tokenizers.__qualname__}',
+            'tokenizer_kwargs': tokenizer_kwargs,
+            'tokens_in_batch': tokens_in_batch,
+            'clean': clean,
+            'max_seq_length': max_seq_length,
+            'min_seq_length': min_seq_length,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    completed = _read_completion_manifest(manifest_path, out_dir)
+    if completed:
+        logging.info(f'Resuming preprocessing with {len(completed)} completed fragments from {manifest_path}')
+
+    fragment_fingerprints = []
+    submitted = set(completed)
+
+    def remaining_fragments():
+        for fragment in iter_parallel_fragments(
+            src_fname, tgt_fname, lines_per_dataset_fragment, config_fingerprint, block_size
+        ):
+            fragment_fingerprints.append(fragment.fingerprint)
+            if fragment.fingerprint in submitted:
+                continue
+            submitted.add(fragment.fingerprint)
+            store_prefix = os.path.join(out_dir, f'{prefix}.{fragment.fingerprint}.tokens.{tokens_in_batch}')
+            yield (
+                fragment,
+                src_fname,
+                tgt_fname,
+                store_prefix,
+                clean,
+                max_seq_length,
+                min_seq_length,
+                tokens_in_batch,
+            )
+
+    num_workers = n_jobs if n_jobs > 0 else max(os.cpu_count() + 1 + n_jobs, 1)
+    with open(manifest_path, 'a') as manifest:
+        if num_workers > 1:
+            pool = multiprocessing.Pool(
+                num_workers, initializer=_init_token_store_worker, initargs=(build_tokenizers, tokenizer_kwargs)
+            )
+            results = pool.imap_unordered(_process_token_store_fragment, remaining_fragments())
+        else:
+            pool = None
+            _init_token_store_worker(build_tokenizers, tokenizer_kwargs)
+            results = map(_process_token_store_fragment, remaining_fragments())
+        try:
+            for fragment, name, num_batches, num_sentences in results:
+                entry = {
+                    'fingerprint': fragment.fingerprint,
+                    'name': name,
+                    'num_batches': num_batches,
+                    'num_sentences': num_sentences,
+                }
+                completed[fragment.fingerprint] = entry
+                manifest.write(json.dumps(entry) + '\n')
+                manifest.flush()
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+    # every distinct fragment is used once, in the order of the corpus
+    fragments = [completed[fingerprint] for fingerprint in dict.fromkeys(fragment_fingerprints)]
+    num_duplicates = len(fragment_fingerprints) - len(fragments)
+    if num_duplicates:
+        logging.info(f'Skipped {num_duplicates} fragments identical to previous fragments.')
+
+    metadata = {
+        'num_batches': sum(fragment['num_batches'] for fragment in fragments),
+        'num_sentences': sum(fragment['num_sentences'] for fragment in fragments),
+        'tokens_in_batch': tokens_in_batch,
+        'token_store_fragments': [fragment['name'] for fragment in fragments],
+        'token_store_num_batches': [fragment['num_batches'] for fragment in fragments],
+    }
+    with open(metadata_path, 'w') as f:
+        json.dump(metadata, f)
+    logging.info(
+        f"Created token store with {metadata['num_batches']} batches of {metadata['num_sentences']} sentence pairs "
+        f"from {len(fragments)} fragments in {out_dir}"
+    )
+    return metadata_path
+
+
+class TranslationTokenStoreDataset(Dataset):
+    """
+    A similar Dataset to the TarredTranslationDataset, which reads the batches of a token store created by
+    `preprocess_parallel_dataset_to_token_store`. The token arrays are memory-mapped and the batches are padded when
+    they are accessed. Being a map-style dataset, it is sharded across ranks by the distributed sampler.
+
+    Args:
+        metadata_path (str): Path to the metadata file of the token store.
+        encoder_tokenizer: Autokenizer wrapped BPE tokenizer model, such as SentenePiece
+        decoder_tokenizer: Autokenizer wrapped BPE tokenizer model, such as SentenePiece
+        reverse_lang_direction (bool): When True, swaps the source and target directions when returning minibatches.
+        prepend_id (int): Prepends the specificed token id to the start of every source sentence. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        metadata_path: str,
+        encoder_tokenizer,
+        decoder_tokenizer,
+        reverse_lang_direction: bool = False,
+        prepend_id: Optional[int] = None,
+    ):
+        super().__init__()
+        self.src_pad_id = encoder_tokenizer.pad_id
+        self.tgt_pad_id = decoder_tokenizer.pad_id
+        self.reverse_lang_direction = reverse_lang_direction
+        self.prepend_id = prepend_id
+
+        with open(metadata_path, 'r') as f:
+            self.metadata = json.load(f)
+        store_dir = os.path.dirname(os.path.abspath(metadata_path))
+        self.store_prefixes = [os.path.join(store_dir, name) for name in self.metadata['token_store_fragments']]
+        self.batch_offsets = np.cumsum([0] + self.metadata['token_store_num_batches'])
+        self._arrays = {}
+
+    def _get_arrays(self, fragment_idx: int) -> Dict[str, np.ndarray]:
+        if fragment_idx not in self._arrays:
+            paths = _token_store_paths(self.store_prefixes[fragment_idx])
+            self._arrays[fragment_idx] = {name: np.load(path, mmap_mode='r') for name, path in paths.items()}
+        return self._arrays[fragment_idx]
+
+    def __getstate__(self):
+        # memory maps are opened again by every dataloader worker
+        state = self.__dict__.copy()
+        state['_arrays'] = {}
+        return state
+
+    def __len__(self):
+        return int(self.batch_offsets[-1])
+
+    @staticmethod
+    def _pad(tokens: np.ndarray, offsets: np.ndarray, pad_id: int) -> np.ndarray:
+        lengths = np.diff(offsets)
+        padded = np.full((len(lengths), lengths.max()), pad_id, dtype=np.int64)
+        padded[np.arange(lengths.max()) < lengths[:, None]] = tokens[offsets[0] : offsets[-1]]
+        return padded
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            idx += len(self)
+        fragment_idx = int(np.searchsorted(self.batch_offsets, idx, side='right')) - 1
+        arrays = self._get_arrays(fragment_idx)
+        batch_idx = idx - self.batch_offsets[fragment_idx]
+        offsets = arrays['offsets'][arrays['batches'][batch_idx] : arrays['batches'][batch_idx + 1] + 1]
+
+        src_ids = self._pad(arrays['src'], offsets[:, 0], self.src_pad_id)
+        tgt = self._pad(arrays['tgt'], offsets[:, 1], self.tgt_pad_id)
+        if self.reverse_lang_direction:
+            src_ids, tgt = tgt, src_ids
+        labels = tgt[:, 1:]
+        tgt_ids = tgt[:, :-1]
+        if self.prepend_id:
+            src_ids = np.insert(src_ids, 0, self.prepend_id, axis=-1)
+        src_mask = (src_ids != self.src_pad_id).astype(np.int32)
+        tgt_mask = (tgt_ids != self.tgt_pad_id).astype(np.int32)
+        return src_ids, src_mask, tgt_ids, tgt_mask, labels
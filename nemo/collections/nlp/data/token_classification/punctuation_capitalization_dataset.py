@@ -180,6 +180,9 @@ class PunctuationCapitalizationDataConfigBase:
     created by the script
     `examples/nlp/token_classification/data/create_punctuation_capitalization_tarred_dataset.py
     <https://github.com/NVIDIA/NeMo/blob/main/examples/nlp/token_classification/data/create_punctuation_capitalization_tarred_dataset.py>`_
+    The metadata file of an indexed dataset created by the same script with ``--indexed`` flag can also be used. An
+    indexed dataset is shuffled globally if ``shuffle=True`` and parameters ``tar_shuffle_n`` and ``shard_strategy``
+    are ignored for it.
     """
 
     tar_shuffle_n: int = 1
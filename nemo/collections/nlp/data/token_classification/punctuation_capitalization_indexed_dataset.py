@@ -0,0 +1,561 @@
+# Copyright (c) 2024, NVIDIA CORPORATION & AFFILIATES.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import math
+import multiprocessing as mp
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+import numpy as np
+import torch
+from joblib import Parallel, delayed
+from torch.utils.data import Dataset
+from torch.utils.data.distributed import DistributedSampler
+
+from nemo.collections.common.tokenizers import TokenizerSpec
+from nemo.collections.nlp.data.token_classification.punctuation_capitalization_dataset import (
+    LABEL_ID_DIR_FOR_NEMO_CHECKPOINT,
+    Progress,
+    create_masks_and_segment_ids,
+    load_label_ids,
+)
+from nemo.collections.nlp.data.token_classification.punctuation_capitalization_tarred_dataset import (
+    DATASET_PARAMETERS_TMPL,
+    DEFAULT_CAPIT_LABEL_VOCAB_FILE_NAME,
+    DEFAULT_PUNCT_LABEL_VOCAB_FILE_NAME,
+    METADATA_CAPIT_LABEL_VOCAB_KEY,
+    METADATA_PUNCT_LABEL_VOCAB_KEY,
+    NUMBER_RE,
+    PROGRESS_REPORT_PERIOD,
+    REPLACE_NOT_ALLOWED_CHARACTERS_IN_FILE_NAME,
+    PunctuationCapitalizationMetadataDatasetMixin,
+    build_fragment_dataset,
+    check_tar_file_prefix,
+    get_fragment_start_bytes,
+    get_label_dictionaries,
+    save_fragment_label_vocab_files,
+)
+from nemo.utils import logging
+
+METADATA_FORMAT_KEY = 'format'
+INDEXED_FORMAT = 'indexed'
+
+INDEXED_FRAGMENT_DATA_TMPL = "{prefix}.fragment{fragment_idx}.bin"
+INDEXED_FRAGMENT_INDEX_TMPL = "{prefix}.fragment{fragment_idx}.index.npy"
+INDEXED_IN_PROGRESS_SUFFIX = ".in_progress"
+
+# One record per token of a padded batch. Batches are stored one after another in row-major order.
+INDEXED_TOKEN_DTYPE = np.dtype(
+    [('input_ids', np.int32), ('subtokens_mask', np.bool_), ('punct_labels', np.int16), ('capit_labels', np.int16)]
+)
+# One record per batch: a position of the first token record of the batch in the fragment data file and the batch shape
+INDEXED_BATCH_DTYPE = np.dtype([('offset', np.int64), ('batch_size', np.int32), ('seq_length', np.int32)])
+
+
+def is_indexed_dataset_metadata(metadata_file: Union[os.PathLike, str]) -> bool:
+    """Returns ``True`` if ``metadata_file`` describes a dataset created by :func:`create_indexed_dataset`."""
+    with open(Path(metadata_file).expanduser()) as f:
+        return json.load(f).get(METADATA_FORMAT_KEY) == INDEXED_FORMAT
+
+
+def remove_unexpected_indexed_files(output_dir: Path, prefix: str, metadata_file_name: Path) -> None:
+    """
+    Removes fragment files and a metadata file left in ``output_dir`` by previous dataset creation with the same
+    ``prefix``.
+    """
+    if not output_dir.is_dir():
+        return
+    escaped_prefix = re.escape(prefix)
+    fragment_pattern = re.compile(
+        f"{escaped_prefix}\\.fragment{NUMBER_RE}\\.(bin|index\\.npy)({re.escape(INDEXED_IN_PROGRESS_SUFFIX)})?$"
+    )
+    unexpected_files = [path for path in output_dir.iterdir() if fragment_pattern.match(path.name)]
+    if unexpected_files:
+        logging.warning(
+            f"Found {len(unexpected_files)} unexpected fragment files in the output directory {output_dir}. All of "
+            f"them are going to be removed. The first unexpected files: "
+            f"{', '.join([str(f) for f in unexpected_files[:3]])}."
+        )
+        for fn in unexpected_files:
+            fn.unlink()
+    for path in [
+        metadata_file_name,
+        output_dir / DEFAULT_PUNCT_LABEL_VOCAB_FILE_NAME,
+        output_dir / DEFAULT_CAPIT_LABEL_VOCAB_FILE_NAME,
+    ]:
+        if path.exists():
+            logging.warning(f"Found unexpected file {path}. It is going to be removed.")
+            path.unlink()
+
+
+def process_indexed_fragment(
+    text_file: Path,
+    labels_file: Path,
+    output_dir: Path,
+    prefix: str,
+    text_start_pos: int,
+    label_start_pos: int,
+    lines_per_dataset_fragment: int,
+    max_seq_length: int,
+    tokens_in_batch: int,
+    tokenizer_name: str,
+    tokenizer_model: Optional[Path],
+    vocab_file: Optional[Path],
+    merges_file: Optional[Path],
+    special_tokens: Dict[str, str],
+    use_fast_tokenizer: Optional[bool],
+    pad_label: str,
+    punct_label_ids: Dict[str, int],
+    capit_label_ids: Dict[str, int],
+    fragment_idx: int,
+    tokenization_progress_queue: mp.Queue,
+    batch_mark_up_progress_queue: mp.Queue,
+    batch_building_progress_queue: mp.Queue,
+    writing_progress_queue: mp.Queue,
+) -> int:
+    """
+    Tokenizes and batches one dataset fragment and writes its batches into a data file and an index file. Files are
+    written under temporary names and renamed when the fragment is complete.
+
+    Returns:
+        a number of batches in the fragment
+    """
+    dataset = build_fragment_dataset(
+        text_file,
+        labels_file,
+        output_dir,
+        text_start_pos,
+        label_start_pos,
+        lines_per_dataset_fragment,
+        max_seq_length,
+        tokens_in_batch,
+        tokenizer_name,
+        tokenizer_model,
+        vocab_file,
+        merges_file,
+        special_tokens,
+        use_fast_tokenizer,
+        pad_label,
+        punct_label_ids,
+        capit_label_ids,
+        fragment_idx,
+        tokenization_progress_queue,
+        batch_mark_up_progress_queue,
+        batch_building_progress_queue,
+    )
+    data_file = output_dir / INDEXED_FRAGMENT_DATA_TMPL.format(prefix=prefix, fragment_idx=fragment_idx)
+    index_file = output_dir / INDEXED_FRAGMENT_INDEX_TMPL.format(prefix=prefix, fragment_idx=fragment_idx)
+    tmp_data_file = data_file.with_name(data_file.name + INDEXED_IN_PROGRESS_SUFFIX)
+    tmp_index_file = index_file.with_name(index_file.name + INDEXED_IN_PROGRESS_SUFFIX)
+    index = np.zeros([len(dataset)], dtype=INDEXED_BATCH_DTYPE)
+    offset, progress_made = 0, 0
+    with tmp_data_file.open('wb') as f:
+        for batch_i in range(len(dataset)):
+            batch = dataset[batch_i]
+            records = np.empty(batch['input_ids'].shape, dtype=INDEXED_TOKEN_DTYPE)
+            for name in INDEXED_TOKEN_DTYPE.names:
+                records[name] = batch[name]
+            f.write(records.tobytes())
+            index[batch_i] = (offset, records.shape[0], records.shape[1])
+            offset += records.size
+            progress_made += records.shape[0]
+            if progress_made >= PROGRESS_REPORT_PERIOD:
+                writing_progress_queue.put(progress_made)
+                progress_made = 0
+    with tmp_index_file.open('wb') as f:
+        np.save(f, index)
+    tmp_data_file.rename(data_file)
+    tmp_index_file.rename(index_file)
+    writing_progress_queue.put(progress_made)
+    if fragment_idx == 0:
+        save_fragment_label_vocab_files(dataset, output_dir)
+    return len(index)
+
+
+def create_indexed_dataset(
+    text_file: Union[os.PathLike, str],
+    labels_file: Union[os.PathLike, str],
+    output_dir: Union[os.PathLike, str],
+    max_seq_length: int,
+    tokens_in_batch: int,
+    lines_per_dataset_fragment: int,
+    tokenizer_name: str,
+    tokenizer_model: Optional[Union[os.PathLike, str]] = None,
+    vocab_file: Optional[Union[os.PathLike, str]] = None,
+    merges_file: Optional[Union[os.PathLike, str]] = None,
+    special_tokens: Optional[Dict[str, str]] = None,
+    use_fast_tokenizer: Optional[bool] = False,
+    pad_label: str = 'O',
+    punct_label_ids: Optional[Dict[str, int]] = None,
+    capit_label_ids: Optional[Dict[str, int]] = None,
+    punct_label_vocab_file: Optional[Union[os.PathLike, str]] = None,
+    capit_label_vocab_file: Optional[Union[os.PathLike, str]] = None,
+    file_prefix: Optional[str] = 'punctuation_capitalization',
+    n_jobs: Optional[int] = None,
+) -> Path:
+    """
+    Creates an indexed dataset from ``text_file`` and ``labels_file``. An indexed dataset is an alternative to a
+    tarred dataset (see
+    :func:`~nemo.collections.nlp.data.token_classification.punctuation_capitalization_tarred_dataset.create_tarred_dataset`)
+    which supports random access to batches. Therefore, batches can be shuffled globally and training can be resumed
+    from any batch.
+
+    Text and labels are split into fragments of ``lines_per_dataset_fragment`` lines which are processed in parallel.
+    Every worker writes batches of its fragment directly into 2 files:
+
+      - ``<prefix>.fragment<N>.bin``: token records of all batches of the fragment. A record contains an input id
+        (``int32``), a subtokens mask value (``bool``), a punctuation label id (``int16``) and a capitalization label
+        id (``int16``). Batches are padded and stored one after another in row-major order.
+      - ``<prefix>.fragment<N>.index.npy``: a ``.npy`` array with one item per batch: an offset of the first record of
+        the batch in the data file, batch size and sequence length.
+
+    Unlike a tarred dataset, no batches are discarded and no repacking is required.
+
+    The dataset directory also contains a metadata JSON file and ``punct_label_vocab.csv`` and
+    ``capit_label_vocab.csv`` files. The metadata file has items ``'format'`` (equal to ``'indexed'``),
+    ``'num_batches'``, ``'fragments'``, ``'punct_label_vocab_file'`` and ``'capit_label_vocab_file'``. ``'fragments'``
+    is a list of dictionaries with items ``'data_file'``, ``'index_file'``, and ``'num_batches'``. Paths are relative
+    to the directory containing the metadata file. The metadata file is passed to
+    :class:`BertPunctuationCapitalizationIndexedDataset`.
+
+    Audio is not supported by indexed datasets.
+
+    Args:
+        text_file (:obj:`Union[os.PathLike, str]`): a path to a file with dataset source.
+        labels_file (:obj:`Union[os.PathLike, str]`): a path to a file with labels.
+        output_dir (:obj:`Union[os.PathLike, str]`): a path to a directory where metadata file, fragment files and
+            label vocabulary files are saved.
+        max_seq_length (:obj:`int`): maximum number of subtokens in an input sequence including [CLS] and [SEP].
+        tokens_in_batch (:obj:`int`): maximum number of tokens in a batch including [CLS], [SEP], [UNK], and [PAD]
+            tokens.
+        lines_per_dataset_fragment (:obj:`int`): a number of lines processed by one worker.
+        tokenizer_name (:obj:`str`): a name of the tokenizer used for tokenization of source sequences.
+        tokenizer_model (:obj:`Union[os.PathLike, str]`, `optional`): a path to a tokenizer model.
+        vocab_file (:obj:`Union[os.PathLike, str]`, `optional`): a path to a vocabulary file.
+        merges_file (:obj:`Union[os.PathLike, str]`, `optional`): a path to merges file.
+        special_tokens (:obj:`Dict[str, str]`, `optional`): a dictionary with special tokens passed to a tokenizer.
+        use_fast_tokenizer (:obj:`bool`, `optional`, defaults to :obj:`False`): whether to use fast HuggingFace
+            tokenizer.
+        pad_label (:obj:`str`, `optional`, defaults to :obj:`'O'`): a pad label both for punctuation and
+            capitalization.
+        punct_label_ids (:obj:`Dict[str, int]`, `optional`): a dictionary which keys are punctuation labels and values
+            are label ids.
+        capit_label_ids (:obj:`Dict[str, int]`, `optional`): same as ``punct_label_ids`` for capitalization labels.
+        punct_label_vocab_file (:obj:`Union[os.PathLike, str]`, `optional`): a path to a file with punctuation labels.
+        capit_label_vocab_file (:obj:`Union[os.PathLike, str]`, `optional`): a path to a file with capitalization
+            labels.
+        file_prefix (:obj:`str`, `optional`, defaults :obj:`'punctuation_capitalization'`): a string from which
+            names of dataset files start. The string can contain only characters ``A-Z``, ``a-z``, ``0-9``, ``_``,
+            ``-``, ``.``.
+        n_jobs (:obj:`int`, `optional`): a number of workers. If ``None``, then ``n_jobs`` is equal to number of CPUs.
+
+    For detailed description of parameters see
+    :func:`~nemo.collections.nlp.data.token_classification.punctuation_capitalization_tarred_dataset.create_tarred_dataset`.
+
+    Returns:
+        :obj:`pathlib.Path`: a path to the created metadata file
+    """
+    check_tar_file_prefix(file_prefix, ValueError, 'file_prefix')
+    if n_jobs is None:
+        n_jobs = mp.cpu_count()
+    text_file, labels_file = Path(text_file).expanduser(), Path(labels_file).expanduser()
+    output_dir = Path(output_dir).expanduser()
+    ds_params_str = DATASET_PARAMETERS_TMPL.format(
+        prefix=file_prefix,
+        tokens_in_batch=tokens_in_batch,
+        max_seq_length=max_seq_length,
+        tokenizer=REPLACE_NOT_ALLOWED_CHARACTERS_IN_FILE_NAME.sub('-', tokenizer_name),
+    )
+    metadata_file_name = output_dir / ('metadata.' + ds_params_str + '.indexed.json')
+    remove_unexpected_indexed_files(output_dir, ds_params_str, metadata_file_name)
+    num_lines, text_start_bytes, label_start_bytes = get_fragment_start_bytes(
+        text_file, labels_file, lines_per_dataset_fragment
+    )
+    if text_start_bytes:
+        output_dir.mkdir(parents=True, exist_ok=True)
+    else:
+        raise ValueError(f"Both {labels_file} and {text_file} are empty. Indexed dataset cannot be created.")
+    punct_label_ids, capit_label_ids = get_label_dictionaries(
+        labels_file,
+        label_start_bytes,
+        num_lines,
+        lines_per_dataset_fragment,
+        pad_label,
+        punct_label_ids,
+        capit_label_ids,
+        punct_label_vocab_file,
+        capit_label_vocab_file,
+        n_jobs,
+    )
+    max_label_id = np.iinfo(INDEXED_TOKEN_DTYPE['punct_labels']).max
+    for label_ids, task in [(punct_label_ids, "punctuation"), (capit_label_ids, "capitalization")]:
+        if max(label_ids.values()) > max_label_id:
+            raise ValueError(
+                f"Indexed dataset supports label ids not greater than {max_label_id}, whereas maximum {task} label id "
+                f"is {max(label_ids.values())}."
+            )
+
+    with Progress(
+        num_lines, ["Tokenization", "Batch mark up", "Batch building", "Writing indexed dataset"], "query"
+    ) as progress_queues:
+        num_batches = Parallel(n_jobs=min(n_jobs, len(text_start_bytes)))(
+            delayed(process_indexed_fragment)(
+                text_file,
+                labels_file,
+                output_dir,
+                ds_params_str,
+                text_start_pos,
+                label_start_pos,
+                lines_per_dataset_fragment,
+                max_seq_length,
+                tokens_in_batch,
+                tokenizer_name,
+                None if tokenizer_model is None else Path(tokenizer_model).expanduser(),
+                None if vocab_file is None else Path(vocab_file).expanduser(),
+                None if merges_file is None else Path(merges_file).expanduser(),
+                special_tokens,
+                use_fast_tokenizer,
+                pad_label,
+                punct_label_ids,
+                capit_label_ids,
+                fragment_idx,
+                *progress_queues,
+            )
+            for fragment_idx, (text_start_pos, label_start_pos) in enumerate(zip(text_start_bytes, label_start_bytes))
+        )
+    metadata = {
+        METADATA_FORMAT_KEY: INDEXED_FORMAT,
+        "num_batches": sum(num_batches),
+        "fragments": [
+            {
+                "data_file": INDEXED_FRAGMENT_DATA_TMPL.format(prefix=ds_params_str, fragment_idx=fragment_idx),
+                "index_file": INDEXED_FRAGMENT_INDEX_TMPL.format(prefix=ds_params_str, fragment_idx=fragment_idx),
+                "num_batches": fragment_num_batches,
+            }
+            for fragment_idx, fragment_num_batches in enumerate(num_batches)
+        ],
+        METADATA_PUNCT_LABEL_VOCAB_KEY: DEFAULT_PUNCT_LABEL_VOCAB_FILE_NAME,
+        METADATA_CAPIT_LABEL_VOCAB_KEY: DEFAULT_CAPIT_LABEL_VOCAB_FILE_NAME,
+    }
+    logging.info(f"{metadata['num_batches']} batches are in indexed dataset with metadata file {metadata_file_name}")
+    with metadata_file_name.open('w') as f:
+        json.dump(metadata, f, indent=2)
+    return metadata_file_name
+
+
+class BertPunctuationCapitalizationIndexedDataset(PunctuationCapitalizationMetadataDatasetMixin, Dataset):
+    """
+    Punctuation capitalization dataset with random access to batches stored in memory mapped files. An indexed dataset
+    is created by function :func:`create_indexed_dataset` or by script
+    `examples/nlp/token_classification/data/create_punctuation_capitalization_tarred_dataset.py
+    <https://github.com/NVIDIA/NeMo/blob/main/examples/nlp/token_classification/data/create_punctuation_capitalization_tarred_dataset.py>`_
+    with ``--indexed`` flag.
+
+    Batches are pre-built, so a PyTorch data loader has to use ``batch_size=1``. Use
+    :class:`PunctuationCapitalizationIndexedSampler` for global shuffling of batches between data parallel processes
+    and for resuming training from a batch in the middle of an epoch.
+
+    Args:
+        metadata_file (:obj:`Union[os.PathLike, str]`): a path to indexed dataset metadata file.
+        tokenizer (:obj:`TokenizerSpec`): a tokenizer instance used for tokenization of dataset source. A tokenizer
+            instance is used for getting ids of [CLS], [PAD], and [SEP] tokens which are used for masks creation.
+        pad_label (:obj:`str`): a label that is used for padding and for absence of punctuation or
+            capitalization.
+        label_info_save_dir (:obj:`Union[os.PathLike, str]`, `optional`): a path to a directory where label
+            vocabularies are copied when method :meth:`save_labels_and_get_file_paths` is called.
+        ignore_extra_tokens (:obj:`bool`, `optional`, defaults to :obj:`False`): whether to use only first token in a
+            word for loss computation and training.
+        ignore_start_end (:obj:`bool`, `optional`, defaults to :obj:`True`): whether to compute loss for [CLS] and
+            [SEP] tokens.
+    """
+
+    def __init__(
+        self,
+        metadata_file: Union[os.PathLike, str],
+        tokenizer: TokenizerSpec,
+        pad_label: str,
+        label_info_save_dir: Optional[Union[os.PathLike, str]] = None,
+        ignore_extra_tokens: bool = False,
+        ignore_start_end: bool = True,
+    ) -> None:
+        super().__init__()
+        self.tokenizer = tokenizer
+        self.metadata_file = Path(metadata_file).expanduser()
+        if label_info_save_dir is None:
+            self.for_nemo_ckpt = self.metadata_file.parent / LABEL_ID_DIR_FOR_NEMO_CHECKPOINT
+        else:
+            self.for_nemo_ckpt = Path(label_info_save_dir).expanduser() / LABEL_ID_DIR_FOR_NEMO_CHECKPOINT
+        with open(self.metadata_file) as f:
+            self.metadata = json.load(f)
+        if self.metadata.get(METADATA_FORMAT_KEY) != INDEXED_FORMAT:
+            raise ValueError(
+                f"Metadata file {self.metadata_file} does not describe an indexed dataset. Expected item "
+                f"'{METADATA_FORMAT_KEY}' equal to '{INDEXED_FORMAT}'."
+            )
+        self.ignore_extra_tokens = ignore_extra_tokens
+        self.ignore_start_end = ignore_start_end
+        self.use_audio = False
+        self.punct_label_vocab_file = self.metadata_file.parent / self.metadata[METADATA_PUNCT_LABEL_VOCAB_KEY]
+        self.capit_label_vocab_file = self.metadata_file.parent / self.metadata[METADATA_CAPIT_LABEL_VOCAB_KEY]
+        self.punct_label_ids = load_label_ids(self.punct_label_vocab_file)
+        self.capit_label_ids = load_label_ids(self.capit_label_vocab_file)
+        self.pad_label = pad_label
+        self._check_pad_label()
+
+        self.data_files: List[Path] = []
+        indices, fragment_ids = [], []
+        for fragment_idx, fragment in enumerate(self.metadata['fragments']):
+            self.data_files.append(self._resolve_path(fragment['data_file']))
+            index = np.load(self._resolve_path(fragment['index_file']))
+            if len(index) != fragment['num_batches']:
+                raise ValueError(
+                    f"Index file {fragment['index_file']} contains {len(index)} batches whereas metadata file "
+                    f"{self.metadata_file} states {fragment['num_batches']} batches."
+                )
+            indices.append(index)
+            fragment_ids.append(np.full([len(index)], fragment_idx, dtype=np.int32))
+        self.index = np.concatenate(indices) if indices else np.zeros([0], dtype=INDEXED_BATCH_DTYPE)
+        self.fragment_ids = np.concatenate(fragment_ids) if fragment_ids else np.zeros([0], dtype=np.int32)
+        self._data: Dict[int, np.ndarray] = {}
+
+    def _resolve_path(self, file_path: str) -> Path:
+        file_path = Path(file_path).expanduser()
+        return file_path if file_path.is_absolute() else self.metadata_file.parent / file_path
+
+    def __getstate__(self):
+        # memory maps are reopened in each process (e.g. data loader workers) instead of being pickled
+        state = self.__dict__.copy()
+        state['_data'] = {}
+        return state
+
+    def _fragment_data(self, fragment_idx: int) -> np.ndarray:
+        if fragment_idx not in self._data:
+            self._data[fragment_idx] = np.memmap(self.data_files[fragment_idx], dtype=INDEXED_TOKEN_DTYPE, mode='r')
+        return self._data[fragment_idx]
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __getitem__(self, idx: int) -> Dict[str, np.ndarray]:
+        """
+        Reads a batch with index ``idx`` and adds ``'segment_ids'``, ``'input_mask'``, ``'loss_mask'`` items to it.
+        The values of a batch dictionary are numpy arrays of identical shapes ``[Batch, Time]``.
+
+        Returns:
+            :obj:`Dict[str, np.ndarray]`: a batch with the same items as batches of
+            :class:`~nemo.collections.nlp.data.token_classification.punctuation_capitalization_tarred_dataset.BertPunctuationCapitalizationTarredDataset`.
+        """
+        offset, batch_size, seq_length = self.index[idx].tolist()
+        records = self._fragment_data(int(self.fragment_ids[idx]))[offset : offset + batch_size * seq_length]
+        records = records.reshape(batch_size, seq_length)
+        batch = {
+            'input_ids': records['input_ids'].astype(np.int32),
+            'subtokens_mask': records['subtokens_mask'].astype(bool),
+            'punct_labels': records['punct_labels'].astype(np.int64),
+            'capit_labels': records['capit_labels'].astype(np.int64),
+        }
+        batch['segment_ids'], batch['input_mask'], batch['loss_mask'] = create_masks_and_segment_ids(
+            batch['input_ids'],
+            batch['subtokens_mask'],
+            self.tokenizer.pad_id,
+            self.tokenizer.cls_id,
+            self.tokenizer.sep_id,
+            self.ignore_start_end,
+            self.ignore_extra_tokens,
+        )
+        return batch
+
+
+class PunctuationCapitalizationIndexedSampler(DistributedSampler):
+    """
+    A distributed sampler of batches of :class:`BertPunctuationCapitalizationIndexedDataset`. All batches of the
+    dataset are shuffled with the seed ``seed + epoch`` and then split between data parallel processes, so an order
+    of batches is fully defined by ``seed`` and an epoch set by :meth:`set_epoch`.
+
+    Training can be resumed from the middle of an epoch with :meth:`set_resume_position`. The position is a number
+    of dataset items of the epoch consumed by all data parallel processes together. The items of the dataset are
+    batches packed at the dataset creation, so the position is exact in items the data loader yields, and it remains
+    valid if the number of data parallel processes changes between interruption and resumption.
+
+    Args:
+        dataset: an indexed dataset
+        num_replicas: a number of data parallel processes
+        rank: a rank of the current process among data parallel processes
+        shuffle: whether to shuffle batches
+        seed: a random seed used for shuffling
+        drop_last: whether to drop the tail of the batch list to make it evenly divisible across processes
+    """
+
+    def __init__(
+        self,
+        dataset: BertPunctuationCapitalizationIndexedDataset,
+        num_replicas: int = 1,
+        rank: int = 0,
+        shuffle: bool = True,
+        seed: int = 0,
+        drop_last: bool = False,
+    ) -> None:
+        super().__init__(
+            dataset, num_replicas=num_replicas, rank=rank, shuffle=shuffle, seed=seed, drop_last=drop_last
+        )
+        self.resume_epoch: Optional[int] = None
+        self.consumed_samples = 0
+
+    def set_resume_position(self, epoch: int, consumed_samples: int) -> None:
+        """
+        Makes the sampler skip ``consumed_samples`` first items of the global order of epoch ``epoch``. The position
+        is applied once, when the sampler is iterated in epoch ``epoch``, and following epochs start from the
+        beginning.
+
+        Args:
+            epoch: an epoch in which training was interrupted
+            consumed_samples: a number of items of the epoch already consumed by all data parallel processes
+        """
+        if not 0 <= consumed_samples <= len(self.dataset):
+            raise ValueError(
+                f"Parameter `consumed_samples` has to be in range [0, {len(self.dataset)}], whereas "
+                f"{consumed_samples} is given."
+            )
+        self.resume_epoch = epoch
+        self.consumed_samples = consumed_samples
+
+    def _num_skipped_samples(self) -> int:
+        return self.consumed_samples if self.resume_epoch == self.epoch else 0
+
+    def _num_samples_per_replica(self, num_items: int) -> int:
+        if self.drop_last:
+            return num_items // self.num_replicas
+        return math.ceil(num_items / self.num_replicas)
+
+    def __iter__(self) -> Iterator[int]:
+        if self.shuffle:
+            generator = torch.Generator()
+            generator.manual_seed(self.seed + self.epoch)
+            indices = torch.randperm(len(self.dataset), generator=generator).tolist()
+        else:
+            indices = list(range(len(self.dataset)))
+        remaining = indices[self._num_skipped_samples() :]
+        self.resume_epoch = None
+        self.consumed_samples = 0
+        total_size = self._num_samples_per_replica(len(remaining)) * self.num_replicas
+        if total_size > len(remaining):
+            # the tail is padded with the first batches of the epoch, as in ``DistributedSampler``
+            remaining += (indices * math.ceil(total_size / len(indices)))[: total_size - len(remaining)]
+        return iter(remaining[self.rank : total_size : self.num_replicas])
+
+    def __len__(self) -> int:
+        return self._num_samples_per_replica(len(self.dataset) - self._num_skipped_samples())
@@ -145,7 +145,7 @@ def get_fragment_start_bytes(
         return num_lines, text_start_bytes, label_start_bytes
 
 
-def process_fragment(
+def build_fragment_dataset(
     text_file: Path,
     labels_file: Path,
     output_dir: Path,
@@ -154,7 +154,6 @@ def process_fragment(
     lines_per_dataset_fragment: int,
     max_seq_length: int,
     tokens_in_batch: int,
-    num_batches_per_tarfile: int,
     tokenizer_name: str,
     tokenizer_model: Optional[Path],
     vocab_file: Optional[Path],
@@ -168,12 +167,16 @@ def process_fragment(
     tokenization_progress_queue: mp.Queue,
     batch_mark_up_progress_queue: mp.Queue,
     batch_building_progress_queue: mp.Queue,
-    writing_to_tar_progress_queue: mp.Queue,
     audio_file: Path = None,
     sample_rate: int = None,
     audio_file_start_pos: int = None,
     use_audio: bool = False,
-) -> None:
+) -> BertPunctuationCapitalizationDataset:
+    """
+    Tokenizes ``lines_per_dataset_fragment`` lines of ``text_file`` and ``labels_file`` starting from bytes
+    ``text_start_pos`` and ``label_start_pos`` and packs them into batches. Pickled features of the returned dataset
+    are removed.
+    """
     tokenizer = get_tokenizer(
         tokenizer_name,
         tokenizer_model=None if tokenizer_model is None else str(tokenizer_model),
@@ -242,6 +245,75 @@ def process_fragment(
         if tmp_audio is not None and os.path.exists(tmp_audio):
             os.remove(tmp_audio)
     dataset.features_pkl.unlink()
+    return dataset
+
+
+def save_fragment_label_vocab_files(dataset: BertPunctuationCapitalizationDataset, output_dir: Path) -> None:
+    """Saves label vocabularies of ``dataset`` into files with default names in ``output_dir``."""
+    punct_label_ids_file, capit_label_ids_file = dataset.save_labels_and_get_file_paths(
+        DEFAULT_PUNCT_LABEL_VOCAB_FILE_NAME, DEFAULT_CAPIT_LABEL_VOCAB_FILE_NAME
+    )
+    punct_label_ids_file.rename(output_dir / DEFAULT_PUNCT_LABEL_VOCAB_FILE_NAME)
+    capit_label_ids_file.rename(output_dir / DEFAULT_CAPIT_LABEL_VOCAB_FILE_NAME)
+    shutil.rmtree(punct_label_ids_file.parent)
+
+
+def process_fragment(
+    text_file: Path,
+    labels_file: Path,
+    output_dir: Path,
+    text_start_pos: int,
+    label_start_pos: int,
+    lines_per_dataset_fragment: int,
+    max_seq_length: int,
+    tokens_in_batch: int,
+    num_batches_per_tarfile: int,
+    tokenizer_name: str,
+    tokenizer_model: Optional[Path],
+    vocab_file: Optional[Path],
+    merges_file: Optional[Path],
+    special_tokens: Dict[str, str],
+    use_fast_tokenizer: Optional[bool],
+    pad_label: str,
+    punct_label_ids: Dict[str, int],
+    capit_label_ids: Dict[str, int],
+    fragment_idx: int,
+    tokenization_progress_queue: mp.Queue,
+    batch_mark_up_progress_queue: mp.Queue,
+    batch_building_progress_queue: mp.Queue,
+    writing_to_tar_progress_queue: mp.Queue,
+    audio_file: Path = None,
+    sample_rate: int = None,
+    audio_file_start_pos: int = None,
+    use_audio: bool = False,
+) -> None:
+    dataset = build_fragment_dataset(
+        text_file,
+        labels_file,
+        output_dir,
+        text_start_pos,
+        label_start_pos,
+        lines_per_dataset_fragment,
+        max_seq_length,
+        tokens_in_batch,
+        tokenizer_name,
+        tokenizer_model,
+        vocab_file,
+        merges_file,
+        special_tokens,
+        use_fast_tokenizer,
+        pad_label,
+        punct_label_ids,
+        capit_label_ids,
+        fragment_idx,
+        tokenization_progress_queue,
+        batch_mark_up_progress_queue,
+        batch_building_progress_queue,
+        audio_file=audio_file,
+        sample_rate=sample_rate,
+        audio_file_start_pos=audio_file_start_pos,
+        use_audio=use_audio,
+    )
     tar_ctr = 0
     current_file_name = output_dir / TAR_FRAGMENT_TMPL_IN_PROGRESS.format(fragment_idx=fragment_idx, file_idx=tar_ctr)
     current_num_batches = 0
@@ -277,12 +349,7 @@ def process_fragment(
     else:
         current_file_name.unlink()
     if fragment_idx == 0:
-        punct_label_ids_file, capit_label_ids_file = dataset.save_labels_and_get_file_paths(
-            DEFAULT_PUNCT_LABEL_VOCAB_FILE_NAME, DEFAULT_CAPIT_LABEL_VOCAB_FILE_NAME
-        )
-        punct_label_ids_file.rename(output_dir / DEFAULT_PUNCT_LABEL_VOCAB_FILE_NAME)
-        capit_label_ids_file.rename(output_dir / DEFAULT_CAPIT_LABEL_VOCAB_FILE_NAME)
-        shutil.rmtree(punct_label_ids_file.parent)
+        save_fragment_label_vocab_files(dataset, output_dir)
 
 
 def remove_unexpected_files_and_dirs(output_dir: Path, output_file_tmpl: str, metadata_file_name: Path) -> None:
@@ -893,67 +960,12 @@ def create_tarred_dataset(
     create_metadata_file(output_dir, output_file_tmpl, metadata_file_name, num_batches_per_tarfile)
 
 
-class BertPunctuationCapitalizationTarredDataset(IterableDataset):
+class PunctuationCapitalizationMetadataDatasetMixin:
     """
-    Punctuation capitalization dataset which allows not to load all data in memory simultaneously. A tarred dataset
-    is created from text and label files using script
-    `examples/nlp/token_classification/data/create_punctuation_capitalization_tarred_dataset.py
-    <https://github.com/NVIDIA/NeMo/blob/main/examples/nlp/token_classification/data/create_punctuation_capitalization_tarred_dataset.py>`_
-    or function
-    :func:`~nemo.collections.nlp.data.token_classification.punctuation_capitalization_tarred_dataset.create_tarred_dataset`.
-
-    Args:
-        metadata_file (:obj:`Union[os.PathLike, str]`): a path to tarred dataset metadata file. Metadata file and files
-            referenced in metadata file are created by
-            `examples/nlp/token_classification/data/create_punctuation_capitalization_tarred_dataset.py
-            <https://github.com/NVIDIA/NeMo/blob/main/examples/nlp/token_classification/data/create_punctuation_capitalization_tarred_dataset.py>`_.
-            Metadata file is a JSON file which contains ``'num_batches'``, ``'tar_files'``,
-            ``'punct_label_vocab_file'``, ``'capit_label_vocab_file'`` items. The first item is total number of batches
-            in a dataset, the second is a list of paths to tar files relative to directory containing
-            ``metadata_file``. Items ``'punct_label_vocab_file'`` and ``'capit_label_vocab_file'`` are paths to
-            ``.csv`` files which contain unique punctuation a capitalization label vocabularies. Vocabulary file paths
-            are relative to directory containing the ``metadata_file``. Each line in ``'punct_label_vocab_file'`` and
-            ``'capit_label_vocab_file'`` contains 1 label. The first lines in ``'punct_label_vocab_file'`` and
-            ``'capit_label_vocab_file'`` files are neutral labels which also serve as pad labels. Neutral labels for
-            punctuation and capitalization must be equal to the ``pad_label`` parameter.
-        tokenizer (:obj:`TokenizerSpec`): a tokenizer instance used for tokenization of dataset source. A tokenizer
-            instance is used for getting ids of [CLS], [PAD], and [SEP] tokens which are used for masks creation.
-        pad_label (:obj:`str`): a label that is used for padding and for absence of punctuation or
-            capitalization. Used for checking items ``'punct_label_vocab'`` and ``'capit_label_vocab'`` of dictionary
-            in ``metadata_file``.
-        label_info_save_dir (:obj:`Union[os.PathLike, str]`, `optional`): a path to a directory where label
-            vocabularies are copied when method :meth:`save_labels_and_get_file_paths` is called. This parameter is
-            useful if tarred dataset directory is read-only.
-        ignore_extra_tokens (:obj:`bool`, `optional`, defaults to :obj:`False`): whether to use only first token in a
-            word for loss computation and training. If set to ``True``, then loss will be computed only for the first
-            tokens of words.
-        ignore_start_end (:obj:`bool`, `optional`, defaults to :obj:`True`): whether to compute loss for [CLS] and
-            [SEP] tokens. If set to ``True``, then loss will not be computed for [CLS] and [SEP] tokens.
-        world_size (:obj:`int`, `optional`, defaults to :obj:`1`): a number of processes used for model training. It is
-            used together with a ``global_rank`` parameter to decide which tar files will be used in the current
-            process.
-        global_rank (:obj:`int`, `optional`, defaults to :obj:`0`): a number of current process in the pool of workers
-            used for model training. It is used together with ``world_size`` parameter to decide which tar files will
-            be used in the current process.
-        shuffle_n (:obj:`int`, `optional`, defaults to :obj:`1`): a number of shuffled batches in a buffer.
-            ``shuffle_n`` batches are loaded into memory, shuffled, and then yielded by a dataset instance.
-        shard_strategy (:obj:`str`, defaults to :obj:``'scatter'``): Tarred dataset shard distribution strategy chosen as
-            a str value during ddp.
-            -   ``'scatter'``: The default shard strategy applied by WebDataset, where each node gets
-                a unique set of shards, which are permanently pre-allocated and never changed at runtime.
-            -   ``'replicate'``: Optional shard strategy, where each node gets all the set of shards
-                available in the tarred dataset, which are permanently pre-allocated and never changed at runtime.
-                The benefit of replication is that it allows each node to sample data points from the entire
-                dataset independently of other nodes, and reduces dependence on value of :param:`shuffle_n`.
-
-                .. warning::
-                    Replicated strategy allows every node to sample the entire set of available tar files,
-                    and therefore more than one node may sample the same tarfile, and even sample the same
-                    data points! As such, there is no assured guarantee that all samples in the dataset will be
-                    sampled at least once during 1 epoch. Scattered strategy, on the other hand, on specific
-                    occasions (when the number of shards is not divisible with ``world_size``), will not sample
-                    the entire dataset. For these reasons it is not advisable to use tarred datasets as validation
-                    or test datasets.
+    Label vocabulary checks, batch collating and output types shared by punctuation and capitalization datasets which
+    are created in advance and described by a metadata file. An inheriting class has to set attributes
+    ``metadata_file``, ``metadata``, ``tokenizer``, ``pad_label``, ``punct_label_ids``, ``capit_label_ids``,
+    ``punct_label_vocab_file``, ``capit_label_vocab_file``, ``for_nemo_ckpt``, and ``use_audio``.
     """
 
     @property
@@ -981,90 +993,6 @@ class BertPunctuationCapitalizationTarredDataset(IterableDataset):
             'capit_labels': NeuralType(('B', 'T'), LabelsType()),
         }
 
-    def __init__(
-        self,
-        metadata_file: Union[os.PathLike, str],
-        tokenizer: TokenizerSpec,
-        pad_label: str,
-        label_info_save_dir: Optional[Union[os.PathLike, str]] = None,
-        ignore_extra_tokens: bool = False,
-        ignore_start_end: bool = True,
-        world_size: int = 1,
-        global_rank: int = 0,
-        shuffle_n: int = 1,
-        shard_strategy: str = "scatter",
-        use_audio: bool = False,
-    ) -> None:
-        super().__init__()
-
-        valid_shard_strategies = ['scatter', 'replicate']
-        if shard_strategy not in valid_shard_strategies:
-            raise ValueError(
-                f"Invalid shard strategy of type {type(shard_strategy)} "
-                f"{repr(shard_strategy) if len(repr(shard_strategy)) < 100 else repr(shard_strategy)[:100] + '...'}! "
-                f"Allowed values are: {valid_shard_strategies}."
-            )
-
-        self.tokenizer = tokenizer
-        self.metadata_file = Path(metadata_file).expanduser()
-        if label_info_save_dir is None:
-            self.for_nemo_ckpt = self.metadata_file.parent / LABEL_ID_DIR_FOR_NEMO_CHECKPOINT
-        else:
-            self.for_nemo_ckpt = Path(label_info_save_dir).expanduser() / LABEL_ID_DIR_FOR_NEMO_CHECKPOINT
-        with open(self.metadata_file) as f:
-            self.metadata = json.load(f)
-        self.ignore_extra_tokens = ignore_extra_tokens
-        self.ignore_start_end = ignore_start_end
-        self.tar_files = []
-        for file_path in self.metadata['tar_files']:
-            file_path = Path(file_path).expanduser()
-            if file_path.is_absolute():
-                self.tar_files.append(str(file_path))
-            else:
-                self.tar_files.append(str(self.metadata_file.parent / file_path))
-        self.punct_label_vocab_file = self.metadata_file.parent / self.metadata[METADATA_PUNCT_LABEL_VOCAB_KEY]
-        self.capit_label_vocab_file = self.metadata_file.parent / self.metadata[METADATA_CAPIT_LABEL_VOCAB_KEY]
-        self.punct_label_ids = load_label_ids(self.punct_label_vocab_file)
-        self.capit_label_ids = load_label_ids(self.capit_label_vocab_file)
-        self.pad_label = pad_label
-        self._check_pad_label()
-
-        if shard_strategy == 'scatter':
-            logging.info("Tarred dataset shards will be scattered evenly across all nodes.")
-            if len(self.tar_files) % world_size != 0:
-                logging.warning(
-                    f"Number of shards in tarred dataset ({len(self.tar_files)}) is not divisible "
-                    f"by number of distributed workers ({world_size}). "
-                    f"Some shards will not be used ({len(self.tar_files) % world_size})."
-                )
-            begin_idx = (len(self.tar_files) // world_size) * global_rank
-            end_idx = begin_idx + (len(self.tar_files) // world_size)
-            logging.info(
-                "Partitioning tarred dataset: process (%d) taking shards [%d, %d)", global_rank, begin_idx, end_idx
-            )
-            batches_per_tar = self.metadata['num_batches'] // len(self.tar_files)
-            self.tar_files = self.tar_files[begin_idx:end_idx]
-            self.length = batches_per_tar * len(self.tar_files) * world_size
-
-        elif shard_strategy == 'replicate':
-            logging.info("All tarred dataset shards will be replicated across all nodes.")
-            self.length = self.metadata['num_batches']
-
-        else:
-            raise ValueError(f"Invalid shard strategy! Allowed values are: {valid_shard_strategies}")
-
-        self._dataset = wds.DataPipeline(
-            wds.SimpleShardList(self.tar_files),
-            webdataset_split_by_workers,
-            wds.tarfile_to_samples(),
-            wds.decode(wds.handle_extension('.pyd', decode_pyd)),
-            wds.shuffle(shuffle_n),
-            wds.to_tuple('__key__', 'batch.pyd'),
-            wds.map(self._build_sample),
-        )
-
-        self.use_audio = use_audio
-
     def _check_pad_label(self) -> None:
         """
         Checks the condition that ``pad_label`` passed to this class constructor has ``0`` id in
@@ -1200,6 +1128,187 @@ class BertPunctuationCapitalizationTarredDataset(IterableDataset):
         shutil.copy(str(self.capit_label_vocab_file), str(capit_label_ids_file))
         return punct_label_ids_file, capit_label_ids_file
 
+    def collate_fn(self, batches: List[Dict[str, np.ndarray]]) -> Dict[str, torch.Tensor]:
+        """
+        Return zeroth batch of ``batches`` list passed for collating and casts ``'segment_ids'``, ``'punct_labels'``,
+        ``'capit_labels'`` to types supported by
+        :class:`~nemo.collections.nlp.models.token_classification.punctuation_capitalization_model.PunctuationCapitalizationModel`.
+        All output tensors have shape ``[Batch, Time]``.
+
+        .. warning::
+            ``batch size`` parameter of a PyTorch data loader and sampler has to be ``1``.
+
+        Args:
+            batches (:obj:`List[Dict[str, np.ndarray]]`): a list of batches passed for collating
+
+        Returns:
+            :obj:`Dict[str, torch.Tensor]`: a batch dictionary with following items (for detailed description of batch
+            items see method :meth:`__getitem__`):
+
+              - ``'input_ids'`` (:obj:`torch.Tensor`): :obj:`torch.int32` tensor,
+              - ``'subtokens_mask'`` (:obj:`torch.Tensor`): :obj:`torch.bool` tensor,
+              - ``'punct_labels'`` (:obj:`torch.Tensor`): :obj:`torch.int64` tensor,
+              - ``'capit_labels'`` (:obj:`torch.Tensor`): :obj:`torch.int64` tensor,
+              - ``'segment_ids'`` (:obj:`torch.Tensor`): :obj:`torch.int32` tensor,
+              - ``'input_mask'`` (:obj:`torch.Tensor`): :obj:`torch.bool` tensor,
+              - ``'loss_mask'`` (:obj:`torch.Tensor`): :obj:`torch.bool` tensor.
+        """
+        batch = {k: torch.as_tensor(v) for k, v in batches[0].items()}
+        batch['segment_ids'] = batch['segment_ids'].int()
+        batch['punct_labels'] = batch['punct_labels'].long()
+        batch['capit_labels'] = batch['capit_labels'].long()
+        if self.use_audio:
+            batch['features'] = batch['features'].to(torch.float32)
+        return batch
+
+
+class BertPunctuationCapitalizationTarredDataset(PunctuationCapitalizationMetadataDatasetMixin, IterableDataset):
+    """
+    Punctuation capitalization dataset which allows not to load all data in memory simultaneously. A tarred dataset
+    is created from text and label files using script
+    `examples/nlp/token_classification/data/create_punctuation_capitalization_tarred_dataset.py
+    <https://github.com/NVIDIA/NeMo/blob/main/examples/nlp/token_classification/data/create_punctuation_capitalization_tarred_dataset.py>`_
+    or function
+    :func:`~nemo.collections.nlp.data.token_classification.punctuation_capitalization_tarred_dataset.create_tarred_dataset`.
+
+    Args:
+        metadata_file (:obj:`Union[os.PathLike, str]`): a path to tarred dataset metadata file. Metadata file and files
+            referenced in metadata file are created by
+            `examples/nlp/token_classification/data/create_punctuation_capitalization_tarred_dataset.py
+            <https://github.com/NVIDIA/NeMo/blob/main/examples/nlp/token_classification/data/create_punctuation_capitalization_tarred_dataset.py>`_.
+            Metadata file is a JSON file which contains ``'num_batches'``, ``'tar_files'``,
+            ``'punct_label_vocab_file'``, ``'capit_label_vocab_file'`` items. The first item is total number of batches
+            in a dataset, the second is a list of paths to tar files relative to directory containing
+            ``metadata_file``. Items ``'punct_label_vocab_file'`` and ``'capit_label_vocab_file'`` are paths to
+            ``.csv`` files which contain unique punctuation a capitalization label vocabularies. Vocabulary file paths
+            are relative to directory containing the ``metadata_file``. Each line in ``'punct_label_vocab_file'`` and
+            ``'capit_label_vocab_file'`` contains 1 label. The first lines in ``'punct_label_vocab_file'`` and
+            ``'capit_label_vocab_file'`` files are neutral labels which also serve as pad labels. Neutral labels for
+            punctuation and capitalization must be equal to the ``pad_label`` parameter.
+        tokenizer (:obj:`TokenizerSpec`): a tokenizer instance used for tokenization of dataset source. A tokenizer
+            instance is used for getting ids of [CLS], [PAD], and [SEP] tokens which are used for masks creation.
+        pad_label (:obj:`str`): a label that is used for padding and for absence of punctuation or
+            capitalization. Used for checking items ``'punct_label_vocab'`` and ``'capit_label_vocab'`` of dictionary
+            in ``metadata_file``.
+        label_info_save_dir (:obj:`Union[os.PathLike, str]`, `optional`): a path to a directory where label
+            vocabularies are copied when method :meth:`save_labels_and_get_file_paths` is called. This parameter is
+            useful if tarred dataset directory is read-only.
+        ignore_extra_tokens (:obj:`bool`, `optional`, defaults to :obj:`False`): whether to use only first token in a
+            word for loss computation and training. If set to ``True``, then loss will be computed only for the first
+            tokens of words.
+        ignore_start_end (:obj:`bool`, `optional`, defaults to :obj:`True`): whether to compute loss for [CLS] and
+            [SEP] tokens. If set to ``True``, then loss will not be computed for [CLS] and [SEP] tokens.
+        world_size (:obj:`int`, `optional`, defaults to :obj:`1`): a number of processes used for model training. It is
+            used together with a ``global_rank`` parameter to decide which tar files will be used in the current
+            process.
+        global_rank (:obj:`int`, `optional`, defaults to :obj:`0`): a number of current process in the pool of workers
+            used for model training. It is used together with ``world_size`` parameter to decide which tar files will
+            be used in the current process.
+        shuffle_n (:obj:`int`, `optional`, defaults to :obj:`1`): a number of shuffled batches in a buffer.
+            ``shuffle_n`` batches are loaded into memory, shuffled, and then yielded by a dataset instance.
+        shard_strategy (:obj:`str`, defaults to :obj:``'scatter'``): Tarred dataset shard distribution strategy chosen as
+            a str value during ddp.
+            -   ``'scatter'``: The default shard strategy applied by WebDataset, where each node gets
+                a unique set of shards, which are permanently pre-allocated and never changed at runtime.
+            -   ``'replicate'``: Optional shard strategy, where each node gets all the set of shards
+                available in the tarred dataset, which are permanently pre-allocated and never changed at runtime.
+                The benefit of replication is that it allows each node to sample data points from the entire
+                dataset independently of other nodes, and reduces dependence on value of :param:`shuffle_n`.
+
+                .. warning::
+                    Replicated strategy allows every node to sample the entire set of available tar files,
+                    and therefore more than one node may sample the same tarfile, and even sample the same
+                    data points! As such, there is no assured guarantee that all samples in the dataset will be
+                    sampled at least once during 1 epoch. Scattered strategy, on the other hand, on specific
+                    occasions (when the number of shards is not divisible with ``world_size``), will not sample
+                    the entire dataset. For these reasons it is not advisable to use tarred datasets as validation
+                    or test datasets.
+    """
+
+    def __init__(
+        self,
+        metadata_file: Union[os.PathLike, str],
+        tokenizer: TokenizerSpec,
+        pad_label: str,
+        label_info_save_dir: Optional[Union[os.PathLike, str]] = None,
+        ignore_extra_tokens: bool = False,
+        ignore_start_end: bool = True,
+        world_size: int = 1,
+        global_rank: int = 0,
+        shuffle_n: int = 1,
+        shard_strategy: str = "scatter",
+        use_audio: bool = False,
+    ) -> None:
+        super().__init__()
+
+        valid_shard_strategies = ['scatter', 'replicate']
+        if shard_strategy not in valid_shard_strategies:
+            raise ValueError(
+                f"Invalid shard strategy of type {type(shard_strategy)} "
+                f"{repr(shard_strategy) if len(repr(shard_strategy)) < 100 else repr(shard_strategy)[:100] + '...'}! "
+                f"Allowed values are: {valid_shard_strategies}."
+            )
+
+        self.tokenizer = tokenizer
+        self.metadata_file = Path(metadata_file).expanduser()
+        if label_info_save_dir is None:
+            self.for_nemo_ckpt = self.metadata_file.parent / LABEL_ID_DIR_FOR_NEMO_CHECKPOINT
+        else:
+            self.for_nemo_ckpt = Path(label_info_save_dir).expanduser() / LABEL_ID_DIR_FOR_NEMO_CHECKPOINT
+        with open(self.metadata_file) as f:
+            self.metadata = json.load(f)
+        self.ignore_extra_tokens = ignore_extra_tokens
+        self.ignore_start_end = ignore_start_end
+        self.tar_files = []
+        for file_path in self.metadata['tar_files']:
+            file_path = Path(file_path).expanduser()
+            if file_path.is_absolute():
+                self.tar_files.append(str(file_path))
+            else:
+                self.tar_files.append(str(self.metadata_file.parent / file_path))
+        self.punct_label_vocab_file = self.metadata_file.parent / self.metadata[METADATA_PUNCT_LABEL_VOCAB_KEY]
+        self.capit_label_vocab_file = self.metadata_file.parent / self.metadata[METADATA_CAPIT_LABEL_VOCAB_KEY]
+        self.punct_label_ids = load_label_ids(self.punct_label_vocab_file)
+        self.capit_label_ids = load_label_ids(self.capit_label_vocab_file)
+        self.pad_label = pad_label
+        self._check_pad_label()
+
+        if shard_strategy == 'scatter':
+            logging.info("Tarred dataset shards will be scattered evenly across all nodes.")
+            if len(self.tar_files) % world_size != 0:
+                logging.warning(
+                    f"Number of shards in tarred dataset ({len(self.tar_files)}) is not divisible "
+                    f"by number of distributed workers ({world_size}). "
+                    f"Some shards will not be used ({len(self.tar_files) % world_size})."
+                )
+            begin_idx = (len(self.tar_files) // world_size) * global_rank
+            end_idx = begin_idx + (len(self.tar_files) // world_size)
+            logging.info(
+                "Partitioning tarred dataset: process (%d) taking shards [%d, %d)", global_rank, begin_idx, end_idx
+            )
+            batches_per_tar = self.metadata['num_batches'] // len(self.tar_files)
+            self.tar_files = self.tar_files[begin_idx:end_idx]
+            self.length = batches_per_tar * len(self.tar_files) * world_size
+
+        elif shard_strategy == 'replicate':
+            logging.info("All tarred dataset shards will be replicated across all nodes.")
+            self.length = self.metadata['num_batches']
+
+        else:
+            raise ValueError(f"Invalid shard strategy! Allowed values are: {valid_shard_strategies}")
+
+        self._dataset = wds.DataPipeline(
+            wds.SimpleShardList(self.tar_files),
+            webdataset_split_by_workers,
+            wds.tarfile_to_samples(),
+            wds.decode(wds.handle_extension('.pyd', decode_pyd)),
+            wds.shuffle(shuffle_n),
+            wds.to_tuple('__key__', 'batch.pyd'),
+            wds.map(self._build_sample),
+        )
+
+        self.use_audio = use_audio
+
     def _build_sample(self, batch: Tuple[str, Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
         """
         Takes batch loaded from tarred dataset and transforms it for passing to the model. Adds ``'segment_ids'``,
@@ -1258,36 +1367,3 @@ class BertPunctuationCapitalizationTarredDataset(IterableDataset):
 
     def __len__(self) -> int:
         return self.length
-
-    def collate_fn(self, batches: List[Dict[str, np.ndarray]]) -> Dict[str, torch.Tensor]:
-        """
-        Return zeroth batch of ``batches`` list passed for collating and casts ``'segment_ids'``, ``'punct_labels'``,
-        ``'capit_labels'`` to types supported by
-        :class:`~nemo.collections.nlp.models.token_classification.punctuation_capitalization_model.PunctuationCapitalizationModel`.
-        All output tensors have shape ``[Batch, Time]``.
-
-        .. warning::
-            ``batch size`` parameter of a PyTorch data loader and sampler has to be ``1``.
-
-        Args:
-            batches (:obj:`List[Dict[str, np.ndarray]]`): a list of batches passed for collating
-
-        Returns:
-            :obj:`Dict[str, torch.Tensor]`: a batch dictionary with following items (for detailed description of batch
-            items see method :meth:`__getitem__`):
-
-              - ``'input_ids'`` (:obj:`torch.Tensor`): :obj:`torch.int32` tensor,
-              - ``'subtokens_mask'`` (:obj:`torch.Tensor`): :obj:`torch.bool` tensor,
-              - ``'punct_labels'`` (:obj:`torch.Tensor`): :obj:`torch.int64` tensor,
-              - ``'capit_labels'`` (:obj:`torch.Tensor`): :obj:`torch.int64` tensor,
-              - ``'segment_ids'`` (:obj:`torch.Tensor`): :obj:`torch.int32` tensor,
-              - ``'input_mask'`` (:obj:`torch.Tensor`): :obj:`torch.bool` tensor,
-              - ``'loss_mask'`` (:obj:`torch.Tensor`): :obj:`torch.bool` tensor.
-        """
-        batch = {k: torch.as_tensor(v) for k, v in batches[0].items()}
-        batch['segment_ids'] = batch['segment_ids'].int()
-        batch['punct_labels'] = batch['punct_labels'].long()
-        batch['capit_labels'] = batch['capit_labels'].long()
-        if self.use_audio:
-            batch['features'] = batch['features'].to(torch.float32)
-        return batch
@@ -41,6 +41,7 @@ from nemo.collections.nlp.modules.common.megatron.utils import (
     ApexGuardDefaults,
     average_losses_across_data_parallel_group,
 )
+from nemo.collections.nlp.parts.retrieval_index import build_index_from_embeddings, search_embedding_files
 from nemo.collections.nlp.parts.utils_funcs import get_last_rank
 from nemo.utils import logging
 
@@ -643,10 +644,23 @@ class MegatronBertEmbeddingModel(MegatronBertModel):
             filename_log_key = f"{mode}_{data_cfg.names[dataloader_idx]}"
             consumed_samples = self._compute_consumed_samples_after_training_step()
             fldr_path = f"{data_cfg.output_file_path_prefix}/consumed_samples{consumed_samples}/{filename_log_key}"
-            self.write_embeddings_to_file(deduplicated_outputs, fldr_path, dataloader_idx)
+            retrieval_index_cfg = data_cfg.get("retrieval_index", None)
+            if retrieval_index_cfg is not None:
+                retrieval_index_cfg = OmegaConf.to_container(retrieval_index_cfg, resolve=True)
+            self.write_embeddings_to_file(deduplicated_outputs, fldr_path, dataloader_idx, retrieval_index_cfg)
+            if dataloader_idx != 0 and retrieval_index_cfg is not None:
+                # queries are written by the first dataloader, score them against the index of the docs
+                query_fldr_path = os.path.join(os.path.dirname(fldr_path), f"{mode}_{data_cfg.names[0]}")
+                if os.path.exists(f"{query_fldr_path}/query.npy"):
+                    search_embedding_files(
+                        query_fldr_path,
+                        fldr_path,
+                        k=data_cfg.get("retrieval_top_k", 10),
+                        output_file=f"{fldr_path}/retrieval_results.jsonl",
+                    )
         return deduplicated_outputs, total_size
 
-    def write_embeddings_to_file(self, outputs, output_file_path, d_idx):
+    def write_embeddings_to_file(self, outputs, output_file_path, d_idx, retrieval_index_cfg=None):
         emb_type = 'query' if d_idx == 0 else 'doc'
         hs = torch.cat(outputs['q_hs' if d_idx == 0 else 'd_hs'], dim=0)
         hs_npy = hs.float().numpy()
@@ -656,6 +670,9 @@ class MegatronBertEmbeddingModel(MegatronBertModel):
             for m in outputs['metadata']:
                 f.write(m[f"{emb_type}_id"] + "\n")
         np.save(f"{emb_fldr}/{emb_type}.npy", hs_npy)
+        if emb_type == 'doc' and retrieval_index_cfg is not None:
+            # ids of the index are the positions of the documents in doc.ids
+            build_index_from_embeddings(hs_npy, **retrieval_index_cfg).save(f"{emb_fldr}/doc_index")
         return True
 
     def inference_loss_func(self, eos_tensors):
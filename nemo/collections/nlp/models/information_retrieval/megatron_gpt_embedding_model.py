@@ -18,7 +18,7 @@ import os
 import numpy as np
 import torch
 from lightning.pytorch.trainer.trainer import Trainer
-from omegaconf import DictConfig, ListConfig
+from omegaconf import DictConfig, ListConfig, OmegaConf
 
 from nemo.collections.nlp.data.information_retrieval.gpt_embedding_dataset import GPTEmbeddingDataset
 from nemo.collections.nlp.data.language_modeling.megatron.base_dataset_utils import (
@@ -26,6 +26,7 @@ from nemo.collections.nlp.data.language_modeling.megatron.base_dataset_utils imp
 )
 from nemo.collections.nlp.data.language_modeling.megatron.blendable_dataset import BlendableDataset
 from nemo.collections.nlp.models.language_modeling.megatron_gpt_sft_model import MegatronGPTSFTModel
+from nemo.collections.nlp.parts.retrieval_index import build_index_from_embeddings, search_embedding_files
 from nemo.utils import logging
 
 try:
@@ -330,10 +331,24 @@ class MegatronGPTEmbeddingModel(MegatronGPTSFTModel):
             filename_log_key = self._determine_log_key(data_cfg, dataloader_idx, None, mode)
             consumed_samples = self._compute_consumed_samples_after_training_step()
             fldr_path = f"{data_cfg.output_file_path_prefix}/consumed_samples{consumed_samples}/{filename_log_key}"
-            self.write_embeddings_to_file(deduplicated_outputs, fldr_path, dataloader_idx)
+            retrieval_index_cfg = data_cfg.get("retrieval_index", None)
+            if retrieval_index_cfg is not None:
+                retrieval_index_cfg = OmegaConf.to_container(retrieval_index_cfg, resolve=True)
+            self.write_embeddings_to_file(deduplicated_outputs, fldr_path, dataloader_idx, retrieval_index_cfg)
+            if dataloader_idx != 0 and retrieval_index_cfg is not None:
+                # queries are written by the first dataloader, score them against the index of the docs
+                query_log_key = self._determine_log_key(data_cfg, 0, None, mode)
+                query_fldr_path = os.path.join(os.path.dirname(fldr_path), query_log_key)
+                if os.path.exists(f"{query_fldr_path}/query.npy"):
+                    search_embedding_files(
+                        query_fldr_path,
+                        fldr_path,
+                        k=data_cfg.get("retrieval_top_k", 10),
+                        output_file=f"{fldr_path}/retrieval_results.jsonl",
+                    )
         return deduplicated_outputs, total_size
 
-    def write_embeddings_to_file(self, outputs, output_file_path, d_idx):
+    def write_embeddings_to_file(self, outputs, output_file_path, d_idx, retrieval_index_cfg=None):
         emb_type = 'query' if d_idx == 0 else 'doc'
         hs = torch.cat(outputs['q_hs' if d_idx == 0 else 'd_hs'], dim=0)
         hs_npy = hs.float().numpy()
@@ -343,6 +358,9 @@ class MegatronGPTEmbeddingModel(MegatronGPTSFTModel):
             for m in outputs['metadata']:
                 f.write(m[f"{emb_type}_id"] + "\n")
         np.save(f"{emb_fldr}/{emb_type}.npy", hs_npy)
+        if emb_type == 'doc' and retrieval_index_cfg is not None:
+            # ids of the index are the positions of the documents in doc.ids
+            build_index_from_embeddings(hs_npy, **retrieval_index_cfg).save(f"{emb_fldr}/doc_index")
         return True
 
     def local_validation_step(self, dataloader_iter):
@@ -40,7 +40,7 @@ from nemo.collections.common.tokenizers.en_ja_tokenizers import EnJaProcessor, J
 from nemo.collections.common.tokenizers.indic_tokenizers import IndicProcessor
 from nemo.collections.common.tokenizers.moses_tokenizers import MosesProcessor
 from nemo.collections.common.tokenizers.tabular_tokenizer import TabularTokenizer
-from nemo.collections.nlp.data import TarredTranslationDataset, TranslationDataset
+from nemo.collections.nlp.data import TarredTranslationDataset, TranslationDataset, TranslationTokenStoreDataset
 from nemo.collections.nlp.models.enc_dec_nlp_model import EncDecNLPModel
 from nemo.collections.nlp.models.machine_translation.mt_enc_dec_config import MTEncDecModelConfig
 from nemo.collections.nlp.modules.common import TokenClassifier
@@ -790,6 +790,17 @@ class MTEncDecModel(EncDecNLPModel, Exportable):
             for idx, metadata_file in enumerate(metadata_file_list):
                 with open(metadata_file) as metadata_reader:
                     metadata = json.load(metadata_reader)
+                if metadata.get('token_store_fragments') is not None:
+                    logging.info(f'Loading from token store {metadata_file}')
+                    dataset = TranslationTokenStoreDataset(
+                        metadata_path=metadata_file,
+                        encoder_tokenizer=encoder_tokenizer,
+                        decoder_tokenizer=decoder_tokenizer,
+                        reverse_lang_direction=cfg.get("reverse_lang_direction", False),
+                        prepend_id=multilingual_ids[idx] if multilingual else None,
+                    )
+                    datasets.append(dataset)
+                    continue
                 if tar_files_list is None:
                     tar_files = metadata.get('tar_files')
                     if tar_files is not None:
@@ -906,7 +917,7 @@ class MTEncDecModel(EncDecNLPModel, Exportable):
             sampler=(
                 None
                 if (
-                    cfg.get("use_tarred_dataset", False)
+                    (cfg.get("use_tarred_dataset", False) and not isinstance(dataset, TranslationTokenStoreDataset))
                     or cfg.get("dataset_type", "") == "tarred"
                     or isinstance(dataset, ConcatDataset)
                 )
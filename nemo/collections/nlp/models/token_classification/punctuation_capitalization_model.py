@@ -33,6 +33,11 @@ from nemo.collections.nlp.data.token_classification.punctuation_capitalization_d
     load_label_ids,
     raise_not_equal_labels_error,
 )
+from nemo.collections.nlp.data.token_classification.punctuation_capitalization_indexed_dataset import (
+    BertPunctuationCapitalizationIndexedDataset,
+    PunctuationCapitalizationIndexedSampler,
+    is_indexed_dataset_metadata,
+)
 from nemo.collections.nlp.data.token_classification.punctuation_capitalization_infer_dataset import (
     BertPunctuationCapitalizationInferDataset,
 )
@@ -98,6 +103,10 @@ class PunctuationCapitalizationModel(NLPModel, Exportable):
         self.label_ids_are_set: bool = False
         self.punct_label_ids: Optional[Dict[str, int]] = None
         self.capit_label_ids: Optional[Dict[str, int]] = None
+        # A sampler of an indexed train dataset and a number of its items consumed in the current epoch by all data
+        # parallel processes. The number is saved in checkpoints for resuming training from the middle of an epoch.
+        self._train_indexed_sampler: Optional[PunctuationCapitalizationIndexedSampler] = None
+        self._train_consumed_samples: int = 0
         super().__init__(cfg=cfg, trainer=trainer)
         if not self.label_ids_are_set:
             self._set_label_ids()
@@ -316,6 +325,36 @@ class PunctuationCapitalizationModel(NLPModel, Exportable):
         if shuffle:
             if isinstance(self.train_dataloader().dataset, BertPunctuationCapitalizationDataset):
                 self.train_dataloader().dataset.repack_batches_with_shuffle()
+        self._train_consumed_samples = 0
+
+    def on_train_batch_start(self, batch: Any, batch_idx: int, unused: int = 0) -> Optional[int]:
+        """
+        Counts items of an indexed train dataset consumed in the current epoch. The counter is increased before
+        the step, so checkpoints saved at the end of the step account for the current batch.
+        """
+        if self._train_indexed_sampler is not None:
+            self._train_consumed_samples = min(
+                self._train_consumed_samples + self._train_indexed_sampler.num_replicas,
+                len(self._train_indexed_sampler.dataset),
+            )
+        return super().on_train_batch_start(batch, batch_idx, unused)
+
+    def on_save_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
+        """Saves a position of an indexed train dataset sampler for resuming training from the middle of an epoch."""
+        super().on_save_checkpoint(checkpoint)
+        if self._train_indexed_sampler is not None and self._trainer is not None:
+            checkpoint['indexed_sampler_state'] = {
+                'epoch': self._trainer.current_epoch,
+                'consumed_samples': self._train_consumed_samples,
+            }
+
+    def on_load_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
+        """Restores a position of an indexed train dataset sampler saved by :meth:`on_save_checkpoint`."""
+        super().on_load_checkpoint(checkpoint)
+        state = checkpoint.get('indexed_sampler_state')
+        if state is not None and self._train_indexed_sampler is not None:
+            self._train_indexed_sampler.set_resume_position(state['epoch'], state['consumed_samples'])
+            self._train_consumed_samples = state['consumed_samples']
 
     def _multi_eval_epoch_end(self, mode: str, dataloader_idx: int) -> Dict[str, Dict[str, torch.Tensor]]:
         loss = self.metrics[mode]['loss'][dataloader_idx].compute()
@@ -476,6 +515,8 @@ class PunctuationCapitalizationModel(NLPModel, Exportable):
         if train_data_config is None:
             train_data_config = self._cfg.train_ds
 
+        self._train_indexed_sampler = None
+        self._train_consumed_samples = 0
         self._train_dl = self._setup_dataloader_from_config(cfg=train_data_config, train=True)
 
         # Need to set this because if using an IterableDataset, the length of the dataloader is the total number
@@ -775,6 +816,7 @@ class PunctuationCapitalizationModel(NLPModel, Exportable):
         self._check_label_config_parameters()
         if not self.label_ids_are_set and not train:
             self._set_label_ids()
+        sampler = None
         if cfg.use_tarred_dataset:
             if cfg.tar_metadata_file is None:
                 raise ValueError(
@@ -782,19 +824,40 @@ class PunctuationCapitalizationModel(NLPModel, Exportable):
                     f"to tarred dataset metadata file, whereas `None` is given."
                 )
             tar_metadata_file = Path(cfg.ds_item) / cfg.tar_metadata_file
-            dataset = BertPunctuationCapitalizationTarredDataset(
-                metadata_file=tar_metadata_file,
-                tokenizer=self.tokenizer,
-                pad_label=self._cfg.common_dataset_parameters.pad_label,
-                ignore_extra_tokens=self._cfg.common_dataset_parameters.ignore_extra_tokens,
-                ignore_start_end=self._cfg.common_dataset_parameters.ignore_start_end,
-                world_size=self.world_size,
-                global_rank=self.global_rank,
-                shuffle_n=cfg.tar_shuffle_n,
-                shard_strategy=cfg.shard_strategy,
-                label_info_save_dir=cfg.label_info_save_dir,
-                use_audio=cfg.use_audio,
-            )
+            if is_indexed_dataset_metadata(tar_metadata_file):
+                if cfg.use_audio:
+                    raise ValueError(f"Indexed dataset {tar_metadata_file} does not support audio.")
+                dataset = BertPunctuationCapitalizationIndexedDataset(
+                    metadata_file=tar_metadata_file,
+                    tokenizer=self.tokenizer,
+                    pad_label=self._cfg.common_dataset_parameters.pad_label,
+                    ignore_extra_tokens=self._cfg.common_dataset_parameters.ignore_extra_tokens,
+                    ignore_start_end=self._cfg.common_dataset_parameters.ignore_start_end,
+                    label_info_save_dir=cfg.label_info_save_dir,
+                )
+                sampler = PunctuationCapitalizationIndexedSampler(
+                    dataset,
+                    num_replicas=self.world_size,
+                    rank=self.global_rank,
+                    shuffle=cfg.shuffle,
+                    drop_last=cfg.drop_last,
+                )
+                if train:
+                    self._train_indexed_sampler = sampler
+            else:
+                dataset = BertPunctuationCapitalizationTarredDataset(
+                    metadata_file=tar_metadata_file,
+                    tokenizer=self.tokenizer,
+                    pad_label=self._cfg.common_dataset_parameters.pad_label,
+                    ignore_extra_tokens=self._cfg.common_dataset_parameters.ignore_extra_tokens,
+                    ignore_start_end=self._cfg.common_dataset_parameters.ignore_start_end,
+                    world_size=self.world_size,
+                    global_rank=self.global_rank,
+                    shuffle_n=cfg.tar_shuffle_n,
+                    shard_strategy=cfg.shard_strategy,
+                    label_info_save_dir=cfg.label_info_save_dir,
+                    use_audio=cfg.use_audio,
+                )
             dataset.check_for_label_consistency_with_model_config(
                 self.punct_label_ids,
                 self.capit_label_ids,
@@ -896,7 +959,10 @@ class PunctuationCapitalizationModel(NLPModel, Exportable):
                 use_bucketing=cfg.use_bucketing,
                 preload_audios=cfg.preload_audios,
             )
-        if cfg.shuffle and cfg.use_tarred_dataset:
+        if sampler is not None:
+            # indexed dataset batches are shuffled by the sampler
+            shuffle = False
+        elif cfg.shuffle and cfg.use_tarred_dataset:
             logging.warning(f"Shuffling in dataloader is not supported for tarred dataset.")
             shuffle = False
         else:
@@ -904,8 +970,9 @@ class PunctuationCapitalizationModel(NLPModel, Exportable):
         return torch.utils.data.DataLoader(
             dataset=dataset,
             collate_fn=dataset.collate_fn,
-            batch_size=1 if cfg.use_bucketing else cfg.batch_size,
+            batch_size=1 if cfg.use_bucketing or sampler is not None else cfg.batch_size,
             shuffle=shuffle,
+            sampler=sampler,
             num_workers=cfg.num_workers,
             pin_memory=cfg.pin_memory,
             drop_last=cfg.drop_last,
@@ -0,0 +1,621 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Nearest neighbour indices over embeddings, used by the entity linking and information retrieval inference scripts.
+
+Three backends are available:
+
+* ``exact``: exact search with blockwise matrix products in PyTorch (on CPU or GPU).
+* ``faiss``: approximate search with any index of ``faiss.index_factory`` (e.g. ``IVF1024,Flat`` or
+  ``IVF1024,PQ32``). Requires ``faiss-cpu`` or ``faiss-gpu``.
+* ``numpy``: approximate IVF-Flat search implemented with NumPy, used when faiss is not installed.
+
+All backends support incremental ``add`` with arbitrary int64 ids, batched ``search`` and persistence to a directory.
+The vectors of the ``exact`` and ``numpy`` backends are saved as ``.npy`` files which are memory-mapped on load, so
+an index larger than the available memory can be searched.
+
+Scores are similarities for the ``ip`` metric (higher is better) and squared distances for the ``l2`` metric (lower
+is better), like in faiss. Missing results are returned with id ``-1``.
+"""
+
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional, Tuple, Type
+
+import numpy as np
+import torch
+
+from nemo.utils import logging
+
+try:
+    import faiss
+
+    HAVE_FAISS = True
+except (ImportError, ModuleNotFoundError):
+    HAVE_FAISS = False
+
+__all__ = [
+    'RetrievalIndex',
+    'ExactRetrievalIndex',
+    'FaissRetrievalIndex',
+    'NumpyIVFRetrievalIndex',
+    'build_index_from_embeddings',
+    'build_retrieval_index',
+    'load_retrieval_index',
+    'search_embedding_files',
+]
+
+INDEX_CONFIG_FILE = 'index.json'
+VECTORS_FILE = 'vectors.npy'
+IDS_FILE = 'ids.npy'
+METRICS = ('ip', 'l2')
+
+
+def _merge_top_k(
+    best_scores: np.ndarray, best_ids: np.ndarray, scores: np.ndarray, ids: np.ndarray, k: int, largest: bool
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Merges the current top ``k`` results of every query with the scores of new candidates."""
+    scores = np.concatenate([best_scores, scores], axis=1)
+    ids = np.concatenate([best_ids, np.broadcast_to(ids, scores[:, best_ids.shape[1] :].shape)], axis=1)
+    keys = -scores if largest else scores
+    if scores.shape[1] > k:
+        top = np.argpartition(keys, k - 1, axis=1)[:, :k]
+        scores, ids, keys = [np.take_along_axis(x, top, axis=1) for x in (scores, ids, keys)]
+    order = np.argsort(keys, axis=1, kind='stable')
+    return np.take_along_axis(scores, order, axis=1), np.take_along_axis(ids, order, axis=1)
+
+
+def _writable(array: np.ndarray) -> np.ndarray:
+    """Copies read-only (e.g. memory-mapped) arrays, which cannot be wrapped by a tensor."""
+    return array if array.flags.writeable and array.flags.c_contiguous else np.array(array)
+
+
+class _VectorSegments:
+    """Vectors and ids stored as a list of immutable segments.
+
+    ``add`` appends a segment, so that vectors loaded as a memory map are never copied to memory when more vectors
+    are added.
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.vectors: List[np.ndarray] = []
+        self.ids: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self.ids)
+
+    def add(self, vectors: np.ndarray, ids: np.ndarray):
+        self.vectors.append(vectors)
+        self.ids.append(ids)
+
+    def blocks(self, block_size: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        for vectors, ids in zip(self.vectors, self.ids):
+            for start in range(0, len(ids), block_size):
+                yield vectors[start : start + block_size], ids[start : start + block_size]
+
+    def save(self, path: str):
+        num_vectors = len(self)
+        # the new files are written next to the old ones, which may be memory-mapped by this index
+        vectors = np.lib.format.open_memmap(
+            os.path.join(path, VECTORS_FILE + '.tmp'), mode='w+', dtype=np.float32, shape=(num_vectors, self.dim)
+        )
+        ids = np.empty(num_vectors, dtype=np.int64)
+        start = 0
+        for block_vectors, block_ids in self.blocks(block_size=65536):
+            vectors[start : start + len(block_ids)] = block_vectors
+            ids[start : start + len(block_ids)] = block_ids
+            start += len(block_ids)
+        vectors.flush()
+        del vectors
+        os.replace(os.path.join(path, VECTORS_FILE + '.tmp'), os.path.join(path, VECTORS_FILE))
+        np.save(os.path.join(path, IDS_FILE), ids)
+
+    def load(self, path: str, mmap: bool):
+        vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode='r' if mmap else None)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            raise ValueError(f"Vectors of shape {vectors.shape} in {path} do not match the dimension {self.dim}")
+        self.vectors, self.ids = [], []
+        if len(vectors) > 0:
+            self.add(vectors, np.load(os.path.join(path, IDS_FILE)))
+
+
+class RetrievalIndex(ABC):
+    """Base class of nearest neighbour indices.
+
+    Args:
+        dim: dimension of the vectors.
+        metric: ``ip`` for inner product or ``l2`` for squared euclidean distance.
+    """
+
+    backend: str = None
+
+    def __init__(self, dim: int, metric: str = 'ip'):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric '{metric}', expected one of {METRICS}")
+        self.dim = dim
+        self.metric = metric
+
+    @property
+    def largest(self) -> bool:
+        """Whether higher scores are better."""
+        return self.metric == 'ip'
+
+    @property
+    def is_trained(self) -> bool:
+        return True
+
+    def train(self, vectors: np.ndarray):
+        """Trains the index on representative vectors. Indices which do not need training ignore this call."""
+        pass
+
+    def add(self, vectors: np.ndarray, ids: Optional[np.ndarray] = None):
+        """Adds vectors to the index.
+
+        Args:
+            vectors: array of shape ``[num_vectors, dim]``.
+            ids: int64 ids of the vectors. Defaults to the positions of the vectors in the index.
+        """
+        vectors = self._check_vectors(vectors)
+        if ids is None:
+            ids = np.arange(len(self), len(self) + len(vectors), dtype=np.int64)
+        else:
+            ids = np.asarray(ids, dtype=np.int64)
+            if ids.shape != (len(vectors),):
+                raise ValueError(f"Expected {len(vectors)} ids, got an array of shape {ids.shape}")
+        if not self.is_trained:
+            raise RuntimeError(f"{type(self).__name__} must be trained before adding vectors")
+        if len(vectors) > 0:
+            self._add(vectors, ids)
+
+    def search(self, queries: np.ndarray, k: int, batch_size: int = 1024) -> Tuple[np.ndarray, np.ndarray]:
+        """Finds the ``k`` nearest neighbours of every query.
+
+        Args:
+            queries: array of shape ``[num_queries, dim]``.
+            k: number of neighbours.
+            batch_size: number of queries searched at once.
+
+        Returns:
+            float32 scores and int64 ids of shape ``[num_queries, k]``, sorted from the best to the worst neighbour.
+        """
+        queries = self._check_vectors(queries)
+        scores = np.empty((len(queries), k), dtype=np.float32)
+        ids = np.empty((len(queries), k), dtype=np.int64)
+        for start in range(0, len(queries), batch_size):
+            end = start + batch_size
+            scores[start:end], ids[start:end] = self._search(queries[start:end], k)
+        return scores, ids
+
+    def save(self, path: str):
+        """Saves the index to the directory ``path``."""
+        os.makedirs(path, exist_ok=True)
+        self._save(path)
+        config = {'backend': self.backend, 'dim': self.dim, 'metric': self.metric, **self._get_config()}
+        with open(os.path.join(path, INDEX_CONFIG_FILE), 'w') as f:
+            json.dump(config, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'RetrievalIndex':
+        """Loads an index saved with ``save``. With ``mmap``, the vectors are memory-mapped instead of read."""
+        with open(os.path.join(path, INDEX_CONFIG_FILE)) as f:
+            config = json.load(f)
+        backend = config.pop('backend')
+        if cls is not RetrievalIndex and backend != cls.backend:
+            raise ValueError(f"{path} contains a '{backend}' index, not a '{cls.backend}' index")
+        index = RETRIEVAL_INDEX_BACKENDS[backend](**config)
+        index._load(path, mmap)
+        return index
+
+    def _check_vectors(self, vectors: np.ndarray) -> np.ndarray:
+        if isinstance(vectors, torch.Tensor):
+            vectors = vectors.detach().float().cpu().numpy()
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of shape [N, {self.dim}], got {vectors.shape}")
+        return vectors
+
+    def _empty_results(self, num_queries: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        fill = -np.inf if self.largest else np.inf
+        return np.full((num_queries, k), fill, dtype=np.float32), np.full((num_queries, k), -1, dtype=np.int64)
+
+    def _get_config(self) -> Dict:
+        return {}
+
+    @abstractmethod
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _add(self, vectors: np.ndarray, ids: np.ndarray):
+        raise NotImplementedError
+
+    @abstractmethod
+    def _search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def _save(self, path: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def _load(self, path: str, mmap: bool):
+        raise NotImplementedError
+
+
+class ExactRetrievalIndex(RetrievalIndex):
+    """Exact search which scores the queries against blocks of ``block_size`` vectors with a matrix product.
+
+    Args:
+        dim: dimension of the vectors.
+        metric: ``ip`` or ``l2``.
+        block_size: number of indexed vectors scored at once, which bounds the memory used by a search.
+        device: device the scores are computed on. Defaults to CUDA when available.
+    """
+
+    backend = 'exact'
+
+    def __init__(self, dim: int, metric: str = 'ip', block_size: int = 65536, device: Optional[str] = None):
+        super().__init__(dim, metric)
+        self.block_size = block_size
+        self.device = torch.device(device if device is not None else 'cuda' if torch.cuda.is_available() else 'cpu')
+        self._segments = _VectorSegments(dim)
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    def _add(self, vectors: np.ndarray, ids: np.ndarray):
+        self._segments.add(vectors, ids)
+
+    @torch.no_grad()
+    def _search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        fill = -np.inf if self.largest else np.inf
+        queries = torch.from_numpy(queries).to(self.device)
+        best_scores = torch.full((len(queries), k), fill, device=self.device)
+        best_ids = torch.full((len(queries), k), -1, dtype=torch.int64, device=self.device)
+        for vectors, ids in self._segments.blocks(self.block_size):
+            vectors = torch.from_numpy(_writable(vectors)).to(self.device, non_blocking=True)
+            scores = queries @ vectors.T
+            if self.metric == 'l2':
+                scores = (queries * queries).sum(1, keepdim=True) - 2 * scores + (vectors * vectors).sum(1)
+            ids = torch.from_numpy(_writable(ids)).to(self.device).expand(len(queries), -1)
+            scores = torch.cat([best_scores, scores], dim=1)
+            ids = torch.cat([best_ids, ids], dim=1)
+            best_scores, top = scores.topk(min(k, scores.shape[1]), dim=1, largest=self.largest)
+            best_ids = ids.gather(1, top)
+        return best_scores.cpu().numpy(), best_ids.cpu().numpy()
+
+    def _get_config(self) -> Dict:
+        return {'block_size': self.block_size}
+
+    def _save(self, path: str):
+        self._segments.save(path)
+
+    def _load(self, path: str, mmap: bool):
+        self._segments.load(path, mmap)
+
+
+class NumpyIVFRetrievalIndex(RetrievalIndex):
+    """Inverted file index implemented with NumPy, a fallback for :class:`FaissRetrievalIndex`.
+
+    ``train`` clusters the vectors into ``nlist`` lists with k-means. A search only scores the vectors of the
+    ``nprobe`` lists whose centroids are the closest to the query.
+
+    Args:
+        dim: dimension of the vectors.
+        metric: ``ip`` or ``l2``. It is also used to assign the vectors to the lists.
+        nlist: number of lists.
+        nprobe: number of lists searched for every query.
+        num_iterations: number of k-means iterations.
+        max_training_points_per_list: the training vectors are subsampled to at most this many vectors per list.
+        seed: seed of the k-means initialization and subsampling.
+    """
+
+    backend = 'numpy'
+
+    def __init__(
+        self,
+        dim: int,
+        metric: str = 'ip',
+        nlist: int = 256,
+        nprobe: int = 16,
+        num_iterations: int = 20,
+        max_training_points_per_list: int = 256,
+        seed: int = 0,
+    ):
+        super().__init__(dim, metric)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.num_iterations = num_iterations
+        self.max_training_points_per_list = max_training_points_per_list
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self._segments = _VectorSegments(dim)
+        # list assignments of every segment and, for every segment, the positions of its vectors sorted by list
+        self._assignments: List[np.ndarray] = []
+        self._inverted_lists: List[Tuple[np.ndarray, np.ndarray]] = []
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def train(self, vectors: np.ndarray):
+        vectors = self._check_vectors(vectors)
+        if len(vectors) < self.nlist:
+            raise ValueError(f"At least nlist={self.nlist} vectors are needed for training, got {len(vectors)}")
+        rng = np.random.default_rng(self.seed)
+        max_points = self.nlist * self.max_training_points_per_list
+        if len(vectors) > max_points:
+            vectors = vectors[np.sort(rng.choice(len(vectors), max_points, replace=False))]
+        centroids = vectors[rng.choice(len(vectors), self.nlist, replace=False)].copy()
+        for _ in range(self.num_iterations):
+            assignments = self._nearest_centroids(vectors, centroids, 1)[:, 0]
+            counts = np.bincount(assignments, minlength=self.nlist)
+            empty = counts == 0
+            starts = (np.cumsum(counts) - counts)[~empty]
+            sums = np.add.reduceat(vectors[np.argsort(assignments, kind='stable')], starts, axis=0)
+            centroids[~empty] = sums / counts[~empty, None]
+            # empty lists are restarted from random training vectors
+            centroids[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        self.centroids = centroids
+
+    def _nearest_centroids(self, vectors: np.ndarray, centroids: np.ndarray, n: int) -> np.ndarray:
+        scores = vectors @ centroids.T
+        if self.metric == 'l2':
+            scores = 2 * scores - (centroids * centroids).sum(1)
+        if n == 1:
+            return scores.argmax(axis=1)[:, None]
+        if n >= scores.shape[1]:
+            return np.argsort(-scores, axis=1)
+        return np.argpartition(-scores, n - 1, axis=1)[:, :n]
+
+    def _add(self, vectors: np.ndarray, ids: np.ndarray):
+        self._segments.add(vectors, ids)
+        self._add_assignments(self._nearest_centroids(vectors, self.centroids, 1)[:, 0].astype(np.int32))
+
+    def _add_assignments(self, assignments: np.ndarray):
+        self._assignments.append(assignments)
+        order = np.argsort(assignments, kind='stable')
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=self.nlist))])
+        self._inverted_lists.append((order, offsets))
+
+    def _search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        best_scores, best_ids = self._empty_results(len(queries), k)
+        if len(self) == 0:
+            return best_scores, best_ids
+        probes = self._nearest_centroids(queries, self.centroids, min(self.nprobe, self.nlist))
+        query_norms = (queries * queries).sum(1) if self.metric == 'l2' else None
+        for list_idx in np.unique(probes):
+            query_idx = np.nonzero((probes == list_idx).any(axis=1))[0]
+            list_queries = queries[query_idx]
+            for vectors, ids, (order, offsets) in zip(
+                self._segments.vectors, self._segments.ids, self._inverted_lists
+            ):
+                members = order[offsets[list_idx] : offsets[list_idx + 1]]
+                if len(members) == 0:
+                    continue
+                # sorted positions keep the reads from memory-mapped vectors sequential
+                members = np.sort(members)
+                list_vectors = vectors[members]
+                scores = list_queries @ list_vectors.T
+                if self.metric == 'l2':
+                    scores = query_norms[query_idx, None] - 2 * scores + (list_vectors * list_vectors).sum(1)
+                best_scores[query_idx], best_ids[query_idx] = _merge_top_k(
+                    best_scores[query_idx], best_ids[query_idx], scores, ids[members], k, self.largest
+                )
+        return best_scores, best_ids
+
+    def _get_config(self) -> Dict:
+        return {
+            'nlist': self.nlist,
+            'nprobe': self.nprobe,
+            'num_iterations': self.num_iterations,
+            'max_training_points_per_list': self.max_training_points_per_list,
+            'seed': self.seed,
+        }
+
+    def _save(self, path: str):
+        if not self.is_trained:
+            raise RuntimeError("Cannot save an untrained index")
+        self._segments.save(path)
+        np.save(os.path.join(path, 'centroids.npy'), self.centroids)
+        assignments = self._assignments[0] if len(self._assignments) == 1 else np.concatenate(self._assignments)
+        np.save(os.path.join(path, 'assignments.npy'), assignments.astype(np.int32))
+
+    def _load(self, path: str, mmap: bool):
+        self._segments.load(path, mmap)
+        self.centroids = np.load(os.path.join(path, 'centroids.npy'))
+        self._assignments, self._inverted_lists = [], []
+        if len(self._segments) > 0:
+            self._add_assignments(np.load(os.path.join(path, 'assignments.npy')))
+
+
+class FaissRetrievalIndex(RetrievalIndex):
+    """Index built with ``faiss.index_factory``, e.g. ``IVF1024,Flat`` or ``IVF1024,PQ32`` for IVF/PQ search.
+
+    Args:
+        dim: dimension of the vectors.
+        metric: ``ip`` or ``l2``.
+        factory_string: faiss index description.
+        nprobe: number of lists searched for every query by IVF indices.
+    """
+
+    backend = 'faiss'
+
+    def __init__(self, dim: int, metric: str = 'ip', factory_string: str = 'IVF256,Flat', nprobe: int = 16):
+        if not HAVE_FAISS:
+            raise ImportError("faiss is not installed. Please install faiss-cpu or use the 'numpy' backend.")
+        super().__init__(dim, metric)
+        self.factory_string = factory_string
+        self.nprobe = nprobe
+        metric_type = faiss.METRIC_INNER_PRODUCT if metric == 'ip' else faiss.METRIC_L2
+        self.index = faiss.index_factory(dim, factory_string, metric_type)
+        self._set_nprobe()
+        self._ids: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return self.index.ntotal
+
+    @property
+    def is_trained(self) -> bool:
+        return self.index.is_trained
+
+    def train(self, vectors: np.ndarray):
+        self.index.train(self._check_vectors(vectors))
+
+    def _set_nprobe(self):
+        try:
+            faiss.extract_index_ivf(self.index).nprobe = self.nprobe
+        except RuntimeError:
+            # not an IVF index
+            pass
+
+    def _add(self, vectors: np.ndarray, ids: np.ndarray):
+        self.index.add(vectors)
+        self._ids.append(ids)
+
+    def _search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        scores, positions = self.index.search(queries, k)
+        if len(self._ids) > 1:
+            self._ids = [np.concatenate(self._ids)]
+        if len(self._ids) == 0:
+            return self._empty_results(len(queries), k)
+        ids = np.where(positions >= 0, self._ids[0][np.maximum(positions, 0)], -1)
+        return scores.astype(np.float32), ids
+
+    def _get_config(self) -> Dict:
+        return {'factory_string': self.factory_string, 'nprobe': self.nprobe}
+
+    def _save(self, path: str):
+        faiss.write_index(self.index, os.path.join(path, 'faiss.index'))
+        ids = np.concatenate(self._ids) if self._ids else np.empty(0, dtype=np.int64)
+        np.save(os.path.join(path, IDS_FILE), ids)
+
+    def _load(self, path: str, mmap: bool):
+        self.index = faiss.read_index(os.path.join(path, 'faiss.index'), faiss.IO_FLAG_MMAP if mmap else 0)
+        self._set_nprobe()
+        ids = np.load(os.path.join(path, IDS_FILE))
+        self._ids = [ids] if len(ids) > 0 else []
+
+
+RETRIEVAL_INDEX_BACKENDS: Dict[str, Type[RetrievalIndex]] = {
+    ExactRetrievalIndex.backend: ExactRetrievalIndex,
+    FaissRetrievalIndex.backend: FaissRetrievalIndex,
+    NumpyIVFRetrievalIndex.backend: NumpyIVFRetrievalIndex,
+}
+
+
+def build_retrieval_index(
+    backend: str,
+    dim: int,
+    metric: str = 'ip',
+    nlist: int = 256,
+    nprobe: int = 16,
+    factory_string: Optional[str] = None,
+    **kwargs,
+) -> RetrievalIndex:
+    """Creates an empty index.
+
+    Args:
+        backend: ``exact``, ``faiss`` or ``numpy``. ``faiss`` falls back to ``numpy`` when faiss is not installed.
+        dim: dimension of the vectors.
+        metric: ``ip`` or ``l2``.
+        nlist: number of lists of IVF indices.
+        nprobe: number of lists searched for every query by IVF indices.
+        factory_string: faiss index description. Defaults to ``IVF{nlist},Flat``.
+        kwargs: other arguments of the backend.
+    """
+    if backend == 'faiss' and not HAVE_FAISS:
+        logging.warning("faiss is not installed, falling back to the 'numpy' IVF index")
+        if factory_string is not None and factory_string != f'IVF{nlist},Flat':
+            logging.warning(f"The numpy backend only supports IVF-Flat indices, ignoring '{factory_string}'")
+        backend = 'numpy'
+    if backend == 'exact':
+        return ExactRetrievalIndex(dim, metric, **kwargs)
+    if backend == 'faiss':
+        factory_string = factory_string if factory_string is not None else f'IVF{nlist},Flat'
+        return FaissRetrievalIndex(dim, metric, factory_string=factory_string, nprobe=nprobe, **kwargs)
+    if backend == 'numpy':
+        return NumpyIVFRetrievalIndex(dim, metric, nlist=nlist, nprobe=nprobe, **kwargs)
+    raise ValueError(f"Unknown retrieval index backend '{backend}', expected one of {list(RETRIEVAL_INDEX_BACKENDS)}")
+
+
+def load_retrieval_index(path: str, mmap: bool = True) -> RetrievalIndex:
+    """Loads an index of any backend saved with ``RetrievalIndex.save``."""
+    return RetrievalIndex.load(path, mmap=mmap)
+
+
+def build_index_from_embeddings(
+    embeddings: np.ndarray,
+    backend: str = 'exact',
+    metric: str = 'ip',
+    ids: Optional[np.ndarray] = None,
+    add_batch_size: int = 65536,
+    **kwargs,
+) -> RetrievalIndex:
+    """Builds an index of ``backend`` (see :func:`build_retrieval_index`), trains it and adds ``embeddings``."""
+    index = build_retrieval_index(backend, embeddings.shape[1], metric, **kwargs)
+    index.train(embeddings)
+    for start in range(0, len(embeddings), add_batch_size):
+        end = start + add_batch_size
+        index.add(embeddings[start:end], None if ids is None else ids[start:end])
+    return index
+
+
+def search_embedding_files(
+    query_dir: str, doc_dir: str, k: int, output_file: Optional[str] = None, batch_size: int = 1024
+) -> List[Dict]:
+    """Retrieves the ``k`` nearest documents of every query written by the information retrieval embedding models.
+
+    Queries are read from ``query.npy``/``query.ids`` in ``query_dir`` and searched with the index saved in
+    ``doc_dir/doc_index``. An exact index of ``doc_dir/doc.npy`` is used when no index was saved.
+
+    Returns:
+        A list with a ``{"query_id", "doc_ids", "scores"}`` dictionary per query, which is also written as JSON lines
+        to ``output_file`` when it is given.
+    """
+    queries = np.load(os.path.join(query_dir, 'query.npy'))
+    with open(os.path.join(query_dir, 'query.ids')) as f:
+        query_ids = [line.rstrip('\n') for line in f]
+    with open(os.path.join(doc_dir, 'doc.ids')) as f:
+        doc_ids = [line.rstrip('\n') for line in f]
+
+    index_path = os.path.join(doc_dir, 'doc_index')
+    if os.path.isdir(index_path):
+        index = load_retrieval_index(index_path)
+    else:
+        index = build_index_from_embeddings(np.load(os.path.join(doc_dir, 'doc.npy')))
+    scores, neighbors = index.search(queries.astype(np.float32), k, batch_size=batch_size)
+
+    results = []
+    for query_id, query_scores, query_neighbors in zip(query_ids, scores, neighbors):
+        # ids of the index are the positions of the documents in doc.ids
+        found = query_neighbors >= 0
+        results.append(
+            {
+                'query_id': query_id,
+                'doc_ids': [doc_ids[idx] for idx in query_neighbors[found]],
+                'scores': query_scores[found].tolist(),
+            }
+        )
+    if output_file is not None:
+        with open(output_file, 'w') as f:
+            for result in results:
+                f.write(json.dumps(result) + '\n')
+    return results
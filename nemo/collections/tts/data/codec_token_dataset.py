@@ -0,0 +1,101 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import torch
+
+from nemo.collections.asr.parts.preprocessing.feature_store import (
+    FeatureStore,
+    FeatureStoreShardSampler,
+    get_feature_store_key,
+)
+from nemo.collections.asr.parts.utils.manifest_utils import read_manifest
+from nemo.collections.tts.parts.utils.codec_tokenization import CODEC_TOKENS_METADATA
+from nemo.collections.tts.parts.utils.tts_dataset_utils import stack_tensors
+from nemo.core.classes import Dataset
+from nemo.utils import logging
+
+
+class AudioCodecTokenDataset(Dataset):
+    """
+    Dataset of audio codec tokens written by
+    `nemo.collections.tts.parts.utils.codec_tokenization.tokenize_manifest_to_store`.
+
+    The tokens are read from the memory mapped shards of the store, and the durations are computed from the index
+    of the store, so filtering by duration does not read any tokens. Use `get_sampler` to read the store shard by
+    shard.
+
+    Args:
+        store_dir: directory of the codec token store.
+        manifest_path: optional manifest, only the entries of the manifest are used. Uses all tokens of the store
+            if not provided.
+        min_duration: optional minimum duration of the audio in seconds.
+        max_duration: optional maximum duration of the audio in seconds.
+    """
+
+    def __init__(
+        self,
+        store_dir: Path,
+        manifest_path: Optional[Path] = None,
+        min_duration: Optional[float] = None,
+        max_duration: Optional[float] = None,
+    ):
+        super().__init__()
+        self.store = FeatureStore(str(store_dir))
+        with open(os.path.join(store_dir, CODEC_TOKENS_METADATA)) as f:
+            self.metadata = json.load(f)
+        self.frame_rate = self.metadata['frame_rate']
+
+        if manifest_path is None:
+            indices = np.arange(len(self.store))
+        else:
+            keys = [get_feature_store_key(entry['audio_filepath']) for entry in read_manifest(manifest_path)]
+            missing = [key for key in keys if key not in self.store]
+            if missing:
+                logging.warning(f'{len(missing)} entries of {manifest_path} are not in the store, e.g. {missing[0]}')
+            indices = np.array([self.store._key_to_index[key] for key in keys if key in self.store], dtype=np.int64)
+
+        durations = self.store.shapes[indices, 1] / self.frame_rate
+        keep = np.ones(len(indices), dtype=bool)
+        if min_duration is not None:
+            keep &= durations >= min_duration
+        if max_duration is not None:
+            keep &= durations <= max_duration
+        logging.info(f'Kept {keep.sum()} of {len(indices)} examples ({durations[keep].sum() / 3600:.2f} hours)')
+        self.indices = indices[keep]
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, index):
+        store_index = self.indices[index]
+        tokens = torch.from_numpy(self.store.get_by_index(store_index).astype(np.int64))
+        return {"key": str(self.store.keys[store_index]), "tokens": tokens, "tokens_len": tokens.shape[1]}
+
+    def get_sampler(self, shuffle: bool = True, seed: int = 0, rank: int = 0, world_size: int = 1):
+        """Sampler reading the store shard by shard, see `FeatureStoreShardSampler`."""
+        # the examples are indexed by store index instead of feature file
+        return FeatureStoreShardSampler.from_shards(
+            self.store.shards[self.indices].tolist(), shuffle=shuffle, seed=seed, rank=rank, world_size=world_size
+        )
+
+    def collate_fn(self, batch: List[dict]):
+        tokens_len = torch.IntTensor([example["tokens_len"] for example in batch])
+        tokens = stack_tensors([example["tokens"] for example in batch], max_lens=[int(tokens_len.max().item())])
+        return {"keys": [example["key"] for example in batch], "tokens": tokens, "tokens_lens": tokens_len}
@@ -34,6 +34,7 @@ from nemo.collections.common.tokenizers.text_to_speech.tts_tokenizers import (
     EnglishCharsTokenizer,
     EnglishPhonemesTokenizer,
 )
+from nemo.collections.tts.parts.preprocessing.text_token_store import TextTokenStore
 from nemo.collections.tts.parts.utils.tts_dataset_utils import (
     BetaBinomialInterpolator,
     beta_binomial_prior_distribution,
@@ -109,6 +110,7 @@ class TTSDataset(Dataset):
         pitch_augment: bool = False,
         cache_pitch_augment: bool = True,
         pad_multiple: int = 1,
+        text_token_store_dir: Optional[Union[Path, str]] = None,
         **kwargs,
     ):
         """Dataset which can be used for training spectrogram generators and end-to-end TTS models.
@@ -157,6 +159,9 @@ class TTSDataset(Dataset):
             n_mels (int): The number of mel filters. Defaults to 80.
             lowfreq (int): The lowfreq input to the mel filter calculation. Defaults to 0.
             highfreq (Optional[int]): The highfreq input to the mel filter calculation. Defaults to None.
+            text_token_store_dir (Optional[Union[Path, str]]): Directory of text token stores created with
+                scripts/dataset_processing/tts/compute_text_tokens.py. Texts which are in the store of text_tokenizer
+                are read from the store instead of being tokenized. Defaults to None which tokenizes all texts.
         Keyword Args:
             log_mel_folder (Optional[Union[Path, str]]): The folder that contains or will contain log mel spectrograms.
             pitch_folder (Optional[Union[Path, str]]): The folder that contains or will contain pitch.
@@ -197,6 +202,9 @@ class TTSDataset(Dataset):
 
             self.text_tokenizer_pad_id = text_tokenizer_pad_id
         self.cache_text = True if self.phoneme_probability is None else False
+        self.text_token_store = None
+        if isinstance(self.text_tokenizer, BaseTokenizer):
+            self.text_token_store = TextTokenStore.from_dir(text_token_store_dir, self.text_tokenizer)
 
         # Initialize text normalizer if specified
         self.text_normalizer = text_normalizer
@@ -249,7 +257,10 @@ class TTSDataset(Dataset):
                             text = self.text_normalizer_call(text, **self.text_normalizer_call_kwargs)
                         file_info["normalized_text"] = text
 
-                    if self.cache_text:
+                    # texts in the text token store are read in __getitem__
+                    if self.cache_text and (
+                        self.text_token_store is None or file_info["normalized_text"] not in self.text_token_store
+                    ):
                         file_info["text_tokens"] = self.text_tokenizer(file_info["normalized_text"])
 
                     data.append(file_info)
@@ -596,7 +607,11 @@ class TTSDataset(Dataset):
             text = torch.tensor(sample["text_tokens"]).long()
             text_length = torch.tensor(len(text)).long()
         else:
-            tokenized = self.text_tokenizer(sample["normalized_text"])
+            tokenized = None
+            if self.text_token_store is not None:
+                tokenized = self.text_token_store.get(sample["normalized_text"])
+            if tokenized is None:
+                tokenized = self.text_tokenizer(sample["normalized_text"])
             text = torch.tensor(tokenized).long()
             text_length = torch.tensor(len(tokenized)).long()
 
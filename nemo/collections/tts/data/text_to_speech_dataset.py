@@ -24,6 +24,7 @@ from nemo.collections.asr.parts.utils.manifest_utils import read_manifest
 from nemo.collections.common.tokenizers.text_to_speech.tts_tokenizers import BaseTokenizer
 from nemo.collections.tts.parts.preprocessing.feature_processors import FeatureProcessor
 from nemo.collections.tts.parts.preprocessing.features import Featurizer
+from nemo.collections.tts.parts.preprocessing.text_token_store import TextTokenStore
 from nemo.collections.tts.parts.utils.tts_dataset_utils import (
     beta_binomial_prior_distribution,
     filter_dataset_by_duration,
@@ -80,6 +81,9 @@ class TextToSpeechDataset(Dataset):
         max_duration: Optional float, if provided audio files in the training manifest longer than 'max_duration'
             will be ignored.
         volume_norm: Whether to apply volume normalization to loaded audio.
+        text_token_store_dir: Optional, directory of text token stores created with
+            scripts.dataset_processing.tts.compute_text_tokens.py. Texts which are in the store of the text tokenizer
+            are not tokenized again.
     """
 
     def __init__(
@@ -95,11 +99,13 @@ class TextToSpeechDataset(Dataset):
         min_duration: Optional[float] = None,
         max_duration: Optional[float] = None,
         volume_norm: bool = True,
+        text_token_store_dir: Optional[Path] = None,
     ):
         super().__init__()
 
         self.sample_rate = sample_rate
         self.text_tokenizer = text_tokenizer
+        self.text_token_store = TextTokenStore.from_dir(text_token_store_dir, text_tokenizer)
         self.weighted_sampling_steps_per_epoch = weighted_sampling_steps_per_epoch
         self.align_prior_hop_length = align_prior_hop_length
         self.include_align_prior = self.align_prior_hop_length is not None
@@ -215,7 +221,9 @@ class TextToSpeechDataset(Dataset):
         audio = torch.tensor(audio_array, dtype=torch.float32)
         audio_len = audio.shape[0]
 
-        tokens = self.text_tokenizer(data.text)
+        tokens = self.text_token_store.get(data.text) if self.text_token_store is not None else None
+        if tokens is None:
+            tokens = self.text_tokenizer(data.text)
         tokens = torch.tensor(tokens, dtype=torch.int32)
         text_len = tokens.shape[0]
 
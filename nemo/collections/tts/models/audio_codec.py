@@ -289,6 +289,51 @@ class AudioCodecModel(ModelPT):
         tokens = self.quantize(encoded=encoded, encoded_len=encoded_len)
         return tokens, encoded_len
 
+    @torch.no_grad()
+    def encode_in_chunks(
+        self, audio: torch.Tensor, audio_len: torch.Tensor, chunk_frames: int, context_frames: int = 0
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Convert long audio into tokens by encoding chunks of `chunk_frames` frames. Every chunk is encoded with
+        `context_frames` frames of audio on both sides, and the tokens of the context are dropped. If the context
+        covers the receptive field of the encoder, the tokens are the same as the tokens of `encode`, while the
+        memory does not depend on the length of the audio. Examples which are shorter than a chunk are not
+        encoded again for the following chunks.
+
+        Args:
+            audio: input time-domain signal, shape `(batch, number of samples)`
+            audio_len: valid length for each example in the batch, shape `(batch size,)`
+            chunk_frames: number of frames of tokens of each chunk
+            context_frames: number of frames of audio context on each side of a chunk
+
+        Returns:
+            Tokens for each codebook for each frame, shape `(batch, number of codebooks, number of frames)`,
+            and the corresponding valid lengths, shape `(batch,)`
+        """
+        tokens_len = torch.ceil(audio_len / self.samples_per_frame).long()
+        max_frames = int(tokens_len.max().item())
+        audio = F.pad(audio, (0, max_frames * self.samples_per_frame - audio.shape[1]))
+
+        tokens = None
+        for start in range(0, max_frames, chunk_frames):
+            end = min(start + chunk_frames, max_frames)
+            ctx_start = max(start - context_frames, 0)
+            ctx_end = min(end + context_frames, max_frames)
+            # only the examples with audio in the chunk are encoded
+            active = torch.nonzero(tokens_len > start).squeeze(1)
+            chunk_len = audio_len[active] - ctx_start * self.samples_per_frame
+            chunk_len = chunk_len.clamp(max=(ctx_end - ctx_start) * self.samples_per_frame)
+            chunk = audio[active, ctx_start * self.samples_per_frame : ctx_end * self.samples_per_frame]
+
+            chunk_tokens, _ = self.encode(audio=chunk, audio_len=chunk_len)
+            if tokens is None:
+                tokens = chunk_tokens.new_zeros(audio.shape[0], chunk_tokens.shape[1], max_frames)
+            tokens[active, :, start:end] = chunk_tokens[:, :, start - ctx_start : end - ctx_start]
+
+        # frames after the end of each example are zero, as for `encode`
+        tokens_mask = torch.arange(max_frames, device=tokens.device)[None, :] < tokens_len[:, None]
+        tokens = tokens * tokens_mask[:, None, :]
+        return tokens, tokens_len.to(audio_len.dtype)
+
     @typecheck(
         input_types={
             "tokens": NeuralType(('B', 'C', 'T_encoded'), TokenIndex()),
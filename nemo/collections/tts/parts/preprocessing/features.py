@@ -24,6 +24,7 @@ import torch
 from torch import Tensor
 
 from nemo.collections.asr.modules import AudioToMelSpectrogramPreprocessor
+from nemo.collections.asr.parts.preprocessing.feature_store import INDEX_SUFFIX, FeatureStore
 from nemo.collections.tts.parts.utils.tts_dataset_utils import get_audio_filepaths, normalize_volume, stack_tensors
 from nemo.utils.decorators import experimental
 
@@ -77,6 +78,47 @@ def _get_feature_filepath(
     return feature_filepath
 
 
+def get_entry_feature_store_key(manifest_entry: Dict[str, Any], audio_dir: Path) -> str:
+    """
+    Key of the features of a manifest entry in a feature store, the relative path of its audio without suffix.
+
+    Example: audio_filepath "<audio_dir>/speaker1/audio1.wav" has the key "speaker1/audio1"
+    """
+    _, audio_filepath_rel = get_audio_filepaths(manifest_entry=manifest_entry, audio_dir=audio_dir)
+    return audio_filepath_rel.with_suffix("").as_posix()
+
+
+# Feature stores opened in this process, by feature directory. None if the features are saved as .npy files.
+_FEATURE_STORES: Dict[Path, Optional[FeatureStore]] = {}
+
+
+def _get_feature_store(feature_dir: Path, feature_name: str) -> Optional[FeatureStore]:
+    """
+    Feature store of a feature, if its features were written to a feature store in "<feature_dir>/<feature_name>"
+    instead of .npy files, see `nemo.collections.tts.parts.preprocessing.pitch_extraction`.
+    """
+    store_dir = Path(feature_dir) / feature_name
+    if store_dir not in _FEATURE_STORES:
+        has_index = any(store_dir.glob("*" + INDEX_SUFFIX))
+        _FEATURE_STORES[store_dir] = FeatureStore(str(store_dir)) if has_index else None
+    return _FEATURE_STORES[store_dir]
+
+
+def clear_feature_store_cache(store_dirs: Optional[List[Path]] = None) -> None:
+    """
+    Forgets the feature stores opened in this process, so that the featurizers look up the stores again.
+    Must be called after feature stores are written or removed, see `write_pitch_energy_feature_stores`.
+
+    Args:
+        store_dirs: directories "<feature_dir>/<feature_name>" of the stores to forget, all stores if None.
+    """
+    if store_dirs is None:
+        _FEATURE_STORES.clear()
+        return
+    for store_dir in store_dirs:
+        _FEATURE_STORES.pop(Path(store_dir), None)
+
+
 def _features_exists(
     feature_names: List[Optional[str]], manifest_entry: Dict[str, Any], audio_dir: Path, feature_dir: Path,
 ) -> bool:
@@ -120,11 +162,21 @@ def _load_feature(
     indices: Optional[Tuple[int, int]] = None,
 ) -> None:
     """
-    If feature_name is provided, load feature into feature_dict from .npy file.
+    If feature_name is provided, load feature into feature_dict from .npy file or feature store.
     """
     if feature_name is None:
         return
 
+    feature_store = _get_feature_store(feature_dir=feature_dir, feature_name=feature_name)
+    if feature_store is not None:
+        # features are stored with shape [1, T]
+        key = get_entry_feature_store_key(manifest_entry=manifest_entry, audio_dir=audio_dir)
+        feature_array = feature_store[key][0]
+        if indices:
+            feature_array = feature_array[indices[0] : indices[1]]
+        feature_dict[feature_name] = torch.from_numpy(np.copy(feature_array))
+        return
+
     feature_filepath = _get_feature_filepath(
         manifest_entry=manifest_entry, audio_dir=audio_dir, feature_dir=feature_dir, feature_name=feature_name
     )
@@ -0,0 +1,585 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Batched pitch and energy extraction for TTS data preparation.
+
+`BatchedPYIN` is a tensor implementation of the probabilistic YIN algorithm of `librosa.pyin`. Frames of many
+utterances are processed together: the difference functions are computed with batched FFTs, the threshold
+distribution of the pitch candidates is evaluated for all frames at once, and the Viterbi decoding runs over all
+utterances of a batch, using that a pitch bin can only be reached from the bins within the maximum transition rate.
+
+`write_pitch_energy_feature_stores` computes the pitch features of `PitchFeaturizer` and the energy of
+`EnergyFeaturizer` for a manifest, loading and resampling every audio file once, and writes them to feature stores,
+see `nemo.collections.asr.parts.preprocessing.feature_store`, instead of one .npy file per feature and utterance.
+"""
+
+import glob
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import librosa
+import numpy as np
+import scipy.stats
+import torch
+from joblib import Parallel, delayed
+from tqdm import tqdm
+
+from nemo.collections.asr.parts.preprocessing.feature_store import INDEX_SUFFIX, FeatureStore, FeatureStoreWriter
+from nemo.collections.tts.parts.preprocessing.features import (
+    EnergyFeaturizer,
+    PitchFeaturizer,
+    clear_feature_store_cache,
+    get_entry_feature_store_key,
+)
+from nemo.collections.tts.parts.utils.tts_dataset_utils import get_audio_filepaths, normalize_volume
+
+__all__ = ['BatchedPYIN', 'compute_pitch_batch', 'write_pitch_energy_feature_stores']
+
+
+class BatchedPYIN:
+    """
+    Probabilistic YIN pitch estimation of a batch of utterances, with the parameters and outputs of `librosa.pyin`
+    (with `center=True`, `pad_mode='constant'` and `fill_na=0.0`).
+
+    The outputs match `librosa.pyin` up to floating point differences, which can change the decoded pitch bin of
+    single frames whose pitch candidates have almost equal probabilities.
+
+    Args:
+        sample_rate: sample rate of the audio.
+        frame_length: length of the frames in samples.
+        hop_length: number of samples between frames.
+        fmin: minimum frequency in Hz.
+        fmax: maximum frequency in Hz.
+        n_thresholds: number of thresholds for peak estimation.
+        beta_parameters: shape parameters of the beta distribution prior over the thresholds.
+        boltzmann_parameter: shape parameter of the Boltzmann distribution prior over the troughs.
+        resolution: resolution of the pitch bins in semitones.
+        max_transition_rate: maximum pitch transition rate in octaves per second.
+        switch_prob: probability of switching from voiced to unvoiced or vice versa.
+        no_trough_prob: maximum probability to add to the global minimum if no trough is below the threshold.
+        frames_per_step: number of frames of a batch processed together, the memory of the trough probabilities
+            grows with this number times the number of periods and thresholds.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = 22050,
+        frame_length: int = 2048,
+        hop_length: Optional[int] = None,
+        fmin: float = librosa.note_to_hz('C2'),
+        fmax: float = librosa.note_to_hz('C7'),
+        n_thresholds: int = 100,
+        beta_parameters: Tuple[float, float] = (2, 18),
+        boltzmann_parameter: float = 2,
+        resolution: float = 0.1,
+        max_transition_rate: float = 35.92,
+        switch_prob: float = 0.01,
+        no_trough_prob: float = 0.01,
+        frames_per_step: int = 256,
+    ):
+        if fmax > sample_rate / 2 or fmin >= fmax or fmin <= 0:
+            raise ValueError(f"Expected 0 < fmin < fmax <= sample_rate / 2, got fmin={fmin} and fmax={fmax}")
+        if sample_rate / fmin >= frame_length - 1:
+            raise ValueError(f"fmin={fmin} is too small for frame_length={frame_length}")
+        self.sample_rate = sample_rate
+        self.frame_length = frame_length
+        self.hop_length = frame_length // 4 if hop_length is None else hop_length
+        self.fmin = fmin
+        self.boltzmann_parameter = boltzmann_parameter
+        self.no_trough_prob = no_trough_prob
+        self.frames_per_step = frames_per_step
+
+        self.min_period = int(np.floor(sample_rate / fmax))
+        self.max_period = min(int(np.ceil(sample_rate / fmin)), frame_length - 1)
+
+        thresholds = np.linspace(0, 1, n_thresholds + 1)
+        beta_probs = np.diff(scipy.stats.beta.cdf(thresholds, beta_parameters[0], beta_parameters[1]))
+        self.thresholds = torch.tensor(thresholds[1:])
+        self.beta_probs = torch.tensor(beta_probs)
+        # probability added to the global minimum for the first n thresholds
+        self.no_trough_probs = no_trough_prob * torch.tensor(np.concatenate([[0.0], np.cumsum(beta_probs)]))
+
+        self.n_bins_per_semitone = int(np.ceil(1.0 / resolution))
+        self.n_pitch_bins = int(np.floor(12 * self.n_bins_per_semitone * np.log2(fmax / fmin))) + 1
+        self.freqs = torch.tensor(fmin * 2 ** (np.arange(self.n_pitch_bins) / (12 * self.n_bins_per_semitone)))
+
+        # Transition matrix of librosa.pyin, kron(t_switch, transition) for [voiced, unvoiced] x [pitch bin].
+        # A bin is only reached from the bins within the transition width, which are stored as band[v_j, v_i, j, k]
+        # for the transition from bin j - width // 2 + k of voicing v_i to bin j of voicing v_j.
+        max_semitones_per_frame = round(max_transition_rate * 12 * self.hop_length / sample_rate)
+        transition_width = max_semitones_per_frame * self.n_bins_per_semitone + 1
+        transition = librosa.sequence.transition_local(
+            self.n_pitch_bins, transition_width, window="triangle", wrap=False
+        )
+        t_switch = librosa.sequence.transition_loop(2, 1 - switch_prob)
+        epsilon = np.finfo(np.float64).tiny
+        self.half_width = transition_width // 2
+        self.width = 2 * self.half_width + 1
+        sources = np.arange(self.n_pitch_bins)[:, None] - self.half_width + np.arange(self.width)
+        in_range = (sources >= 0) & (sources < self.n_pitch_bins)
+        targets = np.arange(self.n_pitch_bins)[:, None]
+        local = np.where(in_range, transition[np.clip(sources, 0, self.n_pitch_bins - 1), targets], 0)
+        band = np.log(t_switch.T[:, :, None, None] * local + epsilon)
+        band[:, :, ~in_range] = -np.inf
+        self.log_band = torch.tensor(band)
+        # transitions outside of the band are not impossible in librosa.viterbi, but have the log probability of zero
+        self.log_epsilon = float(np.log(epsilon))
+        self.log_p_init = float(np.log(1.0 / (2 * self.n_pitch_bins) + epsilon))
+
+    def _cumulative_mean_normalized_difference(self, frames: torch.Tensor) -> torch.Tensor:
+        """[N, frame_length] frames to the [N, max_period - min_period + 1] YIN difference functions."""
+        n_fft = 2 * self.frame_length
+        spectrum = torch.fft.rfft(frames, n=n_fft)
+        acf = torch.fft.irfft(spectrum.real ** 2 + spectrum.imag ** 2, n=n_fft)[:, : self.max_period + 1]
+
+        # Difference function: d(k) = 2 * (ACF(0) - ACF(k)) - sum_{m=0}^{k-1} y(m)^2
+        energy = torch.cumsum(frames ** 2, dim=1)
+        diff = 2 * (acf[:, :1] - acf[:, 1:]) - energy[:, : self.max_period]
+        periods = torch.arange(1, self.max_period + 1, dtype=frames.dtype, device=frames.device)
+        cumulative_mean = torch.cumsum(diff, dim=1) / periods
+        numerator = diff[:, self.min_period - 1 :]
+        denominator = cumulative_mean[:, self.min_period - 1 :]
+        return numerator / (denominator + torch.finfo(frames.dtype).tiny)
+
+    @staticmethod
+    def _parabolic_shifts(yin: torch.Tensor) -> torch.Tensor:
+        """Position of the parabola optima relative to the periods, 0 if outside of [-1, 1] and at the edges."""
+        a = yin[:, 2:] + yin[:, :-2] - 2 * yin[:, 1:-1]
+        b = (yin[:, 2:] - yin[:, :-2]) / 2
+        shifts = torch.where(b.abs() >= a.abs(), torch.zeros_like(a), -b / a)
+        return torch.nn.functional.pad(shifts, (1, 1))
+
+    def _observation_probs(self, frames: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Observation probabilities of the pitch bins of [N, frame_length] frames.
+
+        Returns:
+            [N, 2 * n_pitch_bins] float64 probabilities of the voiced and unvoiced pitch bins, and the [N] voiced
+            probabilities.
+        """
+        yin = self._cumulative_mean_normalized_difference(frames)
+        shifts = self._parabolic_shifts(yin)
+        num_frames, num_periods = yin.shape
+
+        # troughs of the difference functions
+        is_trough = torch.zeros_like(yin, dtype=torch.bool)
+        is_trough[:, 1:-1] = (yin[:, 1:-1] < yin[:, :-2]) & (yin[:, 1:-1] <= yin[:, 2:])
+        is_trough[:, 0] = yin[:, 0] < yin[:, 1]
+        is_trough[:, -1] = yin[:, -1] < yin[:, -2]
+
+        # troughs in the order of their periods, the difference functions have few troughs compared to periods
+        num_troughs = is_trough.sum(dim=1)
+        max_troughs = max(int(num_troughs.max()), 1)
+        trough_index = torch.argsort((~is_trough).to(torch.uint8), dim=1, stable=True)[:, :max_troughs]
+        is_valid = torch.arange(max_troughs, device=yin.device) < num_troughs.unsqueeze(1)
+        heights = yin.gather(1, trough_index).double()
+        heights = torch.where(is_valid, heights, torch.full_like(heights, float('inf')))
+
+        # Boltzmann prior over the troughs below each threshold, smaller periods are weighted more
+        thresholds = self.thresholds.to(yin.device)
+        below = heights.unsqueeze(-1) < thresholds
+        positions = (torch.cumsum(below, dim=1) - 1).double()
+        num_below = below.sum(dim=1, keepdim=True)
+        lam = self.boltzmann_parameter
+        prior = (1 - np.exp(-lam)) * torch.exp(-lam * positions) / (1 - torch.exp(-lam * num_below))
+        prior = torch.where(below, prior, torch.zeros_like(prior))
+        trough_probs = prior @ self.beta_probs.to(yin.device)
+
+        # the global minimum gets the probability of the thresholds without a trough below them
+        global_min = heights.argmin(dim=1, keepdim=True)
+        num_below_min = (thresholds <= heights.gather(1, global_min)).sum(dim=1, keepdim=True)
+        trough_probs = trough_probs.scatter_add(1, global_min, self.no_trough_probs.to(yin.device)[num_below_min])
+        trough_probs = torch.where(is_valid, trough_probs, torch.zeros_like(trough_probs))
+        probs = torch.zeros(num_frames, num_periods, dtype=torch.float64, device=yin.device)
+        probs = probs.scatter_add(1, trough_index, trough_probs)
+
+        # librosa keeps the probabilities in the precision of the difference functions
+        probs = probs.to(yin.dtype).double()
+
+        # pitch bins of the candidates, refined by parabolic interpolation
+        is_candidate = probs > 0
+        periods = self.min_period + torch.arange(num_periods, device=yin.device) + shifts.double()
+        f0 = self.sample_rate / periods
+        bins = torch.round(12 * self.n_bins_per_semitone * torch.log2(f0 / self.fmin))
+        bins = bins.clamp(0, self.n_pitch_bins).long()
+        # candidates of the same bin overwrite each other, the one with the longest period is kept
+        dummy_bin = 2 * self.n_pitch_bins
+        bins = torch.where(is_candidate, bins, torch.full_like(bins, dummy_bin))
+        period_index = torch.arange(num_periods, device=yin.device).expand(num_frames, -1)
+        last = torch.full((num_frames, dummy_bin + 1), -1, dtype=torch.long, device=yin.device)
+        last = last.scatter_reduce(1, bins, period_index, reduce='amax')
+        is_kept = is_candidate & (period_index == last.gather(1, bins))
+        bins = torch.where(is_kept, bins, torch.full_like(bins, dummy_bin))
+
+        observation_probs = torch.zeros(num_frames, dummy_bin + 1, dtype=torch.float64, device=yin.device)
+        observation_probs.scatter_(1, bins, torch.where(is_kept, probs, torch.zeros_like(probs)))
+        voiced_prob = observation_probs[:, : self.n_pitch_bins].sum(dim=1).clamp(0, 1)
+        observation_probs[:, self.n_pitch_bins :] = ((1 - voiced_prob) / self.n_pitch_bins).unsqueeze(1)
+        return observation_probs[:, :dummy_bin], voiced_prob
+
+    def _viterbi_step(self, value: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        """
+        Best predecessors of all states.
+
+        Args:
+            value: [B, 2 * n_pitch_bins] log probabilities of the best paths to the states of the previous frame.
+
+        Returns:
+            [B, 2 * n_pitch_bins] log probabilities of the best transitions to the states, the [B, 2 * n_pitch_bins]
+            index of the predecessor within the band of voicing and bin offset, 2 * width for a transition outside of
+            the band, and the [B] state with the best value, which is the predecessor outside of the band.
+        """
+        batch_size = value.shape[0]
+        n = self.n_pitch_bins
+        padded = torch.nn.functional.pad(
+            value.view(batch_size, 2, n), (self.half_width, self.half_width), value=float('-inf')
+        )
+        # [B, v_i, j, k] value of bin j - half_width + k of voicing v_i
+        windows = padded.unfold(2, self.width, 1)
+        # [B, v_j, v_i, j, k], the first maximum over k and then v_i is the predecessor with the lowest index
+        scores = windows.unsqueeze(1) + self.log_band.to(value.device)
+        best, offset = scores.max(dim=-1)
+        best, voicing = best.max(dim=2)
+        pointer = voicing * self.width + offset.gather(2, voicing.unsqueeze(2)).squeeze(2)
+
+        best_state = value.argmax(dim=1)
+        outside = value.gather(1, best_state.unsqueeze(1)).unsqueeze(-1) + self.log_epsilon
+        is_outside = outside > best
+        best = torch.where(is_outside, outside.expand_as(best), best)
+        pointer = torch.where(is_outside, torch.full_like(pointer, 2 * self.width), pointer)
+        return best.view(batch_size, 2 * n), pointer.view(batch_size, 2 * n), best_state
+
+    def __call__(
+        self, audio: torch.Tensor, audio_len: torch.Tensor
+    ) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]:
+        """
+        Estimates the pitch of a batch of utterances.
+
+        Args:
+            audio: [B, T_audio] float tensor with the audio, padded after the end of the shorter utterances.
+            audio_len: [B] lengths of the utterances in samples.
+
+        Returns:
+            pitch: [B, T_frames] float32 pitch in Hz, 0 for unvoiced frames.
+            voiced_mask: [B, T_frames] bool tensor indicating whether each frame is voiced.
+            voiced_prob: [B, T_frames] float32 probability that each frame is voiced.
+            num_frames: [B] number of frames of the utterances.
+        """
+        batch_size = audio.shape[0]
+        device = audio.device
+        half_frame = self.frame_length // 2
+        audio_len = audio_len.to(device)
+        num_frames = 1 + (audio_len + 2 * half_frame - self.frame_length) // self.hop_length
+        max_frames = int(num_frames.max())
+        # same frames as librosa with center=True and pad_mode='constant'
+        audio = audio.float()[:, : int(audio_len.max())]
+        time_mask = torch.arange(audio.shape[1], device=device) < audio_len.unsqueeze(1)
+        audio = torch.where(time_mask, audio, torch.zeros_like(audio))
+        audio = torch.nn.functional.pad(audio, (half_frame, half_frame + self.frame_length))
+        frames = audio.unfold(1, self.frame_length, self.hop_length)[:, :max_frames]
+
+        n_states = 2 * self.n_pitch_bins
+        tiny = torch.finfo(torch.float64).tiny
+        pointers = torch.zeros(max_frames, batch_size, n_states, dtype=torch.int16, device=device)
+        best_states = torch.zeros(max_frames, batch_size, dtype=torch.long, device=device)
+        final_value = torch.zeros(batch_size, n_states, dtype=torch.float64, device=device)
+        voiced_prob = torch.zeros(batch_size, max_frames, dtype=torch.float32, device=device)
+        value = None
+        step = max(1, self.frames_per_step // batch_size)
+        for start in range(0, max_frames, step):
+            end = min(start + step, max_frames)
+            step_frames = frames[:, start:end].reshape(-1, self.frame_length)
+            observation_probs, voiced_prob_step = self._observation_probs(step_frames)
+            log_probs = torch.log(observation_probs + tiny).view(batch_size, end - start, n_states)
+            voiced_prob[:, start:end] = voiced_prob_step.view(batch_size, end - start).float()
+            for t in range(start, end):
+                if t == 0:
+                    value = log_probs[:, 0] + self.log_p_init
+                else:
+                    best, pointers[t], best_states[t - 1] = self._viterbi_step(value)
+                    value = log_probs[:, t - start] + best
+                is_last = (num_frames - 1 == t).unsqueeze(1)
+                final_value = torch.where(is_last, value, final_value)
+
+        # backtracking from the last frame of every utterance
+        n = self.n_pitch_bins
+        states = torch.zeros(batch_size, max_frames, dtype=torch.long, device=device)
+        final_state = final_value.argmax(dim=1)
+        state = final_state
+        for t in range(max_frames - 1, -1, -1):
+            state = torch.where(num_frames - 1 == t, final_state, state)
+            states[:, t] = state
+            if t > 0:
+                pointer = pointers[t].gather(1, state.unsqueeze(1)).squeeze(1).long()
+                voicing, offset = pointer // self.width, pointer % self.width
+                in_band = voicing * n + state % n - self.half_width + offset
+                state = torch.where(pointer == 2 * self.width, best_states[t - 1], in_band)
+
+        voiced_mask = states < n
+        pitch = self.freqs.to(device)[states % n].float()
+        pitch = torch.where(voiced_mask, pitch, torch.zeros_like(pitch))
+        frame_mask = torch.arange(max_frames, device=device) < num_frames.unsqueeze(1)
+        voiced_mask = voiced_mask & frame_mask
+        pitch = pitch * frame_mask
+        voiced_prob = voiced_prob * frame_mask
+        return pitch, voiced_mask, voiced_prob, num_frames
+
+
+def _get_batched_pyin(pitch_featurizer: PitchFeaturizer) -> BatchedPYIN:
+    return BatchedPYIN(
+        sample_rate=pitch_featurizer.sample_rate,
+        frame_length=pitch_featurizer.win_length,
+        hop_length=pitch_featurizer.hop_length,
+        fmin=pitch_featurizer.pitch_fmin,
+        fmax=pitch_featurizer.pitch_fmax,
+    )
+
+
+def compute_pitch_batch(
+    audios: List[np.ndarray],
+    pitch_featurizer: PitchFeaturizer,
+    pyin: Optional[BatchedPYIN] = None,
+    batch_size: int = 16,
+    device: Union[str, torch.device] = 'cpu',
+) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Computes the pitch features of `PitchFeaturizer.compute_pitch` for audio loaded at the sample rate of the
+    featurizer. Audio longer than the `batch_seconds` of the featurizer is split into padded segments as in
+    `PitchFeaturizer.compute_pitch`, and segments of all audio are batched by length.
+
+    Args:
+        audios: audio of the utterances, with the volume normalization of the featurizer applied.
+        pitch_featurizer: pitch featurizer with the pitch parameters.
+        pyin: optional pitch estimator, created from the featurizer if not provided.
+        batch_size: number of audio segments processed together.
+        device: device of the pitch estimation.
+
+    Returns:
+        Pitch, voiced mask and voiced probability arrays of every utterance.
+    """
+    if pyin is None:
+        pyin = _get_batched_pyin(pitch_featurizer)
+
+    # (utterance index, segment start, segment end, padding frames removed at the start and end)
+    segments = []
+    batch_samples = pitch_featurizer.batch_samples
+    for idx, audio in enumerate(audios):
+        if not batch_samples or audio.shape[0] < batch_samples:
+            segments.append((idx, 0, audio.shape[0], 0, None))
+            continue
+        num_chunks = int(np.ceil(audio.shape[0] / batch_samples))
+        for i in range(num_chunks):
+            start_i, end_i = i * batch_samples, (i + 1) * batch_samples
+            start_frames, end_frames = 0, None
+            if i != 0:
+                start_i -= pitch_featurizer.batch_padding_samples
+                start_frames = pitch_featurizer.batch_padding_frames
+            if i != (num_chunks - 1):
+                end_i += pitch_featurizer.batch_padding_samples
+                end_frames = pitch_featurizer.batch_frames
+            segments.append((idx, start_i, min(end_i, audio.shape[0]), start_frames, end_frames))
+
+    outputs = [None] * len(segments)
+    order = sorted(range(len(segments)), key=lambda i: segments[i][2] - segments[i][1], reverse=True)
+    for batch_start in range(0, len(order), batch_size):
+        batch = order[batch_start : batch_start + batch_size]
+        lengths = [segments[i][2] - segments[i][1] for i in batch]
+        audio_batch = torch.zeros(len(batch), max(lengths), dtype=torch.float32)
+        for row, i in enumerate(batch):
+            idx, start_i, end_i, _, _ = segments[i]
+            audio_batch[row, : end_i - start_i] = torch.from_numpy(audios[idx][start_i:end_i])
+        pitch, voiced_mask, voiced_prob, num_frames = pyin(
+            audio_batch.to(device), torch.tensor(lengths, dtype=torch.long, device=device)
+        )
+        pitch, voiced_mask, voiced_prob = pitch.cpu().numpy(), voiced_mask.cpu().numpy(), voiced_prob.cpu().numpy()
+        for row, i in enumerate(batch):
+            _, _, _, start_frames, end_frames = segments[i]
+            n = int(num_frames[row])
+            frames = slice(start_frames, n if end_frames is None else start_frames + end_frames)
+            outputs[i] = (pitch[row, :n][frames], voiced_mask[row, :n][frames], voiced_prob[row, :n][frames])
+
+    results = [([], [], []) for _ in audios]
+    for (idx, _, _, _, _), output in zip(segments, outputs):
+        for values, value in zip(results[idx], output):
+            values.append(value)
+    return [tuple(np.concatenate(values, axis=0) for values in result) for result in results]
+
+
+def _load_audio(manifest_entry: Dict[str, Any], audio_dir: Path, sample_rate: int, volume_norm: bool) -> np.ndarray:
+    audio_filepath_abs, _ = get_audio_filepaths(manifest_entry=manifest_entry, audio_dir=audio_dir)
+    audio, _ = librosa.load(audio_filepath_abs, sr=sample_rate)
+    if volume_norm:
+        audio = normalize_volume(audio)
+    return audio
+
+
+def _write_feature_store_part(
+    manifest_entries: List[Dict[str, Any]],
+    audio_dir: Path,
+    feature_dir: Path,
+    part_name: str,
+    pitch_featurizer: Optional[PitchFeaturizer],
+    energy_featurizer: Optional[EnergyFeaturizer],
+    batch_size: int,
+    device: Union[str, torch.device],
+    max_shard_size_MB: float,
+    verbose: bool,
+):
+    feature_dtypes = {}
+    if pitch_featurizer is not None:
+        pyin = _get_batched_pyin(pitch_featurizer)
+        feature_dtypes[pitch_featurizer.pitch_name] = np.float32
+        feature_dtypes[pitch_featurizer.voiced_mask_name] = np.bool_
+        feature_dtypes[pitch_featurizer.voiced_prob_name] = np.float32
+    if energy_featurizer is not None:
+        feature_dtypes[energy_featurizer.feature_name] = np.float32
+    writers = {
+        feature_name: FeatureStoreWriter(
+            str(feature_dir / feature_name), part_name=part_name, max_shard_size_MB=max_shard_size_MB, dtype=dtype
+        )
+        for feature_name, dtype in feature_dtypes.items()
+        if feature_name is not None
+    }
+
+    for batch_start in tqdm(range(0, len(manifest_entries), batch_size), disable=not verbose):
+        batch = manifest_entries[batch_start : batch_start + batch_size]
+        features = [{} for _ in batch]
+        # the audio of an entry is loaded and resampled once for all features with the same parameters
+        audio_cache = [{} for _ in batch]
+
+        def _get_audio(i, sample_rate, volume_norm):
+            if (sample_rate, volume_norm) not in audio_cache[i]:
+                audio_cache[i][sample_rate, volume_norm] = _load_audio(batch[i], audio_dir, sample_rate, volume_norm)
+            return audio_cache[i][sample_rate, volume_norm]
+
+        if pitch_featurizer is not None:
+            audios = [
+                _get_audio(i, pitch_featurizer.sample_rate, pitch_featurizer.volume_norm) for i in range(len(batch))
+            ]
+            pitch_features = compute_pitch_batch(
+                audios, pitch_featurizer, pyin=pyin, batch_size=batch_size, device=device
+            )
+            for i, (pitch, voiced_mask, voiced_prob) in enumerate(pitch_features):
+                features[i][pitch_featurizer.pitch_name] = pitch
+                features[i][pitch_featurizer.voiced_mask_name] = voiced_mask
+                features[i][pitch_featurizer.voiced_prob_name] = voiced_prob
+
+        if energy_featurizer is not None:
+            spec_featurizer = energy_featurizer.spec_featurizer
+            for i in range(len(batch)):
+                audio = _get_audio(i, spec_featurizer.sample_rate, spec_featurizer.volume_norm)
+                spec, _ = spec_featurizer.preprocessor(
+                    input_signal=torch.tensor(audio[np.newaxis, :], dtype=torch.float32),
+                    length=torch.tensor([audio.shape[0]], dtype=torch.int32),
+                )
+                features[i][energy_featurizer.feature_name] = np.linalg.norm(spec.detach()[0].numpy(), axis=0)
+
+        for entry, entry_features in zip(batch, features):
+            key = get_entry_feature_store_key(manifest_entry=entry, audio_dir=audio_dir)
+            for feature_name, writer in writers.items():
+                writer.add(key, entry_features[feature_name][np.newaxis, :])
+
+    for writer in writers.values():
+        writer.close()
+
+
+def write_pitch_energy_feature_stores(
+    manifest_entries: List[Dict[str, Any]],
+    audio_dir: Path,
+    feature_dir: Path,
+    pitch_featurizer: Optional[PitchFeaturizer] = None,
+    energy_featurizer: Optional[EnergyFeaturizer] = None,
+    batch_size: int = 16,
+    num_workers: int = 1,
+    device: Union[str, torch.device] = 'cpu',
+    overwrite: bool = False,
+    max_shard_size_MB: float = 1024.0,
+):
+    """
+    Computes the pitch features of a pitch featurizer and the energy of an energy featurizer for manifest entries,
+    and writes every feature to the feature store "<feature_dir>/<feature_name>". The featurizers load the features
+    of the store instead of .npy files.
+
+    Every worker process writes one part of the stores. If the stores exist and `overwrite` is False, entries
+    which are in all stores are skipped and the other entries are written to new parts.
+
+    Args:
+        manifest_entries: manifest entries of the utterances.
+        audio_dir: base directory where audio is stored.
+        feature_dir: base directory where the feature stores are written.
+        pitch_featurizer: optional pitch featurizer, its pitch, voiced mask and voiced probability are written.
+        energy_featurizer: optional energy featurizer.
+        batch_size: number of utterances processed together by a worker.
+        num_workers: number of worker processes. If -1 all CPUs are used.
+        device: device of the pitch estimation.
+        overwrite: whether to remove existing stores of the features.
+        max_shard_size_MB: maximum size of a shard file of the stores.
+    """
+    feature_dir = Path(feature_dir)
+    feature_names = []
+    if pitch_featurizer is not None:
+        feature_names += [
+            pitch_featurizer.pitch_name,
+            pitch_featurizer.voiced_mask_name,
+            pitch_featurizer.voiced_prob_name,
+        ]
+    if energy_featurizer is not None:
+        feature_names.append(energy_featurizer.feature_name)
+    store_dirs = [feature_dir / feature_name for feature_name in feature_names if feature_name is not None]
+    if not store_dirs:
+        return
+
+    num_parts = 0
+    existing_keys = None
+    for store_dir in store_dirs:
+        index_files = glob.glob(str(store_dir / ('*' + INDEX_SUFFIX)))
+        if overwrite:
+            for filepath in index_files + glob.glob(str(store_dir / '*_shard_*.bin')):
+                os.remove(filepath)
+            index_files = []
+            clear_feature_store_cache([store_dir])
+        num_parts = max(num_parts, len(index_files))
+        store_keys = set(FeatureStore(str(store_dir)).keys.tolist()) if index_files else set()
+        existing_keys = store_keys if existing_keys is None else existing_keys & store_keys
+
+    manifest_entries = [
+        entry
+        for entry in manifest_entries
+        if get_entry_feature_store_key(manifest_entry=entry, audio_dir=audio_dir) not in existing_keys
+    ]
+    if not manifest_entries:
+        return
+
+    if num_workers == -1:
+        num_workers = os.cpu_count()
+    num_workers = max(1, min(num_workers, len(manifest_entries)))
+    Parallel(n_jobs=num_workers)(
+        delayed(_write_feature_store_part)(
+            manifest_entries=manifest_entries[worker::num_workers],
+            audio_dir=audio_dir,
+            feature_dir=feature_dir,
+            part_name=f'part_{num_parts:03d}_{worker:03d}',
+            pitch_featurizer=pitch_featurizer,
+            energy_featurizer=energy_featurizer,
+            batch_size=batch_size,
+            device=device,
+            max_shard_size_MB=max_shard_size_MB,
+            verbose=worker == 0,
+        )
+        for worker in range(num_workers)
+    )
+    # the featurizers of this process open the new stores or parts on their next load
+    clear_feature_store_cache(store_dirs)
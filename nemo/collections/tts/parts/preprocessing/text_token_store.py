@@ -0,0 +1,206 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Store of pre-tokenized TTS text.
+
+Text normalization, word tokenization and G2P of the TTS tokenizers are run once for every unique text of a
+dataset, and the token ids are written as uint16 arrays to a feature store
+(`nemo.collections.asr.parts.preprocessing.feature_store`) keyed by a hash of the text. The store of a tokenizer is
+the subdirectory named by the fingerprint of its configuration, so a store is never read with a tokenizer which
+would produce different tokens, and stores of several tokenizers can share a directory.
+
+Tokenizers with a `phoneme_probability` phonemize words at random and are not stored.
+"""
+
+import functools
+import hashlib
+import os
+import types
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+
+import numpy as np
+from joblib import Parallel, delayed
+
+from nemo.collections.asr.parts.preprocessing.feature_store import INDEX_SUFFIX, FeatureStore, FeatureStoreWriter
+from nemo.utils import logging
+
+__all__ = [
+    'TextTokenStore',
+    'get_text_key',
+    'get_tokenizer_fingerprint',
+    'is_tokenizer_deterministic',
+    'write_text_token_store',
+]
+
+
+def _update_hash(hasher, value, visited: set):
+    if isinstance(value, (list, tuple, dict)):
+        # fast path for plain data, e.g. phoneme dictionaries. A different order of the same items only changes
+        # the fingerprint, which causes a store miss but never wrong tokens.
+        text = repr(value)
+        if ' at 0x' not in text:
+            hasher.update(f'{type(value).__name__}:{text};'.encode())
+            return
+    if value is None or isinstance(value, (bool, int, float, str, bytes, Path)):
+        hasher.update(f'{type(value).__name__}:{value!r};'.encode())
+    elif isinstance(value, (list, tuple)):
+        hasher.update(f'{type(value).__name__}[{len(value)}'.encode())
+        for item in value:
+            _update_hash(hasher, item, visited)
+        hasher.update(b']')
+    elif isinstance(value, (set, frozenset)):
+        _update_hash(hasher, sorted(value, key=repr), visited)
+    elif isinstance(value, dict):
+        hasher.update(f'dict[{len(value)}'.encode())
+        for key in sorted(value, key=repr):
+            _update_hash(hasher, key, visited)
+            _update_hash(hasher, value[key], visited)
+        hasher.update(b']')
+    elif isinstance(value, (types.FunctionType, types.MethodType, types.BuiltinFunctionType)):
+        # functions are identified by name, lambdas by the name of the function defining them
+        hasher.update(f'fn:{value.__module__}.{value.__qualname__};'.encode())
+    elif isinstance(value, functools.partial):
+        _update_hash(hasher, (value.func, value.args, value.keywords), visited)
+    elif hasattr(value, '__dict__'):
+        hasher.update(f'obj:{type(value).__module__}.{type(value).__qualname__}'.encode())
+        if id(value) in visited:
+            return
+        visited.add(id(value))
+        # private attributes are caches derived from the configuration or random states
+        attributes = {name: attr for name, attr in vars(value).items() if not name.startswith('_')}
+        _update_hash(hasher, attributes, visited)
+    else:
+        hasher.update(f'{type(value).__qualname__}:{value!r};'.encode())
+
+
+def get_tokenizer_fingerprint(tokenizer) -> str:
+    """
+    Fingerprint of the configuration of a tokenizer, a hash of the class and of the public attributes of the
+    tokenizer and of its G2P module, including the phoneme dictionary and the heteronyms.
+    """
+    hasher = hashlib.blake2b(digest_size=12)
+    _update_hash(hasher, tokenizer, visited=set())
+    return hasher.hexdigest()
+
+
+def is_tokenizer_deterministic(tokenizer) -> bool:
+    """Whether a tokenizer always returns the same tokens for a text, i.e. it does not phonemize at random."""
+    return getattr(tokenizer, 'phoneme_probability', None) is None
+
+
+def get_text_key(text: str) -> str:
+    """Key of the tokens of a text in a text token store."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class TextTokenStore:
+    """
+    Token ids of texts written by `write_text_token_store` for a tokenizer.
+
+    Args:
+        store_dir: directory of the text token stores.
+        tokenizer: tokenizer whose tokens are read, the store of its fingerprint is used.
+    """
+
+    def __init__(self, store_dir: Union[str, Path], tokenizer):
+        if not is_tokenizer_deterministic(tokenizer):
+            raise ValueError('Tokens of a tokenizer with phoneme_probability are random and cannot be stored.')
+        self.fingerprint = get_tokenizer_fingerprint(tokenizer)
+        self.store = FeatureStore(os.path.join(store_dir, self.fingerprint))
+
+    @classmethod
+    def from_dir(cls, store_dir: Optional[Union[str, Path]], tokenizer) -> Optional['TextTokenStore']:
+        """
+        Store of a tokenizer, or None if there is no store for the tokenizer. Datasets then tokenize on the fly.
+        """
+        if store_dir is None:
+            return None
+        if not is_tokenizer_deterministic(tokenizer):
+            logging.warning(f'Not using text token store {store_dir}, the tokenizer has a phoneme_probability.')
+            return None
+        fingerprint = get_tokenizer_fingerprint(tokenizer)
+        if not os.path.isdir(os.path.join(store_dir, fingerprint)):
+            logging.warning(f'No text token store for tokenizer {fingerprint} in {store_dir}, tokenizing on the fly.')
+            return None
+        store = cls(store_dir, tokenizer)
+        logging.info(f'Loaded text token store {store_dir} of tokenizer {fingerprint} with {len(store)} texts.')
+        return store
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    def __contains__(self, text: str) -> bool:
+        return get_text_key(text) in self.store
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Token ids of a text, or None if the text is not in the store."""
+        key = get_text_key(text)
+        if key not in self.store:
+            return None
+        return self.store[key][0].astype(np.int64)
+
+
+def _write_part(tokenizer, texts: List[str], store_dir: str, part_name: str) -> int:
+    with FeatureStoreWriter(store_dir, part_name, dtype=np.uint16) as writer:
+        for text in texts:
+            tokens = np.asarray(tokenizer(text), dtype=np.int64)
+            if len(tokens) and (tokens.min() < 0 or tokens.max() > np.iinfo(np.uint16).max):
+                raise ValueError(f'Tokens of [{text}] do not fit into uint16.')
+            writer.add(get_text_key(text), tokens[None, :])
+    return len(texts)
+
+
+def write_text_token_store(
+    texts: Iterable[str], tokenizer, store_dir: Union[str, Path], num_workers: int = 1, texts_per_part: int = 100000,
+) -> str:
+    """
+    Tokenize the unique texts which are not yet in the store of a tokenizer and add them to the store.
+    Every run adds new parts to the store, so the store can be extended with further manifests.
+
+    Args:
+        texts: texts to tokenize, e.g. the normalized texts of a manifest.
+        tokenizer: TTS tokenizer, must not have a phoneme_probability.
+        store_dir: directory of the text token stores.
+        num_workers: number of parallel processes.
+        texts_per_part: maximum number of texts written by a process to a part.
+
+    Returns:
+        Directory of the store of the tokenizer.
+    """
+    if not is_tokenizer_deterministic(tokenizer):
+        raise ValueError('Tokens of a tokenizer with phoneme_probability are random and cannot be stored.')
+    tokenizer_dir = os.path.join(store_dir, get_tokenizer_fingerprint(tokenizer))
+    os.makedirs(tokenizer_dir, exist_ok=True)
+
+    existing_parts = [name for name in os.listdir(tokenizer_dir) if name.endswith(INDEX_SUFFIX)]
+    existing = FeatureStore(tokenizer_dir) if existing_parts else {}
+    unique_texts = {}
+    for text in texts:
+        key = get_text_key(text)
+        if key not in unique_texts and key not in existing:
+            unique_texts[key] = text
+    new_texts = list(unique_texts.values())
+    logging.info(f'Tokenizing {len(new_texts)} new texts into {tokenizer_dir}.')
+
+    num_parts = max(num_workers, (len(new_texts) + texts_per_part - 1) // texts_per_part)
+    part_texts = [new_texts[idx::num_parts] for idx in range(num_parts)]
+    run_name = f'run_{len(existing_parts):05d}'
+    Parallel(n_jobs=num_workers)(
+        delayed(_write_part)(tokenizer, texts, tokenizer_dir, f'{run_name}_part_{idx:05d}')
+        for idx, texts in enumerate(part_texts)
+        if texts
+    )
+    return tokenizer_dir
@@ -0,0 +1,212 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Offline tokenization of audio datasets with an AudioCodecModel.
+
+The manifest is split into parts of `entries_per_part` entries. The entries of a part are sorted by duration and
+grouped into batches of similar duration, so little compute is spent on padding, and long audio is encoded in
+chunks with `AudioCodecModel.encode_in_chunks`. The tokens of every part are written as uint16 [C, T] arrays to
+a feature store (`nemo.collections.asr.parts.preprocessing.feature_store`) keyed by the file id of the audio.
+A part is complete once its index is written, so an interrupted run only tokenizes the incomplete parts again.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import torch
+
+from nemo.collections.asr.parts.preprocessing.feature_store import (
+    INDEX_SUFFIX,
+    FeatureStoreWriter,
+    get_feature_store_key,
+)
+from nemo.collections.tts.parts.utils.tts_dataset_utils import load_audio, stack_tensors
+from nemo.utils import logging
+
+__all__ = ['batch_by_duration', 'tokenize_manifest_to_store', 'CODEC_TOKENS_METADATA']
+
+CODEC_TOKENS_METADATA = 'codec_tokens.json'
+
+
+def batch_by_duration(
+    durations: List[float], max_batch_duration: float, max_batch_size: Optional[int] = None
+) -> List[List[int]]:
+    """
+    Sort items by duration and group them into batches, so that the padded duration of every batch,
+    i.e. the batch size times the longest duration in the batch, does not exceed `max_batch_duration`.
+    Items longer than `max_batch_duration` are put into batches of their own.
+
+    Args:
+        durations: duration of every item
+        max_batch_duration: maximum padded duration of a batch
+        max_batch_size: optional maximum number of items of a batch
+
+    Returns:
+        List of batches of item indices, from the longest to the shortest items
+    """
+    order = np.argsort(-np.asarray(durations, dtype=np.float64), kind='stable')
+    batches = []
+    batch = []
+    for index in order.tolist():
+        # items are sorted by decreasing duration, so the first item of a batch is the longest
+        batch_duration = durations[batch[0]] * (len(batch) + 1) if batch else 0.0
+        if batch and (batch_duration > max_batch_duration or len(batch) == max_batch_size):
+            batches.append(batch)
+            batch = []
+        batch.append(index)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class _AudioEntryDataset(torch.utils.data.Dataset):
+    def __init__(self, entries: List[Dict[str, Any]], audio_dir: Path, sample_rate: int):
+        self.entries = entries
+        self.audio_dir = audio_dir
+        self.sample_rate = sample_rate
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, index):
+        audio, audio_filepath, _ = load_audio(
+            manifest_entry=self.entries[index], audio_dir=self.audio_dir, sample_rate=self.sample_rate
+        )
+        return str(audio_filepath), torch.tensor(audio, dtype=torch.float32)
+
+
+def _collate_audio(batch):
+    audio_filepaths = [audio_filepath for audio_filepath, _ in batch]
+    audio_len = torch.tensor([audio.shape[0] for _, audio in batch], dtype=torch.long)
+    audio = stack_tensors([audio for _, audio in batch], max_lens=[int(audio_len.max())])
+    return audio_filepaths, audio, audio_len
+
+
+@torch.no_grad()
+def _write_part(
+    model,
+    entries: List[Dict[str, Any]],
+    audio_dir: Path,
+    store_dir: str,
+    part_name: str,
+    max_batch_duration: float,
+    max_batch_size: Optional[int],
+    chunk_frames: Optional[int],
+    context_frames: int,
+    num_workers: int,
+    max_shard_size_MB: float,
+):
+    batches = batch_by_duration([entry['duration'] for entry in entries], max_batch_duration, max_batch_size)
+    dataloader = torch.utils.data.DataLoader(
+        _AudioEntryDataset(entries, audio_dir, model.sample_rate),
+        batch_sampler=batches,
+        collate_fn=_collate_audio,
+        num_workers=num_workers,
+    )
+    with FeatureStoreWriter(store_dir, part_name, max_shard_size_MB=max_shard_size_MB, dtype=np.uint16) as writer:
+        for audio_filepaths, audio, audio_len in dataloader:
+            audio, audio_len = audio.to(model.device), audio_len.to(model.device)
+            if chunk_frames is None:
+                tokens, tokens_len = model.encode(audio=audio, audio_len=audio_len)
+            else:
+                tokens, tokens_len = model.encode_in_chunks(
+                    audio, audio_len, chunk_frames=chunk_frames, context_frames=context_frames
+                )
+            if tokens.min() < 0 or tokens.max() > np.iinfo(np.uint16).max:
+                raise ValueError(f'Tokens of {audio_filepaths} do not fit into uint16.')
+            tokens = tokens.to(torch.int32).cpu().numpy()
+            for audio_filepath, example_tokens, example_len in zip(audio_filepaths, tokens, tokens_len.tolist()):
+                writer.add(get_feature_store_key(audio_filepath), example_tokens[:, :example_len])
+
+
+def tokenize_manifest_to_store(
+    model,
+    entries: List[Dict[str, Any]],
+    audio_dir: Path,
+    store_dir: str,
+    max_batch_duration: float = 600.0,
+    max_batch_size: Optional[int] = None,
+    chunk_duration: Optional[float] = None,
+    context_duration: float = 0.0,
+    entries_per_part: int = 10000,
+    part_indices: Optional[List[int]] = None,
+    num_workers: int = 0,
+    max_shard_size_MB: float = 1024.0,
+) -> List[str]:
+    """
+    Tokenize the audio of manifest entries with an AudioCodecModel and write the tokens to a feature store.
+    Parts whose index already exists in the store are skipped, so an interrupted run can be resumed.
+
+    Args:
+        model: AudioCodecModel in eval mode
+        entries: manifest entries with `audio_filepath` and `duration`, the file ids of the audio must be unique
+        audio_dir: base directory of relative audio paths
+        store_dir: directory of the feature store
+        max_batch_duration: maximum padded duration of a batch in seconds
+        max_batch_size: optional maximum number of examples of a batch
+        chunk_duration: optional duration of the chunks of long audio in seconds, audio is encoded at once if None
+        context_duration: duration of the audio context on each side of a chunk in seconds
+        entries_per_part: number of manifest entries of a part
+        part_indices: optional indices of the parts to tokenize, e.g. to split the parts between several jobs
+        num_workers: number of data loader workers reading the audio
+        max_shard_size_MB: maximum size of a shard file of the store
+
+    Returns:
+        Names of the parts that were tokenized
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    metadata = {
+        'sample_rate': model.sample_rate,
+        'samples_per_frame': model.samples_per_frame,
+        'frame_rate': model.sample_rate / model.samples_per_frame,
+    }
+    with open(os.path.join(store_dir, CODEC_TOKENS_METADATA), 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+    chunk_frames = None
+    context_frames = 0
+    if chunk_duration is not None:
+        chunk_frames = max(int(chunk_duration * metadata['frame_rate']), 1)
+        context_frames = int(np.ceil(context_duration * metadata['frame_rate']))
+
+    num_parts = (len(entries) + entries_per_part - 1) // entries_per_part
+    if part_indices is None:
+        part_indices = range(num_parts)
+
+    tokenized_parts = []
+    for part_index in part_indices:
+        part_name = f'codes_part_{part_index:05d}'
+        if os.path.exists(os.path.join(store_dir, part_name + INDEX_SUFFIX)):
+            logging.info(f'Skipping {part_name}, which is already tokenized.')
+            continue
+        logging.info(f'Tokenizing {part_name} of {num_parts}.')
+        _write_part(
+            model,
+            entries[part_index * entries_per_part : (part_index + 1) * entries_per_part],
+            audio_dir=audio_dir,
+            store_dir=store_dir,
+            part_name=part_name,
+            max_batch_duration=max_batch_duration,
+            max_batch_size=max_batch_size,
+            chunk_frames=chunk_frames,
+            context_frames=context_frames,
+            num_workers=num_workers,
+            max_shard_size_MB=max_shard_size_MB,
+        )
+        tokenized_parts.append(part_name)
+    return tokenized_parts
@@ -0,0 +1,175 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Streaming synthesis with a spectrogram generator and a vocoder.
+
+The spectrogram of a sentence, or of each of its phrases, is generated at once and vocoded in chunks of
+`chunk_frames` mel frames. Every chunk is vocoded with `context_frames` frames of left and right context covering
+the receptive field of the vocoder, the audio of the context is dropped and consecutive chunks are cross-faded over
+`overlap_frames` frames. The first chunk of audio is available after vocoding `chunk_frames + context_frames`
+frames instead of the whole utterance.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+import torch
+
+from nemo.collections.tts.models.base import SpectrogramGenerator, Vocoder
+from nemo.utils import logging
+
+__all__ = ['VocoderReceptiveField', 'StreamingSynthesizer', 'get_vocoder_receptive_field', 'split_into_phrases']
+
+PHRASE_BOUNDARY_REGEX = re.compile(r'(?<=[.,;:!?])\s+')
+
+
+@dataclass
+class VocoderReceptiveField:
+    """Number of audio samples per mel frame and number of mel frames a sample of audio depends on."""
+
+    hop_length: int
+    left_frames: int
+    right_frames: int
+
+
+def get_vocoder_receptive_field(
+    vocoder: Vocoder, num_mel_channels: int, probe_frames: int = 128
+) -> VocoderReceptiveField:
+    """
+    Measures the hop length and the receptive field of a vocoder from the gradients of the audio of a frame in the
+    middle of a random spectrogram with respect to the spectrogram.
+
+    Args:
+        vocoder: vocoder with a `convert_spectrogram_to_audio` method
+        num_mel_channels: number of mel channels of the vocoder input
+        probe_frames: number of frames of the probe spectrogram, must exceed twice the receptive field
+
+    Returns:
+        VocoderReceptiveField of the vocoder
+    """
+    device = next(vocoder.parameters()).device
+    spec = torch.randn(1, num_mel_channels, probe_frames, device=device, requires_grad=True)
+    with torch.enable_grad():
+        audio = vocoder.convert_spectrogram_to_audio(spec=spec)
+        hop_length = audio.shape[-1] // probe_frames
+        center = probe_frames // 2
+        (grad,) = torch.autograd.grad(audio[..., center * hop_length : (center + 1) * hop_length].abs().sum(), spec)
+
+    frames = torch.nonzero(grad[0].abs().sum(dim=0)).squeeze(1)
+    receptive_field = VocoderReceptiveField(
+        hop_length=hop_length, left_frames=center - int(frames.min()), right_frames=int(frames.max()) - center
+    )
+    if frames.min() == 0 or frames.max() == probe_frames - 1:
+        logging.warning(f'Receptive field of the vocoder may exceed the probe of {probe_frames} frames.')
+    return receptive_field
+
+
+def split_into_phrases(text: str) -> List[str]:
+    """Splits a text after punctuation marks followed by whitespace."""
+    return [phrase for phrase in PHRASE_BOUNDARY_REGEX.split(text.strip()) if phrase]
+
+
+class StreamingSynthesizer:
+    """
+    Generator API for streaming synthesis with a SpectrogramGenerator (e.g. FastPitchModel) and a Vocoder
+    (e.g. HifiGanModel, UnivNetModel).
+
+    Args:
+        spec_generator: spectrogram generator, only needed by `stream`
+        vocoder: vocoder converting the spectrograms to audio
+        chunk_frames: number of mel frames vocoded per chunk
+        context_frames: number of frames of left and right context of a chunk, defaults to the receptive field of
+            the vocoder measured with `get_vocoder_receptive_field`
+        overlap_frames: number of frames over which consecutive chunks are cross-faded
+        num_mel_channels: number of mel channels, only needed to measure the receptive field of the vocoder
+    """
+
+    def __init__(
+        self,
+        spec_generator: Optional[SpectrogramGenerator],
+        vocoder: Vocoder,
+        chunk_frames: int = 32,
+        context_frames: Optional[int] = None,
+        overlap_frames: int = 2,
+        num_mel_channels: int = 80,
+    ):
+        if chunk_frames <= overlap_frames:
+            raise ValueError(f'chunk_frames ({chunk_frames}) must be larger than overlap_frames ({overlap_frames})')
+        self.spec_generator = spec_generator
+        self.vocoder = vocoder
+        self.chunk_frames = chunk_frames
+        self.overlap_frames = overlap_frames
+
+        self.receptive_field = get_vocoder_receptive_field(vocoder, num_mel_channels)
+        if context_frames is None:
+            context_frames = max(self.receptive_field.left_frames, self.receptive_field.right_frames)
+        self.context_frames = context_frames
+        self.hop_length = self.receptive_field.hop_length
+
+        self.fade_in = torch.linspace(0.0, 1.0, overlap_frames * self.hop_length + 2)[1:-1]
+        self.fade_out = 1.0 - self.fade_in
+
+    @torch.no_grad()
+    def stream_spectrogram(self, spec: torch.Tensor) -> Iterator[torch.Tensor]:
+        """
+        Vocodes a spectrogram in chunks.
+
+        Args:
+            spec: ['B', 'n_freqs', 'T'] spectrogram
+
+        Returns:
+            iterator of ['B', 'S'] audio chunks, that concatenate to the audio of the whole spectrogram
+        """
+        num_frames = spec.shape[-1]
+        hop = self.hop_length
+        tail = None
+        for start in range(0, num_frames, self.chunk_frames):
+            end = min(start + self.chunk_frames, num_frames)
+            # the chunk is extended by the overlap, which is cross-faded with the next chunk
+            out_end = min(end + self.overlap_frames, num_frames)
+            ctx_start = max(start - self.context_frames, 0)
+            ctx_end = min(out_end + self.context_frames, num_frames)
+
+            audio = self.vocoder.convert_spectrogram_to_audio(spec=spec[..., ctx_start:ctx_end])
+            audio = audio[..., (start - ctx_start) * hop : (out_end - ctx_start) * hop]
+            if tail is not None:
+                fade = tail.shape[-1]
+                audio[..., :fade] = (
+                    tail * self.fade_out[:fade].to(audio) + audio[..., :fade] * self.fade_in[:fade].to(audio)
+                )
+            tail = audio[..., (end - start) * hop :].clone() if out_end > end else None
+            yield audio[..., : (end - start) * hop]
+
+    @torch.no_grad()
+    def stream(self, text: str, split_phrases: bool = False, **generate_kwargs) -> Iterator[torch.Tensor]:
+        """
+        Synthesizes a text and yields the audio in chunks.
+
+        Args:
+            text: text to synthesize
+            split_phrases: generate the spectrogram of every phrase separately, which reduces the time to the first
+                chunk of long texts at the cost of prosody across phrases
+            generate_kwargs: arguments of `generate_spectrogram`, e.g. speaker or pace
+
+        Returns:
+            iterator of ['B', 'S'] audio chunks
+        """
+        if self.spec_generator is None:
+            raise ValueError('A spectrogram generator is required to synthesize text.')
+        for phrase in split_into_phrases(text) if split_phrases else [text]:
+            tokens = self.spec_generator.parse(phrase)
+            spec = self.spec_generator.generate_spectrogram(tokens=tokens, **generate_kwargs)
+            yield from self.stream_spectrogram(spec)
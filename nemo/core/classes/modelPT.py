@@ -44,7 +44,7 @@ from nemo.core import optim
 from nemo.core.classes.common import Model
 from nemo.core.connectors.save_restore_connector import SaveRestoreConnector
 from nemo.core.optim import McoreDistributedOptimizer, prepare_lr_scheduler
-from nemo.utils import logging, model_utils
+from nemo.utils import logging, model_utils, timers
 from nemo.utils.app_state import AppState
 from nemo.utils.debug_hook import register_debug_hooks
 from nemo.utils.exceptions import NeMoBaseException
@@ -1916,7 +1916,7 @@ class ModelPT(LightningModule, Model):
     def on_train_start(self):
         """PyTorch Lightning hook:
         https://pytorch-lightning.readthedocs.io/en/stable/common/lightning_module.html#on-train-start
-        We use it here to copy the relevant config for dynamic freezing.
+        We use it here to copy the relevant config for dynamic freezing and to set up loss profiling.
         """
 
         # dynamic freezing
@@ -1932,6 +1932,39 @@ class ModelPT(LightningModule, Model):
             else:
                 setattr(self, '_freeze_cfg', None)
 
+        self._setup_loss_profiling()
+
+    def _setup_loss_profiling(self):
+        """
+        Times forward passes of loss modules as "loss" ranges of the global HierarchicalTimer, which is set
+        by `nemo.utils.exp_manager.HierarchicalTimingCallback`. Losses nested into other losses are timed
+        as a part of the outer loss. Nothing is done if profiling is disabled.
+        """
+        self._loss_profiling_handles = []
+        timer = timers.get_global_timer()
+        if timer is None:
+            return
+
+        loss_names = []
+        for name, module in self.named_modules():
+            if not isinstance(module, torch.nn.modules.loss._Loss):
+                continue
+            if any(name.startswith(loss_name + '.') for loss_name in loss_names):
+                continue
+            loss_names.append(name)
+            self._loss_profiling_handles.append(module.register_forward_pre_hook(lambda *_: timer.start("loss")))
+            self._loss_profiling_handles.append(
+                module.register_forward_hook(lambda *_: timer.stop("loss"), always_call=True)
+            )
+
+    def _cleanup_loss_profiling(self):
+        """
+        Removes hooks added by `_setup_loss_profiling`.
+        """
+        for handle in getattr(self, '_loss_profiling_handles', []):
+            handle.remove()
+        self._loss_profiling_handles = []
+
     def on_train_batch_start(self, batch: Any, batch_idx: int, unused: int = 0) -> Optional[int]:
         """PyTorch Lightning hook:
         https://pytorch-lightning.readthedocs.io/en/stable/common/lightning_module.html#on-train-batch-start
@@ -2041,9 +2074,10 @@ class ModelPT(LightningModule, Model):
     def on_train_end(self):
         """PyTorch Lightning hook:
         https://pytorch-lightning.readthedocs.io/en/stable/common/lightning_module.html#on-train-end
-        We use it here to cleanup the dynamic freezing config.
+        We use it here to cleanup the dynamic freezing config and loss profiling hooks.
         """
 
+        self._cleanup_loss_profiling()
         self._cleanup_on_execution_end()
 
     def on_test_end(self):
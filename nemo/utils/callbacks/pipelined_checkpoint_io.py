@@ -0,0 +1,501 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Pipelined asynchronous saving of single-file (``torch.save``) checkpoints.
+
+Saving is split in two stages:
+
+1. The blocking stage copies every tensor of the checkpoint into a pool of reusable (pinned, when CUDA is available)
+   host buffers. Device tensors are copied on a side CUDA stream, so the only work done on the training thread is
+   issuing the copies and waiting for them.
+2. A background thread serializes the snapshot with ``torch.save`` into a ring of fixed-size chunk buffers. Full
+   chunks are handed to uploader threads which write them to a :class:`CheckpointStorageBackend` as numbered parts,
+   and each chunk buffer is reused as soon as its part is written. Serialization therefore never holds more than
+   ``num_ring_slots`` chunks of the serialized checkpoint in memory, and writing starts before serialization ends.
+
+The resulting file is a regular ``torch.save`` archive which can be read with ``torch.load``.
+"""
+
+import copy
+import io
+import os
+import queue
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Union
+
+import torch
+from lightning.fabric.plugins.io.checkpoint_io import CheckpointIO
+
+from nemo.utils import logging
+from nemo.utils.s3_utils import MB
+
+
+class CheckpointStorageBackend(ABC):
+    """Storage the :class:`PipelinedCheckpointWriter` streams serialized checkpoints to.
+
+    A checkpoint is written as a sequence of parts. All parts have the same size except for the last one, and
+    ``write_part`` may be called concurrently from several threads and out of order. A checkpoint only becomes
+    visible at ``path`` after ``complete`` was called.
+    """
+
+    #: minimum size in bytes of all parts but the last one
+    min_part_size: int = 0
+
+    @abstractmethod
+    def begin(self, path: str) -> Any:
+        """Starts writing a checkpoint to ``path`` and returns a handle passed to the other methods."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def write_part(self, handle: Any, part_number: int, offset: int, data: memoryview) -> None:
+        """Writes part ``part_number`` (starting from 1) which starts at byte ``offset`` of the checkpoint."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def complete(self, handle: Any) -> None:
+        """Makes the checkpoint visible once all parts were written."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def abort(self, handle: Any) -> None:
+        """Discards a partially written checkpoint."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def open(self, path: str) -> BinaryIO:
+        """Returns a binary stream with the content of the checkpoint at ``path``."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def remove(self, path: str) -> None:
+        """Removes the checkpoint at ``path``."""
+        raise NotImplementedError
+
+
+class LocalFileSystemBackend(CheckpointStorageBackend):
+    """Writes parts at their offsets into a temporary file which is renamed to the checkpoint path on completion."""
+
+    def begin(self, path: str) -> Any:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temp_path = f'{path}.in_progress'
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        return {'path': path, 'temp_path': temp_path, 'fd': fd}
+
+    def write_part(self, handle: Any, part_number: int, offset: int, data: memoryview) -> None:
+        while len(data) > 0:
+            written = os.pwrite(handle['fd'], data, offset)
+            data, offset = data[written:], offset + written
+
+    def complete(self, handle: Any) -> None:
+        os.fsync(handle['fd'])
+        os.close(handle['fd'])
+        os.replace(handle['temp_path'], handle['path'])
+
+    def abort(self, handle: Any) -> None:
+        os.close(handle['fd'])
+        if os.path.exists(handle['temp_path']):
+            os.remove(handle['temp_path'])
+
+    def open(self, path: str) -> BinaryIO:
+        return open(path, 'rb')
+
+    def remove(self, path: str) -> None:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+@dataclass
+class CheckpointSaveMetrics:
+    """Timings of one pipelined checkpoint save. Times are in seconds and sizes in bytes."""
+
+    path: str
+    #: time the training thread was blocked in ``save``, including ``wait_time``
+    blocking_time: float = 0.0
+    #: part of the blocking time spent waiting for the previous save to release the snapshot buffers
+    wait_time: float = 0.0
+    #: time spent copying the tensors into the host buffers
+    snapshot_time: float = 0.0
+    snapshot_bytes: int = 0
+    #: time from the end of the blocking stage until the checkpoint was completed in the storage backend
+    write_time: float = 0.0
+    serialized_bytes: int = 0
+    num_parts: int = 0
+
+    @property
+    def snapshot_throughput(self) -> float:
+        """Bytes per second copied into the snapshot buffers."""
+        return self.snapshot_bytes / self.snapshot_time if self.snapshot_time > 0 else 0.0
+
+    @property
+    def write_throughput(self) -> float:
+        """Bytes per second serialized and written to the storage backend."""
+        return self.serialized_bytes / self.write_time if self.write_time > 0 else 0.0
+
+
+class _HostSnapshotPool:
+    """Host buffers which hold the snapshot of the tensors of a checkpoint.
+
+    Buffers are matched to tensors by their position in the checkpoint, so consecutive saves of checkpoints with
+    the same structure reuse all buffers.
+    """
+
+    def __init__(self, pin_memory: bool):
+        self.pin_memory = pin_memory
+        self._buffers: List[torch.Tensor] = []
+
+    def get(self, idx: int, tensor: torch.Tensor) -> torch.Tensor:
+        if idx < len(self._buffers):
+            buffer = self._buffers[idx]
+            if buffer.shape == tensor.shape and buffer.dtype == tensor.dtype:
+                return buffer
+        buffer = torch.empty(tensor.shape, dtype=tensor.dtype, pin_memory=self.pin_memory)
+        if idx < len(self._buffers):
+            self._buffers[idx] = buffer
+        else:
+            self._buffers.append(buffer)
+        return buffer
+
+    def truncate(self, num_buffers: int) -> None:
+        del self._buffers[num_buffers:]
+
+
+def _collect_tensors(obj: Any, tensors: Dict[int, torch.Tensor]) -> None:
+    """Collects the tensors stored in (nested) dicts, lists and tuples of ``obj`` keyed by their ``id``."""
+    if isinstance(obj, torch.Tensor):
+        if obj.layout == torch.strided and not obj.is_quantized and obj.device.type != 'meta':
+            tensors.setdefault(id(obj), obj)
+    elif isinstance(obj, dict):
+        for value in obj.values():
+            _collect_tensors(value, tensors)
+    elif isinstance(obj, (list, tuple)):
+        for value in obj:
+            _collect_tensors(value, tensors)
+
+
+class _RingStream(io.RawIOBase):
+    """Write-only stream which fills ring chunks and hands full chunks to the uploader threads."""
+
+    def __init__(
+        self,
+        backend: CheckpointStorageBackend,
+        handle: Any,
+        slots: List[bytearray],
+        free_slots: queue.Queue,
+        upload_executor: ThreadPoolExecutor,
+    ):
+        super().__init__()
+        self.backend = backend
+        self.handle = handle
+        self.slots = slots
+        self.free_slots = free_slots
+        self.upload_executor = upload_executor
+        self.chunk_size = len(slots[0])
+        self.num_bytes = 0
+        self.num_parts = 0
+        self._slot_idx = None
+        self._fill = 0
+        self._futures: List[Future] = []
+        self._error: Optional[BaseException] = None
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        view = memoryview(data).cast('B')
+        written = 0
+        while written < len(view):
+            if self._slot_idx is None:
+                self._slot_idx = self._acquire_slot()
+                self._fill = 0
+            num_bytes = min(len(view) - written, self.chunk_size - self._fill)
+            self.slots[self._slot_idx][self._fill : self._fill + num_bytes] = view[written : written + num_bytes]
+            self._fill += num_bytes
+            written += num_bytes
+            if self._fill == self.chunk_size:
+                self._submit()
+        self.num_bytes += written
+        return written
+
+    def finish(self) -> None:
+        """Submits the last chunk and waits until all parts are written."""
+        if self._slot_idx is not None and self._fill > 0:
+            self._submit()
+        for future in self._futures:
+            future.result()
+        self._raise_if_failed()
+
+    def _acquire_slot(self) -> int:
+        while True:
+            self._raise_if_failed()
+            try:
+                return self.free_slots.get(timeout=0.1)
+            except queue.Empty:
+                pass
+
+    def _submit(self) -> None:
+        self.num_parts += 1
+        offset = (self.num_parts - 1) * self.chunk_size
+        self._futures.append(
+            self.upload_executor.submit(self._write_part, self._slot_idx, self.num_parts, offset, self._fill)
+        )
+        self._slot_idx = None
+        self._fill = 0
+
+    def _write_part(self, slot_idx: int, part_number: int, offset: int, num_bytes: int) -> None:
+        try:
+            if self._error is None:
+                self.backend.write_part(self.handle, part_number, offset, memoryview(self.slots[slot_idx])[:num_bytes])
+        except BaseException as e:
+            self._error = e
+            raise
+        finally:
+            self.free_slots.put(slot_idx)
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+
+class PipelinedCheckpointWriter:
+    """Saves checkpoints asynchronously through a snapshot stage and a ring of chunk buffers.
+
+    ``save`` returns as soon as all tensors are copied to host memory; serialization and writing continue in
+    background threads. At most one save is in flight: a new ``save`` first waits for the previous one to finish,
+    because the snapshot buffers are reused. Errors of a background save are raised by the next call to ``save``
+    or ``wait``.
+
+    Tensors which are views of the same storage are saved as independent tensors, and tensors inside objects other
+    than dicts, lists and tuples are deep-copied on their device.
+
+    Args:
+        backend: storage the checkpoints are written to.
+        chunk_size_MB: size of the ring chunks, which is the size of the parts written to the backend.
+        num_ring_slots: number of chunk buffers. Serialization blocks while all of them are being written.
+        num_write_threads: number of threads writing parts to the backend concurrently.
+        pin_memory: whether to pin the snapshot buffers. Ignored when CUDA is not available.
+    """
+
+    def __init__(
+        self,
+        backend: CheckpointStorageBackend,
+        chunk_size_MB: float = 64,
+        num_ring_slots: int = 4,
+        num_write_threads: int = 2,
+        pin_memory: bool = True,
+    ):
+        chunk_size = int(chunk_size_MB * MB)
+        if chunk_size < max(backend.min_part_size, 1):
+            raise ValueError(
+                f'chunk_size_MB={chunk_size_MB} is smaller than the minimum part size of {type(backend).__name__} '
+                f'({backend.min_part_size} bytes)'
+            )
+        if num_ring_slots < 1 or num_write_threads < 1:
+            raise ValueError(
+                f'num_ring_slots and num_write_threads must be positive, got {num_ring_slots} and {num_write_threads}'
+            )
+        self.backend = backend
+        self.chunk_size = chunk_size
+        self.num_ring_slots = num_ring_slots
+        self._pool = _HostSnapshotPool(pin_memory=pin_memory and torch.cuda.is_available())
+        # the ring is allocated on the first save and reused afterwards
+        self._slots: Optional[List[bytearray]] = None
+        self._save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='checkpoint_serializer')
+        self._upload_executor = ThreadPoolExecutor(
+            max_workers=num_write_threads, thread_name_prefix='checkpoint_writer'
+        )
+        self._copy_stream = None
+        self._future: Optional[Future] = None
+        self.metrics: List[CheckpointSaveMetrics] = []
+
+    @property
+    def last_metrics(self) -> Optional[CheckpointSaveMetrics]:
+        """Metrics of the last completed save."""
+        return self.metrics[-1] if self.metrics else None
+
+    @property
+    def is_saving(self) -> bool:
+        return self._future is not None and not self._future.done()
+
+    def save(
+        self, checkpoint: Dict[str, Any], path: Union[str, Path], on_complete: Optional[Callable[[str], None]] = None
+    ) -> None:
+        """Snapshots ``checkpoint`` and starts writing it to ``path`` in the background.
+
+        Args:
+            checkpoint: checkpoint to save. It may be modified as soon as this method returns.
+            path: path of the checkpoint in the storage backend.
+            on_complete: optional function called with ``path`` in the background thread after the checkpoint was
+                completed in the storage backend.
+        """
+        path = str(path)
+        metrics = CheckpointSaveMetrics(path=path)
+        start_time = time.perf_counter()
+        self.wait()
+        metrics.wait_time = time.perf_counter() - start_time
+
+        snapshot_start = time.perf_counter()
+        snapshot, metrics.snapshot_bytes = self._snapshot(checkpoint)
+        end_time = time.perf_counter()
+        metrics.snapshot_time = end_time - snapshot_start
+        metrics.blocking_time = end_time - start_time
+        self._future = self._save_executor.submit(self._write, snapshot, path, metrics, end_time, on_complete)
+
+    def wait(self) -> None:
+        """Waits for the save in flight (if any) and raises its error."""
+        if self._future is None:
+            return
+        future, self._future = self._future, None
+        future.result()
+
+    def close(self) -> None:
+        """Waits for the save in flight and stops the background threads."""
+        try:
+            self.wait()
+        finally:
+            self._save_executor.shutdown(wait=True)
+            self._upload_executor.shutdown(wait=True)
+
+    def _snapshot(self, checkpoint: Dict[str, Any]):
+        tensors: Dict[int, torch.Tensor] = {}
+        _collect_tensors(checkpoint, tensors)
+
+        use_copy_stream = any(tensor.is_cuda for tensor in tensors.values())
+        if use_copy_stream:
+            if self._copy_stream is None:
+                self._copy_stream = torch.cuda.Stream()
+            # copies must see all the work already queued on the training stream
+            self._copy_stream.wait_stream(torch.cuda.current_stream())
+
+        memo = {}
+        num_bytes = 0
+        with torch.no_grad(), torch.cuda.stream(self._copy_stream) if use_copy_stream else nullcontext():
+            for idx, (tensor_id, tensor) in enumerate(tensors.items()):
+                buffer = self._pool.get(idx, tensor)
+                buffer.copy_(tensor, non_blocking=tensor.is_cuda)
+                if isinstance(tensor, torch.nn.Parameter):
+                    buffer = torch.nn.Parameter(buffer, requires_grad=tensor.requires_grad)
+                memo[tensor_id] = buffer
+                num_bytes += tensor.numel() * tensor.element_size()
+        self._pool.truncate(len(tensors))
+        if use_copy_stream:
+            self._copy_stream.synchronize()
+
+        # containers and non-tensor leaves are copied, tensors are replaced by their snapshot through the memo
+        return copy.deepcopy(checkpoint, memo), num_bytes
+
+    def _write(
+        self,
+        snapshot: Dict[str, Any],
+        path: str,
+        metrics: CheckpointSaveMetrics,
+        start_time: float,
+        on_complete: Optional[Callable[[str], None]],
+    ) -> None:
+        if self._slots is None:
+            self._slots = [bytearray(self.chunk_size) for _ in range(self.num_ring_slots)]
+        free_slots = queue.Queue()
+        for slot_idx in range(len(self._slots)):
+            free_slots.put(slot_idx)
+
+        handle = self.backend.begin(path)
+        stream = _RingStream(self.backend, handle, self._slots, free_slots, self._upload_executor)
+        try:
+            torch.save(snapshot, stream)
+            stream.finish()
+            self.backend.complete(handle)
+        except BaseException as e:
+            logging.error(f'Failed to save checkpoint to {path}: {e}')
+            # parts which are still being written must not race with the cleanup of the backend
+            for future in stream._futures:
+                future.exception()
+            self.backend.abort(handle)
+            if stream._error is not None and stream._error is not e:
+                # torch.save reports a failed write with its own error, raise the error of the storage backend
+                raise stream._error from e
+            raise
+        finally:
+            del snapshot
+
+        metrics.write_time = time.perf_counter() - start_time
+        metrics.serialized_bytes = stream.num_bytes
+        metrics.num_parts = stream.num_parts
+        self.metrics.append(metrics)
+        logging.info(
+            f'Saved checkpoint to {path}: blocked training for {metrics.blocking_time:.3f}s '
+            f'(waiting {metrics.wait_time:.3f}s, snapshot {metrics.snapshot_bytes / MB:.1f}MB at '
+            f'{metrics.snapshot_throughput / MB:.1f}MB/s), wrote {metrics.serialized_bytes / MB:.1f}MB in '
+            f'{metrics.num_parts} parts in {metrics.write_time:.2f}s ({metrics.write_throughput / MB:.1f}MB/s)'
+        )
+        if on_complete is not None:
+            on_complete(path)
+
+
+class PipelinedCheckpointIO(CheckpointIO):
+    """CheckpointIO which saves checkpoints asynchronously with a :class:`PipelinedCheckpointWriter`.
+
+    Args:
+        backend: storage backend. Defaults to the local file system.
+        chunk_size_MB: size of the ring chunks and of the parts written to the backend.
+        num_ring_slots: number of ring chunks.
+        num_write_threads: number of threads writing parts concurrently.
+        pin_memory: whether to pin the snapshot buffers.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[CheckpointStorageBackend] = None,
+        chunk_size_MB: float = 64,
+        num_ring_slots: int = 4,
+        num_write_threads: int = 2,
+        pin_memory: bool = True,
+    ):
+        super().__init__()
+        self.backend = backend if backend is not None else LocalFileSystemBackend()
+        self.writer = PipelinedCheckpointWriter(
+            self.backend,
+            chunk_size_MB=chunk_size_MB,
+            num_ring_slots=num_ring_slots,
+            num_write_threads=num_write_threads,
+            pin_memory=pin_memory,
+        )
+
+    @property
+    def metrics(self) -> List[CheckpointSaveMetrics]:
+        return self.writer.metrics
+
+    def save_checkpoint(
+        self, checkpoint: Dict[str, Any], path: Union[str, Path], storage_options: Optional[Any] = None
+    ) -> None:
+        self.writer.save(checkpoint, path)
+
+    def load_checkpoint(
+        self, path: Union[str, Path], map_location: Optional[Callable] = lambda storage, loc: storage
+    ) -> Dict[str, Any]:
+        # a checkpoint which is still being written might be requested, e.g. when resuming from the last one
+        self.writer.wait()
+        with self.backend.open(str(path)) as f:
+            return torch.load(f, map_location=map_location, weights_only=False)
+
+    def remove_checkpoint(self, path: Union[str, Path]) -> None:
+        self.writer.wait()
+        self.backend.remove(str(path))
+
+    def teardown(self) -> None:
+        self.writer.close()
@@ -19,18 +19,22 @@ from io import BytesIO
 from multiprocessing import get_start_method
 from pathlib import Path
 from tempfile import NamedTemporaryFile
-from typing import Any, Callable, Dict, Optional, Union
+from typing import Any, BinaryIO, Callable, Dict, Optional, Union
 
 import torch
 from lightning.fabric.plugins.io.checkpoint_io import CheckpointIO
+from tenacity import before_sleep_log, retry, retry_if_exception, stop_after_delay, wait_exponential
 
 from nemo.utils import logging
+from nemo.utils.callbacks.pipelined_checkpoint_io import CheckpointStorageBackend, PipelinedCheckpointWriter
 from nemo.utils.s3_utils import (
     DEFAULT_CHUNK_SIZE_MB,
     DEFAULT_MAX_READ_CONCURRENCY,
     DEFAULT_MAX_WRITE_CONCURRENCY,
+    MB,
     SHARED_MEM_DIR,
     S3Utils,
+    is_slow_down_error,
 )
 
 
@@ -46,6 +50,8 @@ class S3CheckpointIO(CheckpointIO):
         max_read_concurrency=DEFAULT_MAX_READ_CONCURRENCY,
         max_write_concurrency=DEFAULT_MAX_WRITE_CONCURRENCY,
         async_checkpointing=False,
+        pipelined_async_save=False,
+        num_ring_slots=4,
     ):
         """
         Initialize the transfer configuration with custom values.
@@ -63,6 +69,11 @@ class S3CheckpointIO(CheckpointIO):
             async_checkpointing (bool, optional): Uses a ProcessPoolExecutor to do the main saving logic.
                 This feature should be used with save_top_k as it's possible a previous checkpoint is removed while
                 the current checkpoint write fails.
+            pipelined_async_save (bool, optional): Saves with a PipelinedCheckpointWriter instead: training is only
+                blocked while the tensors are copied to reusable host buffers, and the checkpoint is serialized into
+                a ring of `chunk_size_MB` chunks which are uploaded as the parts of a multipart upload while
+                serialization continues. Cannot be combined with async_checkpointing.
+            num_ring_slots (int, optional): Number of chunks of the ring used by pipelined_async_save.
         """
         if not S3Utils.is_s3_url(dirpath):
             raise AssertionError(
@@ -73,6 +84,16 @@ class S3CheckpointIO(CheckpointIO):
         self.max_read_concurrency = max_read_concurrency
         self.max_write_concurrency = max_write_concurrency
         self._async_checkpointing = async_checkpointing
+        if pipelined_async_save and async_checkpointing:
+            raise ValueError('pipelined_async_save and async_checkpointing cannot be used together')
+        self._pipelined_writer = None
+        if pipelined_async_save:
+            self._pipelined_writer = PipelinedCheckpointWriter(
+                S3MultipartStorageBackend(),
+                chunk_size_MB=chunk_size_MB,
+                num_ring_slots=num_ring_slots,
+                num_write_threads=max_write_concurrency,
+            )
         '''
         When using shared memory, we create a temporary file to hold the checkpoint before uploading to S3. 
         This list will track those temporary files, and clean up any leaked files that are still around during teardown. 
@@ -169,6 +190,11 @@ class S3CheckpointIO(CheckpointIO):
     def save_checkpoint(
         self, checkpoint: Dict[str, Any], path: Union[str, Path], storage_options: Optional[Any] = None
     ) -> None:
+        if self._pipelined_writer is not None:
+            logging.info(f'Uploading checkpoint to {path} in pipelined mode, rank {torch.distributed.get_rank()}')
+            self._pipelined_writer.save(checkpoint, path)
+            return
+
         # if we have a shared memory directory, we can serialize as a file to shared memory instead of as bytes.
         if os.path.exists(SHARED_MEM_DIR):
             localfile = self._serialize_checkpoint_to_shm(checkpoint, path)
@@ -202,6 +228,9 @@ class S3CheckpointIO(CheckpointIO):
     def load_checkpoint(
         self, path: Union[str, Path], map_location: Optional[Callable] = lambda storage, loc: storage
     ) -> Dict[str, Any]:
+        if self._pipelined_writer is not None:
+            # the requested checkpoint might still be uploading
+            self._pipelined_writer.wait()
         if os.path.exists(SHARED_MEM_DIR):
             with NamedTemporaryFile(dir=SHARED_MEM_DIR, delete=True) as tempfile:
                 logging.info(
@@ -235,6 +264,9 @@ class S3CheckpointIO(CheckpointIO):
             start_time = time.perf_counter()
             self._executor.shutdown(wait=True)
             logging.info(f'executor shut down after {(time.perf_counter() - start_time):.2f} seconds, rank {rank}')
+        if self._pipelined_writer is not None:
+            logging.info(f'Entering teardown, waiting for the pipelined upload to finish, rank {rank}')
+            self._pipelined_writer.close()
 
         '''
         this will be non-empty at the end of training if using asynchronous uploading since the futures are not processed with _check_uploading_results_so_far.
@@ -249,6 +281,60 @@ class S3CheckpointIO(CheckpointIO):
                         logging.info(f"Error occurred while deleting file {tfile}: {e}")
 
 
+class S3MultipartStorageBackend(CheckpointStorageBackend):
+    """Storage backend of the PipelinedCheckpointWriter which writes checkpoints with S3 multipart uploads.
+
+    Every ring chunk is uploaded as one part, so the chunks must be at least 5MB large.
+    """
+
+    min_part_size = 5 * MB
+
+    def __init__(self, clean_up_conflicting_checkpoints: bool = True):
+        self.clean_up_conflicting_checkpoints = clean_up_conflicting_checkpoints
+
+    def begin(self, path: str) -> Any:
+        if self.clean_up_conflicting_checkpoints:
+            _clean_up_conflicting_checkpoint(path)
+        bucket, key = S3Utils.parse_s3_url(path)
+        s3_client = S3Utils._get_s3_resource(get_client=True)
+        upload_id = s3_client.create_multipart_upload(Bucket=bucket, Key=key)['UploadId']
+        return {'s3_client': s3_client, 'bucket': bucket, 'key': key, 'upload_id': upload_id, 'parts': {}}
+
+    def write_part(self, handle: Any, part_number: int, offset: int, data: memoryview) -> None:
+        etag = _upload_part_with_retry(
+            handle['s3_client'], handle['bucket'], handle['key'], handle['upload_id'], part_number, bytes(data)
+        )
+        handle['parts'][part_number] = etag
+
+    def complete(self, handle: Any) -> None:
+        parts = [{'PartNumber': number, 'ETag': etag} for number, etag in sorted(handle['parts'].items())]
+        handle['s3_client'].complete_multipart_upload(
+            Bucket=handle['bucket'], Key=handle['key'], UploadId=handle['upload_id'], MultipartUpload={'Parts': parts}
+        )
+
+    def abort(self, handle: Any) -> None:
+        handle['s3_client'].abort_multipart_upload(
+            Bucket=handle['bucket'], Key=handle['key'], UploadId=handle['upload_id']
+        )
+
+    def open(self, path: str) -> BinaryIO:
+        return S3Utils.download_s3_file_to_stream(s3_path=path)
+
+    def remove(self, path: str) -> None:
+        S3Utils.remove_object(path)
+
+
+@retry(
+    wait=wait_exponential(multiplier=1, min=1, max=16),
+    stop=stop_after_delay(2 * 60),
+    retry=retry_if_exception(is_slow_down_error),
+    before_sleep=before_sleep_log(logging, logging.ERROR),
+)
+def _upload_part_with_retry(s3_client, bucket: str, key: str, upload_id: str, part_number: int, body: bytes) -> str:
+    response = s3_client.upload_part(Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=part_number, Body=body)
+    return response['ETag']
+
+
 def _clean_up_conflicting_checkpoint(filepath: str) -> None:
     '''
     before saving to s3, clean up any existing object with the same prefix megatron_gpt+step_count
@@ -0,0 +1,498 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Streaming checkpoint averaging.
+
+Every tensor is averaged chunk by chunk (ranges of rows along the first dimension): the chunk is read from all
+checkpoints by a thread pool while the previous chunk is accumulated in float32, and the averaged chunk is written
+to the output right away. Peak memory is therefore bounded by about ``2 * (num_checkpoints + 1) * chunk_numel``
+elements instead of growing with the number of checkpoints times the model size.
+
+Supported layouts:
+
+* ``nemo`` - ``.nemo`` archives (every ``*model_weights.ckpt`` member is averaged, other members are copied from
+  the first archive) and ``torch`` - PyTorch Lightning ``.ckpt`` files. Weights are memory-mapped with
+  ``torch.load(mmap=True)`` and averaged weights are accumulated in file-backed tensors before being saved.
+* ``zarr`` - zarr distributed checkpoints (one zarr array per tensor).
+* ``torch_dist`` - ``torch.distributed.checkpoint`` checkpoints. Storage items of this format are serialized
+  whole, so every checkpoint reads the current tensor at once and peak memory is about ``num_checkpoints`` times
+  the largest tensor instead of depending on the chunk size.
+
+Non-floating point tensors and the optimizer states of distributed checkpoints (``optimizer.*`` tensors) are copied
+from the first checkpoint. The training state of Lightning checkpoints (optimizer states, schedulers, loops) is not
+written to the averaged ``.ckpt`` file, only the state dict and the hyperparameters are kept.
+"""
+
+import io
+import json
+import math
+import os
+import shutil
+import tarfile
+import tempfile
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+
+from nemo.utils import logging
+
+try:
+    import zarr
+
+    HAVE_ZARR = True
+except (ImportError, ModuleNotFoundError):
+    HAVE_ZARR = False
+
+__all__ = [
+    "CheckpointReader",
+    "CheckpointWriter",
+    "average_checkpoints",
+    "average_checkpoint_files",
+    "detect_checkpoint_format",
+]
+
+_MODEL_WEIGHTS_SUFFIX = "model_weights.ckpt"
+
+
+class CheckpointReader(ABC):
+    """Reads ranges of rows of the tensors of a checkpoint"""
+
+    @abstractmethod
+    def keys(self) -> List[str]:
+        """Names of tensors"""
+
+    @abstractmethod
+    def meta(self, key: str) -> Tuple[Tuple[int, ...], str]:
+        """Shape and dtype name of a tensor"""
+
+    @abstractmethod
+    def read(self, key: str, start: int, end: int) -> torch.Tensor:
+        """Returns rows [start, end) of a tensor (the whole tensor for 0-dim tensors)"""
+
+    def close(self):
+        pass
+
+
+class CheckpointWriter(ABC):
+    """Writes tensors of a checkpoint row range by row range"""
+
+    @abstractmethod
+    def create(self, key: str, shape: Tuple[int, ...], dtype: str):
+        """Creates an empty tensor"""
+
+    @abstractmethod
+    def write(self, key: str, start: int, values: torch.Tensor):
+        """Writes rows starting from `start`"""
+
+    @abstractmethod
+    def finalize(self):
+        """Completes the output checkpoint"""
+
+
+def _is_averaged(key: str, dtype: str) -> bool:
+    # optimizer states are not averaged, integer tensors (e.g. BatchNorm.num_batches_tracked) are copied
+    return not key.startswith("optimizer.") and ("float" in dtype or dtype == "bfloat16")
+
+
+def average_checkpoints(
+    readers: Sequence[CheckpointReader],
+    writer: CheckpointWriter,
+    chunk_numel: int = 2**24,
+    num_io_threads: int = 8,
+):
+    """
+    Averages tensors of checkpoints chunk by chunk.
+
+    Args:
+        readers: readers of the checkpoints to average
+        writer: writer of the averaged checkpoint
+        chunk_numel: maximum number of elements of a chunk (a chunk contains at least one row)
+        num_io_threads: number of threads reading chunks
+    """
+    num_checkpoints = len(readers)
+    with ThreadPoolExecutor(max_workers=num_io_threads) as pool:
+        for key in readers[0].keys():
+            shape, dtype = readers[0].meta(key)
+            for reader in readers[1:]:
+                other_shape, _ = reader.meta(key)
+                if tuple(other_shape) != tuple(shape):
+                    raise ValueError(f"Tensor {key} has shape {other_shape} in a checkpoint and {shape} in another.")
+            writer.create(key, shape, dtype)
+            averaged = _is_averaged(key, dtype)
+            sources = readers if averaged else readers[:1]
+
+            num_rows = shape[0] if len(shape) > 0 else 1
+            row_numel = math.prod(shape[1:]) if len(shape) > 1 else 1
+            rows_per_chunk = max(chunk_numel // max(row_numel, 1), 1)
+            ranges = [(start, min(start + rows_per_chunk, num_rows)) for start in range(0, num_rows, rows_per_chunk)]
+
+            def submit(chunk_range):
+                return [pool.submit(reader.read, key, *chunk_range) for reader in sources]
+
+            # the next chunk is read while the current one is accumulated
+            pending = submit(ranges[0]) if ranges else None
+            for idx, (start, end) in enumerate(ranges):
+                chunks = [future.result() for future in pending]
+                if idx + 1 < len(ranges):
+                    pending = submit(ranges[idx + 1])
+                if averaged:
+                    total = chunks[0].to(torch.float32, copy=True)
+                    for chunk in chunks[1:]:
+                        total += chunk
+                    total /= num_checkpoints
+                    writer.write(key, start, total)
+                else:
+                    writer.write(key, start, chunks[0])
+    writer.finalize()
+
+
+class TorchCheckpointReader(CheckpointReader):
+    """
+    Reads tensors of a file saved with `torch.save` (a state dict or a Lightning checkpoint) memory-mapped.
+    Non-tensor entries of the state dict are available as `extra_items`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        checkpoint = torch.load(path, map_location="cpu", mmap=True, weights_only=False)
+        self.is_lightning_checkpoint = isinstance(checkpoint, dict) and "state_dict" in checkpoint
+        self.checkpoint = checkpoint
+        state_dict = checkpoint["state_dict"] if self.is_lightning_checkpoint else checkpoint
+        self.tensors = {k: v for k, v in state_dict.items() if isinstance(v, torch.Tensor)}
+        self.extra_items = {k: v for k, v in state_dict.items() if not isinstance(v, torch.Tensor)}
+
+    def keys(self) -> List[str]:
+        return list(self.tensors.keys())
+
+    def meta(self, key: str):
+        tensor = self.tensors[key]
+        return tuple(tensor.shape), str(tensor.dtype).replace("torch.", "")
+
+    def read(self, key: str, start: int, end: int) -> torch.Tensor:
+        tensor = self.tensors[key]
+        return tensor if tensor.dim() == 0 else tensor[start:end]
+
+
+class TorchCheckpointWriter(CheckpointWriter):
+    """
+    Writes a file with `torch.save`. Tensors are accumulated in file-backed tensors in `tmp_dir`, so they are not
+    held in process memory before saving. The output has the structure of `template` (a reader of an input file).
+    """
+
+    def __init__(self, path: str, template: TorchCheckpointReader, tmp_dir: str):
+        self.path = path
+        self.template = template
+        self.tmp_dir = tmp_dir
+        self.tensors = {}
+
+    def create(self, key, shape, dtype):
+        numel = math.prod(shape)
+        filename = os.path.join(self.tmp_dir, f"tensor_{len(self.tensors)}.bin")
+        tensor = torch.from_file(filename, shared=True, size=numel, dtype=getattr(torch, dtype))
+        self.tensors[key] = tensor.view(shape)
+
+    def write(self, key, start, values):
+        tensor = self.tensors[key]
+        if tensor.dim() == 0:
+            tensor.copy_(values)
+        else:
+            tensor[start : start + values.size(0)].copy_(values)
+
+    def finalize(self):
+        # keep the order of the keys and the non-tensor entries of the input
+        template_state_dict = (
+            self.template.checkpoint["state_dict"] if self.template.is_lightning_checkpoint else self.template.checkpoint
+        )
+        state_dict = {key: self.tensors.get(key, value) for key, value in template_state_dict.items()}
+        if self.template.is_lightning_checkpoint:
+            checkpoint = {"state_dict": state_dict}
+            # training state (optimizer, schedulers, loops) is not meaningful for an averaged checkpoint
+            for key in ("hyper_parameters", "hparams_name", "pytorch-lightning_version"):
+                if key in self.template.checkpoint:
+                    checkpoint[key] = self.template.checkpoint[key]
+        else:
+            checkpoint = state_dict
+        torch.save(checkpoint, self.path)
+        self.tensors = {}
+
+
+class ZarrCheckpointReader(CheckpointReader):
+    """Reads a zarr distributed checkpoint (one zarr array per tensor in a directory)"""
+
+    def __init__(self, path: str):
+        if not HAVE_ZARR:
+            raise ModuleNotFoundError("zarr is required to average zarr distributed checkpoints.")
+        self.path = path
+        self.arrays = {}
+        for item in sorted(os.listdir(path)):
+            # files and transformer engine states are copied from the first checkpoint
+            if not os.path.isdir(os.path.join(path, item)) or item.endswith("._extra_state"):
+                continue
+            self.arrays[item] = zarr.open(os.path.join(path, item), mode="r")
+
+    def keys(self) -> List[str]:
+        return list(self.arrays.keys())
+
+    def meta(self, key):
+        array = self.arrays[key]
+        return tuple(array.shape), str(array.dtype)
+
+    def read(self, key, start, end) -> torch.Tensor:
+        array = self.arrays[key]
+        values = array[...] if len(array.shape) == 0 else array[start:end]
+        if str(values.dtype) == "bfloat16":
+            values = values.astype(np.float32)
+        return torch.from_numpy(np.ascontiguousarray(values))
+
+
+class ZarrCheckpointWriter(CheckpointWriter):
+    """Writes a zarr distributed checkpoint with the chunking of `template`, copying its other items"""
+
+    def __init__(self, path: str, template: ZarrCheckpointReader):
+        self.path = path
+        self.template = template
+        self.arrays = {}
+
+    def create(self, key, shape, dtype):
+        template = self.template.arrays[key]
+        array = zarr.create(
+            shape,
+            dtype=template.dtype,
+            store=os.path.join(self.path, key),
+            chunks=template.chunks,
+            compressor=None,
+            fill_value=None,
+            write_empty_chunks=True,
+        )
+        if dtype == "bfloat16":
+            array._dtype = template.dtype
+            zarray = array.store['.zarray']
+            array.store['.zarray'] = zarray.replace(b'<V2', b'bfloat16')
+        self.arrays[key] = array
+
+    def write(self, key, start, values):
+        array = self.arrays[key]
+        values = values.numpy().astype(array.dtype)
+        if len(array.shape) == 0:
+            array[...] = values
+        else:
+            array[start : start + values.shape[0]] = values
+
+    def finalize(self):
+        for item in os.listdir(self.template.path):
+            if item in self.arrays:
+                continue
+            source = os.path.join(self.template.path, item)
+            if os.path.isdir(source):
+                shutil.copytree(source, os.path.join(self.path, item), dirs_exist_ok=True)
+            else:
+                shutil.copy(source, self.path)
+
+
+class TorchDistCheckpointReader(CheckpointReader):
+    """
+    Reads a `torch.distributed.checkpoint` checkpoint. Storage items are serialized whole, so the tensor of the
+    last requested key is loaded at once and kept until another key is requested.
+    """
+
+    def __init__(self, path: str):
+        from torch.distributed.checkpoint import FileSystemReader
+        from torch.distributed.checkpoint.metadata import TensorStorageMetadata
+
+        self.path = path
+        self.metadata = FileSystemReader(path).read_metadata()
+        self.tensor_metadata = {
+            key: value
+            for key, value in self.metadata.state_dict_metadata.items()
+            if isinstance(value, TensorStorageMetadata)
+        }
+        self.bytes_keys = [key for key in self.metadata.state_dict_metadata if key not in self.tensor_metadata]
+        self._cached = (None, None)
+
+    def keys(self):
+        return list(self.tensor_metadata.keys())
+
+    def meta(self, key):
+        metadata = self.tensor_metadata[key]
+        return tuple(metadata.size), str(metadata.properties.dtype).replace("torch.", "")
+
+    def _load(self, state_dict: Dict[str, Any]) -> Dict[str, Any]:
+        import torch.distributed.checkpoint as dcp
+
+        dcp.load(state_dict, checkpoint_id=self.path, no_dist=True)
+        return state_dict
+
+    def read(self, key, start, end):
+        if self._cached[0] != key:
+            metadata = self.tensor_metadata[key]
+            tensor = torch.empty(metadata.size, dtype=metadata.properties.dtype)
+            self._cached = (key, self._load({key: tensor})[key])
+        tensor = self._cached[1]
+        return tensor if tensor.dim() == 0 else tensor[start:end]
+
+    def extra_items(self) -> Dict[str, Any]:
+        """Non-tensor items of the checkpoint"""
+        if not self.bytes_keys:
+            return {}
+        return self._load({key: io.BytesIO() for key in self.bytes_keys})
+
+
+class TorchDistCheckpointWriter(CheckpointWriter):
+    """
+    Writes a `torch.distributed.checkpoint` checkpoint. Tensors are accumulated in file-backed tensors in `tmp_dir`
+    and saved at once; non-tensor items and other files (e.g. `common.pt`, `metadata.json`) come from `template`.
+    """
+
+    def __init__(self, path: str, template: TorchDistCheckpointReader, tmp_dir: str):
+        self.path = path
+        self.template = template
+        self.tensor_writer = TorchCheckpointWriter(path=None, template=None, tmp_dir=tmp_dir)
+
+    def create(self, key, shape, dtype):
+        self.tensor_writer.create(key, shape, dtype)
+
+    def write(self, key, start, values):
+        self.tensor_writer.write(key, start, values)
+
+    def finalize(self):
+        import torch.distributed.checkpoint as dcp
+
+        state_dict = dict(self.tensor_writer.tensors)
+        state_dict.update(self.template.extra_items())
+        dcp.save(state_dict, checkpoint_id=self.path, no_dist=True)
+        for item in os.listdir(self.template.path):
+            source = os.path.join(self.template.path, item)
+            if item.endswith(".distcp") or item == ".metadata" or os.path.exists(os.path.join(self.path, item)):
+                continue
+            if os.path.isdir(source):
+                shutil.copytree(source, os.path.join(self.path, item))
+            else:
+                shutil.copy(source, self.path)
+
+
+def detect_checkpoint_format(path: str) -> str:
+    """Returns the layout of a checkpoint: "nemo", "torch", "zarr" or "torch_dist" """
+    if os.path.isfile(path):
+        return "nemo" if path.endswith(".nemo") else "torch"
+    if os.path.exists(os.path.join(path, ".metadata")):
+        return "torch_dist"
+    if os.path.exists(os.path.join(path, "metadata.json")):
+        # megatron distributed checkpoints store the backend in metadata.json
+        with open(os.path.join(path, "metadata.json")) as f:
+            backend = json.load(f).get("sharded_backend", "zarr")
+        return "torch_dist" if backend == "torch_dist" else "zarr"
+    return "zarr"
+
+
+def _extract_model_weights(nemo_path: str, out_dir: str) -> List[str]:
+    # streams model weights members of a .nemo archive to disk, returns their member names
+    members = []
+    with tarfile.open(nemo_path, "r:*") as tar:
+        for member in tar:
+            if member.isfile() and member.name.endswith(_MODEL_WEIGHTS_SUFFIX):
+                target = os.path.join(out_dir, os.path.normpath(member.name).lstrip(os.sep))
+                if ".." in os.path.normpath(member.name).split(os.sep):
+                    raise ValueError(f"Unsafe member {member.name} in {nemo_path}")
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with tar.extractfile(member) as src, open(target, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                members.append(member.name)
+    return members
+
+
+def _average_nemo_files(
+    paths: Sequence[str], output_path: str, tmp_dir: str, chunk_numel: int, num_io_threads: int
+):
+    extracted = []
+    for idx, path in enumerate(paths):
+        out_dir = os.path.join(tmp_dir, f"input_{idx}")
+        extracted.append((out_dir, _extract_model_weights(path, out_dir)))
+    members = extracted[0][1]
+    if not members:
+        raise ValueError(f"No {_MODEL_WEIGHTS_SUFFIX} found in {paths[0]}")
+
+    averaged_files = {}
+    for member in members:
+        rel_path = os.path.normpath(member).lstrip(os.sep)
+        readers = [TorchCheckpointReader(os.path.join(out_dir, rel_path)) for out_dir, _ in extracted]
+        output_file = os.path.join(tmp_dir, "output", rel_path)
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        tensors_dir = tempfile.mkdtemp(dir=tmp_dir)
+        writer = TorchCheckpointWriter(output_file, readers[0], tensors_dir)
+        average_checkpoints(readers, writer, chunk_numel=chunk_numel, num_io_threads=num_io_threads)
+        shutil.rmtree(tensors_dir)
+        averaged_files[member] = output_file
+
+    # the averaged archive has the members of the first archive with averaged model weights
+    with tarfile.open(paths[0], "r:*") as src, tarfile.open(output_path, "w:") as dst:
+        for member in src:
+            if member.name in averaged_files:
+                member.size = os.path.getsize(averaged_files[member.name])
+                with open(averaged_files[member.name], "rb") as f:
+                    dst.addfile(member, f)
+            elif member.isfile():
+                dst.addfile(member, src.extractfile(member))
+            else:
+                dst.addfile(member)
+
+
+def average_checkpoint_files(
+    paths: Sequence[str],
+    output_path: str,
+    checkpoint_format: Optional[str] = None,
+    chunk_numel: int = 2**24,
+    num_io_threads: int = 8,
+    tmp_dir: Optional[str] = None,
+):
+    """
+    Averages checkpoints stored in files or directories.
+
+    Args:
+        paths: checkpoints to average
+        output_path: path of the averaged checkpoint (same layout as the inputs)
+        checkpoint_format: "nemo", "torch", "zarr" or "torch_dist" (detected from the first path if None)
+        chunk_numel: maximum number of elements of a chunk
+        num_io_threads: number of threads reading chunks
+        tmp_dir: directory for temporary files (extracted weights, file-backed tensors), next to the output if None
+    """
+    if len(paths) == 0:
+        raise ValueError("No checkpoints to average.")
+    checkpoint_format = checkpoint_format or detect_checkpoint_format(paths[0])
+    logging.info(f"Averaging {len(paths)} checkpoints in {checkpoint_format} format into {output_path}")
+
+    parent_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(parent_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=tmp_dir or parent_dir) as work_dir:
+        if checkpoint_format == "nemo":
+            _average_nemo_files(paths, output_path, work_dir, chunk_numel, num_io_threads)
+            return
+        if checkpoint_format == "torch":
+            readers = [TorchCheckpointReader(path) for path in paths]
+            writer = TorchCheckpointWriter(output_path, readers[0], work_dir)
+        elif checkpoint_format == "zarr":
+            readers = [ZarrCheckpointReader(path) for path in paths]
+            os.makedirs(output_path, exist_ok=True)
+            writer = ZarrCheckpointWriter(output_path, readers[0])
+        elif checkpoint_format == "torch_dist":
+            readers = [TorchDistCheckpointReader(path) for path in paths]
+            writer = TorchDistCheckpointWriter(output_path, readers[0], work_dir)
+        else:
+            raise ValueError(f"Unknown checkpoint format: {checkpoint_format}")
+        average_checkpoints(readers, writer, chunk_numel=chunk_numel, num_io_threads=num_io_threads)
+        for reader in readers:
+            reader.close()
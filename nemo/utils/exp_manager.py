@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import glob
+import json
 import os
 import signal
 import subprocess
@@ -39,7 +40,7 @@ from lightning.pytorch.strategies.ddp import DDPStrategy
 from lightning.pytorch.trainer.connectors.checkpoint_connector import _CheckpointConnector
 from omegaconf import DictConfig, OmegaConf, open_dict
 
-from nemo.collections.common.callbacks import EMA
+from nemo.collections.common.callbacks import EMA, DataPipelineMetricsCallback
 from nemo.constants import NEMO_ENV_VARNAME_TESTING, NEMO_ENV_VARNAME_VERSION
 from nemo.utils import logging, timers
 from nemo.utils.app_state import AppState
@@ -143,6 +144,30 @@ class StepTimingParams:
     buffer_size: Optional[int] = 1
 
 
+@dataclass
+class HierarchicalTimingParams:
+    # if True torch.cuda.synchronize() is called on start/stop of every range
+    sync_cuda: Optional[bool] = False
+    # number of stored measures per range (histograms and traces are kept separately)
+    buffer_size: Optional[int] = 1
+    # number of log-spaced histogram bins per range
+    num_bins: Optional[int] = 64
+    # maximum number of trace events stored for Chrome trace export (the oldest are dropped)
+    max_trace_events: Optional[int] = 100000
+    # log median time of ranges every n training steps (0 disables step logging)
+    log_every_n_steps: Optional[int] = 50
+    # directory for Chrome traces and the timing summary, if None log_dir/timing is used
+    output_dir: Optional[str] = None
+
+
+@dataclass
+class DataPipelineMetricsParams:
+    # log the data stall fraction and p50/p99 latencies of data pipeline stages every n training steps
+    log_every_n_steps: Optional[int] = 100
+    # directory for per-process stage reports, if None log_dir/data_pipeline is used (a subdirectory per rank)
+    output_dir: Optional[str] = None
+
+
 @dataclass
 class EMAParams:
     enable: Optional[bool] = False
@@ -150,6 +175,8 @@ class EMAParams:
     cpu_offload: Optional[bool] = False
     validate_original_weights: Optional[bool] = False
     every_n_steps: int = 1
+    sharded: Optional[bool] = False
+    chunk_numel: int = 2**22
 
 
 @dataclass
@@ -223,6 +250,16 @@ class ExpManagerConfig:
     # log step time with nemo logger instead of lightning logger to avoid lightning logger overhead
     log_delta_step_timing: Optional[bool] = False
     step_timing_kwargs: Optional[StepTimingParams] = field(default_factory=lambda: StepTimingParams())
+    # logs nested timing of train step stages (dataloader, forward, backward, optimizer) and exports Chrome traces
+    log_hierarchical_timing: Optional[bool] = False
+    hierarchical_timing_kwargs: Optional[HierarchicalTimingParams] = field(
+        default_factory=lambda: HierarchicalTimingParams()
+    )
+    # logs the data stall fraction and timing of data pipeline stages (decode, perturb, tokenize, collate)
+    log_data_pipeline_metrics: Optional[bool] = False
+    data_pipeline_metrics_kwargs: Optional[DataPipelineMetricsParams] = field(
+        default_factory=lambda: DataPipelineMetricsParams()
+    )
     # Configures creation of log files for different ranks
     log_local_rank_0_only: Optional[bool] = False
     log_global_rank_0_only: Optional[bool] = False
@@ -315,6 +352,168 @@ class TimingCallback(Callback):
         self._on_batch_end("train_backward_timing", pl_module)
 
 
+class HierarchicalTimingCallback(Callback):
+    """
+    Logs nested execution time of the stages of train/val steps with a HierarchicalTimer:
+    "train_dataloader" (time between the end of a batch and the start of the next one), "callbacks" (batch start
+    and batch end hooks of all callbacks and of the model), "train_step" with "forward", "backward" and "optimizer"
+    ranges, and "validation_step". The timer is also set as the global timer, so models can add own ranges
+    with `nemo.utils.timers.profile_range`, which are nested into the active stage. ModelPT times its loss
+    modules as "loss" ranges, e.g. "train_step/forward/loss".
+    At the end of training, histograms are reduced across ranks, the summary with p50/p99 per range is logged
+    and saved as JSON, and each rank exports its ranges as a Chrome trace.
+    """
+
+    _STEP = "train_step"
+
+    def __init__(self, output_dir: Optional[str] = None, log_every_n_steps: int = 50, timer_kwargs={}):
+        self.output_dir = output_dir
+        self.log_every_n_steps = log_every_n_steps
+        # only histograms and trace events are used, so by default a single measure is stored per range
+        self.timer = timers.HierarchicalTimer(**{"buffer_size": 1, **timer_kwargs})
+        self._stage = None
+        # (object, hook name) of batch hooks wrapped to time the "callbacks" stage
+        self._wrapped_hooks = []
+
+    def _start_stage(self, stage: Optional[str]):
+        # finish the current stage of the train step and start the next one
+        if self._stage is not None:
+            self.timer.stop(self._stage)
+        if stage is not None:
+            self.timer.start(stage)
+        self._stage = stage
+
+    def _start(self, name: str):
+        if self.timer.is_active(name):
+            logging.warning(
+                f"Timer `{name}` was not correctly stopped, suggesting a "
+                "possible issue. The stale range will be discarded for now."
+            )
+            self.timer.discard(name)
+            if self._stage is not None and not self.timer.is_active(self._stage):
+                self._stage = None
+        self.timer.start(name)
+
+    def _stop(self, name: str):
+        if self.timer.is_active(name):
+            self.timer.stop(name)
+
+    def _wrap_hook(self, obj, hook_name: str, before=None, after=None):
+        # instance attributes take precedence over methods, so the trainer calls the wrapper
+        hook = getattr(obj, hook_name)
+
+        def wrapper(*args, **kwargs):
+            if before is not None:
+                before()
+            output = hook(*args, **kwargs)
+            if after is not None:
+                after()
+            return output
+
+        setattr(obj, hook_name, wrapper)
+        self._wrapped_hooks.append((obj, hook_name))
+
+    def _unwrap_hooks(self):
+        for obj, hook_name in self._wrapped_hooks:
+            delattr(obj, hook_name)
+        self._wrapped_hooks = []
+
+    def _start_callbacks(self):
+        self._stop("train_dataloader")
+        self._start_stage(None)
+        self._stop(self._STEP)
+        self._start("callbacks")
+
+    def _start_step(self):
+        self._stop("callbacks")
+        self._start(self._STEP)
+        self._start_stage("forward")
+
+    def _start_dataloader(self):
+        self._stop("callbacks")
+        self._start("train_dataloader")
+
+    def on_train_start(self, trainer, pl_module):
+        timers.set_global_timer(self.timer)
+        # the trainer calls batch hooks of callbacks in order and then the batch hook of the model, so hooks of
+        # the first callback start the "callbacks" stage, and hooks of the model end it
+        self._unwrap_hooks()
+        first_callback = trainer.callbacks[0]
+        self._wrap_hook(first_callback, "on_train_batch_start", before=self._start_callbacks)
+        self._wrap_hook(pl_module, "on_train_batch_start", after=self._start_step)
+        self._wrap_hook(first_callback, "on_train_batch_end", before=self._start_callbacks)
+        self._wrap_hook(pl_module, "on_train_batch_end", after=self._start_dataloader)
+
+    def on_train_epoch_start(self, trainer, pl_module):
+        self._start("train_dataloader")
+
+    def on_train_batch_start(self, trainer, pl_module, batch, batch_idx):
+        if not self._wrapped_hooks:
+            self._stop("train_dataloader")
+            self._start_step()
+
+    def on_before_backward(self, trainer, pl_module, loss):
+        self._start_stage("backward")
+
+    def on_after_backward(self, trainer, pl_module):
+        self._start_stage(None)
+
+    def on_before_optimizer_step(self, trainer, pl_module, optimizer):
+        self._start_stage("optimizer")
+
+    def on_train_batch_end(self, trainer, pl_module, outputs, batch, batch_idx):
+        if not self._wrapped_hooks:
+            self._start_stage(None)
+            self._stop(self._STEP)
+        if self.log_every_n_steps > 0 and (batch_idx + 1) % self.log_every_n_steps == 0:
+            for path, values in self.timer.summary(percentiles=(50,)).items():
+                pl_module.log(
+                    path + ' p50 in s', torch.as_tensor(values["p50"]), on_step=True, on_epoch=False, batch_size=1
+                )
+        if not self._wrapped_hooks:
+            self._start("train_dataloader")
+
+    def on_train_epoch_end(self, trainer, pl_module):
+        # the model may stop the epoch in its batch start hook, so the step may be active
+        self._start_stage(None)
+        self._stop(self._STEP)
+        self._stop("callbacks")
+        self._stop("train_dataloader")
+
+    def on_validation_start(self, trainer, pl_module):
+        # validation during the training epoch is not a part of the dataloader time
+        self._stop("train_dataloader")
+
+    def on_validation_end(self, trainer, pl_module):
+        if trainer.training:
+            self._start("train_dataloader")
+
+    def on_validation_batch_start(self, trainer, pl_module, batch, batch_idx, dataloader_idx=0):
+        self._start("validation_step")
+
+    def on_validation_batch_end(self, trainer, pl_module, outputs, batch, batch_idx, dataloader_idx=0):
+        self._stop("validation_step")
+
+    def on_train_end(self, trainer, pl_module):
+        timers.set_global_timer(None)
+        self._unwrap_hooks()
+        summary = self.timer.summary(percentiles=(50, 99), reduce_ranks=True)
+        if self.output_dir is None:
+            return
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.timer.export_chrome_trace(
+            os.path.join(self.output_dir, f"trace_rank{trainer.global_rank}.json"), rank=trainer.global_rank
+        )
+        if trainer.is_global_zero:
+            for path, values in sorted(summary.items()):
+                logging.info(
+                    f"{path}: count={values['count']} p50={values['p50']:.6f}s p99={values['p99']:.6f}s"
+                )
+            with open(os.path.join(self.output_dir, "timing_summary.json"), "w") as f:
+                json.dump(summary, f, indent=2)
+
+
 class DeltaTimingCallback(Callback):
     """
     Logs execution time of train/val/test steps using nemo logger. Calculates
@@ -587,12 +786,32 @@ def exp_manager(trainer: 'lightning.pytorch.Trainer', cfg: Optional[Union[DictCo
         timing_callback = TimingCallback(timer_kwargs=cfg.step_timing_kwargs or {})
         trainer.callbacks.insert(0, timing_callback)
 
+    if cfg.log_hierarchical_timing:
+        timing_kwargs = dict(cfg.hierarchical_timing_kwargs or {})
+        output_dir = timing_kwargs.pop("output_dir", None) or os.path.join(log_dir, "timing")
+        log_every_n_steps = timing_kwargs.pop("log_every_n_steps", 50)
+        timing_callback = HierarchicalTimingCallback(
+            output_dir=output_dir, log_every_n_steps=log_every_n_steps, timer_kwargs=timing_kwargs
+        )
+        trainer.callbacks.insert(0, timing_callback)
+
+    if cfg.log_data_pipeline_metrics:
+        metrics_kwargs = cfg.data_pipeline_metrics_kwargs or {}
+        output_dir = metrics_kwargs.get("output_dir", None) or os.path.join(log_dir, "data_pipeline")
+        data_metrics_callback = DataPipelineMetricsCallback(
+            output_dir=os.path.join(output_dir, f"rank{global_rank}"),
+            log_every_n_steps=metrics_kwargs.get("log_every_n_steps", 100),
+        )
+        trainer.callbacks.insert(0, data_metrics_callback)
+
     if cfg.ema.enable:
         ema_callback = EMA(
             decay=cfg.ema.decay,
             validate_original_weights=cfg.ema.validate_original_weights,
             cpu_offload=cfg.ema.cpu_offload,
             every_n_steps=cfg.ema.every_n_steps,
+            sharded=cfg.ema.sharded,
+            chunk_numel=cfg.ema.chunk_numel,
         )
         trainer.callbacks.append(ema_callback)
 
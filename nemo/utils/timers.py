@@ -15,13 +15,24 @@ This module support timing of code blocks.
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import contextlib
+import json
+import threading
 import time
-from typing import Optional
+from collections import deque
+from typing import Dict, Optional, Sequence
 
 import numpy as np
 import torch
 
-__all__ = ["NamedTimer", "SimpleTimer"]
+__all__ = [
+    "NamedTimer",
+    "SimpleTimer",
+    "HierarchicalTimer",
+    "get_global_timer",
+    "set_global_timer",
+    "profile_range",
+]
 
 
 class NamedTimer(object):
@@ -212,3 +223,298 @@ class SimpleTimer:
     def total_sec(self) -> float:
         """Return total time in seconds"""
         return self.total_time / 1e9
+
+
+class HierarchicalTimer(NamedTimer):
+    """
+    A NamedTimer that supports nested timing ranges.
+    Every range is stored under its full path (e.g. "train_step/forward"), which is built from the
+    ranges active in the current thread. In addition to the NamedTimer buffers, the timer keeps
+    a log-spaced histogram of durations per path (which can be reduced across ranks) and a bounded
+    buffer of trace events which can be exported in Chrome trace / Perfetto JSON format.
+    Use case: breaking down the step time of the training loop.
+    """
+
+    def __init__(
+        self,
+        reduction="mean",
+        sync_cuda=False,
+        buffer_size=-1,
+        num_bins=64,
+        min_time=1e-6,
+        max_time=1e3,
+        max_trace_events=100000,
+        separator="/",
+    ):
+        """
+        Args:
+            reduction (str): reduction over multiple timings of the same timer
+                             (none - returns the list instead of a scalar)
+            sync_cuda (bool): if True torch.cuda.synchronize() is called for start/stop
+            buffer_size (int): if positive, limits the number of stored measures per path
+            num_bins (int): number of log-spaced histogram bins between min_time and max_time
+            min_time (float): lower edge of the histogram in seconds (smaller values go to the first bin)
+            max_time (float): upper edge of the histogram in seconds (larger values go to the last bin)
+            max_trace_events (int): if positive, limits the number of stored trace events (the oldest are dropped),
+                                    if 0, trace events are not stored, if negative, the number is not limited
+            separator (str): separator between names of nested ranges in a path
+        """
+        self._bin_edges = np.logspace(np.log10(min_time), np.log10(max_time), num_bins + 1)
+        self._max_trace_events = max_trace_events
+        self._separator = separator
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        # trace timestamps are relative to the creation of the timer
+        self._origin_ns = time.perf_counter_ns()
+        super().__init__(reduction=reduction, sync_cuda=sync_cuda, buffer_size=buffer_size)
+
+    @property
+    def bin_edges(self) -> np.ndarray:
+        return self._bin_edges
+
+    @property
+    def _stack(self):
+        # stack of (path, start_ns) of active ranges of the current thread
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @property
+    def _reduction_fn(self):
+        # measures are stored in bounded deques, but are returned as lists
+        if self._reduction == "none":
+            return list
+        return getattr(np, self._reduction)
+
+    def reset(self, name=None):
+        """
+        Resents all / specific timer
+
+        Args:
+            name (str): timer path to reset (if None all timers, histograms and trace events are reset)
+        """
+        super().reset(name)
+        if name is None:
+            self._local = threading.local()
+            self.histograms = {}
+            self.trace_events = deque(maxlen=self._max_trace_events if self._max_trace_events > 0 else None)
+        else:
+            self.histograms.pop(name, None)
+
+    def start(self, name=""):
+        """
+        Starts measuring a named range nested into the active ranges of the current thread.
+
+        Args:
+            name (str): range name to start
+        """
+        stack = self._stack
+        path = f"{stack[-1][0]}{self._separator}{name}" if stack else name
+        if any(active_path == path for active_path, _ in stack):
+            raise RuntimeError(f"Cannot start timer = '{path}' since it is already active")
+
+        # synchronize pytorch cuda execution if supported
+        if self._sync_cuda and torch.cuda.is_initialized():
+            torch.cuda.synchronize()
+
+        stack.append((path, time.perf_counter_ns()))
+
+    def stop(self, name=""):
+        """
+        Stops measuring the innermost active range of the current thread.
+
+        Args:
+            name (str): range name to stop (must be the innermost active range)
+        """
+        stack = self._stack
+        if not stack or stack[-1][0].split(self._separator)[-1] != name:
+            raise RuntimeError(f"Cannot end timer = '{name}' since it is not the innermost active timer")
+
+        # synchronize pytorch cuda execution if supported
+        if self._sync_cuda and torch.cuda.is_initialized():
+            torch.cuda.synchronize()
+
+        end_ns = time.perf_counter_ns()
+        path, start_ns = stack.pop()
+        dt = (end_ns - start_ns) / 1e9
+        bin_idx = min(max(np.searchsorted(self._bin_edges, dt, side="right") - 1, 0), len(self._bin_edges) - 2)
+
+        with self._lock:
+            timer_data = self.timers.setdefault(path, {})
+            if "dt" not in timer_data:
+                # enforce buffer_size if positive
+                timer_data["dt"] = deque(maxlen=self._buffer_size if self._buffer_size > 0 else None)
+            timer_data["dt"].append(dt)
+
+            if path not in self.histograms:
+                self.histograms[path] = np.zeros(len(self._bin_edges) - 1, dtype=np.int64)
+            self.histograms[path][bin_idx] += 1
+
+            if self._max_trace_events != 0:
+                self.trace_events.append((path, start_ns, end_ns, threading.get_ident()))
+
+    def discard(self, name=""):
+        """
+        Stops an active range of the current thread and the ranges nested into it without recording them,
+        e.g. a range which was not stopped because of an exception.
+
+        Args:
+            name (str): range name to discard
+        """
+        stack = self._stack
+        for idx in reversed(range(len(stack))):
+            if stack[idx][0].split(self._separator)[-1] == name:
+                del stack[idx:]
+                return
+        raise RuntimeError(f"Cannot discard timer = '{name}' since it is not active")
+
+    @contextlib.contextmanager
+    def range(self, name=""):
+        """
+        Context manager measuring a named range nested into the active ranges of the current thread.
+
+        Args:
+            name (str): range name
+        """
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop(name)
+
+    def is_active(self, name=""):
+        return any(path.split(self._separator)[-1] == name for path, _ in self._stack)
+
+    def active_timers(self):
+        """
+        Return list of paths of active ranges of the current thread
+        """
+        return [path for path, _ in self._stack]
+
+    def reduce_histograms(self) -> Dict[str, np.ndarray]:
+        """
+        Sums histograms over all ranks if torch.distributed is initialized.
+        Paths which are not present on some ranks are treated as empty histograms.
+
+        Returns:
+            dictionary with a histogram per path
+        """
+        with self._lock:
+            histograms = {path: hist.copy() for path, hist in self.histograms.items()}
+
+        if not (torch.distributed.is_available() and torch.distributed.is_initialized()):
+            return histograms
+
+        all_paths = [None] * torch.distributed.get_world_size()
+        torch.distributed.all_gather_object(all_paths, sorted(histograms.keys()))
+        paths = sorted(set(path for rank_paths in all_paths for path in rank_paths))
+        if not paths:
+            return {}
+
+        counts = torch.zeros(len(paths), len(self._bin_edges) - 1, dtype=torch.int64)
+        for idx, path in enumerate(paths):
+            if path in histograms:
+                counts[idx] = torch.from_numpy(histograms[path])
+        if torch.distributed.get_backend() == torch.distributed.Backend.NCCL:
+            counts = counts.cuda()
+        torch.distributed.all_reduce(counts, op=torch.distributed.ReduceOp.SUM)
+        counts = counts.cpu().numpy()
+
+        return {path: counts[idx] for idx, path in enumerate(paths)}
+
+    def histogram_percentile(self, histogram: np.ndarray, q: float) -> float:
+        """
+        Estimates the q-th percentile (in seconds) from a histogram using the geometric centers of the bins.
+
+        Args:
+            histogram (np.ndarray): histogram counts
+            q (float): percentile in range [0, 100]
+        """
+        total = histogram.sum()
+        if total == 0:
+            return float("nan")
+        bin_idx = int(np.searchsorted(np.cumsum(histogram), q / 100 * total, side="left"))
+        bin_idx = min(bin_idx, len(histogram) - 1)
+        return float(np.sqrt(self._bin_edges[bin_idx] * self._bin_edges[bin_idx + 1]))
+
+    def summary(self, percentiles: Sequence[float] = (50, 99), reduce_ranks: bool = False) -> Dict[str, Dict]:
+        """
+        Returns the number of measures and the estimated percentiles per path.
+
+        Args:
+            percentiles: percentiles to estimate from histograms
+            reduce_ranks: if True histograms are summed over all ranks (must be called on all ranks)
+        """
+        histograms = self.reduce_histograms() if reduce_ranks else self.histograms
+        data = {}
+        for path, histogram in histograms.items():
+            data[path] = {"count": int(histogram.sum())}
+            for q in percentiles:
+                data[path][f"p{q:g}"] = self.histogram_percentile(histogram, q)
+        return data
+
+    def export_chrome_trace(self, path: str, rank: int = 0):
+        """
+        Writes stored trace events in Chrome trace event format (loadable in chrome://tracing or Perfetto).
+
+        Args:
+            path (str): output JSON file
+            rank (int): rank used as the process id of the events
+        """
+        with self._lock:
+            events = list(self.trace_events)
+
+        trace_events = [
+            {
+                "name": event_path.split(self._separator)[-1],
+                "cat": "nemo",
+                "ph": "X",
+                "ts": (start_ns - self._origin_ns) / 1e3,
+                "dur": (end_ns - start_ns) / 1e3,
+                "pid": rank,
+                "tid": thread_id,
+                "args": {"path": event_path},
+            }
+            for event_path, start_ns, end_ns, thread_id in events
+        ]
+        trace_events.append({"name": "process_name", "ph": "M", "pid": rank, "args": {"name": f"rank {rank}"}})
+
+        with open(path, "w") as f:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f)
+
+
+_GLOBAL_TIMER: Optional[HierarchicalTimer] = None
+_NULL_RANGE = contextlib.nullcontext()
+
+
+def get_global_timer() -> Optional[HierarchicalTimer]:
+    """Returns the global HierarchicalTimer used by `profile_range` (None if profiling is disabled)"""
+    return _GLOBAL_TIMER
+
+
+def set_global_timer(timer: Optional[HierarchicalTimer]):
+    """
+    Sets the global HierarchicalTimer used by `profile_range`.
+
+    Args:
+        timer: timer to use, None disables profiling
+    """
+    global _GLOBAL_TIMER
+    _GLOBAL_TIMER = timer
+
+
+def profile_range(name: str):
+    """
+    Context manager timing a named range with the global HierarchicalTimer.
+    When profiling is disabled, a shared no-op context manager is returned, so the range costs only a function call.
+
+    Example:
+        with profile_range("loss"):
+            loss = self.loss(...)
+
+    Args:
+        name: range name
+    """
+    if _GLOBAL_TIMER is None:
+        return _NULL_RANGE
+    return _GLOBAL_TIMER.range(name)
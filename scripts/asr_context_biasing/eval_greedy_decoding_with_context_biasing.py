@@ -134,7 +134,7 @@ def decoding_step(
     preds_output_manifest: str,
     beam_batch_size: int = 128,
     progress_bar: bool = True,
-    context_graph: context_biasing.ContextGraphCTC = None,
+    context_graph: context_biasing.CompiledContextGraphCTC = None,
     blank_idx: int = 0,
     hp: Optional[Dict] = None,
 ) -> tuple[float, float]:
@@ -417,6 +417,8 @@ def main(cfg: EvalContextBiasingConfig):
     if cfg.apply_context_biasing:
         context_graph = context_biasing.ContextGraphCTC(blank_id=blank_idx)
         context_graph.add_to_graph(context_transcripts)
+        # compile context graph into flat arrays for the vectorized word spotter
+        context_graph = context_graph.compile()
     else:
         context_graph = None
 
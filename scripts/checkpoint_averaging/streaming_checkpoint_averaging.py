@@ -0,0 +1,65 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Averages .nemo files, Lightning .ckpt files, zarr or torch_dist distributed checkpoints chunk by chunk,
+with peak memory bounded by --chunk_numel (see nemo.utils.checkpoint_averaging).
+
+Example: python scripts/checkpoint_averaging/streaming_checkpoint_averaging.py \
+             --checkpoints <checkpoint 1> <checkpoint 2> ... \
+             --output <averaged checkpoint> \
+             --format <nemo, torch, zarr or torch_dist; detected from the first checkpoint if not provided>
+"""
+
+import argparse
+
+from nemo.utils.checkpoint_averaging import average_checkpoint_files
+
+
+def main():
+    """
+    Main function
+    """
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--checkpoints', nargs='+', required=True, help='Checkpoints to average.')
+    parser.add_argument('--output', required=True, help='Path of the averaged checkpoint.')
+    parser.add_argument(
+        '--format',
+        choices=['nemo', 'torch', 'zarr', 'torch_dist'],
+        default=None,
+        help='Layout of the checkpoints. Detected from the first checkpoint if not specified.',
+    )
+    parser.add_argument(
+        '--chunk_numel',
+        type=int,
+        default=2**24,
+        help='Maximum number of elements of a tensor chunk read from each checkpoint at once.',
+    )
+    parser.add_argument('--num_io_threads', type=int, default=8, help='Number of threads reading chunks.')
+    parser.add_argument('--tmp_dir', default=None, help='Directory for temporary files (next to the output by default).')
+    args = parser.parse_args()
+
+    average_checkpoint_files(
+        args.checkpoints,
+        args.output,
+        checkpoint_format=args.format,
+        chunk_numel=args.chunk_numel,
+        num_io_threads=args.num_io_threads,
+        tmp_dir=args.tmp_dir,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -38,9 +38,8 @@ will generate a new directory in each of the distributed checkpoint subfolders n
 import argparse
 import logging
 import os
-import shutil
-import numpy as np
-import zarr
+
+from nemo.utils.checkpoint_averaging import average_checkpoint_files
 
 logging.basicConfig(level=logging.INFO)
 
@@ -66,6 +65,13 @@ def main():
         type=int,
         help='List of checkpoint steps to average. If not specified, will average all.',
     )
+    parser.add_argument(
+        '--chunk_numel',
+        type=int,
+        default=2**24,
+        help='Maximum number of elements of a tensor chunk read from each checkpoint at once.',
+    )
+    parser.add_argument('--num_io_threads', type=int, default=8, help='Number of threads reading chunks.')
 
     args = parser.parse_args()
 
@@ -87,57 +93,6 @@ def main():
                 if key in ckpt_dir:
                     checkpoint_paths.append(ckpt_dir)
 
-    n = len(checkpoint_paths)
-    # initialize dict, will be used to store the weights that need to be averaged
-    avg_weights = {}
-    chunk_info = {}
-
-    logging.info(f"Averaging {n} checkpoints ... {'at steps:' + str(args.steps) if args.steps is not None else ''}")
-
-    # item that needs to be copied to the new checkpoint folder
-    copy_items = []
-    for ix, path in enumerate(checkpoint_paths):
-        full_path = os.path.join(args.checkpoint_dir, path)
-
-        for item in os.listdir(full_path):
-
-            # if item is not a directory, skip it
-            if not os.path.isdir(os.path.join(full_path, item)):
-                if ix == 0:
-                    copy_items.append(os.path.join(full_path, item))
-                continue
-
-            # transformer engine states, leave them out
-            if item.endswith('._extra_state'):
-                if ix == 0:
-                    copy_items.append(os.path.join(full_path, item))
-                continue
-
-            # optimizer states, no point of averaing them
-            if item.startswith('optimizer.'):
-                if ix == 0:
-                    copy_items.append(os.path.join(full_path, item))
-                continue
-
-            if item not in avg_weights:
-                logging.info(f"Initialized average weights dict with: {item}")
-                array = zarr.open(os.path.join(full_path, item), mode='r')
-                avg_weights[item] = array[:]
-                chunk_info[item] = array.chunks
-            else:
-                logging.info(f"Updated average weights dict with weight: {item}")
-                array_z = zarr.open(os.path.join(full_path, item), mode='r')
-                sum_array = avg_weights[item] + array_z[:]
-                avg_weights[item] = sum_array
-
-    for k in avg_weights:
-        logging.info(f"Average weights dict key : {k}, dtype : {avg_weights[k].dtype}, shape : {avg_weights[k].shape}")
-        if str(avg_weights[k].dtype).startswith("int"):
-            raise ValueError("Int type not supported")
-        else:
-            array_z = avg_weights[k] / n
-            avg_weights[k] = array_z
-
     # Save model
     if args.steps is None:
         ckpt_name = os.path.join(args.checkpoint_dir, args.name_prefix + '-averaged')
@@ -145,38 +100,18 @@ def main():
         steps_combined = '_'.join([str(x) for x in args.steps])
         ckpt_name = os.path.join(args.checkpoint_dir, args.name_prefix + '-' + steps_combined + '-averaged')
 
-    # save avg_weights
-    for k in avg_weights:
-        logging.info(f"Saving {k} to {ckpt_name}")
-        input_arr = avg_weights[k]
-        chunks = chunk_info[k]
-        # create the zarr array
-        output_array = zarr.create(
-            input_arr.shape,
-            dtype=input_arr.dtype,
-            store=os.path.join(ckpt_name, k),
-            chunks=chunks,
-            compressor=None,
-            fill_value=None,
-            write_empty_chunks=True,
-        )
-        if input_arr.dtype == np.dtype('bfloat16'):
-            arr = output_array
-            arr._dtype = input_arr.dtype
-            zarray = arr.store['.zarray']
-            arr.store['.zarray'] = zarray.replace(b'<V2', b'bfloat16')
-        output_array[:] = input_arr
-
-    # copy other files
-    for item in copy_items:
-        is_file = os.path.isfile(item)
-        logging.info(f"Copying {'directory' if is_file else 'file'} {item} to {ckpt_name}")
-        if os.path.isfile(item):
-            # copy single file
-            shutil.copy(item, ckpt_name)
-        else:
-            # copy directory
-            shutil.copytree(item, os.path.join(ckpt_name, os.path.basename(item)), dirs_exist_ok=True)
+    logging.info(
+        f"Averaging {len(checkpoint_paths)} checkpoints ... "
+        f"{'at steps:' + str(args.steps) if args.steps is not None else ''}"
+    )
+    # tensors are averaged chunk by chunk, optimizer states and other items are copied from the first checkpoint
+    average_checkpoint_files(
+        [os.path.join(args.checkpoint_dir, path) for path in checkpoint_paths],
+        ckpt_name,
+        checkpoint_format="zarr",
+        chunk_numel=args.chunk_numel,
+        num_io_threads=args.num_io_threads,
+    )
 
     logging.info(f"Averaged distributed checkpoint saved as : {ckpt_name}")
 
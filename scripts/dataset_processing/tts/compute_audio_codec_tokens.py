@@ -0,0 +1,95 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This script tokenizes the audio of a manifest with an audio codec model and writes the tokens to a store
+of uint16 arrays, which is read by nemo.collections.tts.data.codec_token_dataset.AudioCodecTokenDataset.
+
+Files are sorted by duration and batched by padded duration. Long audio is encoded in chunks with audio
+context on both sides. The manifest is split into parts, and parts that are already in the store are skipped,
+so the script can be restarted after an interruption, or run as several jobs with disjoint --part_indices.
+
+$ python <nemo_root_path>/scripts/dataset_processing/tts/compute_audio_codec_tokens.py \
+    --codec_model_path=<codec_model_path>/audio_codec.nemo \
+    --manifest_path=<data_root_path>/manifest.json \
+    --audio_dir=<data_root_path>/audio \
+    --store_dir=<data_root_path>/codec_tokens \
+    --max_batch_duration=600 \
+    --chunk_duration=30 \
+    --context_duration=1 \
+    --num_workers=4
+"""
+
+import argparse
+from pathlib import Path
+
+import torch
+
+from nemo.collections.asr.parts.utils.manifest_utils import read_manifest
+from nemo.collections.tts.models import AudioCodecModel
+from nemo.collections.tts.parts.utils.codec_tokenization import tokenize_manifest_to_store
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter, description="Compute audio codec tokens.",
+    )
+    parser.add_argument("--codec_model_path", required=True, type=Path, help="Path to .nemo file of codec model.")
+    parser.add_argument("--manifest_path", required=True, type=Path, help="Path to manifest with durations.")
+    parser.add_argument("--audio_dir", required=True, type=Path, help="Path to base directory with audio data.")
+    parser.add_argument("--store_dir", required=True, type=Path, help="Path to directory of the token store.")
+    parser.add_argument("--max_batch_duration", default=600.0, type=float, help="Maximum padded seconds of a batch.")
+    parser.add_argument("--max_batch_size", default=None, type=int, help="Maximum number of files in a batch.")
+    parser.add_argument(
+        "--chunk_duration", default=None, type=float, help="Encode audio in chunks of this many seconds."
+    )
+    parser.add_argument(
+        "--context_duration", default=1.0, type=float, help="Seconds of audio context on each side of a chunk."
+    )
+    parser.add_argument("--entries_per_part", default=10000, type=int, help="Number of manifest entries per part.")
+    parser.add_argument(
+        "--part_indices", default=None, type=int, nargs="+", help="Parts to tokenize, all parts if not given."
+    )
+    parser.add_argument("--num_workers", default=4, type=int, help="Number of data loader workers.")
+    parser.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu", type=str)
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = get_args()
+
+    if not args.manifest_path.exists():
+        raise ValueError(f"Manifest {args.manifest_path} does not exist.")
+
+    model = AudioCodecModel.restore_from(args.codec_model_path, map_location=args.device).eval()
+    entries = read_manifest(args.manifest_path)
+
+    tokenize_manifest_to_store(
+        model,
+        entries,
+        audio_dir=args.audio_dir,
+        store_dir=str(args.store_dir),
+        max_batch_duration=args.max_batch_duration,
+        max_batch_size=args.max_batch_size,
+        chunk_duration=args.chunk_duration,
+        context_duration=args.context_duration,
+        entries_per_part=args.entries_per_part,
+        part_indices=args.part_indices,
+        num_workers=args.num_workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -23,6 +23,19 @@ $ python <nemo_root_path>/scripts/dataset_processing/tts/compute_features.py \
     --feature_dir=<data_root_path>/features \
     --overwrite \
     --num_workers=1
+
+With --feature_store, pitch and energy are computed with a batched pYIN implementation, every audio file is loaded
+and resampled once for both features, and the features are written to one feature store per feature in
+'<feature_dir>/<feature_name>' instead of one .npy file per utterance. Other features are saved as .npy files.
+
+$ python <nemo_root_path>/scripts/dataset_processing/tts/compute_features.py \
+    --feature_config_path=<nemo_root_path>/examples/tts/conf/features/feature_22050.yaml \
+    --manifest_path=<data_root_path>/manifest.json \
+    --audio_dir=<data_root_path>/audio \
+    --feature_dir=<data_root_path>/features \
+    --feature_store \
+    --batch_size=16 \
+    --num_workers=8
 """
 
 import argparse
@@ -34,6 +47,8 @@ from omegaconf import OmegaConf
 from tqdm import tqdm
 
 from nemo.collections.asr.parts.utils.manifest_utils import read_manifest
+from nemo.collections.tts.parts.preprocessing.features import EnergyFeaturizer, PitchFeaturizer
+from nemo.collections.tts.parts.preprocessing.pitch_extraction import write_pitch_energy_feature_stores
 
 
 def get_args():
@@ -63,6 +78,17 @@ def get_args():
     parser.add_argument(
         "--num_workers", default=1, type=int, help="Number of parallel threads to use. If -1 all CPUs are used."
     )
+    parser.add_argument(
+        "--feature_store",
+        action=argparse.BooleanOptionalAction,
+        help="If given, pitch and energy are computed in batches and written to feature stores.",
+    )
+    parser.add_argument(
+        "--batch_size", default=16, type=int, help="Number of utterances processed together with --feature_store.",
+    )
+    parser.add_argument(
+        "--device", default="cpu", type=str, help="Device of the pitch computation with --feature_store.",
+    )
 
     args = parser.parse_args()
     return args
@@ -101,6 +127,28 @@ def main():
             audio_filepath_set.add(audio_filepath)
         entries = final_entries
 
+    if args.feature_store:
+        pitch_featurizers = [f for f in featurizers.values() if isinstance(f, PitchFeaturizer)]
+        energy_featurizers = [f for f in featurizers.values() if isinstance(f, EnergyFeaturizer)]
+        if len(pitch_featurizers) > 1 or len(energy_featurizers) > 1:
+            raise ValueError("Feature stores support one pitch and one energy featurizer.")
+        store_names = [name for name, f in featurizers.items() if isinstance(f, (PitchFeaturizer, EnergyFeaturizer))]
+        print(f"Computing feature stores: {store_names}")
+        write_pitch_energy_feature_stores(
+            manifest_entries=entries,
+            audio_dir=audio_dir,
+            feature_dir=feature_dir,
+            pitch_featurizer=pitch_featurizers[0] if pitch_featurizers else None,
+            energy_featurizer=energy_featurizers[0] if energy_featurizers else None,
+            batch_size=args.batch_size,
+            num_workers=num_workers,
+            device=args.device,
+            overwrite=overwrite,
+        )
+        featurizers = {
+            name: f for name, f in featurizers.items() if not isinstance(f, (PitchFeaturizer, EnergyFeaturizer))
+        }
+
     for feature_name, featurizer in featurizers.items():
         print(f"Computing: {feature_name}")
         Parallel(n_jobs=num_workers)(
@@ -0,0 +1,89 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This script tokenizes the texts of TTS manifests with the text tokenizer of a model config, and writes the tokens
+to a text token store. Text normalization, word tokenization and G2P then do not run during training, when the
+store directory is given as 'text_token_store_dir' of TextToSpeechDataset or TTSDataset.
+
+The store of a tokenizer is a subdirectory named by the fingerprint of the tokenizer configuration, so the store of
+a changed tokenizer is created next to the existing ones. Texts which are already in the store are not tokenized
+again. The texts are read from the 'normalized_text' field, or from the 'text' field if it is not present.
+
+$ python <nemo_root_path>/scripts/dataset_processing/tts/compute_text_tokens.py \
+    --config_path=<nemo_root_path>/examples/tts/conf/fastpitch_align_v1.05.yaml \
+    --tokenizer_key=model.text_tokenizer \
+    --manifest_path <data_root_path>/train_manifest.json <data_root_path>/dev_manifest.json \
+    --store_dir=<data_root_path>/text_tokens \
+    --num_workers=8
+"""
+
+import argparse
+from pathlib import Path
+
+from hydra.utils import instantiate
+from omegaconf import OmegaConf
+
+from nemo.collections.asr.parts.utils.manifest_utils import read_manifest
+from nemo.collections.tts.parts.preprocessing.text_token_store import write_text_token_store
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter, description="Compute TTS text tokens.",
+    )
+    parser.add_argument(
+        "--config_path", required=True, type=Path, help="Path to model config file with the text tokenizer.",
+    )
+    parser.add_argument(
+        "--tokenizer_key", default="model.text_tokenizer", type=str, help="Key of the text tokenizer in the config.",
+    )
+    parser.add_argument(
+        "--manifest_path", required=True, type=Path, nargs="+", help="Path(s) to manifests with the texts.",
+    )
+    parser.add_argument(
+        "--store_dir", required=True, type=Path, help="Path to directory where the text tokens will be stored.",
+    )
+    parser.add_argument(
+        "--num_workers", default=1, type=int, help="Number of parallel processes to use. If -1 all CPUs are used."
+    )
+
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = get_args()
+
+    config = OmegaConf.load(args.config_path)
+    tokenizer_config = OmegaConf.select(config, args.tokenizer_key)
+    if tokenizer_config is None:
+        raise ValueError(f"Config {args.config_path} does not contain {args.tokenizer_key}.")
+    text_tokenizer = instantiate(tokenizer_config)
+
+    texts = []
+    for manifest_path in args.manifest_path:
+        if not manifest_path.exists():
+            raise ValueError(f"Manifest {manifest_path} does not exist.")
+        for entry in read_manifest(manifest_path):
+            texts.append(entry.get("normalized_text", entry["text"]))
+
+    store_path = write_text_token_store(
+        texts, text_tokenizer, store_dir=args.store_dir, num_workers=args.num_workers
+    )
+    print(f"Text tokens are stored in {store_path}")
+
+
+if __name__ == "__main__":
+    main()
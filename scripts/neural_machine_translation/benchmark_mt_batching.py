@@ -0,0 +1,96 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark of the token-budget batching of TranslationDataset and MTDataPreproc
+(nemo.collections.nlp.data.machine_translation.machine_translation_dataset.pack_lengths_into_batches).
+
+Sentence lengths are either loaded from .npy files of source and target token counts, or sampled from a
+log-normal distribution of source lengths with target lengths that are correlated with the source lengths,
+similar to tokenized web-crawled parallel corpora. The script reports the packing time, the number of batches
+and the fraction of padding tokens.
+
+python benchmark_mt_batching.py \
+    --num_pairs 1000000 10000000 \
+    --tokens_in_batch 16000 \
+    --output_file=results.json
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from nemo.collections.nlp.data.machine_translation.machine_translation_dataset import pack_lengths_into_batches
+from nemo.utils import logging
+
+
+def sample_lengths(num_pairs: int, max_seq_length: int, seed: int):
+    rng = np.random.default_rng(seed)
+    src_lengths = np.clip(rng.lognormal(mean=3.2, sigma=0.7, size=num_pairs), 1, max_seq_length)
+    ratio = rng.lognormal(mean=0.05, sigma=0.2, size=num_pairs)
+    tgt_lengths = np.clip(src_lengths * ratio, 1, max_seq_length)
+    return src_lengths.astype(np.int64), tgt_lengths.astype(np.int64)
+
+
+def run(src_lengths, tgt_lengths, tokens_in_batch: int) -> dict:
+    start = time.perf_counter()
+    batches = pack_lengths_into_batches(src_lengths, tgt_lengths, tokens_in_batch)
+    elapsed = time.perf_counter() - start
+
+    batch_sizes = np.array([len(batch) for batch in batches])
+    padded_tokens = sum(len(b) * (src_lengths[b].max() + tgt_lengths[b].max()) for b in batches)
+    return {
+        "num_pairs": len(src_lengths),
+        "tokens_in_batch": tokens_in_batch,
+        "time_sec": elapsed,
+        "pairs_per_sec": len(src_lengths) / elapsed,
+        "num_batches": len(batches),
+        "mean_batch_size": float(batch_sizes.mean()),
+        "padding_fraction": float(1.0 - (src_lengths.sum() + tgt_lengths.sum()) / padded_tokens),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--num_pairs", type=int, nargs="+", default=[100_000, 1_000_000], help="synthetic corpus sizes"
+    )
+    parser.add_argument("--tokens_in_batch", type=int, nargs="+", default=[4096, 16000], help="token budgets")
+    parser.add_argument("--max_seq_length", type=int, default=512, help="maximum synthetic sentence length")
+    parser.add_argument("--src_lengths", type=str, default=None, help="optional .npy file of source lengths")
+    parser.add_argument("--tgt_lengths", type=str, default=None, help="optional .npy file of target lengths")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output_file", type=str, default=None, help="optional path of the JSON results")
+    args = parser.parse_args()
+
+    if args.src_lengths is not None:
+        corpora = [(np.load(args.src_lengths), np.load(args.tgt_lengths))]
+    else:
+        corpora = [sample_lengths(num_pairs, args.max_seq_length, args.seed) for num_pairs in args.num_pairs]
+
+    results = []
+    for src_lengths, tgt_lengths in corpora:
+        for tokens_in_batch in args.tokens_in_batch:
+            results.append(run(src_lengths, tgt_lengths, tokens_in_batch))
+            logging.info(json.dumps(results[-1]))
+
+    if args.output_file:
+        with open(args.output_file, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Measures the cost of the EMA update per optimizer step for unsharded and sharded EMA weights.
+
+The benchmark runs on CPU with `--world_size` processes (gloo backend) simulating data-parallel ranks,
+so that the effect of sharding on the per-rank update cost can be measured without GPUs.
+The time of the wrapped optimizer step is measured separately and subtracted.
+
+Example:
+    python scripts/performance/benchmark_ema_update.py --num_params 50_000_000 --world_size 4 --steps 20
+"""
+
+import argparse
+import json
+import os
+import time
+
+import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
+
+from nemo.collections.common.callbacks.ema import EMAOptimizer
+
+
+def make_params(num_params: int, num_tensors: int):
+    sizes = [num_params // num_tensors] * num_tensors
+    sizes[-1] += num_params - sum(sizes)
+    return [torch.nn.Parameter(torch.randn(size)) for size in sizes]
+
+
+def time_steps(optimizer, params, steps: int, warmup: int = 2) -> float:
+    for step in range(warmup + steps):
+        if step == warmup:
+            dist.barrier()
+            start = time.perf_counter()
+        for param in params:
+            param.grad = torch.ones_like(param)
+        optimizer.step()
+        if isinstance(optimizer, EMAOptimizer):
+            optimizer.join()
+    dist.barrier()
+    return (time.perf_counter() - start) / steps
+
+
+def run(rank: int, args):
+    os.environ.setdefault("MASTER_ADDR", "127.0.0.1")
+    os.environ.setdefault("MASTER_PORT", str(args.port))
+    dist.init_process_group("gloo", rank=rank, world_size=args.world_size)
+    torch.set_num_threads(args.num_threads)
+
+    params = make_params(args.num_params, args.num_tensors)
+    base_time = time_steps(torch.optim.SGD(params, lr=1e-6), params, args.steps)
+
+    results = {"num_params": args.num_params, "world_size": args.world_size, "optimizer_step_ms": base_time * 1e3}
+    configs = {"unsharded": dict(sharded=False)}
+    for chunk_numel in args.chunk_numel:
+        configs[f"sharded_chunk{chunk_numel}"] = dict(sharded=True, chunk_numel=chunk_numel)
+    for name, kwargs in configs.items():
+        optimizer = EMAOptimizer(
+            torch.optim.SGD(params, lr=1e-6), device=torch.device("cpu"), decay=0.999, **kwargs
+        )
+        step_time = time_steps(optimizer, params, args.steps)
+        start = time.perf_counter()
+        with optimizer.swap_ema_weights():
+            pass
+        swap_time = time.perf_counter() - start
+        results[name] = {"ema_update_ms": (step_time - base_time) * 1e3, "swap_ms": swap_time * 1e3}
+        del optimizer
+
+    if rank == 0:
+        print(json.dumps(results, indent=2))
+        if args.output_file:
+            with open(args.output_file, "w") as f:
+                json.dump(results, f, indent=2)
+    dist.destroy_process_group()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--num_params", type=int, default=10_000_000, help="total number of parameters")
+    parser.add_argument("--num_tensors", type=int, default=100, help="number of parameter tensors")
+    parser.add_argument("--world_size", type=int, default=2, help="number of simulated data-parallel ranks")
+    parser.add_argument("--steps", type=int, default=10, help="number of measured optimizer steps")
+    parser.add_argument(
+        "--chunk_numel", type=int, nargs="+", default=[2**20, 2**22], help="chunk sizes of the sharded update"
+    )
+    parser.add_argument("--num_threads", type=int, default=1, help="torch threads per process")
+    parser.add_argument("--port", type=int, default=29511, help="port for the gloo process group")
+    parser.add_argument("--output_file", type=str, default=None, help="optional path of the JSON results")
+    args = parser.parse_args()
+    mp.spawn(run, args=(args,), nprocs=args.world_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark of the ASR decoding strategies (CTC, RNN-T, TDT and multitask AED) on synthetic inputs.
+
+CTC strategies decode random log-probabilities of shape [B, T, V + 1], RNN-T and TDT strategies decode random
+encoder outputs with randomly initialized prediction and joint networks, and AED strategies decode random encoder
+outputs with a randomly initialized transformer decoder. `--blank_bias` is added to the blank logit of the CTC
+log-probabilities and of the joint network to control how many labels are emitted per frame.
+
+Every strategy runs in a separate process, so the peak memory (maximum resident set size) of one strategy does not
+include the memory of the others. The script reports the decoded utterances per second, percentiles of the latency
+of a batch and the peak memory of every strategy. Strategies whose dependencies are not installed are reported as
+skipped, and strategies that fail, crash or exceed `--timeout` are reported as errors.
+
+The results are saved as JSON. With `--baseline_file`, the results are compared with the results of a previous run,
+e.g. of the previous release, and strategies slower by more than `--tolerance` are reported as regressions
+(the script exits with a non-zero status when `--fail_on_regression` is set).
+
+# Benchmark all strategies on CPU
+python benchmark_asr_decoding.py \
+    --batch_size=16 \
+    --num_frames=400 \
+    --vocab_size=1024 \
+    --output_file=decoding_results.json
+
+# Compare a subset of the strategies with a previous run
+python benchmark_asr_decoding.py \
+    --strategies ctc_greedy_batch rnnt_greedy_batch_loop_labels tdt_greedy_batch \
+    --baseline_file=decoding_results.json \
+    --output_file=new_decoding_results.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import resource
+import sys
+import time
+from queue import Empty
+from typing import Optional
+from unittest.mock import Mock
+
+import numpy as np
+import torch
+
+from nemo.utils import logging
+
+
+def ctc_inputs(args):
+    log_probs = torch.randn(args.batch_size, args.num_frames, args.vocab_size + 1)
+    log_probs[..., args.vocab_size] += args.blank_bias
+    return log_probs.log_softmax(dim=-1)
+
+
+def encoder_inputs(args, channels_first: bool = True):
+    encoder_output = torch.randn(args.batch_size, args.encoder_dim, args.num_frames)
+    return encoder_output if channels_first else encoder_output.transpose(1, 2).contiguous()
+
+
+def build_rnnt_modules(args, durations=()):
+    from nemo.collections.asr.modules.rnnt import RNNTDecoder, RNNTJoint
+
+    decoder = RNNTDecoder(
+        prednet={'pred_hidden': args.pred_dim, 'pred_rnn_layers': 1}, vocab_size=args.vocab_size, blank_as_pad=True
+    )
+    joint = RNNTJoint(
+        jointnet={
+            'encoder_hidden': args.encoder_dim,
+            'pred_hidden': args.pred_dim,
+            'joint_hidden': args.pred_dim,
+            'activation': 'relu',
+        },
+        num_classes=args.vocab_size,
+        num_extra_outputs=len(durations),
+    )
+    with torch.no_grad():
+        joint.joint_net[-1].bias[args.vocab_size] += args.blank_bias
+    decoder.freeze()
+    joint.freeze()
+    return decoder.eval(), joint.eval()
+
+
+def build_aed_modules(args):
+    from nemo.collections.asr.modules.transformer.transformer import TransformerDecoderNM
+    from nemo.collections.asr.parts.submodules.token_classifier import TokenClassifier
+
+    decoder = TransformerDecoderNM(
+        vocab_size=args.vocab_size,
+        hidden_size=args.encoder_dim,
+        num_layers=args.aed_num_layers,
+        inner_size=4 * args.encoder_dim,
+        num_attention_heads=4,
+        max_sequence_length=args.aed_max_generation_delta + 8,
+    ).eval()
+    classifier = TokenClassifier(hidden_size=args.encoder_dim, num_classes=args.vocab_size, log_softmax=True).eval()
+    with torch.no_grad():
+        # the eos token (2) is the "blank" of AED decoding, the bias controls the length of the hypotheses
+        classifier.mlp.layer0.bias[2] += args.blank_bias
+    tokenizer = Mock(pad=0, bos=1, eos=2)
+    return decoder, classifier, tokenizer
+
+
+def ctc_strategy(name, **kwargs):
+    def build(args):
+        from nemo.collections.asr.parts.submodules import ctc_beam_decoding, ctc_greedy_decoding
+
+        if name == 'beam':
+            decoding = ctc_beam_decoding.BeamCTCInfer(blank_id=args.vocab_size, beam_size=args.beam_size, **kwargs)
+            if kwargs.get('search_type') == 'default':
+                decoding.kenlm_path = args.kenlm_path
+            decoding.set_vocabulary([chr(ord('a') + idx % 26) for idx in range(args.vocab_size)])
+            decoding.set_decoding_type('char')
+        else:
+            decoding = getattr(ctc_greedy_decoding, name)(blank_id=args.vocab_size, **kwargs)
+        log_probs = ctc_inputs(args)
+        return lambda lengths: decoding(decoder_output=log_probs, decoder_lengths=lengths)
+
+    return build
+
+
+def rnnt_strategy(name, **kwargs):
+    def build(args):
+        from nemo.collections.asr.parts.submodules import rnnt_beam_decoding, rnnt_greedy_decoding
+
+        decoder, joint = build_rnnt_modules(args)
+        if name == 'BeamRNNTInfer':
+            decoding = rnnt_beam_decoding.BeamRNNTInfer(decoder, joint, beam_size=args.beam_size, **kwargs)
+        else:
+            decoding = getattr(rnnt_greedy_decoding, name)(
+                decoder, joint, blank_index=args.vocab_size, max_symbols_per_step=args.max_symbols, **kwargs
+            )
+        encoder_output = encoder_inputs(args)
+        return lambda lengths: decoding(encoder_output=encoder_output, encoded_lengths=lengths)
+
+    return build
+
+
+def tdt_strategy(name, **kwargs):
+    def build(args):
+        from nemo.collections.asr.parts.submodules import rnnt_greedy_decoding, tdt_beam_decoding
+
+        decoder, joint = build_rnnt_modules(args, durations=args.tdt_durations)
+        if name == 'BeamTDTInfer':
+            decoding = tdt_beam_decoding.BeamTDTInfer(
+                decoder, joint, durations=args.tdt_durations, beam_size=args.beam_size, **kwargs
+            )
+        else:
+            decoding = getattr(rnnt_greedy_decoding, name)(
+                decoder,
+                joint,
+                blank_index=args.vocab_size,
+                durations=args.tdt_durations,
+                max_symbols_per_step=args.max_symbols,
+                **kwargs,
+            )
+        encoder_output = encoder_inputs(args)
+        return lambda lengths: decoding(encoder_output=encoder_output, encoded_lengths=lengths)
+
+    return build
+
+
+def aed_strategy(name, **kwargs):
+    def build(args):
+        from nemo.collections.asr.parts.submodules import multitask_beam_decoding, multitask_greedy_decoding
+
+        decoder, classifier, tokenizer = build_aed_modules(args)
+        if name == 'TransformerAEDBeamInfer':
+            decoding = multitask_beam_decoding.TransformerAEDBeamInfer(
+                decoder,
+                classifier,
+                tokenizer,
+                beam_size=args.beam_size,
+                max_generation_delta=args.aed_max_generation_delta,
+                **kwargs,
+            )
+        else:
+            decoding = multitask_greedy_decoding.TransformerAEDGreedyInfer(
+                decoder, classifier, tokenizer, max_generation_delta=args.aed_max_generation_delta, **kwargs
+            )
+        encoder_output = encoder_inputs(args, channels_first=False)
+        # prompt of the bos token followed by a task token
+        decoder_input_ids = torch.tensor([[1, 3]]).repeat(args.batch_size, 1)
+
+        def run(lengths):
+            mask = (torch.arange(args.num_frames)[None, :] < lengths[:, None]).float()
+            return decoding(
+                encoder_hidden_states=encoder_output, encoder_input_mask=mask, decoder_input_ids=decoder_input_ids
+            )
+
+        return run
+
+    return build
+
+
+STRATEGIES = {
+    'ctc_greedy': ctc_strategy('GreedyCTCInfer'),
+    'ctc_greedy_batch': ctc_strategy('GreedyBatchedCTCInfer'),
+    'ctc_beam_default': ctc_strategy('beam', search_type='default'),
+    'ctc_beam_pyctcdecode': ctc_strategy('beam', search_type='pyctcdecode'),
+    'ctc_beam_flashlight': ctc_strategy('beam', search_type='flashlight'),
+    'rnnt_greedy': rnnt_strategy('GreedyRNNTInfer'),
+    'rnnt_greedy_batch_frame_loop': rnnt_strategy(
+        'GreedyBatchedRNNTInfer', loop_labels=False, use_cuda_graph_decoder=False
+    ),
+    'rnnt_greedy_batch_loop_labels': rnnt_strategy(
+        'GreedyBatchedRNNTInfer', loop_labels=True, use_cuda_graph_decoder=False
+    ),
+    'rnnt_beam_default': rnnt_strategy('BeamRNNTInfer', search_type='default'),
+    'rnnt_beam_tsd': rnnt_strategy('BeamRNNTInfer', search_type='tsd'),
+    'rnnt_beam_alsd': rnnt_strategy('BeamRNNTInfer', search_type='alsd'),
+    'rnnt_beam_maes': rnnt_strategy('BeamRNNTInfer', search_type='maes'),
+    'tdt_greedy': tdt_strategy('GreedyTDTInfer'),
+    'tdt_greedy_batch': tdt_strategy('GreedyBatchedTDTInfer', use_cuda_graph_decoder=False),
+    'tdt_beam_default': tdt_strategy('BeamTDTInfer', search_type='default'),
+    'tdt_beam_maes': tdt_strategy('BeamTDTInfer', search_type='maes'),
+    'aed_greedy': aed_strategy('TransformerAEDGreedyInfer'),
+    'aed_beam': aed_strategy('TransformerAEDBeamInfer'),
+}
+
+
+def peak_rss_MB() -> float:
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def benchmark_strategy(name: str, args) -> dict:
+    """Runs a strategy with warmup and measures the latency of every batch."""
+    torch.manual_seed(args.seed)
+    torch.set_num_threads(args.num_threads)
+    rng = np.random.default_rng(args.seed)
+    batches = [
+        torch.from_numpy(rng.integers(args.num_frames // 2, args.num_frames + 1, size=args.batch_size))
+        for _ in range(args.num_batches)
+    ]
+    batches[0][0] = args.num_frames
+
+    try:
+        run = STRATEGIES[name](args)
+        start_rss = peak_rss_MB()
+        with torch.inference_mode():
+            for lengths in batches[: args.warmup_batches]:
+                run(lengths)
+            latencies = []
+            for lengths in batches:
+                start = time.perf_counter()
+                run(lengths)
+                latencies.append(time.perf_counter() - start)
+    except (ImportError, ModuleNotFoundError, FileNotFoundError, NotImplementedError) as e:
+        return {"status": "skipped", "reason": f"{type(e).__name__}: {e}"}
+
+    latencies = np.array(latencies)
+    num_frames = int(sum(lengths.sum() for lengths in batches))
+    return {
+        "status": "ok",
+        "utterances_per_sec": args.batch_size * len(batches) / latencies.sum(),
+        "frames_per_sec": num_frames / latencies.sum(),
+        "latency_p50_ms": float(np.percentile(latencies, 50) * 1e3),
+        "latency_p99_ms": float(np.percentile(latencies, 99) * 1e3),
+        "peak_rss_MB": peak_rss_MB(),
+        "peak_rss_increase_MB": peak_rss_MB() - start_rss,
+    }
+
+
+def _benchmark_in_process(queue, name, args):
+    try:
+        result = benchmark_strategy(name, args)
+    except Exception as e:
+        result = {"status": "error", "reason": f"{type(e).__name__}: {e}"}
+    queue.put(result)
+
+
+def run_isolated(name: str, args, timeout: Optional[float] = None, poll_interval: float = 1.0) -> dict:
+    """Runs the benchmark of a strategy in a new process, so the peak memory is measured for the strategy alone.
+
+    A process that exits without a result (e.g. killed by the OOM killer) or runs longer than `timeout` seconds
+    is reported as an error instead of blocking the benchmark.
+    """
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_benchmark_in_process, args=(queue, name, args))
+    process.start()
+    start = time.monotonic()
+    result = None
+    while result is None:
+        try:
+            result = queue.get(timeout=poll_interval)
+        except Empty:
+            if process.exitcode is not None:
+                try:
+                    # the result may have arrived after the last poll
+                    result = queue.get(timeout=poll_interval)
+                except Empty:
+                    result = {"status": "error", "reason": f"process exited with code {process.exitcode}"}
+            elif timeout is not None and time.monotonic() - start > timeout:
+                process.terminate()
+                result = {"status": "error", "reason": f"timed out after {timeout} s"}
+    process.join()
+    return result
+
+
+def find_regressions(results: dict, baseline: dict, tolerance: float) -> dict:
+    """Strategies whose throughput dropped by more than `tolerance` relative to the baseline."""
+    regressions = {}
+    for name, result in results.items():
+        reference = baseline.get(name, {})
+        if result.get("status") != "ok" or reference.get("status") != "ok":
+            continue
+        ratio = result["utterances_per_sec"] / reference["utterances_per_sec"]
+        if ratio < 1.0 - tolerance:
+            regressions[name] = {"throughput_ratio": ratio}
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--strategies", type=str, nargs="+", default=list(STRATEGIES), choices=list(STRATEGIES), help="strategies"
+    )
+    parser.add_argument("--batch_size", type=int, default=16, help="number of utterances per batch (B)")
+    parser.add_argument("--num_frames", type=int, default=200, help="maximum number of encoder frames (T)")
+    parser.add_argument("--vocab_size", type=int, default=256, help="vocabulary size without the blank (V)")
+    parser.add_argument("--encoder_dim", type=int, default=256, help="encoder output dimension")
+    parser.add_argument("--pred_dim", type=int, default=320, help="prediction and joint network dimension")
+    parser.add_argument("--blank_bias", type=float, default=4.0, help="bias of the blank logit")
+    parser.add_argument("--beam_size", type=int, default=4, help="beam size of the beam search strategies")
+    parser.add_argument("--max_symbols", type=int, default=10, help="max symbols per step of greedy RNN-T and TDT")
+    parser.add_argument("--tdt_durations", type=int, nargs="+", default=[0, 1, 2, 3, 4], help="TDT durations")
+    parser.add_argument("--aed_num_layers", type=int, default=2, help="number of layers of the AED decoder")
+    parser.add_argument("--aed_max_generation_delta", type=int, default=32, help="max generated tokens of AED")
+    parser.add_argument("--kenlm_path", type=str, default=None, help="KenLM model of the default CTC beam search")
+    parser.add_argument("--num_batches", type=int, default=10, help="number of measured batches")
+    parser.add_argument("--warmup_batches", type=int, default=2, help="number of warmup batches")
+    parser.add_argument("--num_threads", type=int, default=1, help="torch threads")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=None, help="max seconds of the benchmark of a strategy")
+    parser.add_argument("--baseline_file", type=str, default=None, help="JSON results of a previous run to compare")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed relative drop of the throughput")
+    parser.add_argument("--fail_on_regression", action="store_true", help="exit with status 1 on regressions")
+    parser.add_argument("--output_file", type=str, default=None, help="optional path of the JSON results")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.strategies:
+        results[name] = run_isolated(name, args, timeout=args.timeout)
+        logging.info(f"{name}: {json.dumps(results[name])}")
+
+    output = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("baseline_file", "output_file")},
+        "torch_version": torch.__version__,
+        "results": results,
+    }
+    if args.baseline_file:
+        with open(args.baseline_file) as f:
+            baseline = json.load(f)
+        output["regressions"] = find_regressions(results, baseline["results"], args.tolerance)
+        for name, regression in output["regressions"].items():
+            logging.warning(f"Regression of {name}: {regression['throughput_ratio']:.2f}x of the baseline throughput")
+
+    print(json.dumps(output, indent=2))
+    if args.output_file:
+        with open(args.output_file, "w") as f:
+            json.dump(output, f, indent=2)
+    if args.fail_on_regression and output.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
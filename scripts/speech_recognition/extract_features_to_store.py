@@ -0,0 +1,124 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+# This script extracts log-mel filterbank features of an audio manifest into a sharded feature store
+# (see nemo/collections/asr/parts/preprocessing/feature_store.py) that can be read by the
+# FeatureToCharDataset, FeatureToBPEDataset, FeatureToLabelDataset and FeatureToMultiLabelDataset
+# with `feature_store_dir=<store_dir>`.
+#
+# The manifest is split into contiguous chunks, every worker process writes the features of a chunk as
+# one part of the store. The output manifest contains the entries of the input manifest with a `feature_file`
+# whose file id is the key of the features in the store, i.e. the file id of the audio file.
+# Features are not normalized, the datasets normalize them with `normalize="post_norm"`.
+
+# Usage:
+python extract_features_to_store.py \
+    --manifest_path=<path to the audio manifest file> \
+    --store_dir=<path to output feature store directory> \
+    --output_manifest_path=<path to the output feature manifest file> \
+    --features=80 \
+    --workers=8
+"""
+import argparse
+import os
+from multiprocessing import Pool
+
+import torch
+
+from nemo.collections.asr.parts.preprocessing.feature_store import FeatureStoreWriter, get_feature_store_key
+from nemo.collections.asr.parts.preprocessing.features import FilterbankFeatures
+from nemo.collections.asr.parts.preprocessing.segment import AudioSegment
+from nemo.collections.asr.parts.utils.manifest_utils import read_manifest, write_manifest
+from nemo.utils import logging
+
+parser = argparse.ArgumentParser(description="Extract filterbank features of an audio manifest into a feature store")
+parser.add_argument("--manifest_path", required=True, type=str, help="Path to the input audio manifest")
+parser.add_argument("--store_dir", required=True, type=str, help="Directory of the output feature store")
+parser.add_argument("--output_manifest_path", required=True, type=str, help="Path to the output feature manifest")
+parser.add_argument("--sample_rate", default=16000, type=int, help="Sample rate of the features")
+parser.add_argument("--window_size", default=0.025, type=float, help="Window size in seconds")
+parser.add_argument("--window_stride", default=0.01, type=float, help="Window stride in seconds")
+parser.add_argument("--features", default=80, type=int, help="Number of mel filterbanks")
+parser.add_argument("--n_fft", default=None, type=int, help="Size of the FFT, defaults to the window size")
+parser.add_argument("--max_shard_size_MB", default=1024.0, type=float, help="Maximum size of a shard file")
+parser.add_argument("--chunk_size", default=2000, type=int, help="Number of utterances per part of the store")
+parser.add_argument("--workers", default=1, type=int, help="Number of worker processes, -1 to use all cores")
+
+
+def build_featurizer(args) -> FilterbankFeatures:
+    return FilterbankFeatures(
+        sample_rate=args.sample_rate,
+        n_window_size=int(args.window_size * args.sample_rate),
+        n_window_stride=int(args.window_stride * args.sample_rate),
+        n_fft=args.n_fft,
+        nfilt=args.features,
+        normalize=None,
+        dither=0.0,
+        pad_to=0,
+        max_duration=0.0,
+    ).eval()
+
+
+def extract_chunk(args, chunk_idx, entries):
+    torch.set_num_threads(1)
+    featurizer = build_featurizer(args)
+    with FeatureStoreWriter(
+        args.store_dir, part_name=f'part_{chunk_idx:05d}', max_shard_size_MB=args.max_shard_size_MB
+    ) as writer:
+        for entry in entries:
+            audio = AudioSegment.from_file(
+                entry['audio_filepath'],
+                target_sr=args.sample_rate,
+                offset=entry.get('offset', 0),
+                duration=entry.get('duration', 0),
+            )
+            samples = torch.as_tensor(audio.samples, dtype=torch.float32).unsqueeze(0)
+            with torch.no_grad():
+                features, length = featurizer(samples, torch.tensor([samples.shape[1]]))
+            writer.add(get_feature_store_key(entry['audio_filepath']), features[0, :, : length[0]])
+    return len(entries)
+
+
+def main():
+    args = parser.parse_args()
+    entries = read_manifest(args.manifest_path)
+    keys = [get_feature_store_key(entry['audio_filepath']) for entry in entries]
+    if len(set(keys)) != len(keys):
+        raise ValueError("The file ids of the audio files must be unique to be used as keys of the feature store")
+
+    os.makedirs(args.store_dir, exist_ok=True)
+    chunks = [
+        (args, chunk_idx, entries[start : start + args.chunk_size])
+        for chunk_idx, start in enumerate(range(0, len(entries), args.chunk_size))
+    ]
+    workers = os.cpu_count() if args.workers == -1 else args.workers
+    if workers > 1:
+        with Pool(workers) as pool:
+            num_extracted = sum(pool.starmap(extract_chunk, chunks))
+    else:
+        num_extracted = sum(extract_chunk(*chunk) for chunk in chunks)
+
+    output_entries = []
+    for entry, key in zip(entries, keys):
+        # the file id of the feature file is the key of the features in the store
+        entry = {k: v for k, v in entry.items() if k != 'audio_filepath'}
+        entry['feature_file'] = os.path.join(args.store_dir, key + '.fs')
+        output_entries.append(entry)
+    write_manifest(args.output_manifest_path, output_entries)
+    logging.info(f"Extracted features of {num_extracted} utterances in {len(chunks)} parts to {args.store_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+SCRIPT_PATH = Path(__file__).parents[4] / "scripts" / "speech_recognition" / "benchmark_asr_decoding.py"
+
+
+@pytest.fixture(scope="module")
+def benchmark_script():
+    spec = importlib.util.spec_from_file_location("benchmark_asr_decoding", SCRIPT_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestBenchmarkASRDecoding:
+    @pytest.mark.unit
+    def test_find_regressions(self, benchmark_script):
+        baseline = {
+            "ctc_greedy": {"status": "ok", "utterances_per_sec": 100.0},
+            "rnnt_greedy": {"status": "ok", "utterances_per_sec": 50.0},
+            "tdt_greedy": {"status": "ok", "utterances_per_sec": 40.0},
+            "aed_greedy": {"status": "skipped", "reason": "ImportError"},
+            "ctc_beam": {"status": "ok", "utterances_per_sec": 10.0},
+        }
+        results = {
+            # within the tolerance
+            "ctc_greedy": {"status": "ok", "utterances_per_sec": 95.0},
+            "rnnt_greedy": {"status": "ok", "utterances_per_sec": 40.0},
+            # faster than the baseline
+            "tdt_greedy": {"status": "ok", "utterances_per_sec": 80.0},
+            # not comparable
+            "aed_greedy": {"status": "ok", "utterances_per_sec": 1.0},
+            "ctc_beam": {"status": "error", "reason": "process exited with code -9"},
+            "rnnt_beam": {"status": "ok", "utterances_per_sec": 1.0},
+        }
+        regressions = benchmark_script.find_regressions(results, baseline, tolerance=0.1)
+        assert regressions == {"rnnt_greedy": {"throughput_ratio": pytest.approx(0.8)}}
+        assert benchmark_script.find_regressions(results, baseline, tolerance=0.25) == {}
@@ -0,0 +1,107 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import torch
+
+
+def skip_test_if_unsupported(k2_is_appropriate):
+    supported, msg = k2_is_appropriate
+    if not supported:
+        pytest.skip(f"k2 test is skipped. Reason : {msg}")
+
+
+def assert_same_graphs(graphs, expected):
+    from nemo.core.utils.k2_guard import k2
+
+    assert graphs.shape[0] == expected.shape[0]
+    for i in range(expected.shape[0]):
+        assert k2.to_str_simple(graphs[i]) == k2.to_str_simple(expected[i])
+        assert torch.equal(graphs[i].aux_labels, expected[i].aux_labels)
+
+
+TARGETS = torch.tensor([[1, 2, 3, 0], [2, 2, 0, 0], [1, 2, 3, 3], [3, 1, 0, 0]])
+TARGET_LENGTHS = torch.tensor([3, 2, 4, 2])
+
+
+class TestGraphCompilerCache:
+    @pytest.mark.unit
+    @pytest.mark.parametrize('topo_type', ['default', 'compact', 'shared_blank', 'minimal'])
+    def test_ctc_cache(self, k2_is_appropriate, tmp_path, topo_type):
+        skip_test_if_unsupported(k2_is_appropriate)
+        from nemo.collections.asr.parts.k2.graph_compilers import CtcTopologyCompiler
+
+        expected = CtcTopologyCompiler(4, 0, topo_type).compile(TARGETS, TARGET_LENGTHS)
+        compiler = CtcTopologyCompiler(4, 0, topo_type, graph_cache_size_MB=1, graph_cache_dir=str(tmp_path))
+        assert_same_graphs(compiler.compile(TARGETS[:2], TARGET_LENGTHS[:2]), expected[:2])
+        # the first two utterances are taken from the cache, the other two are compiled
+        assert_same_graphs(compiler.compile(TARGETS, TARGET_LENGTHS), expected)
+        assert (compiler.graph_cache.hits, compiler.graph_cache.misses) == (2, 4)
+
+        # a new compiler with the same topology reuses the graphs saved to disk
+        compiler = CtcTopologyCompiler(4, 0, topo_type, graph_cache_dir=str(tmp_path))
+        assert_same_graphs(compiler.compile(TARGETS, TARGET_LENGTHS), expected)
+        assert (compiler.graph_cache.hits, compiler.graph_cache.misses) == (4, 0)
+
+        # graphs of another topology are not reused
+        compiler = CtcTopologyCompiler(5, 0, topo_type, graph_cache_dir=str(tmp_path))
+        compiler.compile(TARGETS, TARGET_LENGTHS)
+        assert compiler.graph_cache.hits == 0
+
+    @pytest.mark.unit
+    def test_rnnt_cache(self, k2_is_appropriate):
+        skip_test_if_unsupported(k2_is_appropriate)
+        from nemo.collections.asr.parts.k2.graph_compilers import RnntTopologyCompiler
+
+        for max_adapter_length in [0, 3]:
+            expected = RnntTopologyCompiler(4, 0, max_adapter_length=max_adapter_length).compile(
+                TARGETS, TARGET_LENGTHS
+            )
+            compiler = RnntTopologyCompiler(4, 0, max_adapter_length=max_adapter_length, graph_cache_size_MB=1)
+            compiler.compile(TARGETS[1:3], TARGET_LENGTHS[1:3])
+            assert_same_graphs(compiler.compile(TARGETS, TARGET_LENGTHS), expected)
+            assert compiler.graph_cache.hits == 2
+
+    @pytest.mark.unit
+    def test_lru_eviction(self, k2_is_appropriate):
+        skip_test_if_unsupported(k2_is_appropriate)
+        from nemo.collections.asr.parts.k2.graph_compilers import CtcTopologyCompiler
+
+        compiler = CtcTopologyCompiler(4, 0, graph_cache_size_MB=1)
+        compiler.compile(TARGETS[:1], TARGET_LENGTHS[:1])
+        graph_size = compiler.graph_cache.size
+        compiler.graph_cache.max_size = 2 * graph_size
+        compiler.compile(TARGETS[1:2], TARGET_LENGTHS[1:2])
+        compiler.compile(TARGETS[:1], TARGET_LENGTHS[:1])
+        # the least recently used graph (the second one) is evicted
+        compiler.compile(TARGETS[3:4], TARGET_LENGTHS[3:4])
+        assert compiler.graph_cache.size <= 2 * graph_size
+        keys = [token_ids for _, token_ids in compiler.graph_cache._graphs]
+        assert (2, 2) not in keys and (1, 2, 3) in keys
+
+    @pytest.mark.unit
+    def test_ctc_num_cache_with_aux_graph(self, k2_is_appropriate):
+        skip_test_if_unsupported(k2_is_appropriate)
+        from nemo.collections.asr.parts.k2.graph_compilers import CtcNumGraphCompiler
+        from nemo.core.utils.k2_guard import k2
+
+        aux_graph = k2.Fsa.from_str("0 0 1 -0.5\n0 0 2 -0.5\n0 0 3 -1.0\n0 1 -1 0\n1", acceptor=True)
+        expected = CtcNumGraphCompiler(4, 0, aux_graph=aux_graph).compile(TARGETS, TARGET_LENGTHS)
+        compiler = CtcNumGraphCompiler(4, 0, graph_cache_size_MB=1)
+        # the call which changes the auxiliary graph does not use the cache
+        assert_same_graphs(compiler.compile(TARGETS, TARGET_LENGTHS, aux_graph=aux_graph), expected)
+        assert len(compiler.graph_cache) == 0 and compiler._topology_key is None
+        assert_same_graphs(compiler.compile(TARGETS, TARGET_LENGTHS, aux_graph=aux_graph), expected)
+        assert_same_graphs(compiler.compile(TARGETS, TARGET_LENGTHS, aux_graph=aux_graph), expected)
+        assert (compiler.graph_cache.hits, compiler.graph_cache.misses) == (4, 4)
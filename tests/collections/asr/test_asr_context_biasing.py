@@ -23,7 +23,11 @@ from lightning.pytorch import Trainer
 
 from nemo.collections.asr.models import EncDecCTCModelBPE
 from nemo.collections.asr.parts import context_biasing
-from nemo.collections.asr.parts.context_biasing.ctc_based_word_spotter import WSHyp
+from nemo.collections.asr.parts.context_biasing.ctc_based_word_spotter import (
+    WSHyp,
+    run_token_passing,
+    run_vectorized_token_passing,
+)
 from nemo.collections.asr.parts.utils import rnnt_utils
 
 
@@ -49,8 +53,67 @@ class TestContextGraphCTC:
         assert context_graph.root.next['▁g'].next['▁p'].next['▁u'].is_end
         assert context_graph.root.next['▁g'].next['▁p'].next['▁u'].word == 'gpu'
 
+    @pytest.mark.unit
+    def test_graph_compilation(self):
+        context_biasing_list = [["gpu", [[5, 6, 7], [5, 8, 9]]], ["good", [[5, 5, 10]]]]
+        context_graph = context_biasing.ContextGraphCTC(blank_id=1024)
+        context_graph.add_to_graph(context_biasing_list)
+        compiled_graph = context_graph.compile()
+        assert compiled_graph.num_states == context_graph.num_nodes + 1
+        assert compiled_graph.blank_token == 1024
+        assert compiled_graph.words == ["gpu", "good"]
+
+        # compare all transitions with the pointer-based graph
+        states = [context_graph.root]
+        seen = {context_graph.root.index}
+        while states:
+            state = states.pop()
+            begin, end = compiled_graph.arc_offsets[state.index], compiled_graph.arc_offsets[state.index + 1]
+            assert compiled_graph.arc_tokens[begin:end].tolist() == list(state.next.keys())
+            assert compiled_graph.arc_targets[begin:end].tolist() == [s.index for s in state.next.values()]
+            assert compiled_graph.is_end[state.index] == state.is_end
+            if state.is_end:
+                assert compiled_graph.words[compiled_graph.word_ids[state.index]] == state.word
+            for next_state in state.next.values():
+                if next_state.index not in seen:
+                    seen.add(next_state.index)
+                    states.append(next_state)
+
+    @pytest.mark.unit
+    def test_graph_compilation_requires_token_ids(self):
+        context_graph = context_biasing.ContextGraphCTC(blank_id=1024)
+        context_graph.add_to_graph([["gpu", [['▁g', 'p', 'u']]]])
+        with pytest.raises(ValueError):
+            context_graph.compile()
+
 
 class TestCTCWordSpotter:
+    @pytest.mark.unit
+    @pytest.mark.parametrize("beam_threshold", [5.0, 1e9])
+    def test_vectorized_token_passing(self, beam_threshold):
+        vocab_size, num_frames = 32, 60
+        blank_idx = vocab_size
+        rng = np.random.default_rng(0)
+        context_biasing_list = [
+            [f"word_{i}", [rng.integers(0, vocab_size, size=rng.integers(1, 5)).tolist() for _ in range(2)]]
+            for i in range(20)
+        ]
+        context_graph = context_biasing.ContextGraphCTC(blank_id=blank_idx)
+        context_graph.add_to_graph(context_biasing_list)
+
+        logits = rng.normal(size=(num_frames, vocab_size + 1)) * 3
+        logits[:, blank_idx] += 2
+        logprobs = torch.log_softmax(torch.from_numpy(logits), dim=-1).float().numpy()
+
+        ref_spotted_words = run_token_passing(
+            logprobs, context_graph, blank_idx=blank_idx, beam_threshold=beam_threshold, cb_weight=3.0
+        )
+        spotted_words = run_vectorized_token_passing(
+            logprobs, context_graph.compile(), blank_idx=blank_idx, beam_threshold=beam_threshold, cb_weight=3.0
+        )
+        assert len(ref_spotted_words) > 0
+        assert spotted_words == ref_spotted_words
+
     @pytest.mark.unit
     @pytest.mark.with_downloads
     def test_run_word_spotter(self, test_data_dir, conformer_ctc_bpe_model):
@@ -93,6 +156,18 @@ class TestCTCWordSpotter:
         assert ws_results[0].end_frame == 19
         assert round(ws_results[0].score, 4) == 8.9967
 
+        # with compiled context graph
+        compiled_ws_results = context_biasing.run_word_spotter(
+            ctc_logprobs,
+            context_graph.compile(),
+            asr_model,
+            blank_idx=asr_model.decoding.blank_id,
+            beam_threshold=5.0,
+            cb_weight=3.0,
+            ctc_ali_token_weight=0.6,
+        )
+        assert compiled_ws_results == ws_results
+
 
 class TestContextBiasingUtils:
     @pytest.mark.unit
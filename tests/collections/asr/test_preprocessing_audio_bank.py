@@ -0,0 +1,86 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import pickle
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from nemo.collections.asr.parts.preprocessing.audio_bank import AudioBank, get_audio_bank
+from nemo.collections.asr.parts.preprocessing.perturb import ImpulsePerturbation, NoisePerturbation
+from nemo.collections.asr.parts.preprocessing.segment import AudioSegment
+from nemo.collections.common.parts.preprocessing import collections, parsers
+
+
+@pytest.fixture()
+def noise_manifest(tmp_path):
+    rng = np.random.default_rng(0)
+    manifest_path = tmp_path / "noise_manifest.json"
+    with open(manifest_path, "w") as f:
+        for idx, num_samples in enumerate([1600, 4000, 800]):
+            audio_file = str(tmp_path / f"noise_{idx}.wav")
+            sf.write(audio_file, 0.1 * rng.standard_normal(num_samples), 16000)
+            f.write(json.dumps({"audio_filepath": audio_file, "duration": num_samples / 16000, "text": ""}) + "\n")
+    return str(manifest_path)
+
+
+class TestAudioBank:
+    @pytest.mark.unit
+    @pytest.mark.parametrize("sample_rate", [16000, 8000])
+    def test_build(self, noise_manifest, tmp_path, sample_rate):
+        manifest = collections.ASRAudioText(noise_manifest, parser=parsers.make_parser([]))
+        bank = get_audio_bank(manifest, str(tmp_path / "banks"), sample_rate)
+        assert len(bank) == 3
+        assert bank.sample_rate == sample_rate
+        for idx, entry in enumerate(manifest.data):
+            expected = AudioSegment.from_file(entry.audio_file, target_sr=sample_rate).samples
+            assert np.allclose(bank.get(idx).samples, expected, atol=1e-3)
+
+        # the cached bank is reused and is pickled without the memory map
+        assert get_audio_bank(manifest, str(tmp_path / "banks"), sample_rate).bank_dir == bank.bank_dir
+        bank = pickle.loads(pickle.dumps(bank))
+        assert bank._samples is None
+        assert np.allclose(bank.get(2).samples, expected, atol=1e-3)
+
+    @pytest.mark.unit
+    def test_sample(self, noise_manifest, tmp_path):
+        manifest = collections.ASRAudioText(noise_manifest, parser=parsers.make_parser([]))
+        bank = AudioBank.build(manifest, str(tmp_path / "bank"), 16000)
+        for _ in range(20):
+            segment = bank.sample(duration=0.075)
+            # the shortest entry is shorter than the requested duration
+            assert len(segment.samples) in [1200, 800]
+            assert segment.sample_rate == 16000
+        assert len(bank.sample().samples) in [1600, 4000, 800]
+
+    @pytest.mark.unit
+    def test_perturbations_with_bank(self, noise_manifest, tmp_path):
+        data = AudioSegment(0.1 * np.ones(1000, dtype=np.float32), 16000)
+        perturber = NoisePerturbation(noise_manifest, min_snr_db=0, max_snr_db=0, bank_dir=str(tmp_path / "banks"))
+        # the bank is built at construction and workers receive it without the memory map
+        assert os.listdir(str(tmp_path / "banks")) == [os.path.basename(perturber._bank.bank_dir)]
+        perturber._bank = pickle.loads(pickle.dumps(perturber._bank))
+        assert perturber._bank._samples is None
+        perturber.perturb(data)
+        assert not np.allclose(data.samples, 0.1)
+
+        with pytest.raises(ValueError):
+            perturber.perturb(AudioSegment(0.1 * np.ones(1000, dtype=np.float32), 8000))
+
+        perturber = ImpulsePerturbation(noise_manifest, bank_dir=str(tmp_path / "banks"))
+        perturber.perturb(data)
+        assert len(data.samples) == 1000
@@ -0,0 +1,125 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import pickle
+
+import numpy as np
+import pytest
+import torch
+
+from nemo.collections.asr.data.feature_to_label import FeatureToLabelDataset
+from nemo.collections.asr.parts.preprocessing.feature_store import (
+    FeatureStore,
+    FeatureStoreShardSampler,
+    FeatureStoreWriter,
+    get_feature_store_key,
+    shard_shuffled_order,
+)
+
+
+@pytest.fixture()
+def features():
+    rng = np.random.default_rng(0)
+    return {f'utt_{i}': rng.standard_normal((8, 10 + i)).astype(np.float32) for i in range(12)}
+
+
+def write_store(store_dir, features, num_parts=2, max_shard_size_MB=0.0005):
+    keys = list(features)
+    for part in range(num_parts):
+        with FeatureStoreWriter(str(store_dir), part_name=f'part_{part}', max_shard_size_MB=max_shard_size_MB) as w:
+            for key in keys[part::num_parts]:
+                w.add(key, features[key])
+
+
+class TestFeatureStore:
+    @pytest.mark.unit
+    def test_write_and_read(self, tmp_path, features):
+        write_store(tmp_path, features)
+        store = FeatureStore(str(tmp_path))
+
+        assert len(store) == len(features) and store.num_shards > 2
+        for key, expected in features.items():
+            assert key in store
+            loaded = store[key]
+            assert loaded.dtype == np.float16 and loaded.shape == expected.shape
+            np.testing.assert_allclose(loaded, expected, atol=1e-2)
+            # features are a view of the memory mapped shard
+            assert isinstance(loaded.base, np.memmap)
+        assert 'missing' not in store
+
+        # memory maps are not pickled
+        store[next(iter(features))]
+        copied = pickle.loads(pickle.dumps(store))
+        assert copied._memmaps == {}
+        np.testing.assert_array_equal(copied['utt_3'], store['utt_3'])
+
+    @pytest.mark.unit
+    def test_shard_shuffled_order(self, tmp_path, features):
+        shards = np.array([0, 0, 0, 1, 1, 2, 2, 2, 3])
+        order = shard_shuffled_order(shards, seed=1)
+        assert sorted(order) == list(range(len(shards)))
+        # items of a shard are consecutive
+        assert np.count_nonzero(np.diff(shards[order])) == 3
+        assert shard_shuffled_order(shards, shuffle=False) == list(range(len(shards)))
+
+        # the order is split into contiguous parts of equal length
+        orders = [shard_shuffled_order(shards, seed=1, rank=rank, world_size=2) for rank in range(2)]
+        assert orders[0] + orders[1][:-1] == order
+        assert orders[1][-1] == order[0]
+        # every rank gets items even if there are fewer shards than ranks
+        orders = [shard_shuffled_order(shards, seed=1, rank=rank, world_size=6) for rank in range(6)]
+        assert all(len(rank_order) == 2 for rank_order in orders)
+        assert set(sum(orders, [])) == set(range(len(shards)))
+
+        write_store(tmp_path, features)
+        store = FeatureStore(str(tmp_path))
+        visited = {key: value for key, value in store.iter_shards(seed=2)}
+        assert sorted(visited) == sorted(features)
+
+        feature_files = [os.path.join('/data', key + '.pt') for key in features]
+        sampler = FeatureStoreShardSampler(feature_files, store, seed=3)
+        first_epoch = list(sampler)
+        sampler.set_epoch(1)
+        assert sorted(first_epoch) == sorted(sampler) == list(range(len(features)))
+        assert len(sampler) == len(features)
+        from_shards = FeatureStoreShardSampler.from_shards(sampler.shards, seed=3)
+        from_shards.set_epoch(1)
+        assert list(from_shards) == list(sampler)
+
+        # items which are not in the store are sampled as well
+        sampler = FeatureStoreShardSampler(feature_files + ['/data/missing.pt'], store, seed=3, rank=1, world_size=2)
+        assert len(sampler) == len(list(sampler)) == len(features) // 2 + 1
+
+    @pytest.mark.unit
+    def test_feature_dataset_from_store(self, tmp_path, features):
+        store_dir = tmp_path / 'store'
+        write_store(store_dir, features)
+        manifest_path = tmp_path / 'manifest.json'
+        with open(manifest_path, 'w', encoding='utf-8') as fp:
+            for key in features:
+                entry = {'feature_file': str(store_dir / f'{key}.fs'), 'duration': 100000, 'label': '0'}
+                fp.write(json.dumps(entry) + '\n')
+
+        dataset = FeatureToLabelDataset(
+            manifest_filepath=str(manifest_path), labels=['0'], feature_store_dir=str(store_dir)
+        )
+        sampler = dataset.get_sampler(seed=1)
+        assert sorted(sampler) == list(range(len(features)))
+        for idx, (key, expected) in enumerate(features.items()):
+            f, fl, _, _ = dataset[idx]
+            assert get_feature_store_key(dataset.collection[idx].feature_file) == key
+            assert f.dtype == torch.float32 and fl.item() == expected.shape[1]
+            torch.testing.assert_close(f, torch.from_numpy(expected), atol=1e-2, rtol=1e-2)
@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import os
+import pickle
 
 import numpy as np
 import pytest
@@ -20,6 +21,7 @@ import torch
 from omegaconf import DictConfig
 
 from nemo.collections.asr.parts.utils.data_simulation_utils import (
+    AudioReadBuffer,
     DataAnnotator,
     SpeechSampler,
     add_silence_to_alignments,
@@ -358,6 +360,22 @@ class TestDataSimulatorUtils:
             assert audio_manifest['alignments'] == alignments
             assert audio_manifest['words'] == words
 
+    def test_audio_read_buffer(self):
+        # 1MB buffer holds two utterances of 0.4MB each
+        buffer = AudioReadBuffer(max_size_MB=1.0)
+        utterance_len = int(0.4 * 1024 * 1024 / 4)
+        for key in ['a.wav', 'b.wav']:
+            buffer[key] = (torch.zeros(utterance_len), 16000, [0.0, 1.0])
+        assert buffer['a.wav'][1] == 16000
+        buffer['c.wav'] = (torch.zeros(utterance_len), 16000, [0.0, 1.0])
+        # least recently used utterance is evicted
+        assert list(buffer.keys()) == ['a.wav', 'c.wav']
+        assert buffer.size == 2 * utterance_len * 4
+
+        # buffered audio is not sent to worker processes
+        copied = pickle.loads(pickle.dumps(buffer))
+        assert isinstance(copied, AudioReadBuffer) and len(copied) == 0 and copied.max_size == buffer.max_size
+
 
 class TestDataAnnotator:
     def test_init(self, annotator):
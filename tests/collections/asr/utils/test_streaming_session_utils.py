@@ -0,0 +1,145 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+
+import numpy as np
+import pytest
+import torch
+from omegaconf import DictConfig
+
+from nemo.collections.asr.models import EncDecCTCModel
+from nemo.collections.asr.parts.utils.streaming_session_utils import AsyncStreamingEngine, CacheAwareStreamingEngine
+from nemo.collections.asr.parts.utils.streaming_utils import CacheAwareStreamingAudioBuffer
+
+
+@pytest.fixture(scope="module")
+def streaming_model():
+    torch.manual_seed(0)
+    vocabulary = [' ', 'a', 'b', 'c', 'd', 'e']
+    cfg = DictConfig(
+        {
+            'preprocessor': {
+                '_target_': 'nemo.collections.asr.modules.AudioToMelSpectrogramPreprocessor',
+                'features': 64,
+                'normalize': 'NA',
+                'dither': 0.0,
+            },
+            'encoder': {
+                '_target_': 'nemo.collections.asr.modules.ConformerEncoder',
+                'feat_in': 64,
+                'n_layers': 2,
+                'd_model': 32,
+                'n_heads': 2,
+                'subsampling': 'dw_striding',
+                'subsampling_factor': 4,
+                'subsampling_conv_channels': 16,
+                'causal_downsampling': True,
+                'att_context_size': [15, 2],
+                'att_context_style': 'chunked_limited',
+                'conv_context_size': 'causal',
+                'conv_kernel_size': 9,
+            },
+            'decoder': {
+                '_target_': 'nemo.collections.asr.modules.ConvASRDecoder',
+                'feat_in': 32,
+                'num_classes': len(vocabulary),
+                'vocabulary': vocabulary,
+            },
+        }
+    )
+    return EncDecCTCModel(cfg=cfg).eval()
+
+
+def stream_alone(model, audio):
+    """Reference: streams a single audio with CacheAwareStreamingAudioBuffer"""
+    streaming_buffer = CacheAwareStreamingAudioBuffer(model)
+    streaming_buffer.append_audio(audio)
+    cache_last_channel, cache_last_time, cache_last_channel_len = model.encoder.get_initial_cache_state(batch_size=1)
+    pred_out = None
+    for step_num, (chunk_audio, chunk_lengths) in enumerate(streaming_buffer):
+        with torch.no_grad():
+            pred_out, _, cache_last_channel, cache_last_time, cache_last_channel_len, _ = model.conformer_stream_step(
+                processed_signal=chunk_audio,
+                processed_signal_length=chunk_lengths,
+                cache_last_channel=cache_last_channel,
+                cache_last_time=cache_last_time,
+                cache_last_channel_len=cache_last_channel_len,
+                keep_all_outputs=streaming_buffer.is_buffer_empty(),
+                previous_pred_out=pred_out,
+                drop_extra_pre_encoded=0 if step_num == 0 else model.encoder.streaming_cfg.drop_extra_pre_encoded,
+                return_transcription=True,
+            )
+    return pred_out[0]
+
+
+@pytest.fixture(scope="module")
+def audios():
+    rng = np.random.default_rng(0)
+    return [0.1 * rng.standard_normal(num_samples).astype(np.float32) for num_samples in [16000, 24000, 9000]]
+
+
+class TestCacheAwareStreamingEngine:
+    @pytest.mark.unit
+    def test_sessions_join_and_leave(self, streaming_model, audios):
+        engine = CacheAwareStreamingEngine(streaming_model, max_sessions=2)
+        features = [engine._audio_buffer.preprocess_audio(audio)[0][0] for audio in audios]
+
+        # the first session streams alone, the second one joins mid-flight and the third one waits for a free slot
+        engine.open_session("s0")
+        engine.push_features("s0", features[0][:, :37])
+        engine.step()
+        engine.step()
+        engine.open_session("s1")
+        engine.push_features("s1", features[1])
+        engine.finish_session("s1")
+        engine.push_features("s0", features[0][:, 37:])
+        engine.finish_session("s0")
+        with pytest.raises(RuntimeError, match="slots are in use"):
+            engine.open_session("s2")
+
+        completed = {}
+        while engine.sessions or "s2" not in completed:
+            for session in engine.step():
+                completed[session.session_id] = session
+            if engine.num_free_slots and "s2" not in engine.sessions and "s2" not in completed:
+                engine.open_session("s2")
+                engine.push_features("s2", features[2])
+                engine.finish_session("s2")
+
+        for idx, session_id in enumerate(["s0", "s1", "s2"]):
+            expected = stream_alone(streaming_model, audios[idx])
+            assert torch.equal(completed[session_id].previous_pred_out, expected)
+        assert engine.num_free_slots == 2
+        # some steps ran the chunks of both sessions in one batch
+        assert engine.num_chunks > engine.num_batches
+
+    @pytest.mark.unit
+    def test_async_engine(self, streaming_model, audios):
+        async def run_session(engine, audio):
+            session_id = await engine.open_session()
+            for start in range(0, len(audio), 4000):
+                engine.push_audio(session_id, audio[start : start + 4000])
+                await asyncio.sleep(0.001)
+            return await engine.finish_session(session_id)
+
+        async def run():
+            async with AsyncStreamingEngine(CacheAwareStreamingEngine(streaming_model, max_sessions=2)) as engine:
+                return await asyncio.gather(*[run_session(engine, audio) for audio in audios])
+
+        sessions = asyncio.run(run())
+        assert len(sessions) == 3
+        for session in sessions:
+            assert isinstance(session.text, str)
+            assert len(session.latencies) > 0
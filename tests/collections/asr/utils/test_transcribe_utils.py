@@ -0,0 +1,152 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+
+import numpy as np
+import pytest
+from omegaconf import OmegaConf
+
+from nemo.collections.asr.parts.utils.manifest_utils import read_manifest
+from nemo.collections.asr.parts.utils.transcribe_utils import (
+    _get_transcription_store_header,
+    _read_transcription_store,
+    iter_manifest_windows,
+    transcribe_manifest_resumable,
+)
+
+
+class TranscribeFromManifest:
+    """Transcribes an entry with the name of its audio file, and fails after `fail_after` calls."""
+
+    def __init__(self, fail_after=None):
+        self.fail_after = fail_after
+        self.num_calls = 0
+        self.transcribed = []
+
+    def transcribe(self, audio, override_config=None):
+        if self.num_calls == self.fail_after:
+            raise RuntimeError("interrupted")
+        self.num_calls += 1
+        transcriptions = [os.path.basename(item['audio_filepath']) for item in read_manifest(audio)]
+        self.transcribed.extend(transcriptions)
+        return transcriptions
+
+
+@pytest.fixture()
+def manifest(tmp_path):
+    durations = [3.0, 1.0, 5.0, 2.0, 4.0, 6.0, 0.5]
+    manifest_path = str(tmp_path / 'manifest.json')
+    with open(manifest_path, 'w') as f:
+        for idx, duration in enumerate(durations):
+            f.write(json.dumps({'audio_filepath': f'audio_{idx}.wav', 'duration': duration, 'text': 'a'}) + '\n')
+            if idx == 2:
+                f.write('\n')
+    return manifest_path
+
+
+def transcription_cfg(manifest_path, output_filename):
+    return OmegaConf.create(
+        {
+            'dataset_manifest': manifest_path,
+            'output_filename': output_filename,
+            'presort_manifest': True,
+            'append_pred': False,
+            'pred_name_postfix': None,
+            'extract_nbest': False,
+        }
+    )
+
+
+class TestTranscribeUtils:
+    @pytest.mark.unit
+    def test_iter_manifest_windows(self, manifest):
+        windows = list(iter_manifest_windows(manifest, window_size=3))
+        assert [[idx for idx, _ in window] for window in windows] == [[2, 0, 1], [5, 4, 3], [6]]
+        assert windows[0][0][1]['audio_filepath'] == 'audio_2.wav'
+
+        windows = list(iter_manifest_windows(manifest, window_size=3, sort_by_duration=False))
+        assert [[idx for idx, _ in window] for window in windows] == [[0, 1, 2], [3, 4, 5], [6]]
+
+        skip = np.array([True, False, True, True, False, False, False])
+        windows = list(iter_manifest_windows(manifest, window_size=3, skip=skip))
+        assert [[idx for idx, _ in window] for window in windows] == [[5, 4, 1], [6]]
+
+    @pytest.mark.unit
+    def test_transcribe_manifest_resumable(self, manifest, tmp_path):
+        cfg = transcription_cfg(manifest, str(tmp_path / 'out' / 'manifest_pred.json'))
+        store_path = cfg.output_filename + '.partial'
+
+        model = TranscribeFromManifest(fail_after=1)
+        with pytest.raises(RuntimeError):
+            transcribe_manifest_resumable(model, cfg, 'model', window_size=3)
+        assert model.transcribed == ['audio_2.wav', 'audio_0.wav', 'audio_1.wav']
+        assert not os.path.exists(cfg.output_filename)
+
+        # a record of an interrupted write is removed
+        with open(store_path, 'a') as f:
+            f.write('{"entry_idx": 5, "it')
+
+        model = TranscribeFromManifest()
+        output_filename, pred_text_attr_name = transcribe_manifest_resumable(model, cfg, 'model', window_size=3)
+        assert model.transcribed == ['audio_5.wav', 'audio_4.wav', 'audio_3.wav', 'audio_6.wav']
+        assert output_filename == cfg.output_filename and pred_text_attr_name == 'pred_text'
+        assert not os.path.exists(store_path)
+
+        items = read_manifest(output_filename)
+        assert items == [
+            dict(item, pred_text=os.path.basename(item['audio_filepath'])) for item in read_manifest(manifest)
+        ]
+
+    @pytest.mark.unit
+    def test_transcribe_manifest_resumable_store_ownership(self, manifest, tmp_path):
+        cfg = transcription_cfg(manifest, str(tmp_path / 'manifest_pred.json'))
+        store_path = cfg.output_filename + '.partial'
+
+        with pytest.raises(RuntimeError):
+            transcribe_manifest_resumable(TranscribeFromManifest(fail_after=1), cfg, 'model', window_size=3)
+        # a record with an entry index outside of the manifest is removed
+        with open(store_path, 'a') as f:
+            f.write(json.dumps({'entry_idx': 100, 'item': {}}) + '\n')
+
+        # the store of another model is discarded
+        model = TranscribeFromManifest(fail_after=1)
+        with pytest.raises(RuntimeError):
+            transcribe_manifest_resumable(model, cfg, 'other_model', window_size=3)
+        assert model.transcribed == ['audio_2.wav', 'audio_0.wav', 'audio_1.wav']
+
+        # the store of a modified manifest is discarded
+        with open(manifest, 'a') as f:
+            f.write(json.dumps({'audio_filepath': 'audio_7.wav', 'duration': 1.5, 'text': 'a'}) + '\n')
+        model = TranscribeFromManifest()
+        transcribe_manifest_resumable(model, cfg, 'other_model', window_size=3)
+        assert len(model.transcribed) == 8
+        assert len(read_manifest(cfg.output_filename)) == 8
+
+    @pytest.mark.unit
+    def test_transcription_store_invalid_records(self, manifest, tmp_path):
+        store_path = str(tmp_path / 'store.partial')
+        header = _get_transcription_store_header(manifest, 'model')
+        assert (_read_transcription_store(store_path, 7, header) == -1).all()
+        with open(store_path, 'a') as f:
+            f.write(json.dumps({'entry_idx': 1, 'item': {}}) + '\n')
+            f.write(json.dumps({'entry_idx': 7, 'item': {}}) + '\n')
+            f.write(json.dumps({'entry_idx': 2, 'item': {}}) + '\n')
+
+        offsets = _read_transcription_store(store_path, 7, header)
+        assert (offsets >= 0).tolist() == [False, True, False, False, False, False, False]
+        # the invalid record and the records after it are removed
+        with open(store_path) as f:
+            assert len(f.readlines()) == 2
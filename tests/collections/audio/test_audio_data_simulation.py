@@ -11,6 +11,7 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import itertools
 import os
 import tempfile
 from typing import List, Type, Union
@@ -18,6 +19,7 @@ from typing import List, Type, Union
 import numpy as np
 import pytest
 from numpy.random import default_rng
+from scipy.signal import convolve
 
 from nemo.collections.asr.parts.preprocessing.segment import AudioSegment
 from nemo.collections.audio.data.data_simulation import (
@@ -25,7 +27,14 @@ from nemo.collections.audio.data.data_simulation import (
     check_angle,
     convert_placement_to_range,
     convert_rir_to_multichannel,
+    convolve_rir,
+    inverse_sabine,
+    load_rir_simulation,
+    sabine_rt60,
     simulate_room_mix,
+    simulate_room_rir,
+    simulate_room_shard,
+    simulate_shoebox_rir,
     wrap_to_180,
 )
 
@@ -396,3 +405,120 @@ class TestRoomSimulation:
             assert mix_uut.duration == mix_golden.duration
             max_diff = np.max(np.abs(mix_uut_samples - mix_golden.samples))
             assert max_diff < self.max_diff_tol
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("max_order", [0, 3])
+    def test_simulate_shoebox_rir(self, max_order: int):
+        """Test vectorized image source method against a direct sum over image sources."""
+        sample_rate, sound_speed = 16000, 343.0
+        room_dim = np.array([4.0, 5.0, 3.0])
+        absorption = 0.3
+        mic_positions = np.array([[1.0, 1.0, 1.2], [1.1, 1.0, 1.2]])
+        source_positions = [[2.0, 3.0, 1.5], [3.0, 1.0, 1.0]]
+
+        # UUT
+        rirs = simulate_shoebox_rir(
+            room_dim, absorption, max_order, mic_positions, source_positions, sample_rate, sound_speed=sound_speed
+        )
+
+        # Golden reference
+        r = range(-max_order, max_order + 1)
+        for source_position, rir in zip(source_positions, rirs):
+            rir_ref = np.zeros_like(rir)
+            for index in itertools.product(r, r, r):
+                index = np.array(index)
+                if np.abs(index).sum() > max_order:
+                    continue
+                image = index * room_dim + np.where(index % 2 == 0, source_position, room_dim - source_position)
+                for m, mic_position in enumerate(mic_positions):
+                    distance = np.linalg.norm(image - mic_position)
+                    delay = distance / sound_speed * sample_rate
+                    delay_int = int(np.floor(delay))
+                    fractional_delay = np.hanning(81) * np.sinc(np.arange(81) - 40 - (delay - delay_int))
+                    gain = np.sqrt(1 - absorption) ** np.abs(index).sum() / (4 * np.pi * distance)
+                    rir_ref[delay_int : delay_int + 81, m] += gain * fractional_delay
+
+            assert np.max(np.abs(rir - rir_ref)) < 1e-3 * np.max(np.abs(rir_ref))
+
+    @pytest.mark.unit
+    def test_inverse_sabine(self):
+        """Test RT60 of room parameters estimated using the inverse Sabine's formula."""
+        room_dim = [3.0, 4.0, 2.5]
+        for rt60 in [0.2, 0.5]:
+            absorption, max_order = inverse_sabine(rt60, room_dim)
+            assert 0 < absorption < 1 and max_order > 0
+            assert abs(sabine_rt60(room_dim, absorption) - rt60) < 1e-9
+
+        with pytest.raises(ValueError):
+            inverse_sabine(0.01, room_dim)
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize(
+        'room_dim, rt60, expected_absorption, expected_max_order',
+        [
+            # reference values of pyroomacoustics.inverse_sabine
+            ([5.0, 4.0, 3.0], 0.8, 0.128548265, 114),
+            ([3.0, 4.0, 2.5], 0.5, 0.163844569, 89),
+            ([3.0, 4.0, 2.5], 0.2, 0.409611421, 35),
+        ],
+    )
+    def test_inverse_sabine_matches_pyroomacoustics(self, room_dim, rt60, expected_absorption, expected_max_order):
+        absorption, max_order = inverse_sabine(rt60, room_dim)
+        assert abs(absorption - expected_absorption) < 1e-8
+        assert max_order == expected_max_order
+
+    @pytest.mark.unit
+    def test_simulate_room_shard(self):
+        """Test RIRs saved in a shard match the simulated RIRs."""
+        mic_array = ArrayGeometry([[1.0, 1.0, 1.2], [1.1, 1.0, 1.2], [1.2, 1.0, 1.2]])
+        examples = []
+        for n in range(3):
+            absorption, max_order = inverse_sabine(0.2, [3.0 + n, 4.0, 2.5])
+            room_params = {
+                'dim': [3.0 + n, 4.0, 2.5],
+                'absorption': absorption,
+                'max_order': max_order,
+                'rt60_theoretical': 0.2,
+                'anechoic_absorption': 0.999,
+                'anechoic_max_order': 0,
+                'sample_rate': 16000,
+            }
+            source_position = [[2.0, 3.0, 1.5], [1.5 + n / 2, 1.0, 1.0]]
+            examples.append(
+                {
+                    'room_params': room_params,
+                    'mic_array': mic_array,
+                    'source_position': source_position,
+                    'simulator': 'numpy',
+                }
+            )
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            shard_filepath = os.path.join(output_dir, 'shard.npy')
+            metadata = simulate_room_shard(examples, shard_filepath=shard_filepath)
+
+            assert len(metadata) == len(examples)
+            for example, room_metadata in zip(examples, metadata):
+                assert room_metadata['room_filepath'] == shard_filepath
+                rir_dataset, _ = simulate_room_rir(**example)
+                for rir_key in ['rir', 'anechoic']:
+                    for source in range(2):
+                        rir, sample_rate = load_rir_simulation(
+                            shard_filepath, source=source, rir_key=rir_key, rir_index=room_metadata['rir_index']
+                        )
+                        assert sample_rate == 16000
+                        assert np.allclose(rir, rir_dataset[rir_key][source], atol=1e-6)
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("num_channels", [1, 4])
+    def test_convolve_rir(self, num_channels: int):
+        """Test batched FFT convolution against direct convolution."""
+        random = default_rng(0)
+        signal = random.normal(size=1000)
+        rir = random.normal(size=(300, num_channels))
+
+        out = convolve_rir(signal, rir if num_channels > 1 else rir[:, 0])
+
+        for m in range(num_channels):
+            out_m = out[:, m] if num_channels > 1 else out
+            assert np.allclose(out_m, convolve(signal, rir[:, m], method='direct')[: len(signal)])
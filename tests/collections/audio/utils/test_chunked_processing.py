@@ -0,0 +1,92 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from nemo.collections.audio.parts.utils.chunked_processing import (
+    OverlapAddBuffer,
+    iter_audio_chunks,
+    num_audio_chunks,
+    process_files_in_chunks,
+)
+
+
+def write_audio(path, num_samples, num_channels, sample_rate=16000, seed=0):
+    samples = np.random.default_rng(seed).uniform(-0.5, 0.5, size=(num_samples, num_channels)).astype(np.float32)
+    sf.write(str(path), samples, sample_rate, subtype='FLOAT')
+    return str(path), samples.T
+
+
+class TestChunkedProcessing:
+    @pytest.mark.unit
+    @pytest.mark.parametrize('num_samples', [100, 256, 1000])
+    def test_iter_audio_chunks(self, tmp_path, num_samples):
+        path, samples = write_audio(tmp_path / 'audio.wav', num_samples, num_channels=2)
+        chunk_length, hop_length = 256, 96
+
+        chunks = list(iter_audio_chunks(path, chunk_length, hop_length, sample_rate=16000))
+        assert len(chunks) == num_audio_chunks(num_samples, chunk_length, hop_length)
+        padded = np.pad(samples, ((0, 0), (0, chunk_length + len(chunks) * hop_length)))
+        for idx, chunk in enumerate(chunks):
+            assert chunk.shape == (2, chunk_length)
+            np.testing.assert_array_equal(chunk, padded[:, idx * hop_length : idx * hop_length + chunk_length])
+        # the last chunk covers the end of the file
+        assert (len(chunks) - 1) * hop_length + chunk_length >= num_samples
+
+        chunks = list(iter_audio_chunks(path, chunk_length, hop_length, sample_rate=16000, channel_selector=1))
+        np.testing.assert_array_equal(chunks[0][0], padded[1, :chunk_length])
+
+        with pytest.raises(ValueError):
+            next(iter_audio_chunks(path, chunk_length, hop_length, sample_rate=8000))
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize('hop_length', [16, 32, 48, 64])
+    def test_overlap_add_identity(self, hop_length):
+        chunk_length, num_chunks = 64, 10
+        signal = np.random.default_rng(0).normal(size=(1, (num_chunks - 1) * hop_length + chunk_length))
+        buffer = OverlapAddBuffer(chunk_length, hop_length)
+        output = [buffer.add(signal[:, i * hop_length : i * hop_length + chunk_length]) for i in range(num_chunks)]
+        output = np.concatenate(output + [buffer.flush()], axis=1)
+        np.testing.assert_allclose(output, signal, atol=1e-5)
+
+        with pytest.raises(ValueError):
+            OverlapAddBuffer(chunk_length, chunk_length + 1)
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize('batch_size', [1, 3])
+    @pytest.mark.parametrize('num_writer_threads', [1, 2])
+    def test_process_files_in_chunks(self, tmp_path, batch_size, num_writer_threads):
+        inputs = [write_audio(tmp_path / f'in_{n}.wav', n, num_channels=2, seed=n) for n in [50, 700, 1234]]
+        output_files = [str(tmp_path / f'out_{idx}.wav') for idx in range(len(inputs))]
+
+        def process_batch(input_signal, input_length):
+            assert input_signal.shape[0] <= batch_size and (input_length == 256).all()
+            return -input_signal[:, :1]
+
+        process_files_in_chunks(
+            process_batch,
+            input_files=[path for path, _ in inputs],
+            output_files=output_files,
+            sample_rate=16000,
+            chunk_length=256,
+            hop_length=128,
+            batch_size=batch_size,
+            num_writer_threads=num_writer_threads,
+        )
+        for (_, samples), output_file in zip(inputs, output_files):
+            output, sample_rate = sf.read(output_file, dtype='float32', always_2d=True)
+            assert sample_rate == 16000 and output.shape == (samples.shape[1], 1)
+            np.testing.assert_allclose(output[:, 0], -samples[0], atol=1e-5)
@@ -0,0 +1,121 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import time
+from unittest.mock import Mock
+
+import pytest
+import torch
+
+from nemo.collections.common.callbacks import DataPipelineMetricsCallback
+from nemo.collections.common.data.pipeline_metrics import (
+    NEMO_ENV_VARNAME_DATA_PIPELINE_METRICS_DIR,
+    DataPipelineMetrics,
+    data_pipeline_stage,
+    disable_data_pipeline_metrics,
+    enable_data_pipeline_metrics,
+)
+
+
+class _StagedDataset(torch.utils.data.Dataset):
+    def __len__(self):
+        return 8
+
+    def __getitem__(self, index):
+        with data_pipeline_stage("audio_decode"):
+            time.sleep(0.001)
+        with data_pipeline_stage("tokenize"):
+            pass
+        return torch.tensor([index])
+
+
+def _collate(batch):
+    with data_pipeline_stage("collate"):
+        return torch.cat(batch)
+
+
+@pytest.fixture()
+def metrics_dir(tmp_path):
+    enable_data_pipeline_metrics(str(tmp_path))
+    yield str(tmp_path)
+    disable_data_pipeline_metrics()
+
+
+class TestDataPipelineMetrics:
+    @pytest.mark.unit
+    def test_disabled_stage_is_noop(self):
+        assert NEMO_ENV_VARNAME_DATA_PIPELINE_METRICS_DIR not in os.environ
+        with data_pipeline_stage("audio_decode"):
+            pass
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("num_workers", [0, 2])
+    def test_stages_are_collected_from_workers(self, metrics_dir, num_workers):
+        dataloader = torch.utils.data.DataLoader(
+            _StagedDataset(), batch_size=2, num_workers=num_workers, collate_fn=_collate
+        )
+        assert torch.cat(list(dataloader)).tolist() == list(range(8))
+
+        metrics = DataPipelineMetrics(metrics_dir)
+        summary = metrics.summary(percentiles=(50, 99))
+        assert summary["audio_decode"]["count"] == 8
+        assert summary["tokenize"]["count"] == 8
+        assert summary["collate"]["count"] == 4
+        assert 1e-3 <= summary["audio_decode"]["p50"] <= summary["audio_decode"]["p99"]
+
+        worker_time = metrics.worker_time()
+        expected_workers = {-1} if num_workers == 0 else set(range(num_workers))
+        assert set(worker_time.keys()) == expected_workers
+        assert all(t > 0 for t in worker_time.values())
+
+    @pytest.mark.unit
+    def test_worker_time_of_nested_stages(self, metrics_dir):
+        with data_pipeline_stage("collate"):
+            with data_pipeline_stage("tokenize"):
+                time.sleep(0.01)
+            time.sleep(0.01)
+
+        metrics = DataPipelineMetrics(metrics_dir)
+        (report,) = metrics.read_reports()
+        # the nested stage is counted once, as a part of the top-level stage
+        assert metrics.worker_time() == {-1: report["total_time"]["collate"]}
+        assert 0.02 <= report["total_time"]["collate"] < sum(report["total_time"].values())
+
+    @pytest.mark.unit
+    def test_callback_stall_fraction(self, tmp_path):
+        callback = DataPipelineMetricsCallback(output_dir=str(tmp_path), log_every_n_steps=0)
+        assert NEMO_ENV_VARNAME_DATA_PIPELINE_METRICS_DIR not in os.environ
+        try:
+            trainer, pl_module = Mock(), Mock()
+            callback.setup(trainer, pl_module, "fit")
+            assert os.environ[NEMO_ENV_VARNAME_DATA_PIPELINE_METRICS_DIR] == str(tmp_path)
+            callback.on_train_epoch_start(trainer, pl_module)
+            for batch_idx in range(3):
+                # waiting for data
+                time.sleep(0.01)
+                callback.on_train_batch_start(trainer, pl_module, None, batch_idx)
+                with data_pipeline_stage("collate"):
+                    pass
+                callback.on_train_batch_end(trainer, pl_module, None, None, batch_idx)
+            assert callback.stall_fraction > 0.5
+
+            trainer.is_global_zero = True
+            callback.on_train_end(trainer, pl_module)
+            assert os.path.exists(os.path.join(str(tmp_path), "summary.json"))
+            callback.teardown(trainer, pl_module, "fit")
+            assert NEMO_ENV_VARNAME_DATA_PIPELINE_METRICS_DIR not in os.environ
+        finally:
+            disable_data_pipeline_metrics()
+        assert NEMO_ENV_VARNAME_DATA_PIPELINE_METRICS_DIR not in os.environ
@@ -13,6 +13,7 @@
 # limitations under the License.
 
 import os.path
+import sys
 from typing import Any, Dict, Union
 
 import lightning.pytorch as pl
@@ -24,7 +25,7 @@ from lightning.pytorch.utilities.types import STEP_OUTPUT
 from omegaconf import DictConfig, OmegaConf
 
 from nemo.collections.common.callbacks import EMA
-from nemo.collections.common.callbacks.ema import EMAOptimizer
+from nemo.collections.common.callbacks.ema import EMAOptimizer, ShardedEMAState
 from nemo.core import ModelPT
 from nemo.utils.exp_manager import exp_manager
 
@@ -114,12 +115,100 @@ class ExampleModel(ModelPT):
         self.validation_step_outputs.clear()  # free memory
 
 
+def _check_sharded_ema_state(rank: int, world_size: int, init_file: str, device: str):
+    torch.distributed.init_process_group("gloo", init_method=f"file://{init_file}", rank=rank, world_size=world_size)
+    try:
+        torch.manual_seed(0)
+        params = [torch.randn(5, 7, device=device), torch.randn(3, device=device), torch.randn(2, 2, device=device)]
+        expected = [param.clone() for param in params]
+        state = ShardedEMAState(params, chunk_numel=4)
+        assert state.world_size == world_size
+
+        decay = 0.9
+        for _ in range(3):
+            for param, ema in zip(params, expected):
+                param.add_(torch.randn_like(param))
+                ema.mul_(decay).add_(param, alpha=1 - decay)
+            state.update(decay).join()
+        for ema, full in zip(expected, state.full_state()):
+            torch.testing.assert_close(full, ema.cpu())
+
+        # parameters and EMA weights are exchanged, also the local shard read from the parameters
+        original = [param.clone() for param in params]
+        state.swap_with_params()
+        for ema, param in zip(expected, params):
+            torch.testing.assert_close(param, ema)
+        state.swap_with_params()
+        for original_param, param in zip(original, params):
+            torch.testing.assert_close(param, original_param)
+        for ema, full in zip(expected, state.full_state()):
+            torch.testing.assert_close(full, ema.cpu())
+    finally:
+        torch.distributed.destroy_process_group()
+
+
+class TestShardedEMAState:
+    @pytest.mark.unit
+    @pytest.mark.skipif(sys.platform in ['win32', 'cygwin'], reason='gloo process groups are not supported')
+    def test_multi_rank(self, tmpdir):
+        world_size = 2
+        torch.multiprocessing.spawn(
+            _check_sharded_ema_state,
+            args=(world_size, os.path.join(tmpdir, 'init'), 'cpu'),
+            nprocs=world_size,
+        )
+
+    @pytest.mark.unit
+    @pytest.mark.run_only_on('GPU')
+    def test_cuda_params(self, tmpdir):
+        # copies of CUDA parameters to the pinned buffers are non-blocking
+        torch.multiprocessing.spawn(_check_sharded_ema_state, args=(1, os.path.join(tmpdir, 'init'), 'cuda'), nprocs=1)
+
+
 class TestEMAConfig:
     @pytest.mark.unit
     def test_ema_value(self):
         with pytest.raises(MisconfigurationException, match="between 0 and 1"):
             EMA(decay=2)
 
+    @pytest.mark.unit
+    def test_sharded_ema_optimizer(self):
+        """Test to ensure that sharded EMA weights match unsharded ones, also after a state dict round trip."""
+        torch.manual_seed(0)
+        models = [torch.nn.Sequential(torch.nn.Linear(5, 7), torch.nn.Linear(7, 2)) for _ in range(2)]
+        models[1].load_state_dict(models[0].state_dict())
+        optimizers = [
+            EMAOptimizer(torch.optim.SGD(models[0].parameters(), lr=0.1), device=torch.device('cpu'), decay=0.9),
+            EMAOptimizer(
+                torch.optim.SGD(models[1].parameters(), lr=0.1),
+                device=torch.device('cpu'),
+                decay=0.9,
+                sharded=True,
+                chunk_numel=4,
+            ),
+        ]
+        inputs = torch.randn(3, 5)
+        for _ in range(5):
+            for model, optimizer in zip(models, optimizers):
+                optimizer.zero_grad()
+                model(inputs).sum().backward()
+                optimizer.step()
+
+        ema_state, sharded_ema_state = [optimizer.state_dict()['ema'] for optimizer in optimizers]
+        for ema_weight, sharded_ema_weight in zip(ema_state, sharded_ema_state):
+            assert torch.allclose(ema_weight, sharded_ema_weight)
+
+        original_weights = extract_weights(models[1])
+        with optimizers[1].swap_ema_weights():
+            for ema_weight, weight in zip(ema_state, models[1].parameters()):
+                assert torch.allclose(ema_weight, weight)
+        for original_weight, weight in zip(original_weights, models[1].parameters()):
+            assert torch.equal(original_weight, weight)
+
+        optimizers[1].load_state_dict(optimizers[0].state_dict())
+        for ema_weight, sharded_ema_weight in zip(ema_state, optimizers[1].state_dict()['ema']):
+            assert torch.allclose(ema_weight, sharded_ema_weight)
+
     @pytest.mark.unit
     @pytest.mark.run_only_on('GPU')
     def test_ema_saved_state(self, tmpdir, caplog):
@@ -376,7 +465,21 @@ class TestEMATrain:
             tmpdir=tmpdir,
         )
 
-    def run_training_test(self, accumulate_grad_batches, validate_original_weights, accelerator, precision, tmpdir):
+    @pytest.mark.unit
+    @pytest.mark.parametrize("validate_original_weights", [True, False])
+    def test_ema_run_cpu_sharded(self, test_data_dir, validate_original_weights, tmpdir):
+        self.run_training_test(
+            accumulate_grad_batches=1,
+            validate_original_weights=validate_original_weights,
+            accelerator='cpu',
+            precision=32,
+            tmpdir=tmpdir,
+            ema_kwargs={"sharded": True, "chunk_numel": 3},
+        )
+
+    def run_training_test(
+        self, accumulate_grad_batches, validate_original_weights, accelerator, precision, tmpdir, ema_kwargs=None
+    ):
         pl.seed_everything(123)
         model = ExampleModel()
         trainer = Trainer(
@@ -395,7 +498,12 @@ class TestEMATrain:
         exp_manager(
             trainer,
             {
-                "ema": {"enable": True, "validate_original_weights": validate_original_weights, "decay": 0.999},
+                "ema": {
+                    "enable": True,
+                    "validate_original_weights": validate_original_weights,
+                    "decay": 0.999,
+                    **(ema_kwargs or {}),
+                },
                 "explicit_log_dir": str(tmpdir),
                 "checkpoint_callback_params": {"filename": f"{{epoch}}-{{step}}"},
             },
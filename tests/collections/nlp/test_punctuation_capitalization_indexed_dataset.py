@@ -0,0 +1,159 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pickle
+import random
+
+import numpy as np
+import pytest
+
+from nemo.collections.nlp.data.token_classification.punctuation_capitalization_indexed_dataset import (
+    BertPunctuationCapitalizationIndexedDataset,
+    PunctuationCapitalizationIndexedSampler,
+    create_indexed_dataset,
+    is_indexed_dataset_metadata,
+)
+from nemo.collections.nlp.data.token_classification.punctuation_capitalization_tarred_dataset import (
+    BertPunctuationCapitalizationTarredDataset,
+    create_tarred_dataset,
+)
+from nemo.collections.nlp.modules.common.tokenizer_utils import get_tokenizer
+
+SPECIAL_TOKENS = {'pad_token': '[PAD]', 'unk_token': '[UNK]', 'cls_token': '[CLS]', 'sep_token': '[SEP]'}
+WORDS = ['hello', 'world', 'this', 'is', 'a', 'test', 'of', 'punctuation', 'and', 'capitalization']
+
+
+@pytest.fixture(scope="module")
+def data_dir(tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp("punctuation_capitalization")
+    rng = random.Random(0)
+    with open(data_dir / "text.txt", "w") as tf, open(data_dir / "labels.txt", "w") as lf:
+        for _ in range(300):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(1, 20))]
+            tf.write(' '.join(words) + '\n')
+            lf.write(' '.join(rng.choice(['O', '.', ',', '?']) + rng.choice(['O', 'U']) for _ in words) + '\n')
+    with open(data_dir / "vocab.txt", "w") as f:
+        for char in sorted(set(' '.join(WORDS))):
+            f.write(repr(char) + '\n')
+    return data_dir
+
+
+@pytest.fixture(scope="module")
+def metadata_files(data_dir):
+    kwargs = dict(
+        max_seq_length=64,
+        tokens_in_batch=256,
+        lines_per_dataset_fragment=70,
+        tokenizer_name='char',
+        vocab_file=data_dir / "vocab.txt",
+        special_tokens=SPECIAL_TOKENS,
+        n_jobs=2,
+    )
+    text_file, labels_file = data_dir / "text.txt", data_dir / "labels.txt"
+    metadata_file = create_indexed_dataset(text_file, labels_file, data_dir / "indexed", **kwargs)
+    create_tarred_dataset(text_file, labels_file, data_dir / "tarred", num_batches_per_tarfile=1, **kwargs)
+    return metadata_file, next((data_dir / "tarred").glob("metadata.*.json"))
+
+
+class TestPunctuationCapitalizationIndexedDataset:
+    @pytest.mark.unit
+    def test_batches_equal_to_tarred_dataset(self, data_dir, metadata_files):
+        indexed_metadata_file, tarred_metadata_file = metadata_files
+        assert is_indexed_dataset_metadata(indexed_metadata_file)
+        assert not is_indexed_dataset_metadata(tarred_metadata_file)
+
+        tokenizer = get_tokenizer('char', vocab_file=str(data_dir / "vocab.txt"), special_tokens=SPECIAL_TOKENS)
+        dataset = BertPunctuationCapitalizationIndexedDataset(indexed_metadata_file, tokenizer, 'O')
+        tarred_batches = {
+            batch['input_ids'].tobytes(): batch
+            for batch in BertPunctuationCapitalizationTarredDataset(tarred_metadata_file, tokenizer, 'O')
+        }
+        # fragments are not repacked, so no batches are discarded
+        assert len(dataset) == len(tarred_batches)
+        for idx in range(len(dataset)):
+            batch = dataset[idx]
+            expected = tarred_batches[batch['input_ids'].tobytes()]
+            assert batch.keys() == expected.keys()
+            for key, value in expected.items():
+                assert batch[key].dtype == value.dtype
+                np.testing.assert_array_equal(batch[key], value)
+
+        restored = pickle.loads(pickle.dumps(dataset))
+        np.testing.assert_array_equal(restored[5]['input_ids'], dataset[5]['input_ids'])
+
+    @pytest.mark.unit
+    def test_sampler_shuffles_globally_and_resumes(self, data_dir, metadata_files):
+        indexed_metadata_file, _ = metadata_files
+        tokenizer = get_tokenizer('char', vocab_file=str(data_dir / "vocab.txt"), special_tokens=SPECIAL_TOKENS)
+        dataset = BertPunctuationCapitalizationIndexedDataset(indexed_metadata_file, tokenizer, 'O')
+
+        epoch_indices = []
+        for rank in range(2):
+            sampler = PunctuationCapitalizationIndexedSampler(dataset, num_replicas=2, rank=rank, seed=3)
+            sampler.set_epoch(1)
+            epoch_indices.append(list(sampler))
+        assert set(epoch_indices[0] + epoch_indices[1]) == set(range(len(dataset)))
+
+        resumed = PunctuationCapitalizationIndexedSampler(dataset, num_replicas=2, rank=1, seed=3)
+        resumed.set_resume_position(epoch=1, consumed_samples=10)
+        resumed.set_epoch(1)
+        assert len(resumed) == len(epoch_indices[1]) - 5
+        assert list(resumed) == epoch_indices[1][5:]
+        # the next epoch starts from the beginning
+        assert list(resumed) == epoch_indices[1]
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("num_replicas_after_resume", [1, 2, 3])
+    @pytest.mark.parametrize("drop_last", [False, True])
+    def test_sampler_interrupt_and_resume(self, data_dir, metadata_files, num_replicas_after_resume, drop_last):
+        indexed_metadata_file, _ = metadata_files
+        tokenizer = get_tokenizer('char', vocab_file=str(data_dir / "vocab.txt"), special_tokens=SPECIAL_TOKENS)
+        dataset = BertPunctuationCapitalizationIndexedDataset(indexed_metadata_file, tokenizer, 'O')
+
+        def make_samplers(num_replicas):
+            samplers = [
+                PunctuationCapitalizationIndexedSampler(
+                    dataset, num_replicas=num_replicas, rank=rank, seed=7, drop_last=drop_last
+                )
+                for rank in range(num_replicas)
+            ]
+            for sampler in samplers:
+                sampler.set_epoch(2)
+            return samplers
+
+        # 2 processes consume 4 steps of epoch 2, and then training is interrupted
+        num_steps, consumed = 4, []
+        for sampler in make_samplers(2):
+            consumed.extend(list(sampler)[:num_steps])
+        state = pickle.loads(pickle.dumps({'epoch': 2, 'consumed_samples': 2 * num_steps}))
+
+        resumed_samplers = make_samplers(num_replicas_after_resume)
+        remaining = []
+        for sampler in resumed_samplers:
+            sampler.set_resume_position(**state)
+            num_batches = len(sampler)
+            indices = list(sampler)
+            assert len(indices) == num_batches
+            remaining.extend(indices)
+
+        # every batch is seen exactly once, apart from batches dropped or repeated to split the tail evenly
+        num_left = len(dataset) - 2 * num_steps
+        assert len(set(consumed)) == len(consumed) == 2 * num_steps
+        if drop_last:
+            assert len(remaining) == num_left - num_left % num_replicas_after_resume
+            assert len(set(remaining)) == len(remaining)
+            assert not set(consumed) & set(remaining)
+        else:
+            assert 0 <= len(remaining) - num_left < num_replicas_after_resume
+            assert set(remaining) >= set(range(len(dataset))) - set(consumed)
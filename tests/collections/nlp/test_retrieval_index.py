@@ -0,0 +1,158 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import numpy as np
+import pytest
+
+from nemo.collections.nlp.parts import retrieval_index
+from nemo.collections.nlp.parts.retrieval_index import (
+    ExactRetrievalIndex,
+    NumpyIVFRetrievalIndex,
+    build_retrieval_index,
+    build_index_from_embeddings,
+    load_retrieval_index,
+    search_embedding_files,
+)
+
+
+def brute_force(vectors, queries, k, metric):
+    if metric == 'ip':
+        order = np.argsort(-(queries @ vectors.T), axis=1, kind='stable')
+    else:
+        order = np.argsort(((queries[:, None] - vectors[None]) ** 2).sum(-1), axis=1, kind='stable')
+    return order[:, :k]
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((8, 16)).astype(np.float32)
+    vectors = centers[rng.integers(0, 8, 500)] + 0.3 * rng.standard_normal((500, 16)).astype(np.float32)
+    queries = centers[rng.integers(0, 8, 40)] + 0.3 * rng.standard_normal((40, 16)).astype(np.float32)
+    return vectors, queries
+
+
+class TestRetrievalIndex:
+    @pytest.mark.unit
+    @pytest.mark.parametrize("metric", ["ip", "l2"])
+    def test_exact_index(self, data, metric):
+        vectors, queries = data
+        ids = np.arange(len(vectors)) * 10 + 3
+        index = ExactRetrievalIndex(16, metric, block_size=64, device='cpu')
+        # incremental adds and query batches must not change the results
+        index.add(vectors[:200], ids[:200])
+        index.add(vectors[200:], ids[200:])
+        scores, found = index.search(queries, k=5, batch_size=7)
+        np.testing.assert_array_equal(found, ids[brute_force(vectors, queries, 5, metric)])
+        assert scores.shape == (40, 5) and scores.dtype == np.float32
+        assert np.all(np.diff(scores, axis=1) <= 1e-5 if metric == 'ip' else np.diff(scores, axis=1) >= -1e-5)
+
+        # missing neighbours are returned with id -1
+        small = ExactRetrievalIndex(16, metric, device='cpu')
+        small.add(vectors[:3])
+        _, found = small.search(queries[:2], k=5)
+        assert np.all(found[:, 3:] == -1) and set(found[0, :3]) == {0, 1, 2}
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("metric", ["ip", "l2"])
+    def test_numpy_ivf_index(self, data, metric):
+        vectors, queries = data
+        index = NumpyIVFRetrievalIndex(16, metric, nlist=8, nprobe=8, num_iterations=5)
+        with pytest.raises(RuntimeError, match="trained"):
+            index.add(vectors)
+        index.train(vectors)
+        index.add(vectors[:300])
+        index.add(vectors[300:])
+        # probing all lists is an exact search
+        _, found = index.search(queries, k=5, batch_size=16)
+        np.testing.assert_array_equal(found, brute_force(vectors, queries, 5, metric))
+
+        index.nprobe = 2
+        _, found = index.search(queries, k=10)
+        expected = brute_force(vectors, queries, 10, metric)
+        recall = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(found, expected)])
+        assert recall > 0.8
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("backend", ["exact", "numpy"])
+    def test_save_and_load_memory_mapped(self, data, tmp_path, backend):
+        vectors, queries = data
+        kwargs = {'device': 'cpu'} if backend == 'exact' else {'num_iterations': 5}
+        index = build_retrieval_index(backend, 16, nlist=8, nprobe=3, **kwargs)
+        index.train(vectors)
+        index.add(vectors[:400])
+        index.save(str(tmp_path / "index"))
+
+        loaded = load_retrieval_index(str(tmp_path / "index"))
+        assert type(loaded) is type(index) and len(loaded) == 400
+        assert isinstance(loaded._segments.vectors[0], np.memmap)
+        np.testing.assert_array_equal(loaded.search(queries, 5)[1], index.search(queries, 5)[1])
+
+        # vectors added to a memory-mapped index are saved together with the loaded ones
+        index.add(vectors[400:])
+        loaded.add(vectors[400:])
+        loaded.save(str(tmp_path / "index"))
+        reloaded = load_retrieval_index(str(tmp_path / "index"), mmap=False)
+        assert len(reloaded) == 500
+        np.testing.assert_array_equal(reloaded.search(queries, 5)[1], index.search(queries, 5)[1])
+
+    @pytest.mark.unit
+    def test_faiss_falls_back_to_numpy(self, data, monkeypatch):
+        monkeypatch.setattr(retrieval_index, "HAVE_FAISS", False)
+        index = build_retrieval_index('faiss', 16, nlist=4)
+        assert isinstance(index, NumpyIVFRetrievalIndex) and index.nlist == 4
+
+    @pytest.mark.unit
+    def test_faiss_index(self, data, tmp_path):
+        pytest.importorskip("faiss")
+        vectors, queries = data
+        ids = np.arange(len(vectors)) + 1000
+        index = build_retrieval_index('faiss', 16, metric='l2', nlist=8, nprobe=8)
+        index.train(vectors)
+        index.add(vectors[:250], ids[:250])
+        index.add(vectors[250:], ids[250:])
+        _, found = index.search(queries, k=5)
+        np.testing.assert_array_equal(found, ids[brute_force(vectors, queries, 5, 'l2')])
+
+        index.save(str(tmp_path / "index"))
+        loaded = load_retrieval_index(str(tmp_path / "index"), mmap=False)
+        np.testing.assert_array_equal(loaded.search(queries, k=5)[1], found)
+
+    @pytest.mark.unit
+    def test_search_embedding_files(self, data, tmp_path):
+        vectors, queries = data
+        query_dir, doc_dir = tmp_path / "test_queries", tmp_path / "test_doc"
+        query_dir.mkdir()
+        doc_dir.mkdir()
+        np.save(query_dir / "query.npy", queries)
+        (query_dir / "query.ids").write_text(''.join(f"q{i}\n" for i in range(len(queries))))
+        np.save(doc_dir / "doc.npy", vectors)
+        (doc_dir / "doc.ids").write_text(''.join(f"d{i}\n" for i in range(len(vectors))))
+        expected = [[f"d{i}" for i in row] for row in brute_force(vectors, queries, 5, 'ip')]
+
+        # an exact index is built when the docs were written without an index
+        results = search_embedding_files(str(query_dir), str(doc_dir), k=5)
+        assert [r['query_id'] for r in results] == [f"q{i}" for i in range(len(queries))]
+        assert [r['doc_ids'] for r in results] == expected
+
+        build_index_from_embeddings(vectors, backend='numpy', nlist=8, nprobe=8, num_iterations=5).save(
+            str(doc_dir / "doc_index")
+        )
+        output_file = tmp_path / "retrieval_results.jsonl"
+        results = search_embedding_files(str(query_dir), str(doc_dir), k=5, output_file=str(output_file))
+        assert [r['doc_ids'] for r in results] == expected
+        with open(output_file) as f:
+            assert [json.loads(line) for line in f] == results
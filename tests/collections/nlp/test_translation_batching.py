@@ -0,0 +1,72 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+import pytest
+
+from nemo.collections.nlp.data.machine_translation.machine_translation_dataset import (
+    TranslationDataset,
+    pack_lengths_into_batches,
+)
+
+
+def pack_one_by_one(src_lengths, tgt_lengths, tokens_in_batch):
+    """Reference implementation adding the sorted pairs one by one."""
+    order = sorted(range(len(src_lengths)), key=lambda i: (src_lengths[i], tgt_lengths[i], i))
+    batches, batch = [], []
+    for idx in order:
+        batch.append(idx)
+        src_len = max(src_lengths[i] for i in batch)
+        tgt_len = max(tgt_lengths[i] for i in batch)
+        if len(batch) * (src_len + tgt_len) > tokens_in_batch:
+            batches_to_evict = 8 * ((len(batch) - 1) // 8) or len(batch)
+            batches.append(batch[:batches_to_evict])
+            batch = batch[batches_to_evict:]
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+@pytest.fixture()
+def lengths():
+    rng = np.random.default_rng(0)
+    src_lengths = np.clip(rng.lognormal(3.0, 0.6, 3000), 1, 250).astype(np.int64)
+    tgt_lengths = np.clip(src_lengths * rng.normal(1.1, 0.2, 3000), 1, 250).astype(np.int64)
+    return src_lengths, tgt_lengths
+
+
+class TestTranslationBatching:
+    @pytest.mark.unit
+    @pytest.mark.parametrize("tokens_in_batch", [64, 512, 4096])
+    def test_pack_lengths_into_batches(self, lengths, tokens_in_batch):
+        src_lengths, tgt_lengths = lengths
+        batches = pack_lengths_into_batches(src_lengths, tgt_lengths, tokens_in_batch)
+        assert batches == pack_one_by_one(src_lengths.tolist(), tgt_lengths.tolist(), tokens_in_batch)
+        assert sorted(i for batch in batches for i in batch) == list(range(len(src_lengths)))
+        for batch in batches[:-1]:
+            padded_size = len(batch) * (src_lengths[batch].max() + tgt_lengths[batch].max())
+            # batches are cut to a multiple of 8 pairs, unless a few pairs exceed the budget already
+            assert (len(batch) % 8 == 0 and padded_size <= tokens_in_batch) or len(batch) <= 8
+
+    @pytest.mark.unit
+    def test_translation_dataset_batches(self):
+        dataset = TranslationDataset(dataset_src='', dataset_tgt='', tokens_in_batch=40)
+        dataset.src_pad_id = dataset.tgt_pad_id = 0
+        src_ids = [[1] * n for n in [3, 1, 2, 5, 2]]
+        tgt_ids = [[1] * n for n in [2, 2, 1, 3, 4]]
+        batch_indices = dataset.pack_data_into_batches(src_ids, tgt_ids)
+        assert batch_indices == [[1, 2, 4, 0, 3]]
+        batches = dataset.pad_batches(src_ids, tgt_ids, batch_indices)
+        assert batches[0]["src"].shape == (5, 5) and batches[0]["tgt"].shape == (5, 4)
+        assert pack_lengths_into_batches([], [], 40) == []
@@ -0,0 +1,163 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from nemo.collections.nlp.data.machine_translation.machine_translation_dataset import TranslationDataset
+from nemo.collections.nlp.data.machine_translation.translation_token_store import (
+    TranslationTokenStoreDataset,
+    iter_parallel_fragments,
+    preprocess_parallel_dataset_to_token_store,
+)
+from nemo.collections.nlp.modules.common.tokenizer_utils import get_nmt_tokenizer
+
+
+def build_byte_level_tokenizers():
+    return get_nmt_tokenizer(library='byte-level'), get_nmt_tokenizer(library='byte-level')
+
+
+def write_corpus(path, lines, trailing_newline=True):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + ('\n' if trailing_newline else ''))
+    return str(path)
+
+
+@pytest.fixture()
+def corpus(tmp_path):
+    rng = np.random.default_rng(0)
+    words = ['der', 'hund', 'läuft', 'schnell', 'über', 'die', 'straße', 'nach', 'hause']
+    src = [' '.join(rng.choice(words, size=rng.integers(1, 12))) for _ in range(50)]
+    tgt = [' '.join(reversed(line.split())) + ' .' for line in src]
+    return write_corpus(tmp_path / 'src.txt', src), write_corpus(tmp_path / 'tgt.txt', tgt)
+
+
+def read_batches(dataset):
+    """Returns the sorted (src, tgt) sentence pairs of the batches of a dataset, without padding."""
+    pairs = []
+    for idx in range(len(dataset)):
+        src_ids, src_mask, tgt_ids, _, labels = dataset[idx]
+        tgt = np.concatenate([tgt_ids[:, :1], labels], axis=1)
+        for i in range(len(src_ids)):
+            tgt_len = (labels[i] != dataset.tgt_pad_id).sum() + 1
+            pairs.append((tuple(src_ids[i][src_mask[i] == 1]), tuple(tgt[i][:tgt_len])))
+    return sorted(pairs)
+
+
+class TestTranslationTokenStore:
+    @pytest.mark.unit
+    @pytest.mark.parametrize("block_size", [7, 64, 1 << 20])
+    @pytest.mark.parametrize("trailing_newline", [True, False])
+    def test_iter_parallel_fragments(self, tmp_path, block_size, trailing_newline):
+        src = [f'source line {i}' + 'x' * i for i in range(23)]
+        tgt = [f'target {i}' for i in range(23)]
+        src_fname = write_corpus(tmp_path / 'src.txt', src, trailing_newline)
+        tgt_fname = write_corpus(tmp_path / 'tgt.txt', tgt, trailing_newline)
+
+        fragments = list(iter_parallel_fragments(src_fname, tgt_fname, 5, block_size=block_size))
+        assert [fragment.num_lines for fragment in fragments] == [5, 5, 5, 5, 3]
+        with open(src_fname, 'rb') as f:
+            src_data = f.read()
+        for idx, fragment in enumerate(fragments):
+            lines = src_data[fragment.src_start : fragment.src_end].decode().splitlines()
+            assert lines == src[5 * idx : 5 * idx + 5]
+        assert len({fragment.fingerprint for fragment in fragments}) == len(fragments)
+
+        write_corpus(tmp_path / 'short.txt', tgt[:-1])
+        with pytest.raises(ValueError):
+            list(iter_parallel_fragments(src_fname, str(tmp_path / 'short.txt'), 5, block_size=block_size))
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("n_jobs", [1, 2])
+    def test_token_store_matches_translation_dataset(self, tmp_path, corpus, n_jobs):
+        src_fname, tgt_fname = corpus
+        metadata_path = preprocess_parallel_dataset_to_token_store(
+            src_fname=src_fname,
+            tgt_fname=tgt_fname,
+            out_dir=str(tmp_path / 'store'),
+            build_tokenizers=build_byte_level_tokenizers,
+            tokenizer_kwargs={},
+            tokens_in_batch=256,
+            lines_per_dataset_fragment=1000,
+            n_jobs=n_jobs,
+        )
+        encoder_tokenizer, decoder_tokenizer = build_byte_level_tokenizers()
+        store = TranslationTokenStoreDataset(metadata_path, encoder_tokenizer, decoder_tokenizer)
+
+        expected = TranslationDataset(dataset_src=src_fname, dataset_tgt=tgt_fname, tokens_in_batch=256)
+        expected.batchify(encoder_tokenizer, decoder_tokenizer)
+        assert len(store) == len(expected) == json.load(open(metadata_path))['num_batches']
+        for idx in range(len(store)):
+            for actual, reference in zip(store[idx], expected[idx]):
+                np.testing.assert_array_equal(actual, reference)
+
+        # memory maps are not pickled
+        copied = pickle.loads(pickle.dumps(store))
+        assert copied._arrays == {}
+        assert read_batches(copied) == read_batches(store)
+
+    @pytest.mark.unit
+    def test_token_store_resume_and_dedup(self, tmp_path, corpus):
+        src_fname, tgt_fname = corpus
+        out_dir = str(tmp_path / 'store')
+        kwargs = dict(
+            src_fname=src_fname,
+            tgt_fname=tgt_fname,
+            out_dir=out_dir,
+            build_tokenizers=build_byte_level_tokenizers,
+            tokenizer_kwargs={},
+            tokens_in_batch=128,
+            lines_per_dataset_fragment=10,
+            n_jobs=1,
+        )
+        metadata_path = preprocess_parallel_dataset_to_token_store(**kwargs)
+        metadata = json.load(open(metadata_path))
+        assert len(metadata['token_store_fragments']) == 5 and metadata['num_sentences'] == 50
+        encoder_tokenizer, decoder_tokenizer = build_byte_level_tokenizers()
+        expected = read_batches(TranslationTokenStoreDataset(metadata_path, encoder_tokenizer, decoder_tokenizer))
+
+        # interrupt after two fragments: only the remaining fragments are processed again
+        manifest_path = os.path.join(out_dir, 'parallel.tokens.128.manifest.jsonl')
+        with open(manifest_path) as f:
+            entries = f.readlines()
+        with open(manifest_path, 'w') as f:
+            f.writelines(entries[:2])
+            f.write('{"fingerprint": "trunc')
+        kept = os.path.join(out_dir, json.loads(entries[0])['name'] + '.src.npy')
+        mtime = os.path.getmtime(kept)
+        os.remove(metadata_path)
+        metadata_path = preprocess_parallel_dataset_to_token_store(**kwargs)
+        assert os.path.getmtime(kept) == mtime
+        assert json.load(open(metadata_path)) == metadata
+        with open(manifest_path) as f:
+            lines = f.read().splitlines()
+        # the remaining fragments are appended after the truncated entry
+        assert len(lines) == 6 and lines[2] == '{"fingerprint": "trunc'
+        store = TranslationTokenStoreDataset(metadata_path, encoder_tokenizer, decoder_tokenizer)
+        assert read_batches(store) == expected
+
+        # identical fragments are tokenized and used once
+        src = open(src_fname).read().splitlines()
+        tgt = open(tgt_fname).read().splitlines()
+        kwargs['src_fname'] = write_corpus(tmp_path / 'src2.txt', src[:20] + src[:20] + src[20:])
+        kwargs['tgt_fname'] = write_corpus(tmp_path / 'tgt2.txt', tgt[:20] + tgt[:20] + tgt[20:])
+        kwargs['out_dir'] = str(tmp_path / 'dedup')
+        metadata_path = preprocess_parallel_dataset_to_token_store(**kwargs)
+        assert json.load(open(metadata_path))['num_sentences'] == 50
+        store = TranslationTokenStoreDataset(metadata_path, encoder_tokenizer, decoder_tokenizer)
+        assert read_batches(store) == expected
@@ -28,6 +28,7 @@ from nemo.collections.asr.parts.utils.offline_clustering import (
     split_input_data,
 )
 from nemo.collections.asr.parts.utils.online_clustering import (
+    IncrementalSpeakerClustering,
     OnlineSpeakerClustering,
     get_closest_embeddings,
     get_merge_quantity,
@@ -1044,6 +1045,80 @@ class TestSpeakerClustering:
     def test_online_speaker_clustering_cpu(self, n_spks, total_sec, buffer_size, sigma, seed, jit_script, cuda=False):
         self.test_online_speaker_clustering(n_spks, total_sec, buffer_size, sigma, seed, jit_script, cuda)
 
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    @pytest.mark.parametrize("n_spks, total_sec, buffer_size, sigma, seed", [(3, 30, 30, 0.1, 0), (4, 120, 20, 0.1, 1)])
+    @pytest.mark.parametrize("jit_script", [False, True])
+    def test_incremental_speaker_clustering_cpu(self, n_spks, total_sec, buffer_size, sigma, seed, jit_script):
+        step_per_frame = 2
+        em, ts, mc, _, _, gt = generate_toy_data(
+            n_spks, spk_dur=total_sec / n_spks, perturb_sigma=sigma, torch_seed=seed
+        )
+        em_s, _ = split_input_data(em, ts, mc)
+        emb_gen = em_s[-1]
+
+        online_clus = IncrementalSpeakerClustering(
+            max_num_speakers=8,
+            max_rp_threshold=0.15,
+            sparse_search_volume=30,
+            history_buffer_size=buffer_size,
+            current_buffer_size=buffer_size,
+            knn_neighbors=5,
+            recluster_interval=4,
+        )
+        if jit_script:
+            online_clus = torch.jit.script(online_clus)
+
+        evaluation_list = []
+        for frame_index in range(int(emb_gen.shape[0] / step_per_frame)):
+            curr_emb = emb_gen[0 : (frame_index + 1) * step_per_frame]
+            # Only the history and current buffers are passed after the session is longer than the buffers
+            stt_idx = max(0, curr_emb.shape[0] - 3 * buffer_size)
+            base_segment_indexes = torch.arange(stt_idx, curr_emb.shape[0])
+            merged_clus_labels = online_clus.forward_infer(
+                curr_emb=curr_emb[stt_idx:], base_segment_indexes=base_segment_indexes, frame_index=frame_index
+            )
+            assert len(merged_clus_labels) == (frame_index + 1) * step_per_frame
+            # The history buffer keeps at most `history_buffer_size` exemplars
+            assert online_clus.history_embedding_buffer_emb.shape[0] <= buffer_size
+            assert (
+                online_clus.history_embedding_buffer_emb.shape[0]
+                == online_clus.history_embedding_buffer_label.shape[0]
+                == online_clus.history_embedding_buffer_count.shape[0]
+            )
+            merged_clus_labels = stitch_cluster_labels(Y_old=gt[: len(merged_clus_labels)], Y_new=merged_clus_labels)
+            evaluation_list.extend(list(merged_clus_labels == gt[: len(merged_clus_labels)]))
+
+        assert online_clus.is_online
+        # Every segment which left the current buffer is counted in the speaker centroids
+        assert int(online_clus.centroid_count.sum()) == online_clus.history_buffer_seg_end
+        cumul_label_acc = sum(evaluation_list) / len(evaluation_list)
+        assert cumul_label_acc > 0.9
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_incremental_speaker_clustering_relabel_history(self):
+        torch.manual_seed(0)
+        online_clus = IncrementalSpeakerClustering(history_buffer_size=4)
+        embs = torch.randn(6, 8)
+        for emb, label in zip(embs, [0, 0, 0, 1, 1, 1]):
+            online_clus.add_embedding_to_history(emb, label)
+        # two embedding vectors are merged into exemplars
+        assert online_clus.history_embedding_buffer_emb.shape[0] == 4
+
+        hist_labels = online_clus.history_embedding_buffer_label.clone()
+        hist_labels[0] = 2
+        online_clus.relabel_history_buffer(hist_labels)
+        assert torch.equal(online_clus.history_embedding_buffer_label, hist_labels)
+        # the centroids are the sums of the embedding vectors merged into the exemplars of each speaker
+        counts = online_clus.history_embedding_buffer_count
+        for spk in range(3):
+            mask = hist_labels == spk
+            expected_sum = (online_clus.history_embedding_buffer_emb[mask] * counts[mask].unsqueeze(1)).sum(0)
+            assert torch.allclose(online_clus.centroid_sum[spk], expected_sum, atol=1e-5)
+            assert online_clus.centroid_count[spk] == counts[mask].sum()
+        assert int(online_clus.centroid_count.sum()) == 6
+
 
 class TestLinearSumAssignmentAlgorithm:
     @pytest.mark.unit
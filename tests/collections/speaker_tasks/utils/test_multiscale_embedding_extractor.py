@@ -0,0 +1,130 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+import numpy as np
+import pytest
+import soundfile as sf
+import torch
+from omegaconf import DictConfig
+
+from nemo.collections.asr.data.audio_to_label import repeat_signal
+from nemo.collections.asr.models import EncDecSpeakerLabelModel
+from nemo.collections.asr.parts.utils.multiscale_embedding_extractor import MultiscaleEmbeddingExtractor
+from nemo.collections.asr.parts.utils.speaker_utils import segments_manifest_to_subsegments_manifest
+
+SAMPLE_RATE = 16000
+
+
+@pytest.fixture(scope="module")
+def speaker_model():
+    torch.manual_seed(0)
+    cfg = DictConfig(
+        {
+            'preprocessor': {
+                '_target_': 'nemo.collections.asr.modules.AudioToMelSpectrogramPreprocessor',
+                'features': 16,
+                'dither': 0.0,
+            },
+            'encoder': {
+                '_target_': 'nemo.collections.asr.modules.ECAPAEncoder',
+                'feat_in': 16,
+                'filters': [4, 4, 4, 4, 12],
+                'kernel_sizes': [5, 3, 3, 3, 1],
+                'dilations': [1, 1, 1, 1, 1],
+                'scale': 2,
+            },
+            'decoder': {
+                '_target_': 'nemo.collections.asr.modules.SpeakerDecoder',
+                'feat_in': 12,
+                'num_classes': 2,
+                'pool_mode': 'attention',
+                'emb_sizes': 8,
+            },
+        }
+    )
+    return EncDecSpeakerLabelModel(cfg=cfg).eval()
+
+
+class TestMultiscaleEmbeddingExtractor:
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_extract(self, tmp_path, speaker_model):
+        rng = np.random.default_rng(0)
+        segments = []
+        for idx, num_samples in enumerate([3 * SAMPLE_RATE, 2 * SAMPLE_RATE]):
+            audio_filepath = str(tmp_path / f'audio_{idx}.wav')
+            sf.write(audio_filepath, rng.uniform(-0.5, 0.5, num_samples), SAMPLE_RATE)
+            segments.append({'audio_filepath': audio_filepath, 'offset': 0.1, 'duration': 1.7, 'label': 'UNK'})
+        segments.append(dict(segments[0], offset=2.2, duration=0.6))
+        segments_manifest = tmp_path / 'segments.json'
+        with open(segments_manifest, 'w') as f:
+            f.writelines(json.dumps(segment) + '\n' for segment in segments)
+
+        window_lengths = {0: 1.0, 1: 0.5}
+        subsegments_manifests = {
+            scale_idx: segments_manifest_to_subsegments_manifest(
+                str(segments_manifest), str(tmp_path / f'subsegments_scale{scale_idx}.json'), window, window / 2
+            )
+            for scale_idx, window in window_lengths.items()
+        }
+
+        extractor = MultiscaleEmbeddingExtractor(speaker_model, SAMPLE_RATE, batch_size=3, verbose=False)
+        outputs = extractor.extract(subsegments_manifests, window_lengths)
+        assert sorted(outputs) == [0, 1]
+        for scale_idx, (embeddings, time_stamps) in outputs.items():
+            window_samples = int(window_lengths[scale_idx] * SAMPLE_RATE)
+            with open(subsegments_manifests[scale_idx]) as f:
+                subsegments = [json.loads(line) for line in f]
+            assert sorted(embeddings) == ['audio_0', 'audio_1']
+            assert sum(len(embs) for embs in embeddings.values()) == len(subsegments)
+            for uniq_name in embeddings:
+                entries = [entry for entry in subsegments if uniq_name in entry['audio_filepath']]
+                assert time_stamps[uniq_name] == [
+                    [entry['offset'], entry['offset'] + entry['duration']] for entry in entries
+                ]
+                for emb, entry in zip(embeddings[uniq_name], entries):
+                    samples, _ = sf.read(
+                        entry['audio_filepath'],
+                        start=int(entry['offset'] * SAMPLE_RATE),
+                        frames=int(entry['duration'] * SAMPLE_RATE),
+                        dtype='float32',
+                    )
+                    # windows shorter than the window length are repeated, the model runs with autocast
+                    signal = repeat_signal(torch.tensor(samples), len(samples), window_samples)
+                    with torch.no_grad(), torch.amp.autocast('cpu'):
+                        _, expected = speaker_model.forward(
+                            input_signal=signal[None], input_signal_length=torch.tensor([window_samples])
+                        )
+                    assert torch.allclose(emb, expected[0].float(), atol=1e-4)
+
+        # embeddings of the same subsegments are cached
+        extractor.speaker_model = None
+        cached = extractor.extract(subsegments_manifests, window_lengths)
+        for scale_idx in outputs:
+            for uniq_name, embs in outputs[scale_idx][0].items():
+                assert torch.equal(cached[scale_idx][0][uniq_name], embs)
+
+        # the cache keeps the most recently used embeddings, evicted embeddings are extracted again
+        extractor.speaker_model = speaker_model
+        extractor.max_cache_size = 5
+        extractor.extract({1: subsegments_manifests[1]}, window_lengths)
+        assert len(extractor._cache) == 5
+        assert all(window_length == window_lengths[1] for _, window_length, _, _ in extractor._cache)
+        bounded = extractor.extract(subsegments_manifests, window_lengths)
+        assert len(extractor._cache) == 5
+        for scale_idx in outputs:
+            for uniq_name, embs in outputs[scale_idx][0].items():
+                assert torch.allclose(bounded[scale_idx][0][uniq_name], embs, atol=1e-4)
@@ -0,0 +1,147 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import glob
+
+import librosa
+import numpy as np
+import pytest
+import soundfile as sf
+import torch
+
+from nemo.collections.tts.parts.preprocessing.features import (
+    EnergyFeaturizer,
+    MelSpectrogramFeaturizer,
+    PitchFeaturizer,
+)
+from nemo.collections.tts.parts.preprocessing.pitch_extraction import (
+    BatchedPYIN,
+    write_pitch_energy_feature_stores,
+)
+
+SAMPLE_RATE = 8000
+WIN_LENGTH = 512
+HOP_LENGTH = 128
+FMIN = 60
+FMAX = 400
+
+
+def harmonic_audio(duration, pitch, seed):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+    phase = 2 * np.pi * np.cumsum(pitch * (1 + 0.1 * np.sin(2 * np.pi * 2 * t))) / SAMPLE_RATE
+    audio = 0.5 * np.sin(phase) + 0.2 * np.sin(2 * phase) + 0.05 * rng.standard_normal(t.shape)
+    # unvoiced start
+    audio[: SAMPLE_RATE // 5] = 0.05 * rng.standard_normal(SAMPLE_RATE // 5)
+    return audio.astype(np.float32)
+
+
+class TestPitchExtraction:
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_batched_pyin_matches_librosa(self):
+        audios = [harmonic_audio(1.2, 110, 0), harmonic_audio(0.5, 220, 1), harmonic_audio(0.9, 160, 2)]
+        audio = torch.zeros(len(audios), max(len(a) for a in audios))
+        for i, a in enumerate(audios):
+            audio[i, : len(a)] = torch.from_numpy(a)
+
+        pyin = BatchedPYIN(
+            sample_rate=SAMPLE_RATE, frame_length=WIN_LENGTH, hop_length=HOP_LENGTH, fmin=FMIN, fmax=FMAX
+        )
+        pitch, voiced_mask, voiced_prob, num_frames = pyin(audio, torch.tensor([len(a) for a in audios]))
+
+        for i, a in enumerate(audios):
+            expected_pitch, expected_mask, expected_prob = librosa.pyin(
+                a,
+                fmin=FMIN,
+                fmax=FMAX,
+                sr=SAMPLE_RATE,
+                frame_length=WIN_LENGTH,
+                hop_length=HOP_LENGTH,
+                fill_na=0.0,
+            )
+            n = int(num_frames[i])
+            assert n == len(expected_pitch)
+            assert expected_mask.any() and not expected_mask.all()
+            assert np.array_equal(voiced_mask[i, :n].numpy(), expected_mask)
+            assert np.allclose(pitch[i, :n].numpy(), expected_pitch, atol=1e-3)
+            assert np.allclose(voiced_prob[i, :n].numpy(), expected_prob, atol=1e-5)
+            assert not voiced_mask[i, n:].any() and not pitch[i, n:].any()
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_write_feature_stores(self, tmp_path):
+        audio_dir = tmp_path / "audio"
+        (audio_dir / "speaker").mkdir(parents=True)
+        entries = []
+        for i, (duration, pitch) in enumerate([(1.5, 120), (0.6, 200), (1.0, 150)]):
+            sf.write(audio_dir / "speaker" / f"{i}.wav", harmonic_audio(duration, pitch, i), SAMPLE_RATE)
+            entries.append({"audio_filepath": f"speaker/{i}.wav"})
+        entries.append({"audio_filepath": "speaker/0.wav", "offset": 0.5, "duration": 0.5})
+
+        # long audio is split into segments
+        pitch_featurizer = PitchFeaturizer(
+            voiced_prob_name="voiced_prob",
+            sample_rate=SAMPLE_RATE,
+            win_length=WIN_LENGTH,
+            hop_length=HOP_LENGTH,
+            pitch_fmin=FMIN,
+            pitch_fmax=FMAX,
+            batch_seconds=0.5,
+            batch_padding=5,
+        )
+        spec_featurizer = MelSpectrogramFeaturizer(
+            sample_rate=SAMPLE_RATE, win_length=WIN_LENGTH, hop_length=HOP_LENGTH, mel_dim=20, highfreq=None
+        )
+        energy_featurizer = EnergyFeaturizer(spec_featurizer=spec_featurizer)
+        feature_dir = tmp_path / "features"
+        write_pitch_energy_feature_stores(
+            entries[:2],
+            audio_dir,
+            feature_dir,
+            pitch_featurizer=pitch_featurizer,
+            energy_featurizer=energy_featurizer,
+            batch_size=2,
+        )
+        # opens the stores with the first entries, which must not hide the entries written afterwards
+        pitch_featurizer.load(entries[0], audio_dir, feature_dir)
+        # entries in the stores are skipped, the others are written by two workers
+        write_pitch_energy_feature_stores(
+            entries,
+            audio_dir,
+            feature_dir,
+            pitch_featurizer=pitch_featurizer,
+            energy_featurizer=energy_featurizer,
+            batch_size=2,
+            num_workers=2,
+        )
+        assert len(glob.glob(str(feature_dir / "pitch" / "*_index.npz"))) == 2
+
+        for entry in entries:
+            features = pitch_featurizer.load(entry, audio_dir, feature_dir)
+            features.update(energy_featurizer.load(entry, audio_dir, feature_dir))
+            expected_pitch, expected_mask, expected_prob = pitch_featurizer.compute_pitch(entry, audio_dir)
+            expected_energy = energy_featurizer.compute_energy(entry, audio_dir)
+            if "offset" in entry:
+                start = librosa.time_to_frames(entry["offset"], sr=SAMPLE_RATE, hop_length=HOP_LENGTH)
+                end = 1 + start + librosa.time_to_frames(entry["duration"], sr=SAMPLE_RATE, hop_length=HOP_LENGTH)
+                expected_pitch, expected_mask, expected_prob, expected_energy = (
+                    feature[start:end] for feature in (expected_pitch, expected_mask, expected_prob, expected_energy)
+                )
+
+            assert features["voiced_mask"].dtype == torch.bool
+            assert torch.equal(features["voiced_mask"], torch.from_numpy(expected_mask))
+            assert torch.allclose(features["pitch"], torch.from_numpy(expected_pitch), atol=1e-3)
+            assert torch.allclose(features["voiced_prob"], torch.from_numpy(expected_prob), atol=1e-5)
+            assert torch.allclose(features["energy"], torch.from_numpy(expected_energy), atol=1e-4)
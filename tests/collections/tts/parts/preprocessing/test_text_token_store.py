@@ -0,0 +1,90 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from nemo.collections.common.tokenizers.text_to_speech.tts_tokenizers import (
+    EnglishCharsTokenizer,
+    EnglishPhonemesTokenizer,
+)
+from nemo.collections.tts.g2p.models.en_us_arpabet import EnglishG2p
+from nemo.collections.tts.parts.preprocessing.text_token_store import (
+    TextTokenStore,
+    get_tokenizer_fingerprint,
+    write_text_token_store,
+)
+
+PHONEME_DICT = {
+    "hello": [["HH", "AH0", "L", "OW1"]],
+    "world": [["W", "ER1", "L", "D"]],
+    "read": [["R", "EH1", "D"], ["R", "IY1", "D"]],
+}
+
+TEXTS = ["Hello world!", "Read the world, hello.", "hello", "Hello world!", "A text, with (punctuation)."]
+
+
+def phonemes_tokenizer(phoneme_dict=PHONEME_DICT, phoneme_probability=None):
+    g2p = EnglishG2p(phoneme_dict=phoneme_dict, heteronyms=["read"], phoneme_probability=phoneme_probability)
+    return EnglishPhonemesTokenizer(g2p, stresses=True, chars=True, pad_with_space=True)
+
+
+class TestTextTokenStore:
+    @pytest.mark.unit
+    def test_tokenizer_fingerprint(self):
+        assert get_tokenizer_fingerprint(phonemes_tokenizer()) == get_tokenizer_fingerprint(phonemes_tokenizer())
+        assert get_tokenizer_fingerprint(EnglishCharsTokenizer()) == get_tokenizer_fingerprint(EnglishCharsTokenizer())
+
+        fingerprint = get_tokenizer_fingerprint(phonemes_tokenizer())
+        other_dict = dict(PHONEME_DICT, world=[["W", "ER0", "L", "D"]])
+        assert get_tokenizer_fingerprint(phonemes_tokenizer(phoneme_dict=other_dict)) != fingerprint
+        assert get_tokenizer_fingerprint(EnglishCharsTokenizer(pad_with_space=True)) != get_tokenizer_fingerprint(
+            EnglishCharsTokenizer()
+        )
+        assert get_tokenizer_fingerprint(EnglishCharsTokenizer()) != fingerprint
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("num_workers", [1, 2])
+    def test_write_and_read(self, tmp_path, num_workers):
+        tokenizer = phonemes_tokenizer()
+        assert TextTokenStore.from_dir(tmp_path, tokenizer) is None
+
+        tokenizer_dir = write_text_token_store(TEXTS[:3], tokenizer, tmp_path, num_workers=num_workers)
+        assert os.path.basename(tokenizer_dir) == get_tokenizer_fingerprint(tokenizer)
+        # texts in the store are not tokenized again
+        write_text_token_store(TEXTS, tokenizer, tmp_path, num_workers=num_workers, texts_per_part=1)
+        write_text_token_store(TEXTS, tokenizer, tmp_path, num_workers=num_workers)
+
+        store = TextTokenStore.from_dir(tmp_path, phonemes_tokenizer())
+        assert len(store) == len(set(TEXTS))
+        for text in TEXTS:
+            tokens = store.get(text)
+            assert tokens.dtype == np.int64
+            assert tokens.tolist() == tokenizer(text)
+        assert "unknown text" not in store and store.get("unknown text") is None
+        assert pickle.loads(pickle.dumps(store)).get(TEXTS[0]).tolist() == tokenizer(TEXTS[0])
+
+        # the store of another tokenizer is not used
+        assert TextTokenStore.from_dir(tmp_path, EnglishCharsTokenizer()) is None
+
+    @pytest.mark.unit
+    def test_random_tokenizer_not_stored(self, tmp_path):
+        tokenizer = phonemes_tokenizer(phoneme_probability=0.5)
+        with pytest.raises(ValueError):
+            write_text_token_store(TEXTS, tokenizer, tmp_path)
+        write_text_token_store(TEXTS, phonemes_tokenizer(), tmp_path)
+        assert TextTokenStore.from_dir(tmp_path, tokenizer) is None
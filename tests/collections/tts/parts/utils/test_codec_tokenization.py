@@ -0,0 +1,129 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+
+import numpy as np
+import pytest
+import soundfile as sf
+import torch
+from omegaconf import OmegaConf
+
+from nemo.collections.asr.parts.utils.manifest_utils import write_manifest
+from nemo.collections.tts.data.codec_token_dataset import AudioCodecTokenDataset
+from nemo.collections.tts.models import AudioCodecModel
+from nemo.collections.tts.parts.utils.codec_tokenization import batch_by_duration, tokenize_manifest_to_store
+
+
+@pytest.fixture(scope="module")
+def codec_model():
+    torch.manual_seed(0)
+    cfg = OmegaConf.create(
+        {
+            "sample_rate": 8000,
+            "samples_per_frame": 16,
+            "commit_loss_scale": 0.0,
+            "loss_resolutions": [[64, 16, 64]],
+            "mel_loss_dims": [16],
+            "audio_encoder": {
+                "_target_": "nemo.collections.tts.modules.audio_codec_modules.HiFiGANEncoder",
+                "encoded_dim": 4,
+                "down_sample_rates": [4, 4],
+                "base_channels": 4,
+                "resblock_kernel_sizes": [3],
+            },
+            "vector_quantizer": {
+                "_target_": "nemo.collections.tts.modules.audio_codec_modules.GroupFiniteScalarQuantizer",
+                "num_groups": 2,
+                "num_levels_per_group": [8, 5],
+            },
+            "audio_decoder": {
+                "_target_": "nemo.collections.tts.modules.audio_codec_modules.HiFiGANDecoder",
+                "input_dim": 4,
+                "up_sample_rates": [4, 4],
+                "base_channels": 8,
+                "resblock_kernel_sizes": [3],
+            },
+            "discriminator": {
+                "_target_": "nemo.collections.tts.modules.audio_codec_modules.Discriminator",
+                "discriminators": [],
+            },
+            "generator_loss": {"_target_": "nemo.collections.tts.losses.audio_codec_loss.GeneratorSquaredLoss"},
+            "discriminator_loss": {
+                "_target_": "nemo.collections.tts.losses.audio_codec_loss.DiscriminatorSquaredLoss"
+            },
+        }
+    )
+    return AudioCodecModel(cfg=cfg).eval()
+
+
+class TestCodecTokenization:
+    @pytest.mark.unit
+    def test_batch_by_duration(self):
+        durations = [1.0, 5.0, 2.0, 12.0, 2.5, 0.5, 4.0]
+        batches = batch_by_duration(durations, max_batch_duration=10.0)
+        assert batches == [[3], [1, 6], [4, 2, 0, 5]]
+        for batch in batches[1:]:
+            assert max(durations[i] for i in batch) * len(batch) <= 10.0
+        assert batch_by_duration(durations, max_batch_duration=100.0, max_batch_size=3) == [[3, 1, 6], [4, 2, 0], [5]]
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_encode_in_chunks(self, codec_model):
+        audio = torch.randn(3, 5000)
+        audio_len = torch.tensor([5000, 700, 3001])
+        with torch.no_grad():
+            expected, expected_len = codec_model.encode(audio=audio, audio_len=audio_len)
+
+        tokens, tokens_len = codec_model.encode_in_chunks(audio, audio_len, chunk_frames=50, context_frames=8)
+        assert torch.equal(tokens_len, expected_len.long())
+        assert torch.equal(tokens, expected)
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_tokenize_manifest_to_store(self, tmp_path, codec_model):
+        rng = np.random.default_rng(0)
+        entries = []
+        for idx, num_samples in enumerate([4000, 800, 2400, 9600, 1600]):
+            audio_filepath = f'audio_{idx}.wav'
+            sf.write(tmp_path / audio_filepath, rng.uniform(-0.5, 0.5, num_samples), 8000)
+            entries.append({'audio_filepath': audio_filepath, 'duration': num_samples / 8000})
+        manifest_path = tmp_path / 'manifest.json'
+        write_manifest(str(manifest_path), entries[::-1])
+        store_dir = str(tmp_path / 'store')
+
+        kwargs = dict(max_batch_duration=1.5, chunk_duration=0.2, context_duration=0.05, entries_per_part=2)
+        parts = tokenize_manifest_to_store(codec_model, entries, tmp_path, store_dir, **kwargs)
+        assert parts == ['codes_part_00000', 'codes_part_00001', 'codes_part_00002']
+
+        # complete parts are not tokenized again
+        os.remove(os.path.join(store_dir, 'codes_part_00001_index.npz'))
+        parts = tokenize_manifest_to_store(codec_model, entries, tmp_path, store_dir, **kwargs)
+        assert parts == ['codes_part_00001']
+
+        dataset = AudioCodecTokenDataset(store_dir, manifest_path=manifest_path, max_duration=1.0)
+        assert len(dataset) == 4
+        for example in dataset:
+            idx = int(example['key'].split('_')[1])
+            num_samples = int(entries[idx]['duration'] * 8000)
+            audio = torch.tensor(sf.read(tmp_path / entries[idx]['audio_filepath'], dtype='float32')[0])
+            with torch.no_grad():
+                expected, _ = codec_model.encode(audio=audio[None], audio_len=torch.tensor([num_samples]))
+            assert example['tokens'].dtype == torch.int64 and example['tokens_len'] == -(-num_samples // 16)
+            assert torch.equal(example['tokens'], expected[0].long())
+
+        sampler = dataset.get_sampler(shuffle=True, seed=1)
+        assert sorted(sampler) == list(range(len(dataset)))
+        batch = dataset.collate_fn([dataset[i] for i in range(len(dataset))])
+        assert batch['tokens'].shape == (4, 2, int(batch['tokens_lens'].max()))
@@ -0,0 +1,92 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import torch
+
+from nemo.collections.tts.modules.hifigan_modules import Generator
+from nemo.collections.tts.parts.utils.streaming import (
+    StreamingSynthesizer,
+    get_vocoder_receptive_field,
+    split_into_phrases,
+)
+
+
+class TinyHifiGan(torch.nn.Module):
+    """Randomly initialized HiFi-GAN generator with the vocoder interface."""
+
+    def __init__(self):
+        super().__init__()
+        torch.manual_seed(0)
+        self.generator = Generator(
+            resblock=1,
+            upsample_rates=[4, 4],
+            upsample_kernel_sizes=[8, 8],
+            upsample_initial_channel=32,
+            resblock_kernel_sizes=[3, 7],
+            resblock_dilation_sizes=[[1, 3, 5], [1, 3, 5]],
+            initial_input_size=16,
+        ).eval()
+
+    def convert_spectrogram_to_audio(self, spec):
+        return self.generator(x=spec).squeeze(1)
+
+
+class TinySpectrogramGenerator:
+    def parse(self, text):
+        return torch.tensor([[ord(c) for c in text]])
+
+    def generate_spectrogram(self, tokens):
+        return torch.randn(1, 16, 3 * tokens.shape[1])
+
+
+class TestStreamingSynthesis:
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_vocoder_receptive_field(self):
+        receptive_field = get_vocoder_receptive_field(TinyHifiGan(), num_mel_channels=16)
+        assert receptive_field.hop_length == 16
+        # conv_pre (3 frames), upsampling and resblocks at 4x (10 frames) and 16x (3 frames)
+        assert receptive_field.left_frames == receptive_field.right_frames == 16
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    @pytest.mark.parametrize("chunk_frames, overlap_frames", [(8, 0), (10, 2), (64, 3)])
+    def test_streaming_matches_full_utterance(self, chunk_frames, overlap_frames):
+        vocoder = TinyHifiGan()
+        synthesizer = StreamingSynthesizer(
+            None, vocoder, chunk_frames=chunk_frames, overlap_frames=overlap_frames, num_mel_channels=16
+        )
+        spec = torch.randn(2, 16, 45)
+        with torch.no_grad():
+            expected = vocoder.convert_spectrogram_to_audio(spec=spec)
+        chunks = list(synthesizer.stream_spectrogram(spec))
+        assert len(chunks) == -(-45 // chunk_frames)
+        torch.testing.assert_close(torch.cat(chunks, dim=-1), expected, atol=1e-5, rtol=1e-4)
+
+        # without context the chunks are cross-faded but differ from the full utterance
+        synthesizer.context_frames = 0
+        audio = torch.cat(list(synthesizer.stream_spectrogram(spec)), dim=-1)
+        assert audio.shape == expected.shape
+
+    @pytest.mark.run_only_on('CPU')
+    @pytest.mark.unit
+    def test_stream_phrases(self):
+        assert split_into_phrases(" Hello, world. How are you?  Fine ") == ["Hello,", "world.", "How are you?", "Fine"]
+        synthesizer = StreamingSynthesizer(TinySpectrogramGenerator(), TinyHifiGan(), num_mel_channels=16)
+        text = "Hello, world. How are you?"
+        whole = torch.cat(list(synthesizer.stream(text)), dim=-1)
+        phrases = torch.cat(list(synthesizer.stream(text, split_phrases=True)), dim=-1)
+        assert whole.shape[-1] == 3 * 16 * len(text)
+        assert phrases.shape[-1] == 3 * 16 * sum(len(phrase) for phrase in split_into_phrases(text))
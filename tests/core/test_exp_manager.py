@@ -15,6 +15,7 @@ import json
 import math
 import os
 import re
+import time
 from pathlib import Path
 from typing import Any
 
@@ -29,10 +30,12 @@ from omegaconf.errors import OmegaConfBaseException
 from nemo.collections.nlp.parts.nlp_overrides import NLPDDPStrategy
 from nemo.constants import NEMO_ENV_VARNAME_VERSION
 from nemo.core.classes import ModelPT
+from nemo.utils import timers
 from nemo.utils.app_state import AppState
 from nemo.utils.callbacks import NeMoModelCheckpoint
 from nemo.utils.exp_manager import (
     CheckpointMisconfigurationError,
+    HierarchicalTimingCallback,
     LoggerMisconfigurationError,
     NotFoundError,
     exp_manager,
@@ -648,6 +651,79 @@ class TestExpManager:
         model = TestModel()
         trainer.fit(model, ckpt_path=model_path)
 
+    @pytest.mark.unit
+    def test_hierarchical_timing(self, tmp_path):
+        class TestModel(ExampleModel):
+            def __init__(self):
+                super().__init__()
+                self.loss_fn = torch.nn.L1Loss()
+
+            def train_dataloader(self):
+                dataset = OnesDataset(8)
+                return torch.utils.data.DataLoader(dataset, batch_size=1)
+
+            def training_step(self, batch, batch_idx):
+                with timers.profile_range("encoder"):
+                    output = self.l1(batch)
+                return self.loss_fn(output, torch.zeros_like(output))
+
+        class SlowCallback(Callback):
+            def on_train_batch_end(self, trainer, pl_module, outputs, batch, batch_idx):
+                time.sleep(0.01)
+
+        trainer = pl.Trainer(
+            accelerator='cpu', enable_checkpointing=False, logger=False, max_steps=8, callbacks=[SlowCallback()]
+        )
+        exp_manager(
+            trainer,
+            {
+                "explicit_log_dir": str(tmp_path),
+                "create_checkpoint_callback": False,
+                "log_hierarchical_timing": True,
+                "hierarchical_timing_kwargs": {"log_every_n_steps": 4},
+            },
+        )
+        trainer.fit(TestModel())
+        assert timers.get_global_timer() is None
+
+        with open(tmp_path / "timing" / "timing_summary.json") as f:
+            summary = json.load(f)
+        assert summary["train_step"]["count"] == 8
+        assert summary["train_step/forward/encoder"]["count"] == 8
+        # loss modules are timed by ModelPT
+        assert summary["train_step/forward/loss"]["count"] == 8
+        assert summary["train_step/backward"]["count"] == 8
+        assert summary["train_step/optimizer"]["count"] == 8
+        assert summary["train_dataloader"]["count"] >= 8
+        # batch start and batch end hooks of each step
+        assert summary["callbacks"]["count"] == 16
+        # hooks of other callbacks are not a part of the dataloader time
+        assert summary["callbacks"]["p99"] >= 0.01
+        assert summary["train_dataloader"]["p50"] < 0.01
+
+        with open(tmp_path / "timing" / "trace_rank0.json") as f:
+            trace = json.load(f)
+        step_events = [event for event in trace["traceEvents"] if event["name"] == "train_step"]
+        assert len(step_events) == 8
+        assert all(event["ph"] == "X" and event["dur"] >= 0 for event in step_events)
+
+    @pytest.mark.unit
+    def test_hierarchical_timing_stale_range(self):
+        callback = HierarchicalTimingCallback()
+        assert callback.timer.buffer_size == 1
+        callback.on_train_epoch_start(None, None)
+        callback.on_train_batch_start(None, None, None, 0)
+        callback.on_train_batch_end(None, None, None, None, 0)
+        # a step which was not finished, e.g. because of an exception in the forward pass
+        callback.on_train_batch_start(None, None, None, 1)
+        callback.on_train_batch_start(None, None, None, 2)
+        callback.on_train_batch_end(None, None, None, None, 2)
+
+        assert callback.timer.active_timers() == ["train_dataloader"]
+        # only the stale step is dropped, earlier measures are kept
+        assert callback.timer.histograms["train_step"].sum() == 2
+        assert callback.timer.histograms["train_step/forward"].sum() == 2
+
     @pytest.mark.unit
     def test_resume_checkpoint_skip_validation(self, tmp_path):
         """Test to ensure that when we resume from a checkpoint, we do not re-run validation unnecessarily."""
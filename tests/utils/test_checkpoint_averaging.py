@@ -0,0 +1,130 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import os
+import tarfile
+
+import pytest
+import torch
+
+from nemo.utils.checkpoint_averaging import average_checkpoint_files, detect_checkpoint_format
+
+
+def make_state_dicts(num_checkpoints=3):
+    state_dicts = []
+    for idx in range(num_checkpoints):
+        torch.manual_seed(idx)
+        state_dicts.append(
+            {
+                "linear.weight": torch.randn(37, 5),
+                "linear.bias": torch.randn(7).bfloat16(),
+                "scalar": torch.tensor(float(idx)),
+                "bn.num_batches_tracked": torch.tensor(idx + 5),
+            }
+        )
+    return state_dicts
+
+
+def check_average(averaged, state_dicts):
+    expected = sum(state_dict["linear.weight"] for state_dict in state_dicts) / len(state_dicts)
+    assert torch.allclose(averaged["linear.weight"], expected)
+    expected = sum(state_dict["linear.bias"].float() for state_dict in state_dicts) / len(state_dicts)
+    assert averaged["linear.bias"].dtype == torch.bfloat16
+    assert torch.allclose(averaged["linear.bias"].float(), expected.bfloat16().float())
+    assert averaged["scalar"] == 1.0
+    # integer tensors are copied from the first checkpoint
+    assert averaged["bn.num_batches_tracked"] == 5
+
+
+class TestCheckpointAveraging:
+    @pytest.mark.unit
+    def test_average_lightning_checkpoints(self, tmp_path):
+        state_dicts = make_state_dicts()
+        paths = []
+        for idx, state_dict in enumerate(state_dicts):
+            paths.append(str(tmp_path / f"step={idx}.ckpt"))
+            torch.save({"state_dict": {**state_dict, "te._extra_state": None}, "optimizer_states": [{}]}, paths[-1])
+
+        assert detect_checkpoint_format(paths[0]) == "torch"
+        output_path = str(tmp_path / "averaged.ckpt")
+        # chunks of 16 elements split the weight into chunks of 3 rows
+        average_checkpoint_files(paths, output_path, chunk_numel=16, num_io_threads=2)
+        averaged = torch.load(output_path, weights_only=False)
+        assert "optimizer_states" not in averaged
+        assert list(averaged["state_dict"].keys())[-1] == "te._extra_state"
+        check_average(averaged["state_dict"], state_dicts)
+
+    @pytest.mark.unit
+    def test_average_nemo_files(self, tmp_path):
+        state_dicts = make_state_dicts()
+        paths = []
+        for idx, state_dict in enumerate(state_dicts):
+            model_dir = tmp_path / f"model_{idx}"
+            os.makedirs(model_dir)
+            torch.save(state_dict, model_dir / "model_weights.ckpt")
+            with open(model_dir / "model_config.yaml", "w") as f:
+                f.write(f"idx: {idx}\n")
+            paths.append(str(tmp_path / f"model_{idx}.nemo"))
+            with tarfile.open(paths[-1], "w:") as tar:
+                tar.add(model_dir, arcname=".")
+
+        output_path = str(tmp_path / "averaged.nemo")
+        average_checkpoint_files(paths, output_path, chunk_numel=16)
+        with tarfile.open(output_path, "r:") as tar:
+            assert tar.extractfile("./model_config.yaml").read() == b"idx: 0\n"
+            averaged = torch.load(io.BytesIO(tar.extractfile("./model_weights.ckpt").read()))
+        check_average(averaged, state_dicts)
+
+    @pytest.mark.unit
+    def test_average_torch_dist_checkpoints(self, tmp_path):
+        import torch.distributed.checkpoint as dcp
+
+        state_dicts = make_state_dicts()
+        paths = []
+        for idx, state_dict in enumerate(state_dicts):
+            paths.append(str(tmp_path / f"step={idx}"))
+            dcp.save({**state_dict, "te._extra_state": io.BytesIO(b"state")}, checkpoint_id=paths[-1], no_dist=True)
+            with open(os.path.join(paths[-1], "common.pt"), "wb") as f:
+                f.write(b"common")
+
+        assert detect_checkpoint_format(paths[0]) == "torch_dist"
+        output_path = str(tmp_path / "averaged")
+        average_checkpoint_files(paths, output_path, chunk_numel=16)
+        assert os.path.exists(os.path.join(output_path, "common.pt"))
+
+        averaged = {key: torch.empty_like(value) for key, value in state_dicts[0].items()}
+        averaged["te._extra_state"] = io.BytesIO()
+        dcp.load(averaged, checkpoint_id=output_path, no_dist=True)
+        check_average(averaged, state_dicts)
+        assert averaged["te._extra_state"].getvalue() == b"state"
+
+    @pytest.mark.unit
+    def test_average_zarr_checkpoints(self, tmp_path):
+        zarr = pytest.importorskip("zarr")
+        state_dicts = make_state_dicts()
+        paths = []
+        for idx, state_dict in enumerate(state_dicts):
+            paths.append(str(tmp_path / f"step={idx}"))
+            for key, value in state_dict.items():
+                if value.dtype == torch.bfloat16:
+                    # zarr has no bfloat16 without extensions
+                    value = value.float()
+                zarr.save_array(os.path.join(paths[-1], key), value.numpy())
+
+        output_path = str(tmp_path / "averaged")
+        average_checkpoint_files(paths, output_path, checkpoint_format="zarr", chunk_numel=16)
+        averaged = {key: torch.from_numpy(zarr.open(os.path.join(output_path, key))[...]) for key in state_dicts[0]}
+        averaged["linear.bias"] = averaged["linear.bias"].bfloat16()
+        check_average(averaged, state_dicts)
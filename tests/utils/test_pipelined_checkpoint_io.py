@@ -0,0 +1,153 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import os
+import threading
+import time
+
+import pytest
+import torch
+
+from nemo.utils.callbacks.pipelined_checkpoint_io import (
+    CheckpointStorageBackend,
+    PipelinedCheckpointIO,
+    PipelinedCheckpointWriter,
+)
+
+# chunks of 1KB split the checkpoints below into many parts
+CHUNK_SIZE_MB = 1 / 1024
+
+
+class FakeObjectStore(CheckpointStorageBackend):
+    """Keeps parts in memory like an object store multipart upload. Parts are written slowly to exercise the ring."""
+
+    def __init__(self, part_delay=0.0, fail_on_part=None):
+        self.part_delay = part_delay
+        self.fail_on_part = fail_on_part
+        self.objects = {}
+        self.aborted = []
+        self.part_sizes = []
+        self._lock = threading.Lock()
+
+    def begin(self, path):
+        return {'path': path, 'parts': {}}
+
+    def write_part(self, handle, part_number, offset, data):
+        time.sleep(self.part_delay)
+        if part_number == self.fail_on_part:
+            raise RuntimeError("upload failed")
+        with self._lock:
+            handle['parts'][part_number] = bytes(data)
+            self.part_sizes.append(len(data))
+
+    def complete(self, handle):
+        parts = handle['parts']
+        assert sorted(parts) == list(range(1, len(parts) + 1))
+        self.objects[handle['path']] = b''.join(parts[number] for number in sorted(parts))
+
+    def abort(self, handle):
+        self.aborted.append(handle['path'])
+
+    def open(self, path):
+        return io.BytesIO(self.objects[path])
+
+    def remove(self, path):
+        self.objects.pop(path, None)
+
+
+def make_checkpoint():
+    weight = torch.randn(64, 32)
+    return {
+        "state_dict": {"linear.weight": weight, "linear.bias": torch.randn(32).bfloat16(), "tied.weight": weight},
+        "optimizer_states": [{"state": {0: {"exp_avg": torch.randn(64, 32)}}, "param_groups": [{"lr": 0.1}]}],
+        "global_step": 10,
+    }
+
+
+class TestPipelinedCheckpointIO:
+    @pytest.mark.unit
+    def test_save_to_local_file_system(self, tmp_path):
+        checkpoint_io = PipelinedCheckpointIO(chunk_size_MB=CHUNK_SIZE_MB, num_ring_slots=2, num_write_threads=3)
+        checkpoint = make_checkpoint()
+        expected = {key: value.clone() for key, value in checkpoint["state_dict"].items()}
+        path = tmp_path / "checkpoints" / "step=10.ckpt"
+        checkpoint_io.save_checkpoint(checkpoint, path)
+        # the snapshot is taken before save_checkpoint returns
+        checkpoint["state_dict"]["linear.weight"].add_(1.0)
+        checkpoint["optimizer_states"][0]["param_groups"][0]["lr"] = 0.2
+
+        loaded = checkpoint_io.load_checkpoint(path)
+        assert not os.path.exists(f"{path}.in_progress")
+        assert torch.load(path, weights_only=False).keys() == checkpoint.keys()
+        for key, value in expected.items():
+            assert loaded["state_dict"][key].dtype == value.dtype
+            assert torch.equal(loaded["state_dict"][key], value)
+        assert loaded["state_dict"]["tied.weight"] is loaded["state_dict"]["linear.weight"]
+        assert loaded["optimizer_states"][0]["param_groups"][0]["lr"] == 0.1
+        assert loaded["global_step"] == 10
+
+        metrics = checkpoint_io.metrics[-1]
+        assert metrics.snapshot_bytes == (2 * 64 * 32 + 32) * 4 - 32 * 2
+        assert metrics.serialized_bytes == os.path.getsize(path)
+        assert metrics.num_parts == -(-metrics.serialized_bytes // 1024)
+        assert metrics.blocking_time > 0 and metrics.write_throughput > 0
+
+        checkpoint_io.remove_checkpoint(path)
+        assert not os.path.exists(path)
+        checkpoint_io.teardown()
+
+    @pytest.mark.unit
+    def test_save_to_object_store_reuses_buffers(self):
+        backend = FakeObjectStore(part_delay=0.001)
+        writer = PipelinedCheckpointWriter(backend, chunk_size_MB=CHUNK_SIZE_MB, num_ring_slots=3)
+        checkpoints = []
+        for step in range(3):
+            checkpoints.append(make_checkpoint())
+            writer.save(checkpoints[-1], f"s3://bucket/step={step}.ckpt")
+            snapshot_buffers = list(writer._pool._buffers)
+        writer.close()
+
+        # snapshot buffers are reused by saves of checkpoints with the same structure
+        assert all(a is b for a, b in zip(snapshot_buffers, writer._pool._buffers))
+        assert len(writer.metrics) == 3
+        # only the last part of each checkpoint is smaller than a chunk
+        assert sum(size != 1024 for size in backend.part_sizes) == 3
+        for step, checkpoint in enumerate(checkpoints):
+            loaded = torch.load(backend.open(f"s3://bucket/step={step}.ckpt"), weights_only=False)
+            exp_avg = loaded["optimizer_states"][0]["state"][0]["exp_avg"]
+            assert torch.equal(exp_avg, checkpoint["optimizer_states"][0]["state"][0]["exp_avg"])
+
+    @pytest.mark.unit
+    def test_failed_upload_is_aborted_and_raised(self):
+        backend = FakeObjectStore(fail_on_part=3)
+        writer = PipelinedCheckpointWriter(backend, chunk_size_MB=CHUNK_SIZE_MB, num_ring_slots=2)
+        writer.save(make_checkpoint(), "s3://bucket/failed.ckpt")
+        with pytest.raises(RuntimeError, match="upload failed"):
+            writer.wait()
+        assert backend.aborted == ["s3://bucket/failed.ckpt"]
+        assert "s3://bucket/failed.ckpt" not in backend.objects
+
+        # the writer can be used again after a failure
+        backend.fail_on_part = None
+        writer.save(make_checkpoint(), "s3://bucket/retried.ckpt")
+        writer.close()
+        assert "s3://bucket/retried.ckpt" in backend.objects
+
+    @pytest.mark.unit
+    def test_chunk_size_smaller_than_min_part_size(self):
+        backend = FakeObjectStore()
+        backend.min_part_size = 5 * 1024**2
+        with pytest.raises(ValueError, match="minimum part size"):
+            PipelinedCheckpointWriter(backend, chunk_size_MB=1)
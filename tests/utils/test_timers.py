@@ -0,0 +1,138 @@
+# Copyright (c) 2024, NVIDIA CORPORATION.  All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from nemo.utils import timers
+
+
+class TestHierarchicalTimer:
+    @pytest.mark.unit
+    def test_nested_ranges(self):
+        timer = timers.HierarchicalTimer(reduction="none")
+        for _ in range(3):
+            with timer.range("step"):
+                with timer.range("forward"):
+                    pass
+                timer.start("backward")
+                assert timer.active_timers() == ["step", "step/backward"]
+                timer.stop("backward")
+
+        assert timer.active_timers() == []
+        assert set(timer.export().keys()) == {"step", "step/forward", "step/backward"}
+        assert len(timer["step/forward"]) == 3
+        assert all(timer.histograms[path].sum() == 3 for path in timer.histograms)
+
+    @pytest.mark.unit
+    def test_wrong_stop_order(self):
+        timer = timers.HierarchicalTimer()
+        timer.start("step")
+        timer.start("forward")
+        with pytest.raises(RuntimeError):
+            timer.stop("step")
+        timer.stop("forward")
+        timer.stop("step")
+        with pytest.raises(RuntimeError):
+            timer.stop("step")
+
+    @pytest.mark.unit
+    def test_buffer_size(self):
+        timer = timers.HierarchicalTimer(reduction="none", buffer_size=2)
+        for _ in range(5):
+            with timer.range("step"):
+                pass
+        assert isinstance(timer["step"], list) and len(timer["step"]) == 2
+        # histograms count all measures
+        assert timer.histograms["step"].sum() == 5
+
+    @pytest.mark.unit
+    def test_discard(self):
+        timer = timers.HierarchicalTimer()
+        with timer.range("step"):
+            pass
+        timer.start("step")
+        timer.start("forward")
+        timer.discard("step")
+        assert timer.active_timers() == []
+        # the discarded ranges are not recorded and other measures are kept
+        assert timer.histograms["step"].sum() == 1 and "step/forward" not in timer.histograms
+        with pytest.raises(RuntimeError):
+            timer.discard("step")
+
+    @pytest.mark.unit
+    def test_threads_have_separate_stacks(self):
+        timer = timers.HierarchicalTimer()
+
+        def worker():
+            with timer.range("worker"):
+                pass
+
+        with timer.range("main"):
+            thread = threading.Thread(target=worker)
+            thread.start()
+            thread.join()
+
+        assert set(timer.export().keys()) == {"main", "worker"}
+
+    @pytest.mark.unit
+    def test_summary_percentiles(self):
+        timer = timers.HierarchicalTimer(num_bins=90, min_time=1e-6, max_time=1e3)
+        # 99 measures in the bin of 1ms, one outlier in the bin of 1s
+        histogram = np.zeros(90, dtype=np.int64)
+        histogram[np.searchsorted(timer.bin_edges, 1e-3, side="right") - 1] = 99
+        histogram[np.searchsorted(timer.bin_edges, 1.0, side="right") - 1] = 1
+        timer.histograms["step"] = histogram
+
+        summary = timer.summary(percentiles=(50, 100))
+        assert summary["step"]["count"] == 100
+        assert 1e-3 <= summary["step"]["p50"] < 1.3e-3
+        assert 1.0 <= summary["step"]["p100"] < 1.3
+
+    @pytest.mark.unit
+    def test_chrome_trace_export(self, tmp_path):
+        timer = timers.HierarchicalTimer(max_trace_events=2)
+        for _ in range(3):
+            with timer.range("step"):
+                with timer.range("forward"):
+                    pass
+
+        trace_path = tmp_path / "trace.json"
+        timer.export_chrome_trace(str(trace_path), rank=3)
+        with open(trace_path) as f:
+            trace = json.load(f)
+        events = [event for event in trace["traceEvents"] if event["ph"] == "X"]
+        # only the last max_trace_events events are stored
+        assert [event["args"]["path"] for event in events] == ["step/forward", "step"]
+        assert all(event["pid"] == 3 for event in trace["traceEvents"])
+        assert events[1]["ts"] <= events[0]["ts"]
+        assert events[1]["dur"] >= events[0]["dur"]
+
+    @pytest.mark.unit
+    def test_global_profile_range(self):
+        assert timers.get_global_timer() is None
+        with timers.profile_range("disabled"):
+            pass
+
+        timer = timers.HierarchicalTimer()
+        timers.set_global_timer(timer)
+        try:
+            with timers.profile_range("enabled"):
+                pass
+        finally:
+            timers.set_global_timer(None)
+        assert list(timer.export().keys()) == ["enabled"]